@@ -2,5 +2,12 @@
 # Monte Carlo Tree Search module
 
 from app.ai.mcts.core import MCTS
+from app.ai.mcts.array_tree import ArrayTree
+from app.ai.mcts.transposition import TranspositionTable
+from app.ai.mcts.tree_cache import TreeCache
+from app.ai.mcts.batch import BatchMCTS
+from app.ai.mcts.rollout import RandomRolloutPolicy, SoftmaxRolloutPolicy, LinearValueModel
+from app.ai.mcts.settings import create_mcts, get_tree_cache
 
-__all__ = ['MCTS']
\ No newline at end of file
+__all__ = ['MCTS', 'ArrayTree', 'TranspositionTable', 'TreeCache', 'BatchMCTS', 'RandomRolloutPolicy', 'SoftmaxRolloutPolicy',
+           'LinearValueModel', 'create_mcts', 'get_tree_cache']
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""Action and score caching shared by the states of one search.
+
+Rollouts revisit the same situations over and over (a trader resting in the
+same settlement, a herd moving back and forth between two areas), and every
+new state used to rebuild its legal actions and re-score them from scratch.
+An ``ActionCache`` is created by the root state of a search and handed to
+every state derived from it by reference, like the world snapshot (see
+``app.ai.mcts.transition``), so that
+
+- legal actions and their scores/probabilities are built once per action
+  key, i.e. per distinct value of the entity fields action generation reads
+- per-location values such as settlement scores or location safety are
+  computed once per search instead of once per state
+
+Cached action objects are shared between states and must not be modified
+after they are built.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+from collections import OrderedDict
+
+# Default maximum number of action lists kept per search
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def freeze(mapping: Optional[Mapping[Any, Any]]) -> Optional[frozenset]:
+    """
+    Turn a flat mapping of entity data into a hashable key part.
+    
+    Returns:
+        Frozenset of the items, or None when the data is not a mapping of
+        hashable values
+    """
+    if not mapping:
+        return frozenset()
+    try:
+        return frozenset(mapping.items())
+    except (TypeError, AttributeError):
+        return None
+
+
+class ActionCache:
+    """
+    Legal actions and derived values shared by all states of one search.
+    
+    Action lists are kept in an LRU bounded to ``max_entries``; derived
+    values are keyed by location and stay bounded by the size of the world.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_entries: Maximum number of action lists to keep
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        
+        self.max_entries = max_entries
+        self._actions: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._values: Dict[Hashable, Any] = {}
+        
+        # Counters for decision stats
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._actions)
+    
+    def actions(self, key: Optional[Hashable], build: Callable[[], Any]) -> Any:
+        """
+        Get the legal actions of an action key, building them on a miss.
+        
+        Args:
+            key: Action key of the state, or None to bypass the cache
+            build: Function generating and scoring the actions
+        
+        Returns:
+            Whatever ``build`` returns for this key
+        """
+        if key is None:
+            return build()
+        
+        cached = self._actions.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._actions.move_to_end(key)
+            return cached
+        
+        self.misses += 1
+        cached = build()
+        self._actions[key] = cached
+        if len(self._actions) > self.max_entries:
+            self._actions.popitem(last=False)
+        return cached
+    
+    def value(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Get a derived per-search value (e.g. a settlement score), computing it once.
+        
+        Args:
+            key: Key of the value, including everything it depends on
+            compute: Function computing the value
+        
+        Returns:
+            The cached or newly computed value
+        """
+        if key in self._values:
+            return self._values[key]
+        value = compute()
+        self._values[key] = value
+        return value
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get usage counters for decision stats."""
+        return {
+            "entries": len(self._actions),
+            "values": len(self._values),
+            "hits": self.hits,
+            "misses": self.misses
+        }
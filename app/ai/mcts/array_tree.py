@@ -0,0 +1,409 @@
+"""Array-backed tree storage for Monte Carlo Tree Search.
+
+Instead of allocating an ``MCTSNode`` object (with its own ``children`` list
+and a full copy of the state) per expansion, ``ArrayTree`` keeps every node
+as a row in a handful of flat NumPy arrays. Nodes are plain integer indices
+and states are never stored on the tree: the search re-applies the actions
+along the selected path, so only the states on that path are alive at once.
+"""
+
+from typing import Dict, List, Any, Optional, Sequence
+from collections import deque
+import math
+import random
+import sys
+import numpy as np
+
+from app.ai.mcts.transposition import NO_SLOT, TranspositionTable
+
+# Index used for "no node" / "no action" in the int arrays
+NO_NODE = -1
+
+# Names of the per-node arrays, in the order ``to_arrays`` returns them
+NODE_ARRAYS = ("visits", "value_sums", "parent", "first_child", "next_sibling", "action_index",
+               "action_start", "action_count", "expanded_count", "tt_slot", "tt_generation")
+
+
+def ucb1_scores(visits: np.ndarray,
+                value_sums: np.ndarray,
+                parent_visits: float,
+                exploration_weight: float = 1.0) -> np.ndarray:
+    """
+    Compute UCB1 scores for a set of sibling nodes.
+    
+    UCB1 = value/visits + exploration_weight * sqrt(ln(parent visits)/visits).
+    Unvisited nodes score infinity so they are always tried first.
+    
+    Args:
+        visits: Visit counts of the children
+        value_sums: Summed rewards of the children
+        parent_visits: Visit count of the parent
+        exploration_weight: UCB1 exploration constant
+    
+    Returns:
+        Array of scores, one per child
+    """
+    log_visits = math.log(parent_visits) if parent_visits > 0 else 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(visits > 0,
+                        value_sums / visits + exploration_weight * np.sqrt(log_visits / visits),
+                        np.inf)
+
+
+class ArrayTree:
+    """
+    Flat, array-backed MCTS tree.
+    
+    Each node is an index into the following arrays:
+    
+    - ``visits`` / ``value_sums``: backpropagated statistics
+    - ``parent``: index of the parent node (``NO_NODE`` for the root)
+    - ``first_child`` / ``next_sibling``: child list as a linked list
+    - ``action_index``: index into ``actions`` of the action leading here
+    - ``action_start`` / ``action_count``: slice of ``actions`` holding the
+      node's legal actions (``action_start`` is ``NO_NODE`` until generated)
+    - ``expanded_count``: how many of those actions already have a child
+    - ``tt_slot`` / ``tt_generation``: transposition table entry of the node's
+      state (``NO_SLOT`` if the search has no table or the state has no key)
+    
+    Legal actions are stored in one flat Python list in a shuffled order, so
+    expanding "a random untried action" is just taking the next one.
+    
+    When a node's actions are generated, one row per action is reserved in a
+    contiguous block, so the statistics of all expanded children of a node
+    are the slice ``[first_child, first_child + expanded_count)`` and can be
+    scored with a single NumPy expression.
+    """
+    
+    def __init__(self, capacity: int = 256):
+        """
+        Initialize an empty tree.
+        
+        Args:
+            capacity: Initial number of node rows to allocate (grows as needed)
+        """
+        capacity = max(1, capacity)
+        self.visits = np.zeros(capacity, dtype=np.int64)
+        self.value_sums = np.zeros(capacity, dtype=np.float64)
+        self.parent = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.first_child = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.next_sibling = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.action_index = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.action_start = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.action_count = np.zeros(capacity, dtype=np.int32)
+        self.expanded_count = np.zeros(capacity, dtype=np.int32)
+        self.tt_slot = np.full(capacity, NO_SLOT, dtype=np.int64)
+        self.tt_generation = np.zeros(capacity, dtype=np.int64)
+        self.actions: List[Any] = []
+        self.num_nodes = 0
+    
+    def __len__(self) -> int:
+        return self.num_nodes
+    
+    @property
+    def capacity(self) -> int:
+        """Number of node rows currently allocated."""
+        return len(self.visits)
+    
+    @property
+    def nbytes(self) -> int:
+        """Estimated memory of the tree: the node arrays plus the action list."""
+        arrays = (self.visits, self.value_sums, self.parent, self.first_child, self.next_sibling,
+                  self.action_index, self.action_start, self.action_count, self.expanded_count,
+                  self.tt_slot, self.tt_generation)
+        return sum(array.nbytes for array in arrays) + sys.getsizeof(self.actions)
+    
+    def _grow(self, min_capacity: int) -> None:
+        """Reallocate all arrays to hold at least ``min_capacity`` nodes."""
+        new_capacity = self.capacity
+        while new_capacity < min_capacity:
+            new_capacity *= 2
+        
+        def resized(array: np.ndarray, fill) -> np.ndarray:
+            grown = np.full(new_capacity, fill, dtype=array.dtype)
+            grown[:self.num_nodes] = array[:self.num_nodes]
+            return grown
+        
+        self.visits = resized(self.visits, 0)
+        self.value_sums = resized(self.value_sums, 0.0)
+        self.parent = resized(self.parent, NO_NODE)
+        self.first_child = resized(self.first_child, NO_NODE)
+        self.next_sibling = resized(self.next_sibling, NO_NODE)
+        self.action_index = resized(self.action_index, NO_NODE)
+        self.action_start = resized(self.action_start, NO_NODE)
+        self.action_count = resized(self.action_count, 0)
+        self.expanded_count = resized(self.expanded_count, 0)
+        self.tt_slot = resized(self.tt_slot, NO_SLOT)
+        self.tt_generation = resized(self.tt_generation, 0)
+    
+    def _allocate(self, count: int) -> int:
+        """Reserve ``count`` contiguous node rows and return the first index."""
+        if self.num_nodes + count > self.capacity:
+            self._grow(self.num_nodes + count)
+        
+        first = self.num_nodes
+        self.num_nodes += count
+        return first
+    
+    def add_root(self) -> int:
+        """
+        Add the root node.
+        
+        Returns:
+            Index of the root node (always 0)
+        """
+        return self._allocate(1)
+    
+    def has_actions(self, node: int) -> bool:
+        """Check if the legal actions of a node have been generated."""
+        return self.action_start[node] != NO_NODE
+    
+    def set_actions(self, node: int, actions: Sequence[Any], rng: Optional[random.Random] = None) -> None:
+        """
+        Store the legal actions of a node.
+        
+        Args:
+            node: Index of the node
+            actions: Legal actions from the node's state
+            rng: Random number generator of the search that shuffles the
+                actions, or None to use the random module
+        """
+        shuffled = list(actions)
+        (rng or random).shuffle(shuffled)
+        count = len(shuffled)
+        action_start = len(self.actions)
+        self.action_start[node] = action_start
+        self.action_count[node] = count
+        self.actions.extend(shuffled)
+        
+        if count == 0:
+            return
+        
+        # Reserve the child block; rows only count as children once expanded
+        first = self._allocate(count)
+        block = slice(first, first + count)
+        self.parent[block] = node
+        self.action_index[block] = np.arange(action_start, action_start + count)
+        self.first_child[node] = first
+    
+    def has_untried_actions(self, node: int) -> bool:
+        """Check if a node still has actions without a child node."""
+        return self.expanded_count[node] < self.action_count[node]
+    
+    def is_fully_expanded(self, node: int, max_children: Optional[int] = None) -> bool:
+        """
+        Check if a node has no more children to expand.
+        
+        Args:
+            node: Index of the node
+            max_children: Optional cap on the number of children (progressive
+                widening); the node counts as fully expanded once it is reached
+        
+        Returns:
+            True if selection should descend into the existing children
+        """
+        expanded = self.expanded_count[node]
+        if not self.has_actions(node) or expanded == 0:
+            return False
+        if max_children is not None and expanded >= max_children:
+            return True
+        return not self.has_untried_actions(node)
+    
+    def expand(self, node: int) -> int:
+        """
+        Add a child for the next untried action of a node.
+        
+        Args:
+            node: Index of the node to expand
+        
+        Returns:
+            Index of the new child node
+        """
+        expanded = self.expanded_count[node]
+        child = int(self.first_child[node] + expanded)
+        if expanded > 0:
+            self.next_sibling[child - 1] = child
+        self.expanded_count[node] += 1
+        return child
+    
+    def children(self, node: int) -> List[int]:
+        """
+        Get the child indices of a node.
+        
+        Args:
+            node: Index of the node
+        
+        Returns:
+            List of child node indices
+        """
+        first = int(self.first_child[node])
+        return list(range(first, first + int(self.expanded_count[node])))
+    
+    def _child_slice(self, node: int) -> slice:
+        """Slice of the node arrays holding the expanded children of a node."""
+        first = int(self.first_child[node])
+        return slice(first, first + int(self.expanded_count[node]))
+    
+    def action(self, node: int) -> Any:
+        """Get the action that led to a node."""
+        return self.actions[self.action_index[node]]
+    
+    def select_child(self, 
+                     node: int, 
+                     exploration_weight: float = 1.0,
+                     table: Optional[TranspositionTable] = None) -> int:
+        """
+        Select the best child of a node using the UCB1 formula.
+        
+        Args:
+            node: Index of the parent node
+            exploration_weight: UCB1 exploration constant
+            table: Optional transposition table; children with a live entry are
+                scored with the statistics shared by all equivalent states
+        
+        Returns:
+            Index of the selected child
+        """
+        block = self._child_slice(node)
+        visits = self.visits[block]
+        value_sums = self.value_sums[block]
+        parent_visits = self.visits[node]
+        if table is not None:
+            visits, value_sums = table.shared_stats(self.tt_slot[block], self.tt_generation[block],
+                                                    visits, value_sums)
+            parent_visits = max(parent_visits, int(visits.sum()))
+        scores = ucb1_scores(visits, value_sums, parent_visits, exploration_weight)
+        return block.start + int(np.argmax(scores))
+    
+    def set_transposition(self, node: int, slot: int, generation: int) -> None:
+        """Link a node to the transposition table entry of its state."""
+        self.tt_slot[node] = slot
+        self.tt_generation[node] = generation
+    
+    def backpropagate(self, path: Sequence[int], reward: float) -> None:
+        """
+        Add a simulation result to every node on a path.
+        
+        Args:
+            path: Node indices from the root to the simulated leaf
+            reward: Reward of the simulation
+        """
+        indices = np.asarray(path, dtype=np.int64)
+        self.visits[indices] += 1
+        self.value_sums[indices] += reward
+    
+    def best_child(self, node: int) -> Optional[int]:
+        """
+        Get the most visited child of a node.
+        
+        Args:
+            node: Index of the parent node
+        
+        Returns:
+            Index of the most visited child, or None if the node has no children
+        """
+        block = self._child_slice(node)
+        if block.start == block.stop:
+            return None
+        return block.start + int(np.argmax(self.visits[block]))
+    
+    def subtree(self, node: int) -> 'ArrayTree':
+        """
+        Copy the subtree below a node into a new tree rooted at that node.
+        
+        Used to keep the tree below the chosen action for the next decision.
+        Statistics, generated actions and expansion order are kept; the
+        transposition links are not, since tables only live for one search.
+        
+        Args:
+            node: Index of the node that becomes the new root
+        
+        Returns:
+            New, compacted tree whose root (index 0) mirrors ``node``
+        """
+        new_tree = ArrayTree()
+        root = new_tree.add_root()
+        new_tree.visits[root] = self.visits[node]
+        new_tree.value_sums[root] = self.value_sums[node]
+        
+        queue = deque([(node, root)])
+        while queue:
+            old, new = queue.popleft()
+            if not self.has_actions(old):
+                continue
+            
+            # Copy the action slice in its (already shuffled) order
+            start = int(self.action_start[old])
+            count = int(self.action_count[old])
+            expanded = int(self.expanded_count[old])
+            new_start = len(new_tree.actions)
+            new_tree.actions.extend(self.actions[start:start + count])
+            new_tree.action_start[new] = new_start
+            new_tree.action_count[new] = count
+            new_tree.expanded_count[new] = expanded
+            if count == 0:
+                continue
+            
+            # Copy the whole child block, expanded or not
+            old_first = int(self.first_child[old])
+            first = new_tree._allocate(count)
+            block = slice(first, first + count)
+            old_block = slice(old_first, old_first + count)
+            new_tree.parent[block] = new
+            new_tree.action_index[block] = np.arange(new_start, new_start + count)
+            new_tree.visits[block] = self.visits[old_block]
+            new_tree.value_sums[block] = self.value_sums[old_block]
+            new_tree.first_child[new] = first
+            if expanded > 1:
+                new_tree.next_sibling[first:first + expanded - 1] = np.arange(first + 1, first + expanded)
+            
+            for i in range(expanded):
+                queue.append((old_first + i, first + i))
+        
+        return new_tree
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Get the node arrays trimmed to the allocated rows.
+        
+        Together with ``actions`` this is the whole tree, so it can be stored
+        without pickling (e.g. with ``np.savez``) and rebuilt with ``from_arrays``.
+        
+        Returns:
+            Mapping of ``NODE_ARRAYS`` names to copies of the arrays
+        """
+        return {name: getattr(self, name)[:self.num_nodes].copy() for name in NODE_ARRAYS}
+    
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], actions: Sequence[Any]) -> 'ArrayTree':
+        """
+        Rebuild a tree from the output of ``to_arrays`` and its action list.
+        
+        Args:
+            arrays: Node arrays by name
+            actions: Flat action list the ``action_start`` slices point into
+        
+        Returns:
+            Tree with the given nodes
+        
+        Raises:
+            ValueError: If an array is missing or the lengths do not match
+        """
+        missing = [name for name in NODE_ARRAYS if name not in arrays]
+        if missing:
+            raise ValueError(f"Missing tree arrays: {', '.join(missing)}")
+        num_nodes = len(arrays["visits"])
+        if any(len(arrays[name]) != num_nodes for name in NODE_ARRAYS):
+            raise ValueError("Tree arrays have different lengths")
+        
+        tree = cls(capacity=num_nodes)
+        for name in NODE_ARRAYS:
+            template = getattr(tree, name)
+            template[:num_nodes] = np.asarray(arrays[name], dtype=template.dtype)
+        tree.num_nodes = num_nodes
+        tree.actions = list(actions)
+        
+        action_end = tree.action_start[:num_nodes] + tree.action_count[:num_nodes]
+        if num_nodes and int(action_end.max()) > len(tree.actions):
+            raise ValueError("Tree arrays point past the action list")
+        return tree
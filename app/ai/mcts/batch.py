@@ -0,0 +1,241 @@
+"""Batched multi-agent Monte Carlo Tree Search.
+
+A world tick needs one decision per entity, and all of those entities read the
+same world snapshot. ``BatchMCTS`` runs their searches together: each agent
+keeps its own ``ArrayTree``, but every simulation round selects one leaf per
+agent, advances all rollouts in lockstep and evaluates all leaf states with a
+single batch reward call, so the per-round overhead is paid once for the whole
+batch instead of once per agent.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+from app.ai.mcts.array_tree import ArrayTree
+from app.ai.mcts.core import MCTS, S, A
+
+
+class BatchMCTS(MCTS[S, A]):
+    """
+    Run one MCTS search per agent, batching rollouts and reward evaluation.
+    
+    Agents are independent: they do not see each other's moves, they only
+    share the read-only world snapshot their states point to. The search
+    options are the same as ``MCTS`` with ``tree_storage="array"``.
+    """
+    
+    def __init__(self, **kwargs):
+        """
+        Initialize the batch search.
+        
+        Args:
+            **kwargs: Options of ``MCTS`` (the tree storage is always "array")
+        """
+        kwargs["tree_storage"] = "array"
+        super().__init__(**kwargs)
+        self.agent_stats: List[Dict[str, Any]] = []
+    
+    def search_batch(self,
+                     root_states: Sequence[S],
+                     get_legal_actions_fn,
+                     apply_action_fn,
+                     is_terminal_fn,
+                     get_reward_fn=None,
+                     num_simulations: Optional[int] = 100,
+                     batch_reward_fn: Optional[Callable[[List[S]], Sequence[float]]] = None,
+                     state_key_fn=None,
+                     tree_keys: Optional[Sequence[Any]] = None,
+                     world_version=None) -> List[Optional[A]]:
+        """
+        Find the best action for every root state.
+        
+        Args:
+            root_states: One root state per agent
+            get_legal_actions_fn: Function returning the legal actions of a state
+            apply_action_fn: Function applying an action to a state
+            is_terminal_fn: Function checking if a state is terminal
+            get_reward_fn: Function returning the reward of one state; used
+                when batch_reward_fn is not given
+            num_simulations: Number of simulations per agent, or None when the
+                search is bounded by a time, node or memory budget (these apply
+                to the whole batch; early stopping is not used in batches)
+            batch_reward_fn: Function returning the rewards of a list of states
+                in one call (e.g. ``TraderState.batch_rewards``)
+            state_key_fn: Transposition key function (see ``MCTS.search``)
+            tree_keys: One tree cache key per agent (see ``MCTS.search``), or
+                None to search from empty trees
+            world_version: Version of the shared world snapshot
+        
+        Returns:
+            List with the most visited root action of each agent, or None for
+            agents without legal actions
+        """
+        if batch_reward_fn is None:
+            if get_reward_fn is None:
+                raise ValueError("Either get_reward_fn or batch_reward_fn is required")
+            batch_reward_fn = lambda states: [get_reward_fn(state) for state in states]
+        state_key_fn = state_key_fn or self._default_state_key
+        self.rng = self._new_rng()
+        
+        num_agents = len(root_states)
+        if num_agents == 0:
+            self.agent_stats = []
+            return []
+        if tree_keys is None:
+            tree_keys = [None] * num_agents
+        trees = []
+        for tree_key, root_state in zip(tree_keys, root_states):
+            tree = self._cached_tree(tree_key, world_version, root_state)
+            if tree is None:
+                tree = ArrayTree()
+                tree.add_root()
+            trees.append(tree)
+        roots = [0] * num_agents
+        reused_visits = [int(tree.visits[0]) for tree in trees]
+        tables = [self._new_transposition_table() for _ in range(num_agents)]
+        rollout_steps = 0
+        budget = self._new_budget(num_simulations)
+        budget.early_stopping = False
+        
+        rounds = 0
+        while True:
+            stop_reason = budget.stop_reason(
+                rounds,
+                lambda: sum(len(tree) for tree in trees),
+                lambda: sum(tree.nbytes for tree in trees),
+                lambda: np.zeros(0, dtype=np.int64)
+            )
+            if stop_reason is not None:
+                break
+            
+            paths = []
+            leaf_states = []
+            known_values: List[Optional[float]] = []
+            
+            # Selection and expansion, one leaf per agent
+            for tree, root, table, root_state in zip(trees, roots, tables, root_states):
+                path, state, known_value = self._select_and_expand(
+                    tree, root, table, root_state,
+                    get_legal_actions_fn, apply_action_fn, is_terminal_fn, state_key_fn
+                )
+                paths.append(path)
+                leaf_states.append(state)
+                known_values.append(known_value)
+            
+            # Simulation, all rollouts advanced in lockstep
+            to_simulate = [i for i, value in enumerate(known_values) if value is None]
+            final_states, truncated, steps = self._simulate_batch(
+                [leaf_states[i] for i in to_simulate],
+                get_legal_actions_fn, apply_action_fn, is_terminal_fn
+            )
+            rollout_steps += steps
+            
+            rewards = np.array([value if value is not None else 0.0 for value in known_values],
+                               dtype=np.float64)
+            if to_simulate:
+                rewards[to_simulate] = self._evaluate_batch(final_states, truncated, batch_reward_fn)
+            
+            # Backpropagation
+            for tree, table, path, reward in zip(trees, tables, paths, rewards):
+                tree.backpropagate(path, reward)
+                if table is not None:
+                    table.update(tree.tt_slot[path], tree.tt_generation[path], reward)
+            rounds += 1
+        
+        # Get the best action of each agent
+        best_actions = []
+        self.agent_stats = []
+        for i, (tree, root, table) in enumerate(zip(trees, roots, tables)):
+            best_child = tree.best_child(root)
+            best_action = tree.action(best_child) if best_child is not None else None
+            best_actions.append(best_action)
+            stats = {
+                "best_action": best_action,
+                "visits": int(tree.visits[root]),
+                "value": float(tree.value_sums[root]),
+                "children": len(tree.children(root)),
+                "nodes": len(tree),
+                "simulations": rounds
+            }
+            if table is not None:
+                stats["transposition"] = table.stats()
+            if self.tree_cache is not None and tree_keys[i] is not None:
+                stats["reused_visits"] = reused_visits[i]
+                self._cache_subtree(tree_keys[i], world_version, tree, best_child,
+                                    root_states[i], apply_action_fn)
+            self.agent_stats.append(stats)
+        
+        self.decision_stats = {
+            "agents": num_agents,
+            "simulations": rounds * num_agents,
+            "stop_reason": stop_reason,
+            "elapsed_ms": budget.elapsed_ms,
+            "rollout_steps": rollout_steps,
+            "nodes": sum(len(tree) for tree in trees),
+            "tree_storage": self.tree_storage
+        }
+        
+        return best_actions
+    
+    def _simulate_batch(self,
+                        states: List[S],
+                        get_legal_actions_fn,
+                        apply_action_fn,
+                        is_terminal_fn):
+        """
+        Advance rollouts of several states in lockstep.
+        
+        The rollout policy picks the actions of all active states in one
+        ``choose_batch`` call per step.
+        
+        Returns:
+            Tuple of (final states, indices of rollouts cut off at the depth
+            limit, total number of rollout steps)
+        """
+        states = list(states)
+        active = list(range(len(states)))
+        depth = 0
+        steps = 0
+        truncated: List[int] = []
+        
+        while active:
+            if self.max_rollout_depth is not None and depth >= self.max_rollout_depth:
+                truncated = active
+                break
+            
+            still_active = []
+            action_lists = []
+            for i in active:
+                state = states[i]
+                if is_terminal_fn(state):
+                    continue
+                actions = get_legal_actions_fn(state)
+                if not actions:
+                    continue
+                still_active.append(i)
+                action_lists.append(actions)
+            
+            chosen = self.rollout_policy.choose_batch([states[i] for i in still_active], action_lists, self.rng)
+            for i, action in zip(still_active, chosen):
+                states[i] = apply_action_fn(states[i], action)
+            
+            steps += len(still_active)
+            active = still_active
+            depth += 1
+        
+        return states, truncated, steps
+    
+    def _evaluate_batch(self, final_states: List[S], truncated: List[int], batch_reward_fn) -> np.ndarray:
+        """Get the rewards of finished rollouts, using the policy's value estimate for truncated ones."""
+        estimates = None
+        if truncated:
+            estimates = self.rollout_policy.evaluate_truncated([final_states[i] for i in truncated])
+        if estimates is None:
+            return np.asarray(batch_reward_fn(final_states), dtype=np.float64)
+        
+        rewards = np.zeros(len(final_states), dtype=np.float64)
+        rewards[truncated] = estimates
+        finished = np.setdiff1d(np.arange(len(final_states)), truncated)
+        if len(finished):
+            rewards[finished] = np.asarray(batch_reward_fn([final_states[i] for i in finished]), dtype=np.float64)
+        return rewards
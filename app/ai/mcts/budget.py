@@ -0,0 +1,131 @@
+"""Search budgets for anytime Monte Carlo Tree Search.
+
+A search can be bounded by a number of simulations, by wall-clock time, by
+the number of tree nodes and by the (estimated) memory of the tree, and can
+stop early once the most visited root child can no longer be overtaken by the
+runner-up in the simulations that are left. ``SearchBudget`` is checked
+before every simulation and reports why the search stopped.
+"""
+
+from typing import Callable, Optional
+import time
+import numpy as np
+
+# Stop reasons reported in MCTS decision stats
+STOP_SIMULATIONS = "simulations"
+STOP_TIME = "time_budget"
+STOP_NODES = "node_budget"
+STOP_MEMORY = "memory_budget"
+STOP_EARLY = "early_stop"
+STOP_NO_ACTIONS = "no_actions"
+
+
+class SearchBudget:
+    """
+    Limits of one search and the bookkeeping to enforce them.
+    
+    Memory is only estimated (see ``ArrayTree.nbytes`` and
+    ``MCTSNode.MEMORY_ESTIMATE``), which is enough to keep a search from
+    growing without bound.
+    """
+    
+    def __init__(self,
+                 num_simulations: Optional[int] = None,
+                 time_budget_ms: Optional[float] = None,
+                 max_nodes: Optional[int] = None,
+                 max_memory_bytes: Optional[int] = None,
+                 early_stopping: bool = False):
+        """
+        Initialize the budget.
+        
+        Args:
+            num_simulations: Maximum number of simulations, or None
+            time_budget_ms: Maximum wall-clock time in milliseconds, or None
+            max_nodes: Maximum number of tree nodes, or None
+            max_memory_bytes: Maximum estimated tree memory in bytes, or None
+            early_stopping: Stop once the best root child cannot be overtaken
+        
+        Raises:
+            ValueError: If the search would have no bound at all
+        """
+        if num_simulations is None and time_budget_ms is None and max_nodes is None and max_memory_bytes is None:
+            raise ValueError("A search needs num_simulations or a time, node or memory budget")
+        
+        self.num_simulations = num_simulations
+        self.time_budget_ms = time_budget_ms
+        self.max_nodes = max_nodes
+        self.max_memory_bytes = max_memory_bytes
+        self.early_stopping = early_stopping
+        self._start = time.perf_counter()
+    
+    def start(self) -> None:
+        """Start the clock of the time budget."""
+        self._start = time.perf_counter()
+    
+    @property
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the search started."""
+        return (time.perf_counter() - self._start) * 1000
+    
+    def stop_reason(self,
+                    simulations: int,
+                    num_nodes: Callable[[], int],
+                    memory_bytes: Callable[[], int],
+                    root_child_visits: Callable[[], np.ndarray]) -> Optional[str]:
+        """
+        Check whether the search should stop before the next simulation.
+        
+        The node, memory and visit callbacks are only called for the budgets
+        that are enabled.
+        
+        Args:
+            simulations: Simulations done so far
+            num_nodes: Returns the current number of tree nodes
+            memory_bytes: Returns the current estimated tree memory
+            root_child_visits: Returns the visit counts of the root's children
+        
+        Returns:
+            The stop reason, or None to keep searching
+        """
+        if self.num_simulations is not None and simulations >= self.num_simulations:
+            return STOP_SIMULATIONS
+        if self.time_budget_ms is not None and self.elapsed_ms >= self.time_budget_ms:
+            return STOP_TIME
+        if self.max_nodes is not None and num_nodes() >= self.max_nodes:
+            return STOP_NODES
+        if self.max_memory_bytes is not None and memory_bytes() >= self.max_memory_bytes:
+            return STOP_MEMORY
+        if self.early_stopping and self._decided(simulations, root_child_visits()):
+            return STOP_EARLY
+        return None
+    
+    def remaining_simulations(self, simulations: int) -> float:
+        """
+        Estimate how many more simulations the budget allows.
+        
+        Uses the simulation limit and, with a time budget, the simulation rate
+        so far. Returns infinity when neither bounds the search.
+        """
+        remaining = float("inf")
+        if self.num_simulations is not None:
+            remaining = self.num_simulations - simulations
+        if self.time_budget_ms is not None and simulations > 0:
+            elapsed = self.elapsed_ms
+            if elapsed > 0:
+                rate = simulations / elapsed
+                remaining = min(remaining, rate * max(0.0, self.time_budget_ms - elapsed))
+        return remaining
+    
+    def _decided(self, simulations: int, visits: np.ndarray) -> bool:
+        """Check if the runner-up can no longer catch up with the most visited child."""
+        if len(visits) == 0:
+            return False
+        remaining = self.remaining_simulations(simulations)
+        if remaining == float("inf"):
+            return False
+        
+        if len(visits) == 1:
+            best, second = visits[0], 0
+        else:
+            second, best = np.partition(visits, len(visits) - 2)[-2:]
+        return best - second > remaining
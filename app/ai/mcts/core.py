@@ -4,13 +4,38 @@ import numpy as np
 from typing import List, Dict, Any, Optional, Tuple, Generic, TypeVar
 import logging
 
+from app.ai.mcts.array_tree import ArrayTree, ucb1_scores
+from app.ai.mcts.transposition import NO_SLOT, TranspositionTable
+from app.ai.mcts.budget import SearchBudget, STOP_NO_ACTIONS
+from app.ai.mcts.tree_cache import TreeCache
+from app.ai.mcts.rollout import RolloutPolicy, RandomRolloutPolicy
+
 # Type variables for state and action
 S = TypeVar('S')  # State type
 A = TypeVar('A')  # Action type
 
+# Search callbacks of states that implement the state protocol themselves. Unlike
+# lambdas they can be pickled, so root-parallel searches can send them to the
+# process pool.
+
+def state_legal_actions(state):
+    return state.get_legal_actions()
+
+def state_apply_action(state, action):
+    return state.apply_action(action)
+
+def state_is_terminal(state) -> bool:
+    return state.is_terminal()
+
+def state_reward(state) -> float:
+    return state.get_reward()
+
 class MCTSNode(Generic[S, A]):
     """Node in the Monte Carlo Tree Search"""
     
+    # Rough size of a node with its children list and state, for memory budgets
+    MEMORY_ESTIMATE = 1024
+    
     def __init__(self, state: S, parent=None, action: Optional[A] = None):
         self.state = state
         self.parent = parent
@@ -19,22 +44,28 @@ class MCTSNode(Generic[S, A]):
         self.visits = 0
         self.value = 0.0
         self.untried_actions: List[A] = []
+        self.tt_slot = NO_SLOT  # Transposition table entry of the state, if any
+        self.tt_generation = 0
         
     def is_fully_expanded(self) -> bool:
         """Check if all possible actions have been tried."""
         return len(self.untried_actions) == 0
     
-    def select_child(self, exploration_weight: float = 1.0) -> 'MCTSNode':
+    def select_child(self, 
+                     exploration_weight: float = 1.0,
+                     table: Optional[TranspositionTable] = None) -> 'MCTSNode':
         """Select the best child node using UCB1 formula."""
-        # UCB1 = value/visits + exploration_weight * sqrt(ln(parent visits)/visits)
-        log_visits = math.log(self.visits) if self.visits > 0 else 0
-        
-        def ucb_score(child: 'MCTSNode') -> float:
-            exploitation = child.value / child.visits if child.visits > 0 else 0
-            exploration = exploration_weight * math.sqrt(log_visits / child.visits) if child.visits > 0 else float('inf')
-            return exploitation + exploration
-        
-        return max(self.children, key=ucb_score)
+        count = len(self.children)
+        visits = np.fromiter((child.visits for child in self.children), dtype=np.int64, count=count)
+        values = np.fromiter((child.value for child in self.children), dtype=np.float64, count=count)
+        parent_visits = self.visits
+        if table is not None:
+            slots = np.fromiter((child.tt_slot for child in self.children), dtype=np.int64, count=count)
+            generations = np.fromiter((child.tt_generation for child in self.children), dtype=np.int64, count=count)
+            visits, values = table.shared_stats(slots, generations, visits, values)
+            parent_visits = max(parent_visits, int(visits.sum()))
+        scores = ucb1_scores(visits, values, parent_visits, exploration_weight)
+        return self.children[int(np.argmax(scores))]
     
     def expand(self, action: A, next_state: S) -> 'MCTSNode':
         """Expand the tree by adding a child node."""
@@ -50,9 +81,153 @@ class MCTSNode(Generic[S, A]):
 class MCTS(Generic[S, A]):
     """Monte Carlo Tree Search implementation."""
     
-    def __init__(self, exploration_weight: float = 1.0):
+    # Supported values for the tree_storage option
+    TREE_STORAGES = ("node", "array")
+    
+    def __init__(self, 
+                 exploration_weight: float = 1.0, 
+                 tree_storage: str = "node",
+                 max_rollout_depth: Optional[int] = None,
+                 root_exploration_weight: Optional[float] = None,
+                 widening_constant: Optional[float] = None,
+                 widening_exponent: float = 0.5,
+                 transposition_table_size: Optional[int] = None,
+                 root_parallel_workers: int = 1,
+                 seed: Optional[int] = None,
+                 time_budget_ms: Optional[float] = None,
+                 max_nodes: Optional[int] = None,
+                 max_memory_mb: Optional[float] = None,
+                 early_stopping: bool = False,
+                 tree_cache: Optional[TreeCache] = None,
+                 rollout_policy: Optional[RolloutPolicy] = None):
+        """
+        Initialize the search.
+        
+        Args:
+            exploration_weight: UCB1 exploration constant
+            tree_storage: "node" for one MCTSNode object per expansion, or "array"
+                for the flat ArrayTree storage that keeps no states on the tree
+            max_rollout_depth: Maximum number of actions in a simulation, or None
+                to simulate until a terminal state
+            root_exploration_weight: UCB1 exploration constant at the root, or None
+                to use exploration_weight everywhere
+            widening_constant: Enables progressive widening when set: a node with
+                n visits may have at most ceil(widening_constant * n^widening_exponent)
+                children, so wide action sets are only opened up as visits accumulate
+            widening_exponent: Exponent of the progressive widening limit
+            transposition_table_size: Enables a transposition table when set:
+                states with equal ``state_key()`` share visit and value statistics
+                within a search, bounded to this many keys (least recently used
+                keys are evicted)
+            root_parallel_workers: Number of independent trees to search in a
+                process pool (root parallelization); their root child statistics
+                are merged to pick the action. 1 searches a single tree in-process
+            seed: Seed of the search's own random number generator (``rng``);
+                tree i of a root-parallel search uses seed + i, so searches with
+                the same seed are reproducible. The global ``random`` state is
+                never reseeded; unseeded searches seed their generator with one
+                draw from it
+            time_budget_ms: Stop searching after this many milliseconds
+            max_nodes: Stop searching once the tree has this many nodes
+            max_memory_mb: Stop searching once the estimated tree memory reaches
+                this many megabytes
+            early_stopping: Stop once the most visited root child can no longer
+                be overtaken within the remaining simulation or time budget
+            tree_cache: Enables subtree reuse when set: searches given a
+                ``tree_key`` start from the subtree kept from the entity's
+                previous decision and leave the subtree of the chosen action
+                in the cache (array storage, single tree only)
+            rollout_policy: How simulations pick actions and value rollouts cut
+                off at max_rollout_depth (see ``app.ai.mcts.rollout``); uniform
+                random actions by default
+        """
+        if tree_storage not in self.TREE_STORAGES:
+            raise ValueError(f"Unknown tree storage '{tree_storage}', expected one of {self.TREE_STORAGES}")
+        if widening_constant is not None and widening_constant <= 0:
+            raise ValueError("widening_constant must be positive")
+        if transposition_table_size is not None and transposition_table_size <= 0:
+            raise ValueError("transposition_table_size must be positive")
+        if root_parallel_workers < 1:
+            raise ValueError("root_parallel_workers must be at least 1")
+        if tree_cache is not None and (tree_storage != "array" or root_parallel_workers > 1):
+            raise ValueError("tree_cache requires tree_storage='array' and a single tree")
+        
         self.exploration_weight = exploration_weight
+        self.root_exploration_weight = root_exploration_weight
+        self.tree_storage = tree_storage
+        self.max_rollout_depth = max_rollout_depth
+        self.widening_constant = widening_constant
+        self.widening_exponent = widening_exponent
+        self.transposition_table_size = transposition_table_size
+        self.root_parallel_workers = root_parallel_workers
+        self.seed = seed
+        self.time_budget_ms = time_budget_ms
+        self.max_nodes = max_nodes
+        self.max_memory_mb = max_memory_mb
+        self.early_stopping = early_stopping
+        self.tree_cache = tree_cache
+        self.rollout_policy = rollout_policy or RandomRolloutPolicy()
+        self.rng = self._new_rng()  # Replaced at the start of every search
         self.decision_stats: Dict[str, Any] = {}
+        self.root_stats: List[Tuple[A, int, float]] = []  # (action, visits, value sum) per root child
+    
+    def _exploration_weight_at(self, depth: int) -> float:
+        """Get the exploration constant for a node at the given depth."""
+        if depth == 0 and self.root_exploration_weight is not None:
+            return self.root_exploration_weight
+        return self.exploration_weight
+    
+    def _max_children(self, visits: int) -> Optional[int]:
+        """Get the progressive widening child limit for a node, or None if disabled."""
+        if self.widening_constant is None:
+            return None
+        return max(1, math.ceil(self.widening_constant * max(visits, 1) ** self.widening_exponent))
+    
+    def _new_budget(self, num_simulations: Optional[int]) -> SearchBudget:
+        """Create the budget of one search."""
+        max_memory_bytes = None
+        if self.max_memory_mb is not None:
+            max_memory_bytes = int(self.max_memory_mb * 1024 * 1024)
+        return SearchBudget(num_simulations=num_simulations,
+                            time_budget_ms=self.time_budget_ms,
+                            max_nodes=self.max_nodes,
+                            max_memory_bytes=max_memory_bytes,
+                            early_stopping=self.early_stopping)
+    
+    def _new_rng(self) -> random.Random:
+        """Create the random number generator of one search."""
+        return random.Random(self.seed if self.seed is not None else random.getrandbits(64))
+    
+    def _new_transposition_table(self) -> Optional[TranspositionTable]:
+        """Create the transposition table for one search, or None if disabled."""
+        if self.transposition_table_size is None:
+            return None
+        return TranspositionTable(self.transposition_table_size)
+    
+    @staticmethod
+    def _default_state_key(state: S) -> Optional[Any]:
+        """Use the state's own ``state_key()`` hook when it has one."""
+        state_key = getattr(state, "state_key", None)
+        return state_key() if callable(state_key) else None
+    
+    def _lookup(self, 
+                table: Optional[TranspositionTable], 
+                state: S, 
+                state_key_fn) -> Tuple[int, int, Optional[float]]:
+        """
+        Find the transposition entry of a newly expanded state.
+        
+        Returns:
+            Tuple of (slot, generation, known value); the known value is the
+            average reward already recorded for an equivalent state, or None
+        """
+        if table is None:
+            return NO_SLOT, 0, None
+        key = state_key_fn(state)
+        if key is None:
+            return NO_SLOT, 0, None
+        slot, generation = table.entry(key)
+        return slot, generation, table.mean_value(slot)
         
     def search(self, 
                root_state: S, 
@@ -60,47 +235,309 @@ class MCTS(Generic[S, A]):
                apply_action_fn, 
                is_terminal_fn, 
                get_reward_fn, 
-               num_simulations: int) -> A:
-        """Run MCTS search to find the best action."""
+               num_simulations: Optional[int],
+               state_key_fn=None,
+               tree_key=None,
+               world_version=None) -> A:
+        """
+        Run MCTS search to find the best action.
+        
+        ``num_simulations`` may be None when the search is bounded by a time,
+        node or memory budget instead. The search stops at whichever limit is
+        reached first; ``decision_stats`` reports the number of simulations
+        done and the stop reason.
+        
+        ``state_key_fn`` maps a state to a hashable transposition key (or None)
+        and is only used when the transposition table is enabled; by default
+        the state's ``state_key()`` method is used if it has one.
+        
+        ``tree_key`` identifies the deciding entity for the tree cache, and
+        ``world_version`` the world snapshot the states read; a cached tree
+        is only reused on the same version.
+        """
+        if self.root_parallel_workers > 1:
+            from app.ai.mcts.parallel import search_root_parallel
+            return search_root_parallel(self, root_state, get_legal_actions_fn, apply_action_fn,
+                                        is_terminal_fn, get_reward_fn, num_simulations, state_key_fn)
+        
+        budget = self._new_budget(num_simulations)
+        self.rng = self._new_rng()
+        table = self._new_transposition_table()
+        state_key_fn = state_key_fn or self._default_state_key
+        if self.tree_storage == "array":
+            return self._search_array(root_state, get_legal_actions_fn, apply_action_fn,
+                                      is_terminal_fn, get_reward_fn, budget,
+                                      table, state_key_fn, tree_key, world_version)
+        
         root_node = MCTSNode(root_state)
+        if not is_terminal_fn(root_state):
+            root_node.untried_actions = list(get_legal_actions_fn(root_state))
         
-        for _ in range(num_simulations):
+        simulations = 0
+        num_nodes = 1
+        stop_reason = None if root_node.untried_actions else STOP_NO_ACTIONS
+        while stop_reason is None:
+            stop_reason = budget.stop_reason(
+                simulations,
+                lambda: num_nodes,
+                lambda: num_nodes * MCTSNode.MEMORY_ESTIMATE,
+                lambda: np.fromiter((child.visits for child in root_node.children), dtype=np.int64)
+            )
+            if stop_reason is not None:
+                break
+            
             node = root_node
-            state = root_state
+            depth = 0
             
             # Selection
-            while not node.is_fully_expanded() and not is_terminal_fn(state):
-                action = random.choice(node.untried_actions)
-                state = apply_action_fn(state, action)
-                if action not in node.untried_actions:
-                    node.untried_actions.append(action)
-                node = node.expand(action, state)
+            while node.children and not is_terminal_fn(node.state) and self._node_fully_expanded(node):
+                node = node.select_child(self._exploration_weight_at(depth), table)
+                depth += 1
             
             # Expansion
-            if not is_terminal_fn(state):
-                action = random.choice(node.untried_actions)
-                state = apply_action_fn(state, action)
+            known_value = None
+            if node.untried_actions and not is_terminal_fn(node.state):
+                action = node.untried_actions.pop(self.rng.randrange(len(node.untried_actions)))
+                state = apply_action_fn(node.state, action)
                 node = node.expand(action, state)
+                num_nodes += 1
+                node.tt_slot, node.tt_generation, known_value = self._lookup(table, state, state_key_fn)
+                if not is_terminal_fn(state):
+                    node.untried_actions = list(get_legal_actions_fn(state))
             
-            # Simulation
-            while not is_terminal_fn(state):
-                action = random.choice(get_legal_actions_fn(state))
-                state = apply_action_fn(state, action)
+            # Simulation (skipped when an equivalent state already has a value)
+            if known_value is not None:
+                reward = known_value
+            else:
+                reward = self._simulate(node.state, get_legal_actions_fn, apply_action_fn, 
+                                        is_terminal_fn, get_reward_fn)
             
             # Backpropagation
-            reward = get_reward_fn(state)
+            slots, generations = [], []
             while node is not None:
                 node.update(reward)
+                slots.append(node.tt_slot)
+                generations.append(node.tt_generation)
                 node = node.parent
+            if table is not None:
+                table.update(slots, generations, reward)
+            simulations += 1
         
         # Get the best action
-        best_child = max(root_node.children, key=lambda n: n.visits)
-        best_action = best_child.action
+        best_child = max(root_node.children, key=lambda n: n.visits) if root_node.children else None
+        best_action = best_child.action if best_child is not None else None
+        self.root_stats = [(child.action, child.visits, child.value) for child in root_node.children]
         self.decision_stats = {
             "best_action": best_action,
             "visits": root_node.visits,
             "value": root_node.value,
-            "children": len(root_node.children)
+            "children": len(root_node.children),
+            "nodes": num_nodes,
+            "simulations": simulations,
+            "stop_reason": stop_reason,
+            "elapsed_ms": budget.elapsed_ms,
+            "tree_storage": self.tree_storage
         }
+        if table is not None:
+            self.decision_stats["transposition"] = table.stats()
+        
+        return best_action
+    
+    def search_state(self, root_state: S, num_simulations: Optional[int], **kwargs) -> A:
+        """
+        Run ``search`` on a state with the state's own methods as callbacks.
+        
+        States implementing ``get_legal_actions``, ``apply_action``,
+        ``is_terminal`` and ``get_reward`` (all state classes do) should be
+        searched this way: the callbacks are picklable, so a root-parallel
+        search can run its trees in the process pool.
+        
+        Args:
+            root_state: State to decide from
+            num_simulations: Simulation budget (see ``search``)
+            **kwargs: Further ``search`` arguments (state_key_fn, tree_key, world_version)
+        
+        Returns:
+            The best action, or None if the state has no legal actions
+        """
+        return self.search(root_state, state_legal_actions, state_apply_action,
+                           state_is_terminal, state_reward, num_simulations, **kwargs)
+    
+    def _node_fully_expanded(self, node: MCTSNode) -> bool:
+        """Check if selection should descend into a node's children."""
+        max_children = self._max_children(node.visits)
+        if max_children is not None and len(node.children) >= max_children:
+            return True
+        return node.is_fully_expanded()
+    
+    def _search_array(self, 
+                      root_state: S, 
+                      get_legal_actions_fn, 
+                      apply_action_fn, 
+                      is_terminal_fn, 
+                      get_reward_fn, 
+                      budget: SearchBudget,
+                      table: Optional[TranspositionTable] = None,
+                      state_key_fn=None,
+                      tree_key=None,
+                      world_version=None) -> Optional[A]:
+        """
+        Run MCTS search on an ArrayTree.
+        
+        States are not stored on the tree: every simulation starts from the root
+        state and re-applies the actions along the selected path.
+        
+        Returns:
+            The most visited root action, or None if the root has no legal actions
+        """
+        tree = self._cached_tree(tree_key, world_version, root_state)
+        reused_visits = int(tree.visits[0]) if tree is not None else 0
+        if tree is None:
+            tree = ArrayTree()
+            tree.add_root()
+        root = 0
+        
+        simulations = 0
+        stop_reason = None
+        if is_terminal_fn(root_state):
+            stop_reason = STOP_NO_ACTIONS
+        else:
+            if not tree.has_actions(root):
+                tree.set_actions(root, get_legal_actions_fn(root_state), self.rng)
+            if not tree.has_untried_actions(root) and not tree.children(root):
+                stop_reason = STOP_NO_ACTIONS
+        while stop_reason is None:
+            stop_reason = budget.stop_reason(
+                simulations,
+                lambda: len(tree),
+                lambda: tree.nbytes,
+                lambda: tree.visits[tree._child_slice(root)]
+            )
+            if stop_reason is not None:
+                break
+            
+            # Selection and expansion
+            path, state, known_value = self._select_and_expand(
+                tree, root, table, root_state,
+                get_legal_actions_fn, apply_action_fn, is_terminal_fn, state_key_fn
+            )
+            
+            # Simulation (skipped when an equivalent state already has a value)
+            if known_value is not None:
+                reward = known_value
+            else:
+                reward = self._simulate(state, get_legal_actions_fn, apply_action_fn, 
+                                        is_terminal_fn, get_reward_fn)
+            
+            # Backpropagation
+            tree.backpropagate(path, reward)
+            if table is not None:
+                table.update(tree.tt_slot[path], tree.tt_generation[path], reward)
+            simulations += 1
+        
+        # Get the best action
+        best_child = tree.best_child(root)
+        best_action = tree.action(best_child) if best_child is not None else None
+        self.root_stats = [(tree.action(child), int(tree.visits[child]), float(tree.value_sums[child]))
+                           for child in tree.children(root)]
+        self.decision_stats = {
+            "best_action": best_action,
+            "visits": int(tree.visits[root]),
+            "value": float(tree.value_sums[root]),
+            "children": len(tree.children(root)),
+            "nodes": len(tree),
+            "simulations": simulations,
+            "stop_reason": stop_reason,
+            "elapsed_ms": budget.elapsed_ms,
+            "tree_storage": self.tree_storage
+        }
+        if table is not None:
+            self.decision_stats["transposition"] = table.stats()
+        if self.tree_cache is not None and tree_key is not None:
+            self.decision_stats["reused_visits"] = reused_visits
+            self._cache_subtree(tree_key, world_version, tree, best_child, root_state, apply_action_fn)
+        
+        return best_action
+    
+    def _cached_tree(self, tree_key, world_version, root_state: S) -> Optional[ArrayTree]:
+        """Get the reusable tree of an entity from the tree cache, or None."""
+        if self.tree_cache is None or tree_key is None:
+            return None
+        return self.tree_cache.take(tree_key, world_version, root_state)
+    
+    def _cache_subtree(self,
+                       tree_key,
+                       world_version,
+                       tree: ArrayTree,
+                       best_child: Optional[int],
+                       root_state: S,
+                       apply_action_fn) -> None:
+        """Keep the subtree of the chosen action for the entity's next decision."""
+        if best_child is None:
+            self.tree_cache.discard(tree_key)
+            return
+        child_state = apply_action_fn(root_state, tree.action(best_child))
+        self.tree_cache.put(tree_key, world_version, child_state, tree.subtree(best_child))
+    
+    def _select_and_expand(self,
+                           tree: ArrayTree,
+                           root: int,
+                           table: Optional[TranspositionTable],
+                           root_state: S,
+                           get_legal_actions_fn,
+                           apply_action_fn,
+                           is_terminal_fn,
+                           state_key_fn):
+        """
+        Run the selection and expansion phases of one simulation on one tree.
+        
+        Returns:
+            Tuple of (path, leaf state, known value of the leaf or None)
+        """
+        node = root
+        state = root_state
+        path = [root]
+        
+        # Selection
+        while (not is_terminal_fn(state) and
+               tree.is_fully_expanded(node, self._max_children(tree.visits[node]))):
+            node = tree.select_child(node, self._exploration_weight_at(len(path) - 1), table)
+            state = apply_action_fn(state, tree.action(node))
+            path.append(node)
+        
+        # Expansion
+        known_value = None
+        if not is_terminal_fn(state):
+            if not tree.has_actions(node):
+                tree.set_actions(node, get_legal_actions_fn(state), self.rng)
+            if tree.has_untried_actions(node):
+                node = tree.expand(node)
+                state = apply_action_fn(state, tree.action(node))
+                path.append(node)
+                slot, generation, known_value = self._lookup(table, state, state_key_fn)
+                tree.set_transposition(node, slot, generation)
+        
+        return path, state, known_value
+    
+    def _simulate(self, 
+                  state: S, 
+                  get_legal_actions_fn, 
+                  apply_action_fn, 
+                  is_terminal_fn, 
+                  get_reward_fn) -> float:
+        """Run a simulation from a state with the rollout policy and return its reward."""
+        depth = 0
+        while not is_terminal_fn(state):
+            if self.max_rollout_depth is not None and depth >= self.max_rollout_depth:
+                # Truncated rollout: use the policy's value estimate if it has one
+                estimate = self.rollout_policy.evaluate_truncated([state])
+                if estimate is not None:
+                    return float(estimate[0])
+                break
+            actions = get_legal_actions_fn(state)
+            if not actions:
+                break
+            state = apply_action_fn(state, self.rollout_policy.choose(state, actions, self.rng))
+            depth += 1
         
-        return best_action
\ No newline at end of file
+        return get_reward_fn(state)
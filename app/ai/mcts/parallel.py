@@ -0,0 +1,209 @@
+"""Root-parallel Monte Carlo Tree Search.
+
+With ``MCTS(root_parallel_workers=K)`` a search builds K independent trees,
+each with its own seed, in a process pool and merges the visit and value
+statistics of their root children. The most visited merged action is the
+decision. Trees never share nodes, so there is no locking and the result
+only depends on the seeds.
+
+The pool is created on first use and reused by every later search of the
+process, so its workers are started once. They are spawned rather than
+forked, since the API and thread-pool workers run threads, and receive each
+search pickled: search with ``MCTS.search_state`` (or other module-level
+callbacks) rather than lambdas. Searches whose arguments cannot be pickled,
+searches inside a daemonic process that may not start children (e.g. a
+Celery prefork pool worker) and searches whose pool broke are run one tree
+after another in the calling process, with the same result.
+``app.ai.mcts.settings.create_mcts`` keeps daemonic processes to one tree.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Worker processes of the shared pool; searches with more trees queue for them
+POOL_WORKERS = os.cpu_count() or 1
+
+# Pool shared by the root-parallel searches of this process, and its owner
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def tree_seeds(seed: Optional[int], num_trees: int) -> List[int]:
+    """
+    Get the seed of every tree of a root-parallel search.
+    
+    Args:
+        seed: Seed of the search, or None to draw one at random
+        num_trees: Number of trees
+    
+    Returns:
+        One seed per tree (seed, seed + 1, ...)
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 31)
+    return [seed + i for i in range(num_trees)]
+
+
+def action_key(action: Any) -> Any:
+    """
+    Get a key identifying equal actions that were generated in different trees.
+    
+    Actions coming back from worker processes are copies, so they are matched
+    by value: through ``to_dict()`` when the action has one (all state action
+    classes do), otherwise by the action itself or its ``repr``.
+    """
+    if hasattr(action, "to_dict"):
+        return json.dumps(action.to_dict(), sort_keys=True, default=str)
+    try:
+        hash(action)
+        return action
+    except TypeError:
+        return repr(action)
+
+
+def merge_root_stats(tree_stats: List[List[Tuple[Any, int, float]]]) -> List[Tuple[Any, int, float]]:
+    """
+    Merge the root child statistics of several trees.
+    
+    Args:
+        tree_stats: Per tree, a list of (action, visits, value sum)
+    
+    Returns:
+        Merged list of (action, visits, value sum), in order of first appearance
+    """
+    merged: Dict[Any, List[Any]] = {}
+    for stats in tree_stats:
+        for action, visits, value in stats:
+            key = action_key(action)
+            if key in merged:
+                merged[key][1] += visits
+                merged[key][2] += value
+            else:
+                merged[key] = [action, visits, value]
+    return [tuple(entry) for entry in merged.values()]
+
+
+def _search_tree(mcts, search_args: Tuple[Any, ...], tree_seed: int) -> Tuple[List[Tuple[Any, int, float]], Dict[str, Any]]:
+    """
+    Search one tree of a root-parallel search with the given seed.
+    
+    Returns:
+        Tuple of (root child statistics, decision stats of the tree)
+    """
+    tree_mcts = copy.copy(mcts)
+    tree_mcts.root_parallel_workers = 1
+    tree_mcts.seed = tree_seed
+    tree_mcts.search(*search_args)
+    
+    stats = dict(tree_mcts.decision_stats)
+    stats.pop("best_action", None)
+    return tree_mcts.root_stats, stats
+
+
+def _search_pickled_tree(search: bytes, tree_seed: int) -> Tuple[List[Tuple[Any, int, float]], Dict[str, Any]]:
+    """Search one tree in a pool worker from the pickled (mcts, search arguments)."""
+    mcts, search_args = pickle.loads(search)
+    return _search_tree(mcts, search_args, tree_seed)
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """Get the process pool of this process (a new one after a fork), or None where a pool cannot be used."""
+    global _pool, _pool_pid
+    if multiprocessing.current_process().daemon:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Shut the process pool down, waiting for running trees."""
+    global _pool
+    with _pool_lock:
+        # A pool inherited through a fork belongs to the parent
+        pool = _pool if _pool_pid == os.getpid() else None
+        _pool = None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def _search_trees(mcts, search_args: Tuple[Any, ...], seeds: List[int]) -> List[Tuple[List[Tuple[Any, int, float]], Dict[str, Any]]]:
+    """Search the trees of a root-parallel search, in the process pool where possible."""
+    pool = get_pool()
+    if pool is None:
+        logger.warning("Process pool unavailable, searching root-parallel trees sequentially")
+        return [_search_tree(mcts, search_args, tree_seed) for tree_seed in seeds]
+    
+    try:
+        search = pickle.dumps((mcts, search_args))
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        logger.warning(f"Search arguments cannot be pickled ({str(e)}), searching root-parallel trees "
+                       f"sequentially; use MCTS.search_state instead of lambdas")
+        return [_search_tree(mcts, search_args, tree_seed) for tree_seed in seeds]
+    
+    try:
+        return list(pool.map(_search_pickled_tree, [search] * len(seeds), seeds))
+    except BrokenProcessPool:
+        logger.exception("Process pool broke, searching root-parallel trees sequentially")
+        shutdown_pool()
+        return [_search_tree(mcts, search_args, tree_seed) for tree_seed in seeds]
+
+
+def search_root_parallel(mcts,
+                         root_state,
+                         get_legal_actions_fn,
+                         apply_action_fn,
+                         is_terminal_fn,
+                         get_reward_fn,
+                         num_simulations: int,
+                         state_key_fn=None):
+    """
+    Run a root-parallel search for ``MCTS.search``.
+    
+    Every tree runs ``num_simulations`` simulations, so the search does
+    ``root_parallel_workers * num_simulations`` simulations in total.
+    
+    Returns:
+        The most visited action over all trees, or None if the root has no
+        legal actions
+    """
+    num_trees = mcts.root_parallel_workers
+    seeds = tree_seeds(mcts.seed, num_trees)
+    results = _search_trees(mcts, (root_state, get_legal_actions_fn, apply_action_fn, is_terminal_fn,
+                                   get_reward_fn, num_simulations, state_key_fn), seeds)
+    
+    root_stats = merge_root_stats([stats for stats, _ in results])
+    best = max(root_stats, key=lambda entry: entry[1]) if root_stats else None
+    best_action = best[0] if best is not None else None
+    
+    stop_reasons = {tree_stats["stop_reason"] for _, tree_stats in results}
+    
+    mcts.root_stats = root_stats
+    mcts.decision_stats = {
+        "best_action": best_action,
+        "visits": sum(tree_stats["visits"] for _, tree_stats in results),
+        "value": sum(tree_stats["value"] for _, tree_stats in results),
+        "children": len(root_stats),
+        "simulations": sum(tree_stats["simulations"] for _, tree_stats in results),
+        "stop_reason": stop_reasons.pop() if len(stop_reasons) == 1 else "mixed",
+        "tree_storage": mcts.tree_storage,
+        "root_parallel_workers": num_trees,
+        "seeds": seeds,
+        "trees": [tree_stats for _, tree_stats in results]
+    }
+    
+    return best_action
@@ -0,0 +1,301 @@
+"""Rollout policies for the simulation phase of Monte Carlo Tree Search.
+
+A simulation plays actions from a leaf until a terminal state (or the
+``max_rollout_depth`` cutoff) and scores the final state. Uniformly random
+rollouts are cheap but noisy, so a search needs many of them to converge.
+A ``RolloutPolicy`` decides how rollout actions are picked and how a
+truncated rollout is valued:
+
+- ``RandomRolloutPolicy``: uniform random actions (the default)
+- ``SoftmaxRolloutPolicy``: samples actions from a softmax over action
+  scores, scored for all actions of a state (or of a whole batch of states)
+  with a single NumPy expression
+
+Any policy can be given a ``LinearValueModel``: when a rollout is cut off at
+``max_rollout_depth``, the model's estimate of the state's eventual reward is
+used instead of the reward of the cut-off state. The model is a linear
+regression over ``value_features()`` fitted with scikit-learn on the rewards
+of full rollouts (see ``collect_value_samples``). Cutting rollouts off early
+and valuing them with the model lets a search match the decisions of uniform
+rollouts with a fraction of the simulations (see ``tests/ai/mcts/test_benchmark.py``).
+
+Policies sample with the ``random.Random`` of the search they run in (the
+``rng`` argument), so seeded searches stay reproducible without touching the
+global ``random`` state; without one they fall back to the ``random`` module.
+"""
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import random
+import numpy as np
+
+# Score used for actions without any score information (uniform sampling)
+NEUTRAL_SCORE = 0.0
+
+# Smallest probability used when taking logs of preference probabilities
+MIN_PROBABILITY = 1e-6
+
+
+class LinearValueModel:
+    """
+    Linear estimate of the eventual reward of a state.
+    
+    ``fit`` uses scikit-learn's ``Ridge``; the fitted coefficients are kept as
+    NumPy arrays so predictions do not go through scikit-learn.
+    """
+    
+    def __init__(self,
+                 feature_fn: Optional[Callable[[Any], Sequence[float]]] = None,
+                 alpha: float = 1.0):
+        """
+        Initialize an unfitted model.
+        
+        Args:
+            feature_fn: Function returning the feature vector of a state, or
+                None to use the state's ``value_features()`` method
+            alpha: Ridge regularization strength
+        """
+        self.feature_fn = feature_fn or (lambda state: state.value_features())
+        self.alpha = alpha
+        self.coef: Optional[np.ndarray] = None
+        self.intercept = 0.0
+    
+    @property
+    def is_fitted(self) -> bool:
+        """Check if the model has been fitted."""
+        return self.coef is not None
+    
+    def features(self, states: Sequence[Any]) -> np.ndarray:
+        """Get the feature matrix of a list of states."""
+        return np.array([self.feature_fn(state) for state in states], dtype=np.float64)
+    
+    def fit(self, states: Sequence[Any], rewards: Sequence[float]) -> 'LinearValueModel':
+        """
+        Fit the model to observed rewards.
+        
+        Args:
+            states: States the rollouts were valued from
+            rewards: Reward each rollout eventually reached
+        
+        Returns:
+            The fitted model
+        
+        Raises:
+            ImportError: If scikit-learn is not installed
+            ValueError: If there are no samples
+        """
+        if len(states) == 0:
+            raise ValueError("Cannot fit a value model without samples")
+        try:
+            from sklearn.linear_model import Ridge
+        except ImportError as e:
+            raise ImportError("LinearValueModel.fit requires scikit-learn") from e
+        
+        regression = Ridge(alpha=self.alpha)
+        regression.fit(self.features(states), np.asarray(rewards, dtype=np.float64))
+        self.coef = np.asarray(regression.coef_, dtype=np.float64)
+        self.intercept = float(regression.intercept_)
+        return self
+    
+    def predict(self, states: Sequence[Any]) -> np.ndarray:
+        """
+        Estimate the eventual reward of several states.
+        
+        Raises:
+            ValueError: If the model has not been fitted
+        """
+        if not self.is_fitted:
+            raise ValueError("LinearValueModel has not been fitted")
+        if len(states) == 0:
+            return np.zeros(0, dtype=np.float64)
+        return self.features(states) @ self.coef + self.intercept
+
+
+class RolloutPolicy:
+    """
+    Base class of rollout policies: uniform random actions.
+    
+    Subclasses override ``choose_batch`` (and ``choose`` for a faster single
+    state path) to bias the rollouts.
+    """
+    
+    def __init__(self, value_model: Optional[LinearValueModel] = None):
+        """
+        Initialize the policy.
+        
+        Args:
+            value_model: Fitted model valuing rollouts cut off at the depth
+                limit, or None to use the reward of the cut-off state
+        """
+        self.value_model = value_model
+    
+    def choose(self, state: Any, actions: Sequence[Any], rng: Optional[random.Random] = None) -> Any:
+        """Pick the next rollout action of a state from its legal actions."""
+        return (rng or random).choice(actions)
+    
+    def choose_batch(self,
+                     states: Sequence[Any],
+                     action_lists: Sequence[Sequence[Any]],
+                     rng: Optional[random.Random] = None) -> List[Any]:
+        """Pick the next rollout action of several states (none without actions)."""
+        return [self.choose(state, actions, rng) for state, actions in zip(states, action_lists)]
+    
+    def evaluate_truncated(self, states: Sequence[Any]) -> Optional[np.ndarray]:
+        """
+        Value rollouts that were cut off at the depth limit.
+        
+        Returns:
+            Estimated rewards, or None to use the reward of the states
+        """
+        if self.value_model is None or not self.value_model.is_fitted:
+            return None
+        return self.value_model.predict(states)
+
+
+class RandomRolloutPolicy(RolloutPolicy):
+    """Uniform random rollout actions, the classic MCTS simulation."""
+
+
+def action_scores(state: Any, actions: Sequence[Any]) -> np.ndarray:
+    """
+    Score the actions of a state for softmax sampling.
+    
+    Uses the ``score`` every action class except ``TraderAction`` carries, or
+    the log of the state's ``get_action_probabilities()``; neutral scores
+    otherwise.
+    
+    Args:
+        state: The state the actions are legal in
+        actions: Legal actions of the state
+    
+    Returns:
+        Array of scores, one per action
+    """
+    scores = [getattr(action, "score", None) for action in actions]
+    if all(isinstance(score, (int, float)) for score in scores):
+        return np.asarray(scores, dtype=np.float64)
+    
+    get_probabilities = getattr(state, "get_action_probabilities", None)
+    if callable(get_probabilities):
+        probabilities = get_probabilities()
+        return np.log(np.maximum([probabilities.get(action, MIN_PROBABILITY) for action in actions],
+                                 MIN_PROBABILITY))
+    
+    return np.full(len(actions), NEUTRAL_SCORE, dtype=np.float64)
+
+
+class SoftmaxRolloutPolicy(RolloutPolicy):
+    """
+    Sample rollout actions from a softmax over action scores.
+    
+    P(action) is proportional to exp(score / temperature). A high temperature
+    approaches uniform random rollouts, a low one always plays the best
+    scored action.
+    """
+    
+    def __init__(self,
+                 score_fn: Callable[[Any, Sequence[Any]], np.ndarray] = action_scores,
+                 temperature: float = 1.0,
+                 value_model: Optional[LinearValueModel] = None):
+        """
+        Initialize the policy.
+        
+        Args:
+            score_fn: Function returning the score array of a state's actions
+            temperature: Softmax temperature
+            value_model: See ``RolloutPolicy``
+        """
+        if temperature <= 0:
+            raise ValueError("temperature must be positive")
+        super().__init__(value_model)
+        self.score_fn = score_fn
+        self.temperature = temperature
+    
+    def choose(self, state: Any, actions: Sequence[Any], rng: Optional[random.Random] = None) -> Any:
+        """Sample one action of a state."""
+        if len(actions) == 1:
+            return actions[0]
+        scores = np.asarray(self.score_fn(state, actions), dtype=np.float64) / self.temperature
+        weights = np.exp(scores - scores.max())
+        cumulative = np.cumsum(weights)
+        index = int(np.searchsorted(cumulative, (rng or random).random() * cumulative[-1], side="right"))
+        return actions[min(index, len(actions) - 1)]
+    
+    def choose_batch(self,
+                     states: Sequence[Any],
+                     action_lists: Sequence[Sequence[Any]],
+                     rng: Optional[random.Random] = None) -> List[Any]:
+        """
+        Sample one action for each of several states.
+        
+        The scores of all states are concatenated, so the softmax of the whole
+        batch is one pass of segmented NumPy reductions.
+        """
+        if not states:
+            return []
+        
+        counts = np.fromiter((len(actions) for actions in action_lists), dtype=np.int64, count=len(action_lists))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        scores = np.concatenate([np.asarray(self.score_fn(state, actions), dtype=np.float64)
+                                 for state, actions in zip(states, action_lists)]) / self.temperature
+        
+        # Segmented softmax: subtract each state's max score, then normalize per state
+        weights = np.exp(scores - np.repeat(np.maximum.reduceat(scores, starts), counts))
+        cumulative = np.cumsum(weights)
+        totals = np.add.reduceat(weights, starts)
+        offsets = cumulative[starts] - weights[starts]
+        draws = np.array([(rng or random).random() for _ in range(len(states))]) * totals + offsets
+        
+        indices = np.searchsorted(cumulative, draws, side="right")
+        indices = np.minimum(np.maximum(indices, starts), starts + counts - 1) - starts
+        return [actions[int(index)] for actions, index in zip(action_lists, indices)]
+
+
+def collect_value_samples(root_states: Sequence[Any],
+                          get_legal_actions_fn,
+                          apply_action_fn,
+                          is_terminal_fn,
+                          get_reward_fn,
+                          policy: Optional[RolloutPolicy] = None,
+                          rollouts_per_state: int = 20,
+                          max_depth: int = 50,
+                          rng: Optional[random.Random] = None) -> Tuple[List[Any], List[float]]:
+    """
+    Collect training data for a ``LinearValueModel`` from full rollouts.
+    
+    Every state visited by a rollout is paired with the reward the rollout
+    eventually reached, so the model learns what a state is worth further
+    down the line rather than its immediate reward.
+    
+    Args:
+        root_states: States to start rollouts from
+        get_legal_actions_fn: Function returning the legal actions of a state
+        apply_action_fn: Function applying an action to a state
+        is_terminal_fn: Function checking if a state is terminal
+        get_reward_fn: Function returning the reward of a state
+        policy: Rollout policy to play the rollouts with (random by default)
+        rollouts_per_state: Number of rollouts from each root state
+        max_depth: Length of the rollouts
+        rng: Random number generator of the rollouts, or None to use the random module
+    
+    Returns:
+        Tuple of (states, eventual rewards)
+    """
+    policy = policy or RandomRolloutPolicy()
+    states, rewards = [], []
+    for root_state in root_states:
+        for _ in range(rollouts_per_state):
+            state = root_state
+            visited = [state]
+            for _ in range(max_depth):
+                if is_terminal_fn(state):
+                    break
+                actions = get_legal_actions_fn(state)
+                if not actions:
+                    break
+                state = apply_action_fn(state, policy.choose(state, actions, rng))
+                visited.append(state)
+            
+            reward = get_reward_fn(state)
+            states.extend(visited)
+            rewards.extend([reward] * len(visited))
+    return states, rewards
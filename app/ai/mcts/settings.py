@@ -0,0 +1,206 @@
+"""Per-entity-type MCTS search settings.
+
+Entity types differ a lot in how expensive a decision is: a trader picks
+between a handful of connections, while faction and settlement states have
+the largest action spaces. ``ENTITY_SEARCH_SETTINGS`` holds the ``MCTS``
+options per entity type, and ``create_mcts`` builds a search from them, so
+the expensive decisions can use every core of a worker box through
+root-parallel search while cheap ones stay single-process. A daemonic
+process, such as a Celery prefork pool worker, may not start a process pool,
+so the decision tasks of those entity types run on the MCTS queue of
+solo/threads pool workers (see docs/MCTS_WORKERS.md). Elsewhere in a daemonic
+process the search logs a warning and uses a single tree instead of
+searching all trees in turn.
+
+Entity types in ``VALUE_MODEL_SETTINGS`` cut their rollouts off after a few
+actions and value the cut-off states with a ``LinearValueModel``. The model
+is fitted once per process, on full rollouts from the states of the first
+search that asks for it (``sample_states`` of ``create_mcts``), which costs
+about as much as a few dozen simulations.
+
+``get_tree_cache`` returns the process-wide ``TreeCache`` of an entity type,
+so consecutive decisions of the same entity on one worker reuse their trees.
+Trees evicted from a full cache are spilled to the Redis server at the
+``TREE_CACHE_REDIS_URL`` environment variable, if it is set.
+"""
+
+from typing import Any, Dict, Optional, Sequence, Set
+import logging
+import multiprocessing
+import os
+
+from app.ai.mcts.core import MCTS, state_apply_action, state_is_terminal, state_legal_actions, state_reward
+from app.ai.mcts.rollout import LinearValueModel, RandomRolloutPolicy, collect_value_samples
+from app.ai.mcts.states.trader_state import TraderAction
+from app.ai.mcts.tree_cache import TreeCache
+
+logger = logging.getLogger(__name__)
+
+# Number of CPU cores of the worker box
+CPU_COUNT = os.cpu_count() or 1
+
+# Options used for entity types without their own settings
+DEFAULT_SEARCH_SETTINGS: Dict[str, Any] = {
+    "exploration_weight": 1.0,
+    "root_parallel_workers": 1
+}
+
+# MCTS options per entity type, merged over DEFAULT_SEARCH_SETTINGS
+ENTITY_SEARCH_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "trader": {"tree_storage": "array"},
+    "animal": {"tree_storage": "array"},
+    "animal_group": {"tree_storage": "array"},
+    "faction": {"tree_storage": "array", "root_parallel_workers": CPU_COUNT},
+    "settlement": {"tree_storage": "array", "root_parallel_workers": CPU_COUNT}
+}
+
+# Rollout cutoff and value model training per entity type: rollouts stop after
+# "rollout_depth" actions; the model is fitted on "sample_rollouts" full rollouts
+# of "sample_depth" actions from each sample state
+VALUE_MODEL_SETTINGS: Dict[str, Dict[str, int]] = {
+    "trader": {"rollout_depth": 3, "sample_rollouts": 20, "sample_depth": 10}
+}
+
+# Maximum number of entity trees kept in process per entity type
+TREE_CACHE_MAX_ENTRIES = 10000
+
+# Redis URL that evicted trees are spilled to; unset or empty keeps them in process only
+TREE_CACHE_REDIS_URL: Optional[str] = os.environ.get("TREE_CACHE_REDIS_URL") or None
+
+# Action classes that store the actions of spilled trees, per entity type
+TREE_CACHE_ACTION_TYPES: Dict[str, type] = {
+    "trader": TraderAction
+}
+
+# Process-wide tree caches per entity type
+_tree_caches: Dict[str, TreeCache] = {}
+
+# Entity types whose single-tree fallback in a daemonic process was logged
+_single_tree_warned: Set[str] = set()
+
+# Process-wide value models per entity type (None if fitting failed)
+_value_models: Dict[str, Optional[LinearValueModel]] = {}
+
+
+def get_search_settings(entity_type: str) -> Dict[str, Any]:
+    """
+    Get the MCTS options of an entity type.
+    
+    Args:
+        entity_type: Entity type (e.g. "trader", "faction")
+    
+    Returns:
+        Dictionary of ``MCTS`` keyword arguments
+    """
+    settings = dict(DEFAULT_SEARCH_SETTINGS)
+    settings.update(ENTITY_SEARCH_SETTINGS.get(entity_type, {}))
+    return settings
+
+
+def create_mcts(entity_type: str, sample_states: Optional[Sequence[Any]] = None, **overrides) -> MCTS:
+    """
+    Create an MCTS search configured for an entity type.
+    
+    Args:
+        entity_type: Entity type (e.g. "trader", "faction")
+        sample_states: States to fit the entity type's value model from if it
+            has none yet (usually the root state); without them rollouts are
+            not cut off
+        **overrides: ``MCTS`` options that take precedence over the settings
+    
+    Returns:
+        Configured MCTS instance; a single-tree one in daemonic processes
+    """
+    settings = get_search_settings(entity_type)
+    if sample_states:
+        settings.update(get_rollout_settings(entity_type, sample_states))
+    settings.update(overrides)
+    if settings["root_parallel_workers"] > 1 and multiprocessing.current_process().daemon:
+        if entity_type not in _single_tree_warned:
+            _single_tree_warned.add(entity_type)
+            logger.warning(f"{entity_type} searches use 1 tree instead of {settings['root_parallel_workers']}: "
+                           f"daemonic processes cannot start a process pool, run the task on the MCTS queue")
+        settings["root_parallel_workers"] = 1
+    return MCTS(**settings)
+
+
+def get_rollout_settings(entity_type: str, sample_states: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Get the rollout options of an entity type that cuts rollouts off.
+    
+    Args:
+        entity_type: Entity type (e.g. "trader")
+        sample_states: States to fit the value model from if there is none yet
+    
+    Returns:
+        ``rollout_policy`` and ``max_rollout_depth`` options, or an empty
+        dictionary if the entity type has no value model
+    """
+    model = get_value_model(entity_type, sample_states)
+    if model is None:
+        return {}
+    return {
+        "rollout_policy": RandomRolloutPolicy(value_model=model),
+        "max_rollout_depth": VALUE_MODEL_SETTINGS[entity_type]["rollout_depth"]
+    }
+
+
+def get_value_model(entity_type: str, sample_states: Sequence[Any]) -> Optional[LinearValueModel]:
+    """
+    Get the process-wide value model of an entity type, fitting it on first use.
+    
+    Args:
+        entity_type: Entity type (e.g. "trader")
+        sample_states: States to start the training rollouts from
+    
+    Returns:
+        Fitted model, or None if the entity type has none or it could not be fitted
+    """
+    if entity_type in _value_models:
+        return _value_models[entity_type]
+    options = VALUE_MODEL_SETTINGS.get(entity_type)
+    if options is None or not sample_states:
+        return None
+    
+    model = None
+    try:
+        samples = collect_value_samples(sample_states, state_legal_actions, state_apply_action,
+                                        state_is_terminal, state_reward,
+                                        rollouts_per_state=options["sample_rollouts"],
+                                        max_depth=options["sample_depth"])
+        model = LinearValueModel().fit(*samples)
+    except ImportError as e:
+        logger.warning(f"Using full rollouts for {entity_type} searches: {str(e)}")
+    _value_models[entity_type] = model
+    return model
+
+
+def get_tree_cache(entity_type: str) -> TreeCache:
+    """
+    Get the process-wide tree cache of an entity type.
+    
+    Args:
+        entity_type: Entity type (e.g. "trader")
+    
+    Returns:
+        TreeCache shared by all searches of that entity type in this process
+    """
+    cache = _tree_caches.get(entity_type)
+    if cache is None:
+        cache = TreeCache(max_entries=TREE_CACHE_MAX_ENTRIES,
+                          redis_client=_tree_cache_redis_client(),
+                          action_type=TREE_CACHE_ACTION_TYPES.get(entity_type))
+        _tree_caches[entity_type] = cache
+    return cache
+
+
+def _tree_cache_redis_client():
+    """Create the Redis client for tree spills, or None if not configured."""
+    if TREE_CACHE_REDIS_URL is None:
+        return None
+    try:
+        import redis
+        return redis.Redis.from_url(TREE_CACHE_REDIS_URL)
+    except ImportError:
+        logger.warning("redis is not installed, MCTS trees are only cached in process")
+        return None
@@ -8,7 +8,9 @@ state transition, and reward calculation for animal group decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data
+from app.ai.mcts.action_cache import ActionCache
 
 logger = logging.getLogger(__name__)
 
@@ -96,6 +98,7 @@ class AnimalGroupState:
         self.group_data = group_data
         self.world_data = world_data or {}
         self._legal_actions = None
+        self._action_cache: Optional[ActionCache] = None  # Shared by all states of a search
         
         # Cache frequently used values for performance
         self.area_id = group_data.get("area_id")
@@ -119,6 +122,34 @@ class AnimalGroupState:
         if self._legal_actions is not None:
             return self._legal_actions
         
+        # States of a search with the same action key share one action list
+        self._legal_actions = self._get_action_cache().actions(self._action_key(), self._generate_legal_actions)
+        return self._legal_actions
+    
+    def _get_action_cache(self) -> ActionCache:
+        """Get the action cache of the search, creating it for a root state."""
+        if self._action_cache is None:
+            self._action_cache = ActionCache()
+        return self._action_cache
+    
+    def _action_key(self) -> Tuple[Any, ...]:
+        """
+        Get the key of everything action generation and scoring reads from the group.
+        
+        Species, behaviors, diet and migration settings are not part of the key:
+        they do not change within a search.
+        """
+        return (
+            self.area_id,
+            self.size,
+            self.energy,
+            self.health,
+            frozenset(self.territory),
+            tuple(self.group_data.get("status", []))
+        )
+    
+    def _generate_legal_actions(self) -> List[AnimalGroupAction]:
+        """Generate and score the legal actions of this state."""
         actions = []
         
         # Add movement actions
@@ -151,8 +182,6 @@ class AnimalGroupState:
         # Calculate action scores based on group state
         self._calculate_action_scores(actions)
         
-        # Cache actions
-        self._legal_actions = actions
         return actions
     
     def _get_movement_actions(self) -> List[AnimalGroupAction]:
@@ -347,6 +376,11 @@ class AnimalGroupState:
         Returns:
             True if food is available, False otherwise
         """
+        return self._get_action_cache().value(("food", location_id, self.size),
+                                              lambda: self._compute_has_food(location_id))
+    
+    def _compute_has_food(self, location_id: str) -> bool:
+        """Check ``_has_food_at_location`` without caching."""
         # Check vegetation if herbivore
         if "herbivore" in self.diet:
             vegetation_data = self.world_data.get("vegetation_data", {})
@@ -459,6 +493,13 @@ class AnimalGroupState:
         Returns:
             Float between 0 and 1, higher is safer
         """
+        return self._get_action_cache().value(
+            ("safety", location_id, self.size, location_id in self.territory),
+            lambda: self._compute_location_safety(location_id)
+        )
+    
+    def _compute_location_safety(self, location_id: str) -> float:
+        """Compute ``_location_safety`` without caching."""
         # Default to medium safety
         safety = 0.5
         
@@ -501,9 +542,10 @@ class AnimalGroupState:
         Returns:
             A new AnimalGroupState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_group_data = copy.deepcopy(self.group_data)
-        new_state = AnimalGroupState(new_group_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_group_data = copy_entity_data(self.group_data)
+        new_state = AnimalGroupState(new_group_data, self.world_data)
+        new_state._action_cache = self._get_action_cache()
         
         # Apply the action effect based on type
         if action.action_type == "move":
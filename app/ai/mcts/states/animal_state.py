@@ -8,7 +8,8 @@ state transition, and reward calculation for animal decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +89,9 @@ class AnimalState:
     including information about the animal, the world, and available actions.
     """
     
+    # Energy and health are compared in buckets of this size when matching transpositions
+    TRANSPOSITION_STAT_BUCKET = 10
+    
     def __init__(self, animal_data: Dict[str, Any] = None, world_data: Optional[Dict[str, Any]] = None):
         """
         Initialize animal state.
@@ -434,9 +438,9 @@ class AnimalState:
         Returns:
             A new AnimalState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_animal_data = copy.deepcopy(self.animal_data)
-        new_state = AnimalState(new_animal_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_animal_data = copy_entity_data(self.animal_data)
+        new_state = AnimalState(new_animal_data, self.world_data)
         
         # Apply the action effect based on type
         if action.action_type == "move":
@@ -543,6 +547,22 @@ class AnimalState:
         # Roll for success
         return random.random() < success_chance
     
+    def state_key(self) -> Tuple[Any, ...]:
+        """
+        Get a hashable key identifying equivalent states for the transposition table.
+        
+        Energy and health are rounded down to ``TRANSPOSITION_STAT_BUCKET`` so
+        animals in the same area in nearly the same condition share statistics.
+        
+        Returns:
+            Tuple of the state features that matter for planning
+        """
+        return (
+            self.area_id,
+            int(self.energy) // self.TRANSPOSITION_STAT_BUCKET,
+            int(self.health) // self.TRANSPOSITION_STAT_BUCKET
+        )
+    
     def is_terminal(self) -> bool:
         """
         Check if this is a terminal state (simulation should end).
@@ -8,7 +8,8 @@ state transition, and reward calculation for equipment decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data, copy_world_path
 
 logger = logging.getLogger(__name__)
 
@@ -305,9 +306,16 @@ class EquipmentState:
         Returns:
             A new EquipmentState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_equipment_data = copy.deepcopy(self.equipment_data)
-        new_state = EquipmentState(new_equipment_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_equipment_data = copy_entity_data(self.equipment_data)
+        new_state = EquipmentState(new_equipment_data, self.world_data)
+        
+        # These actions update items in the world data, so copy only those items
+        if action.action_type in ("equip", "unequip", "swap", "repair"):
+            written_items = [action.item_id]
+            if action.action_type == "swap":
+                written_items.append(self.slots.get(action.slot))
+            new_state.world_data = copy_world_path(self.world_data, "items", written_items)
         
         # Apply the action effect based on type
         if action.action_type == "equip":
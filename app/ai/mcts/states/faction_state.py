@@ -8,7 +8,8 @@ state transition, and reward calculation for faction decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +89,10 @@ class FactionState:
     including information about the faction, the world, and available actions.
     """
     
+    # Bucket sizes used when matching transpositions
+    TRANSPOSITION_GOLD_BUCKET = 50
+    TRANSPOSITION_INFLUENCE_BUCKET = 5
+    
     def __init__(self, faction_data: Dict[str, Any], world_data: Optional[Dict[str, Any]] = None):
         """
         Initialize faction state.
@@ -586,9 +591,9 @@ class FactionState:
         Returns:
             A new FactionState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_faction_data = copy.deepcopy(self.faction_data)
-        new_state = FactionState(new_faction_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_faction_data = copy_entity_data(self.faction_data)
+        new_state = FactionState(new_faction_data, self.world_data)
         
         # Apply the action effect based on type
         if action.action_type == "move":
@@ -720,6 +725,29 @@ class FactionState:
         
         return new_state
     
+    def state_key(self) -> Tuple[Any, ...]:
+        """
+        Get a hashable key identifying equivalent states for the transposition table.
+        
+        Gold, influence and the resource total are rounded down to
+        ``TRANSPOSITION_GOLD_BUCKET`` / ``TRANSPOSITION_INFLUENCE_BUCKET`` so
+        factions whose trades came out nearly the same share statistics.
+        
+        Returns:
+            Tuple of the state features that matter for planning
+        """
+        return (
+            self.current_location_id,
+            int(self.gold) // self.TRANSPOSITION_GOLD_BUCKET,
+            int(self.influence) // self.TRANSPOSITION_INFLUENCE_BUCKET,
+            int(sum(self.resources.values())) // self.TRANSPOSITION_GOLD_BUCKET,
+            len(self.members),
+            frozenset(self.controlled_locations),
+            frozenset(self.allies),
+            frozenset(self.enemies),
+            frozenset(self.available_quests)
+        )
+    
     def is_terminal(self) -> bool:
         """
         Check if this is a terminal state (simulation should end).
@@ -8,7 +8,8 @@ state transition, and reward calculation for item decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data
 
 logger = logging.getLogger(__name__)
 
@@ -371,9 +372,9 @@ class ItemState:
         Returns:
             A new ItemState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_item_data = copy.deepcopy(self.item_data)
-        new_state = ItemState(new_item_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_item_data = copy_entity_data(self.item_data)
+        new_state = ItemState(new_item_data, self.world_data)
         
         # Apply the action effect based on type
         if action.action_type == "equip":
@@ -8,7 +8,8 @@ state transition, and reward calculation for player decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,9 @@ class PlayerAction:
                  target_id: Optional[str] = None,
                  resource_type: Optional[str] = None,
                  amount: Optional[int] = None,
-                 location_id: Optional[str] = None):
+                 location_id: Optional[str] = None,
+                 item_id: Optional[str] = None,
+                 destination_id: Optional[str] = None):
         """
         Initialize a player action.
         
@@ -30,6 +33,8 @@ class PlayerAction:
             resource_type: Type of resource (for resource-related actions)
             amount: Amount for quantity-based actions
             location_id: ID of the location (for movement actions)
+            item_id: ID of the item (for item-related actions)
+            destination_id: ID of the destination (for planning movement)
         """
         self.action_type = action_type
         self.target_id = target_id
@@ -39,8 +44,8 @@ class PlayerAction:
         
         # Optional data for specialized actions
         self.skill_name = None  # For skill-based actions
-        self.item_id = None  # For item-related actions
-        self.destination_id = None  # For planning movement
+        self.item_id = item_id  # For item-related actions
+        self.destination_id = destination_id  # For planning movement
         self.score = 1.0  # Base score for action selection
         
     def __str__(self) -> str:
@@ -407,6 +412,13 @@ class PlayerState:
         # Simple implementation - in a real system would use proper pathfinding
         if from_id == to_id:
             return 0
+        
+        # Settlement routes precomputed for the world (see app.game_state.route_table)
+        route_table = self.world_data.get("route_table")
+        if route_table is not None:
+            steps = route_table.steps(from_id, to_id)
+            if steps is not None:
+                return steps
             
         # Try direct connection
         location_graph = self.world_data.get("location_graph", {})
@@ -427,9 +439,9 @@ class PlayerState:
         Returns:
             A new PlayerState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_player_data = copy.deepcopy(self.player_data)
-        new_state = PlayerState(new_player_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_player_data = copy_entity_data(self.player_data)
+        new_state = PlayerState(new_player_data, self.world_data)
         
         # Apply the action effect based on type
         if action.action_type == "move":
@@ -8,7 +8,8 @@ state transition, and reward calculation for settlement decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data
 
 logger = logging.getLogger(__name__)
 
@@ -749,9 +750,9 @@ class SettlementState:
         Returns:
             A new SettlementState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_settlement_data = copy.deepcopy(self.settlement_data)
-        new_state = SettlementState(new_settlement_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_settlement_data = copy_entity_data(self.settlement_data)
+        new_state = SettlementState(new_settlement_data, self.world_data)
         
         # Apply the action effect based on type
         if action.action_type == "build":
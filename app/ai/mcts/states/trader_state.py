@@ -6,13 +6,20 @@ state transition, and reward calculation for trader decision making.
 """
 
 from typing import List, Dict, Any, Optional, Set, Tuple
+from bisect import bisect_right
 import random
 import logging
-import copy
 import json
+import numpy as np
+
+from app.ai.mcts.transition import copy_entity_data
+from app.ai.mcts.action_cache import ActionCache
 
 logger = logging.getLogger(__name__)
 
+# Highest area danger level; route dangers are divided by it to get risk levels
+MAX_DANGER_LEVEL = 10
+
 class TraderAction:
     """Represents an action a trader can take."""
     
@@ -104,6 +111,9 @@ class TraderState:
     including information about the trader, the world, and available actions.
     """
     
+    # Gold is compared in buckets of this size when matching transpositions
+    TRANSPOSITION_GOLD_BUCKET = 50
+    
     def __init__(self, trader_data: Dict[str, Any], world_data: Optional[Dict[str, Any]] = None):
         """
         Initialize trader state.
@@ -115,7 +125,9 @@ class TraderState:
         self.trader_data = trader_data
         self.world_data = world_data or {}
         self._legal_actions = None
+        self._legal_actions_key = None
         self._action_probabilities = None
+        self._action_cache: Optional[ActionCache] = None  # Shared by all states of a search
         
         # Cache frequently used values for performance
         self.current_settlement_id = trader_data.get("current_location_id")
@@ -148,52 +160,117 @@ class TraderState:
         if self._legal_actions is not None:
             return self._legal_actions
         
+        # States of a search with the same action key share one action list
+        self._legal_actions_key = self._action_key()
+        self._legal_actions = self._get_action_cache().actions(self._legal_actions_key,
+                                                               self._generate_legal_actions)
+        return self._legal_actions
+    
+    def get_action_probabilities(self) -> Dict[TraderAction, float]:
+        """
+        Get the preference-based probability of each legal action.
+        
+        Probabilities are only computed when asked for, and shared by the
+        states of a search that agree on the legal actions and on everything
+        the preferences look at.
+        
+        Returns:
+            Dictionary of action to probability (summing to 1)
+        """
+        if self._action_probabilities is None:
+            actions = self.get_legal_actions()
+            unvisited = frozenset(action.destination_id for action in actions
+                                  if action.action_type == "move"
+                                  and action.destination_id not in self.visited_settlements)
+            key = ("probabilities", self._legal_actions_key, self.destination_id, unvisited, self.gold > 5000)
+            self._action_probabilities = self._get_action_cache().actions(
+                key, lambda: self._calculate_action_probabilities(actions)
+            )
+        return self._action_probabilities
+    
+    def _get_action_cache(self) -> ActionCache:
+        """Get the action cache of the search, creating it for a root state."""
+        if self._action_cache is None:
+            self._action_cache = ActionCache()
+        return self._action_cache
+    
+    def _action_key(self) -> Tuple[Any, ...]:
+        """
+        Get the key that determines the legal actions of this state.
+        
+        Gold only matters through the thresholds action generation compares it
+        to: how many of the local market's items are affordable and the settle,
+        open shop and retire limits. So states that differ in gold, elapsed
+        days or visited settlements still share their action list.
+        
+        Returns:
+            Hashable key
+        """
+        if self.is_retired:
+            return ("retired",)
+        
+        affordable = 0
+        sellable = frozenset()
+        if self.current_settlement_id and self._has_market_data():
+            affordable = bisect_right(self._get_sorted_sale_prices(self.current_settlement_id), self.gold)
+            items_to_buy = self._get_items_to_buy()
+            sellable = frozenset(item_id for item_id, count in self.inventory.items()
+                                 if count > 0 and item_id in items_to_buy)
+        
+        return (
+            self.current_settlement_id,
+            self.is_settled,
+            self.is_traveling,
+            affordable,
+            sellable,
+            self.gold >= 500,
+            self.gold >= 1000,
+            self.gold >= 2000
+        )
+    
+    def _get_sorted_sale_prices(self, settlement_id: str) -> List[float]:
+        """Get the sorted prices of the items for sale at the current settlement, once per search."""
+        return self._get_action_cache().value(("sale_prices", settlement_id),
+                                              lambda: sorted(self._get_items_for_sale().values()))
+    
+    def _generate_legal_actions(self) -> List[TraderAction]:
+        """Generate the legal actions of this state."""
         actions = []
         
         # Skip actions if retired
         if self.is_retired:
             # Only option is to stay retired
             actions.append(TraderAction(action_type="rest"))
-            self._legal_actions = actions
             return actions
         
         # Generate movement actions if we're in a settlement and not settled down
         if self.current_settlement_id and not self.is_settled:
-            # Get connected settlements
-            settlement_connections = self._get_settlement_connections()
-            
-            for connection in settlement_connections:
-                if connection.get("destination_id") == self.current_settlement_id:
-                    # Skip connections pointing to current location
-                    continue
-                    
-                actions.append(TraderAction(
-                    action_type="move",
-                    destination_id=connection.get("destination_id"),
-                    destination_name=connection.get("destination", "Unknown"),
-                    area_path=connection.get("path", [])
-                ))
+            actions.extend(self._get_move_actions(self.current_settlement_id))
         
         # Generate trade actions if we're in a settlement with market data
         if self.current_settlement_id and self._has_market_data():
             # Buy actions
             for item_id, price in self._get_items_for_sale().items():
                 if self.gold >= price:
-                    actions.append(TraderAction(
+                    action = TraderAction(
                         action_type="buy",
                         item_id=item_id,
                         price=price
-                    ))
+                    )
+                    action.estimated_profit = self._get_item_value(item_id) - price
+                    actions.append(action)
             
             # Sell actions
             for item_id, count in self.inventory.items():
                 if count > 0 and item_id in self._get_items_to_buy():
                     price = self._get_items_to_buy()[item_id]
-                    actions.append(TraderAction(
+                    action = TraderAction(
                         action_type="sell",
                         item_id=item_id,
                         price=price
-                    ))
+                    )
+                    action.estimated_profit = price - self._get_item_value(item_id)
+                    actions.append(action)
         
         # Generate settlement actions if conditions are right
         if self.current_settlement_id:
@@ -222,23 +299,66 @@ class TraderState:
         if not self.is_traveling:
             actions.append(TraderAction(action_type="rest"))
         
-        # Calculate action probabilities based on trader preferences
-        self._calculate_action_probabilities(actions)
-        
-        # Cache actions
-        self._legal_actions = actions
         return actions
     
+    def _get_move_actions(self, settlement_id: str) -> List[TraderAction]:
+        """
+        Get the move actions along the connections of a settlement.
+        
+        They only depend on the world snapshot, so they are built once per
+        settlement and search. Their risk level is the danger of the route
+        to the destination in the snapshot's ``route_table``, if it has one.
+        
+        Args:
+            settlement_id: ID of the settlement to leave
+            
+        Returns:
+            List of move actions (shared, do not modify)
+        """
+        route_table = self.world_data.get("route_table")
+        
+        def build() -> List[TraderAction]:
+            actions = []
+            for connection in self._get_settlement_connections(settlement_id):
+                if connection.get("destination_id") == settlement_id:
+                    # Skip connections pointing to current location
+                    continue
+                
+                action = TraderAction(
+                    action_type="move",
+                    destination_id=connection.get("destination_id"),
+                    destination_name=connection.get("destination", "Unknown"),
+                    area_path=connection.get("path", [])
+                )
+                route = route_table.route(settlement_id, action.destination_id) if route_table is not None else None
+                if route is not None:
+                    action.risk_level = min(route.danger_level / MAX_DANGER_LEVEL, 1.0)
+                actions.append(action)
+            return actions
+        
+        return self._get_action_cache().value(("moves", settlement_id), build)
+    
     def _calculate_settlement_score(self, settlement_id: str) -> float:
         """
         Calculate how desirable a settlement is for this trader.
         
+        Scores only depend on the trader's preferences and the world snapshot,
+        so they are computed once per search.
+        
         Args:
             settlement_id: ID of the settlement to evaluate
             
         Returns:
             Float score between 0 and 1, higher is better
         """
+        # The market bonus is read from the current settlement, so it is part of the key
+        return self._get_action_cache().value(
+            ("settlement_score", settlement_id, self.current_settlement_id),
+            lambda: self._compute_settlement_score(settlement_id)
+        )
+    
+    def _compute_settlement_score(self, settlement_id: str) -> float:
+        """Compute the score of ``_calculate_settlement_score`` without caching."""
         score = 0.5  # Base score
         
         # Preferred settlement bonus
@@ -261,16 +381,18 @@ class TraderState:
         # Cap at 1.0
         return min(1.0, score)
     
-    def _calculate_action_probabilities(self, actions: List[TraderAction]) -> None:
+    def _calculate_action_probabilities(self, actions: List[TraderAction]) -> Dict[TraderAction, float]:
         """
         Calculate probabilities for each action based on trader preferences.
         
         Args:
             actions: List of possible actions
+            
+        Returns:
+            Dictionary of action to probability
         """
         if not actions:
-            self._action_probabilities = {}
-            return
+            return {}
             
         probabilities = {}
         
@@ -331,7 +453,7 @@ class TraderState:
             for action in probabilities:
                 probabilities[action] /= total
         
-        self._action_probabilities = probabilities
+        return probabilities
     
     def apply_action(self, action: TraderAction) -> 'TraderState':
         """
@@ -343,9 +465,10 @@ class TraderState:
         Returns:
             A new TraderState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_trader_data = copy.deepcopy(self.trader_data)
-        new_state = TraderState(new_trader_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_trader_data = copy_entity_data(self.trader_data)
+        new_state = TraderState(new_trader_data, self.world_data)
+        new_state._action_cache = self._get_action_cache()
         
         # Increment simulation days
         new_state.simulation_days = self.simulation_days + action.time_cost
@@ -447,6 +570,51 @@ class TraderState:
         
         return new_state
     
+    def state_key(self) -> Tuple[Any, ...]:
+        """
+        Get a hashable key identifying equivalent states for the transposition table.
+        
+        States reached through different action orders (e.g. buy then travel, or
+        travel then buy) share a key when they agree on location, travel flags,
+        inventory, visited settlements, elapsed days and gold rounded down to
+        ``TRANSPOSITION_GOLD_BUCKET``.
+        
+        Returns:
+            Tuple of the state features that matter for planning
+        """
+        return (
+            self.current_settlement_id,
+            self.trader_data.get("destination_id"),
+            int(self.gold) // self.TRANSPOSITION_GOLD_BUCKET,
+            self.simulation_days,
+            self.is_traveling,
+            self.is_settled,
+            self.is_retired,
+            self.has_shop,
+            frozenset(self.inventory.items()),
+            frozenset(self.visited_settlements)
+        )
+    
+    def reuse_key(self) -> Tuple[Any, ...]:
+        """
+        Get the key that decides whether a cached search tree fits this state.
+        
+        Unlike ``state_key`` it leaves out elapsed days, travel flags and the
+        visited list, which differ between the simulated child state and the
+        trader's real state once the journey is over.
+        
+        Returns:
+            Tuple of location, gold bucket, inventory and status flags
+        """
+        return (
+            self.current_settlement_id,
+            int(self.gold) // self.TRANSPOSITION_GOLD_BUCKET,
+            self.is_settled,
+            self.is_retired,
+            self.has_shop,
+            frozenset(self.inventory.items())
+        )
+    
     def is_terminal(self) -> bool:
         """
         Check if this is a terminal state (simulation should end).
@@ -488,10 +656,85 @@ class TraderState:
         Returns:
             Float reward value (higher is better)
         """
-        reward = 0.0
+        return float(TraderState.batch_rewards([self])[0])
+    
+    @staticmethod
+    def batch_rewards(states: List['TraderState']) -> np.ndarray:
+        """
+        Calculate the rewards of many states at once.
+        
+        The terms every state has (wealth, inventory value, exploration and the
+        time penalty) are computed as NumPy vectors; only the situational
+        bonuses are evaluated per state.
         
-        # Reward for gold (basic wealth)
-        reward += self.gold * 0.1
+        Args:
+            states: States to evaluate (may belong to different traders)
+        
+        Returns:
+            Array with one reward per state
+        """
+        count = len(states)
+        gold = np.fromiter((state.gold for state in states), dtype=np.float64, count=count)
+        inventory_value = np.fromiter((state._get_inventory_value() for state in states),
+                                      dtype=np.float64, count=count)
+        visited = np.fromiter((len(state.visited_settlements) for state in states),
+                              dtype=np.float64, count=count)
+        days = np.fromiter((state.simulation_days for state in states), dtype=np.float64, count=count)
+        situational = np.fromiter((state._get_situational_reward() for state in states),
+                                  dtype=np.float64, count=count)
+        
+        # Reward for gold (basic wealth) and valuable inventory
+        rewards = gold * 0.1 + inventory_value * 0.05
+        
+        # Reward for exploring new settlements
+        rewards += visited * 2.0
+        
+        # Penalty for long simulations (encourages efficiency)
+        rewards -= days * 0.1
+        
+        return rewards + situational
+    
+    def value_features(self) -> List[float]:
+        """
+        Get the features a learned value model estimates this state's worth from.
+        
+        Returns:
+            Current reward, gold, inventory value, visited and unvisited
+            neighbouring settlements, elapsed days, status flags and the
+            current settlement's score
+        """
+        unvisited = 0
+        if self.current_settlement_id and not self.is_settled:
+            unvisited = sum(1 for action in self._get_move_actions(self.current_settlement_id)
+                            if action.destination_id not in self.visited_settlements)
+        settlement_score = (self._calculate_settlement_score(self.current_settlement_id)
+                            if self.current_settlement_id else 0.0)
+        return [
+            self.get_reward(),
+            float(self.gold),
+            self._get_inventory_value(),
+            float(len(self.visited_settlements)),
+            float(unvisited),
+            float(self.simulation_days),
+            float(self.is_settled),
+            float(self.has_shop),
+            float(self.is_retired),
+            settlement_score
+        ]
+    
+    def _get_inventory_value(self) -> float:
+        """Get the total base value of the inventory."""
+        return sum(self._get_item_value(item_id) * count 
+                   for item_id, count in self.inventory.items())
+    
+    def _get_situational_reward(self) -> float:
+        """
+        Calculate the reward terms that depend on the trader's status and location.
+        
+        Returns:
+            Float reward value
+        """
+        reward = 0.0
         
         # Reward for status achievements
         if self.is_retired:
@@ -512,11 +755,6 @@ class TraderState:
             settlement_score = self._calculate_settlement_score(self.current_settlement_id)
             reward += 50.0 * settlement_score
         
-        # Reward for valuable inventory
-        inventory_value = sum(self._get_item_value(item_id) * count 
-                             for item_id, count in self.inventory.items())
-        reward += inventory_value * 0.05
-        
         # Reward for being in preferred location/biome
         if self.current_settlement_id in self.preferred_settlements:
             reward += 10.0
@@ -526,20 +764,12 @@ class TraderState:
         if settlement_biome in self.preferred_biomes:
             reward += 5.0
         
-        # Reward for exploring new settlements
-        exploration_reward = len(self.visited_settlements) * 2.0
-        reward += exploration_reward
-        
         # Reward for reaching destination
         if self.destination_id == self.current_settlement_id and self.destination_id is not None:
             reward += 20.0
         
-        # Penalty for long simulations (encourages efficiency)
-        reward -= self.simulation_days * 0.1
-        
         # Add life goal progress reward
-        life_goal_reward = self._get_life_goal_reward()
-        reward += life_goal_reward
+        reward += self._get_life_goal_reward()
         
         return reward
         
@@ -572,19 +802,23 @@ class TraderState:
         # Scale for MCTS reward (typically 0-10 range)
         return avg_progress * 5.0  # Maximum contribution of 5.0 to reward
     
-    def _get_settlement_connections(self) -> List[Dict[str, Any]]:
+    def _get_settlement_connections(self, settlement_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Get connections from the current settlement.
+        Get connections from a settlement.
+        
+        Args:
+            settlement_id: ID of the settlement, or None for the current settlement
         
         Returns:
             List of connection dictionaries
         """
-        if not self.current_settlement_id:
+        settlement_id = settlement_id or self.current_settlement_id
+        if not settlement_id:
             return []
             
         # Get the settlement data from the world data
         settlements = self.world_data.get("settlements", {})
-        current_settlement = settlements.get(self.current_settlement_id, {})
+        current_settlement = settlements.get(settlement_id, {})
         
         # Get connections - format can vary based on your data structure
         connections = current_settlement.get("connections", [])
@@ -714,12 +948,13 @@ class TraderState:
         
     # Methods for compatibility with the TraderEntity interface
     @classmethod
-    def from_trader_entity(cls, trader):
+    def from_trader_entity(cls, trader, world_data: Optional[Dict[str, Any]] = None):
         """
         Create a TraderState from a Trader entity.
         
         Args:
             trader: The trader entity
+            world_data: Optional world snapshot for the state
             
         Returns:
             TraderState: A new state object representing the trader
@@ -727,8 +962,9 @@ class TraderState:
         # Convert trader entity to data dictionary
         trader_data = trader.to_dict() if hasattr(trader, 'to_dict') else {}
         
-        # If to_dict isn't available, get properties directly
-        if not trader_data and hasattr(trader, 'get_property'):
+        # If to_dict isn't available or nests the properties (as Trader.to_dict does),
+        # get properties directly
+        if (not trader_data or "properties" in trader_data) and hasattr(trader, 'get_property'):
             trader_data = {
                 "trader_id": trader.trader_id,
                 "name": trader.get_property("name"),
@@ -746,4 +982,4 @@ class TraderState:
                 "life_goals": trader.get_property("life_goals", [])
             }
             
-        return cls(trader_data)
\ No newline at end of file
+        return cls(trader_data, world_data)
\ No newline at end of file
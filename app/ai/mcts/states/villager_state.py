@@ -8,7 +8,9 @@ state transition, and reward calculation for villager decision making.
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
+
+from app.ai.mcts.transition import copy_entity_data
+from app.ai.mcts.action_cache import ActionCache, freeze
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +107,7 @@ class VillagerState:
         self.villager_data = villager_data
         self.world_data = world_data or {}
         self._legal_actions = None
+        self._action_cache: Optional[ActionCache] = None  # Shared by all states of a search
         
         # Cache frequently used values for performance
         self.villager_id = villager_data.get("id")
@@ -136,6 +139,44 @@ class VillagerState:
         if self._legal_actions is not None:
             return self._legal_actions
         
+        # States of a search with the same action key share one action list
+        self._legal_actions = self._get_action_cache().actions(self._action_key(), self._generate_legal_actions)
+        return self._legal_actions
+    
+    def _get_action_cache(self) -> ActionCache:
+        """Get the action cache of the search, creating it for a root state."""
+        if self._action_cache is None:
+            self._action_cache = ActionCache()
+        return self._action_cache
+    
+    def _action_key(self) -> Optional[Tuple[Any, ...]]:
+        """
+        Get the key of everything action generation and scoring reads from the villager.
+        
+        Only the hour of the simulation time matters. Home, work, profession and
+        daily routine are not part of the key: they do not change within a search.
+        
+        Returns:
+            Hashable key, or None if needs, skills or relationships cannot be hashed
+        """
+        needs = freeze(self.needs)
+        skills = freeze(self.skills)
+        relationships = freeze(self.relationships)
+        if needs is None or skills is None or relationships is None:
+            return None
+        return (
+            self.simulation_time % 24,
+            self.current_location_id,
+            self.energy,
+            self.happiness,
+            self.gold,
+            needs,
+            skills,
+            relationships
+        )
+    
+    def _generate_legal_actions(self) -> List[VillagerAction]:
+        """Generate and score the legal actions of this state."""
         actions = []
         
         # Add actions according to time of day and daily routine
@@ -211,8 +252,6 @@ class VillagerState:
         # Calculate action scores based on villager state
         self._calculate_action_scores(actions)
         
-        # Cache actions
-        self._legal_actions = actions
         return actions
     
     def _get_routine_action(self, hour_of_day: int) -> Optional[VillagerAction]:
@@ -612,9 +651,10 @@ class VillagerState:
         Returns:
             A new VillagerState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_villager_data = copy.deepcopy(self.villager_data)
-        new_state = VillagerState(new_villager_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_villager_data = copy_entity_data(self.villager_data)
+        new_state = VillagerState(new_villager_data, self.world_data)
+        new_state._action_cache = self._get_action_cache()
         
         # Apply the action effect based on type
         if action.action_type == "work":
@@ -21,9 +21,10 @@ Additional functions to consider adding:
 from typing import List, Dict, Any, Optional, Set, Tuple
 import random
 import logging
-import copy
 import json
 
+from app.ai.mcts.transition import copy_entity_data
+
 logger = logging.getLogger(__name__)
 
 class TraderAction:
@@ -117,6 +118,9 @@ class TraderState:
     including information about the trader, the world, and available actions.
     """
     
+    # Gold is compared in buckets of this size when matching transpositions
+    TRANSPOSITION_GOLD_BUCKET = 50
+    
     def __init__(self, trader_data: Dict[str, Any], world_data: Optional[Dict[str, Any]] = None):
         """
         Initialize trader state.
@@ -356,9 +360,9 @@ class TraderState:
         Returns:
             A new TraderState resulting from the action
         """
-        # Create a deep copy of the current state
-        new_trader_data = copy.deepcopy(self.trader_data)
-        new_state = TraderState(new_trader_data, copy.deepcopy(self.world_data))
+        # Copy the entity data; the read-only world snapshot is shared
+        new_trader_data = copy_entity_data(self.trader_data)
+        new_state = TraderState(new_trader_data, self.world_data)
         
         # Increment simulation days
         new_state.simulation_days = self.simulation_days + action.time_cost
@@ -460,6 +464,31 @@ class TraderState:
         
         return new_state
     
+    def state_key(self) -> Tuple[Any, ...]:
+        """
+        Get a hashable key identifying equivalent states for the transposition table.
+        
+        States reached through different action orders (e.g. buy then travel, or
+        travel then buy) share a key when they agree on location, travel flags,
+        inventory, visited settlements, elapsed days and gold rounded down to
+        ``TRANSPOSITION_GOLD_BUCKET``.
+        
+        Returns:
+            Tuple of the state features that matter for planning
+        """
+        return (
+            self.current_settlement_id,
+            self.trader_data.get("destination_id"),
+            int(self.gold) // self.TRANSPOSITION_GOLD_BUCKET,
+            self.simulation_days,
+            self.is_traveling,
+            self.is_settled,
+            self.is_retired,
+            self.has_shop,
+            frozenset(self.inventory.items()),
+            frozenset(self.visited_settlements)
+        )
+    
     def is_terminal(self) -> bool:
         """
         Check if this is a terminal state (simulation should end).
@@ -0,0 +1,88 @@
+"""Copy-on-write state transitions for MCTS states.
+
+Every MCTS state holds two kinds of data: the entity's own data (trader,
+animal, faction, ...), which actions modify, and the world snapshot, which
+is read-only for the duration of a search. ``apply_action`` used to
+``copy.deepcopy`` both on every simulated step, so the world snapshot was
+copied thousands of times per decision.
+
+The shared transition protocol is:
+
+- the entity data of the new state is copied with ``copy_entity_data``
+- the world snapshot is passed to the new state by reference, so parent and
+  child states share it
+- the few actions that do write to the world (e.g. item durability in
+  ``EquipmentState``) first call ``copy_world_path``, which copies only the
+  dicts on the written path and keeps sharing everything else
+- states that cache their legal actions hand the search's ``ActionCache``
+  (``app.ai.mcts.action_cache``) to the new state the same way
+
+World snapshots must therefore never be modified in place by a state.
+"""
+
+from typing import Any, Dict, Iterable
+import copy
+
+# Leaf types that can be shared between states without copying
+_IMMUTABLE_TYPES = frozenset((str, int, float, bool, complex, bytes, type(None)))
+
+
+def copy_entity_data(data: Any) -> Any:
+    """
+    Copy entity data for a new state.
+    
+    Dicts, lists and sets are copied recursively and immutable leaves are
+    shared, which is much cheaper than ``copy.deepcopy`` for the plain JSON-like
+    data the states use. Any other object falls back to ``copy.deepcopy``.
+    
+    Args:
+        data: Entity data (usually a dict)
+    
+    Returns:
+        An independent copy of the data
+    """
+    data_type = type(data)
+    if data_type in _IMMUTABLE_TYPES:
+        return data
+    if data_type is dict:
+        return {key: value if type(value) in _IMMUTABLE_TYPES else copy_entity_data(value)
+                for key, value in data.items()}
+    if data_type is list:
+        return [value if type(value) in _IMMUTABLE_TYPES else copy_entity_data(value)
+                for value in data]
+    if data_type is tuple:
+        return tuple(copy_entity_data(value) for value in data)
+    if data_type is set:
+        return set(data)
+    return copy.deepcopy(data)
+
+
+def copy_world_path(world_data: Dict[str, Any],
+                    collection: str,
+                    entry_keys: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Make some entries of a world collection writable without copying the world.
+    
+    Copies the top-level world dict, ``world_data[collection]`` and each of the
+    given entries of that collection. Everything else stays shared with the
+    original snapshot.
+    
+    Args:
+        world_data: The shared world snapshot
+        collection: Top-level key of the collection to write to (e.g. "items")
+        entry_keys: Keys of the entries in the collection that will be modified
+    
+    Returns:
+        A new world dict whose given entries can be modified safely
+    """
+    new_world = dict(world_data)
+    entries = new_world.get(collection)
+    if not isinstance(entries, dict):
+        return new_world
+    
+    entries = dict(entries)
+    for key in entry_keys:
+        if isinstance(entries.get(key), dict):
+            entries[key] = dict(entries[key])
+    new_world[collection] = entries
+    return new_world
@@ -0,0 +1,166 @@
+"""Transposition table for Monte Carlo Tree Search.
+
+Different action orders often reach equivalent states (a trader at the same
+settlement with the same gold bucket on the same day offset). The
+``TranspositionTable`` maps a hashable state key to a shared slot of visit and
+value statistics, so every tree node reaching an equivalent state reads and
+updates the same numbers within a search.
+
+States opt in by implementing ``state_key()``, which returns a hashable key or
+None for states that should not be shared.
+"""
+
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+from collections import OrderedDict
+import numpy as np
+
+# Slot value for "no transposition entry"
+NO_SLOT = -1
+
+
+class TranspositionTable:
+    """
+    LRU-bounded table of statistics shared by equivalent states.
+    
+    Statistics live in fixed-size NumPy arrays indexed by slot. When the table
+    is full, the least recently used key is evicted and its slot is reused for
+    the new key. Each slot has a generation counter that is bumped on reuse,
+    so holders of a stale ``(slot, generation)`` reference can detect that the
+    entry they pointed to is gone.
+    """
+    
+    def __init__(self, max_entries: int):
+        """
+        Initialize an empty table.
+        
+        Args:
+            max_entries: Maximum number of state keys to keep
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        
+        self.max_entries = max_entries
+        self.visits = np.zeros(max_entries, dtype=np.int64)
+        self.value_sums = np.zeros(max_entries, dtype=np.float64)
+        self.generations = np.zeros(max_entries, dtype=np.int64)
+        self._slots: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._slot_keys: list = [None] * max_entries
+        
+        # Counters for decision stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self) -> int:
+        return len(self._slots)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+    
+    def entry(self, key: Hashable) -> Tuple[int, int]:
+        """
+        Get the slot of a key, creating it if needed.
+        
+        Args:
+            key: Hashable state key
+        
+        Returns:
+            Tuple of (slot, generation) identifying the entry
+        """
+        slot = self._slots.get(key)
+        if slot is not None:
+            self.hits += 1
+            self._slots.move_to_end(key)
+            return slot, int(self.generations[slot])
+        
+        self.misses += 1
+        if len(self._slots) < self.max_entries:
+            slot = len(self._slots)
+        else:
+            # Evict the least recently used key and reuse its slot
+            _, slot = self._slots.popitem(last=False)
+            self.evictions += 1
+            self.generations[slot] += 1
+            self.visits[slot] = 0
+            self.value_sums[slot] = 0.0
+        
+        self._slots[key] = slot
+        self._slot_keys[slot] = key
+        return slot, int(self.generations[slot])
+    
+    def is_valid(self, slot: int, generation: int) -> bool:
+        """Check if a (slot, generation) reference still points to a live entry."""
+        return slot != NO_SLOT and self.generations[slot] == generation
+    
+    def mean_value(self, slot: int) -> Optional[float]:
+        """Get the average value of an entry, or None if it has no visits."""
+        if self.visits[slot] == 0:
+            return None
+        return float(self.value_sums[slot] / self.visits[slot])
+    
+    def valid_mask(self, slots: np.ndarray, generations: np.ndarray) -> np.ndarray:
+        """
+        Check a batch of (slot, generation) references.
+        
+        Args:
+            slots: Slot per node (NO_SLOT for nodes without an entry)
+            generations: Generation per node
+        
+        Returns:
+            Boolean array, True where the reference points to a live entry
+        """
+        safe_slots = np.where(slots == NO_SLOT, 0, slots)
+        return (slots != NO_SLOT) & (self.generations[safe_slots] == generations)
+    
+    def shared_stats(self,
+                     slots: np.ndarray,
+                     generations: np.ndarray,
+                     visits: np.ndarray,
+                     value_sums: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Replace node statistics with the shared entry statistics where available.
+        
+        Args:
+            slots: Slot per node (NO_SLOT for nodes without an entry)
+            generations: Generation per node
+            visits: Visit counts of the nodes themselves
+            value_sums: Value sums of the nodes themselves
+        
+        Returns:
+            Tuple of (visits, value_sums) arrays to use for selection
+        """
+        valid = self.valid_mask(slots, generations)
+        safe_slots = np.where(valid, slots, 0)
+        return (np.where(valid, self.visits[safe_slots], visits),
+                np.where(valid, self.value_sums[safe_slots], value_sums))
+    
+    def update(self, slots: Sequence[int], generations: Sequence[int], reward: float) -> None:
+        """
+        Add a simulation result to the live entries among the given references.
+        
+        Args:
+            slots: Slots of the nodes on the simulated path
+            generations: Generations of those references
+            reward: Reward of the simulation
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        generations = np.asarray(generations, dtype=np.int64)
+        live = slots[self.valid_mask(slots, generations)]
+        if len(live) == 0:
+            return
+        
+        # The same state can appear twice on a path, so accumulate with add.at
+        np.add.at(self.visits, live, 1)
+        np.add.at(self.value_sums, live, reward)
+        for slot in np.unique(live):
+            self._slots.move_to_end(self._slot_keys[slot])
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get usage counters for decision stats."""
+        return {
+            "entries": len(self._slots),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
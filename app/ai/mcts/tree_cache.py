@@ -0,0 +1,298 @@
+"""Subtree reuse between consecutive MCTS decisions of the same entity.
+
+A search normally throws its tree away once the decision is made, and the
+next decision of the same entity starts from an empty tree even though the
+world barely changed. ``TreeCache`` keeps, per entity, the subtree below the
+chosen action (re-rooted with ``ArrayTree.subtree``) so the next search
+starts with the statistics already gathered for that position.
+
+A cached tree is only reused when
+
+- the world snapshot version is the one it was searched on, and
+- the entity's new root state has the reuse key that the chosen child state
+  had, i.e. the entity actually ended up where the search expected.
+
+The reuse key is the state's ``reuse_key()`` hook (falling back to
+``state_key()``); states without either are never reused. The cache is an
+LRU bounded to ``max_entries`` trees. With a Redis client, evicted trees are
+spilled to Redis and read back on an in-process miss, so a worker that
+restarts or serves many entities keeps its trees.
+
+Spilled trees are never pickled, since anyone who can write to the Redis
+server could then run code in every worker. A spill is a JSON header (world
+version, reuse key and actions) followed by the node arrays saved with
+``np.savez``, which is read back with ``allow_pickle=False``. Actions are
+stored as JSON values, or with ``to_dict``/``from_dict`` of the cache's
+``action_type``; entries that cannot be encoded this way are not spilled.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import io
+import json
+import logging
+import numpy as np
+
+from app.ai.mcts.array_tree import NODE_ARRAYS, ArrayTree
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the Redis keys holding spilled trees
+REDIS_KEY_PREFIX = "mcts:tree:"
+
+# World snapshot sections that states plan with
+SNAPSHOT_SECTIONS = ("locations", "settlements", "markets", "items")
+
+
+def default_reuse_key(state: Any) -> Optional[Hashable]:
+    """Use the state's ``reuse_key()`` hook, or its ``state_key()`` if it has none."""
+    for hook in ("reuse_key", "state_key"):
+        key_fn = getattr(state, hook, None)
+        if callable(key_fn):
+            return key_fn()
+    return None
+
+
+def encode_json_key(value: Any) -> Any:
+    """
+    Encode a reuse key (or plain action) as JSON, tagging tuples and sets.
+    
+    Args:
+        value: None, bool, int, float, str, or tuples/lists/frozensets of those
+    
+    Returns:
+        JSON-serializable value that ``decode_json_key`` turns back into ``value``
+    
+    Raises:
+        TypeError: If the value contains anything else
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, tuple):
+        return {"tuple": [encode_json_key(item) for item in value]}
+    if isinstance(value, list):
+        return {"list": [encode_json_key(item) for item in value]}
+    if isinstance(value, frozenset):
+        items = [encode_json_key(item) for item in value]
+        return {"frozenset": sorted(items, key=lambda item: json.dumps(item, sort_keys=True))}
+    raise TypeError(f"Cannot encode {type(value).__name__} as a JSON key")
+
+
+def decode_json_key(value: Any) -> Any:
+    """Decode a value written by ``encode_json_key``."""
+    if isinstance(value, dict):
+        if len(value) != 1:
+            raise ValueError("Malformed JSON key")
+        tag, items = next(iter(value.items()))
+        decoded = [decode_json_key(item) for item in items]
+        if tag == "tuple":
+            return tuple(decoded)
+        if tag == "list":
+            return decoded
+        if tag == "frozenset":
+            return frozenset(decoded)
+        raise ValueError(f"Unknown JSON key tag: {tag}")
+    return value
+
+
+def snapshot_version(world_data: Dict[str, Any], sections: Tuple[str, ...] = SNAPSHOT_SECTIONS) -> str:
+    """
+    Fingerprint the planning-relevant content of a world snapshot.
+    
+    The game day and season are left out on purpose: they advance every tick
+    without changing what the states plan with.
+    
+    Args:
+        world_data: World snapshot
+        sections: Top-level keys of the snapshot to include
+    
+    Returns:
+        Hex digest that changes whenever one of the sections changes
+    """
+    content = {section: world_data.get(section) for section in sections}
+    encoded = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class TreeCache:
+    """
+    LRU cache of re-rooted search trees, keyed by entity.
+    
+    Entries are ``(world_version, reuse_key, tree)``. ``take`` removes the
+    entry it returns: the search grows that tree and ``put`` stores the next
+    subtree, so a tree is never shared by two searches.
+    """
+    
+    def __init__(self,
+                 max_entries: int = 1000,
+                 reuse_key_fn: Optional[Callable[[Any], Optional[Hashable]]] = None,
+                 redis_client=None,
+                 redis_ttl_seconds: int = 3600,
+                 action_type: Optional[type] = None):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_entries: Maximum number of trees kept in process
+            reuse_key_fn: Function returning the reuse key of a state, or None
+                to use ``default_reuse_key``
+            redis_client: Optional Redis client that evicted trees are spilled to
+            redis_ttl_seconds: Expiry of spilled trees
+            action_type: Action class whose ``to_dict``/``from_dict`` store the
+                actions of spilled trees, or None if actions are plain JSON values
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        
+        self.max_entries = max_entries
+        self.reuse_key_fn = reuse_key_fn or default_reuse_key
+        self.redis_client = redis_client
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.action_type = action_type
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Hashable, ArrayTree]]" = OrderedDict()
+        
+        # Counters for decision stats
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.spills = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, entity_key: Hashable) -> bool:
+        return entity_key in self._entries
+    
+    def take(self, entity_key: Hashable, world_version: Any, root_state: Any) -> Optional[ArrayTree]:
+        """
+        Remove and return the cached tree of an entity if it can be reused.
+        
+        Args:
+            entity_key: Key of the entity (e.g. its ID)
+            world_version: Version of the world snapshot the search will use
+            root_state: Root state of the new search
+        
+        Returns:
+            The cached tree rooted at ``root_state``, or None
+        """
+        entry = self._entries.pop(entity_key, None)
+        if entry is None:
+            entry = self._load_spilled(entity_key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        cached_version, cached_key, tree = entry
+        reuse_key = self.reuse_key_fn(root_state)
+        if cached_version != world_version or reuse_key is None or cached_key != reuse_key:
+            self.invalidations += 1
+            return None
+        
+        self.hits += 1
+        return tree
+    
+    def put(self, entity_key: Hashable, world_version: Any, child_state: Any, tree: ArrayTree) -> None:
+        """
+        Store the subtree of the chosen action for the entity's next decision.
+        
+        Args:
+            entity_key: Key of the entity
+            world_version: Version of the world snapshot the tree was searched on
+            child_state: State reached by the chosen action (the subtree's root)
+            tree: Re-rooted subtree
+        """
+        reuse_key = self.reuse_key_fn(child_state)
+        if reuse_key is None:
+            self.discard(entity_key)
+            return
+        
+        self._entries[entity_key] = (world_version, reuse_key, tree)
+        self._entries.move_to_end(entity_key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._spill(evicted_key, evicted)
+    
+    def discard(self, entity_key: Hashable) -> None:
+        """Drop the cached tree of an entity, in process and in Redis."""
+        self._entries.pop(entity_key, None)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.delete(self._redis_key(entity_key))
+            except Exception as e:
+                logger.warning(f"Could not delete spilled MCTS tree of {entity_key}: {str(e)}")
+    
+    def clear(self) -> None:
+        """Drop all in-process trees."""
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get usage counters for decision stats."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "spills": self.spills
+        }
+    
+    @staticmethod
+    def _redis_key(entity_key: Hashable) -> str:
+        return f"{REDIS_KEY_PREFIX}{entity_key}"
+    
+    def _spill(self, entity_key: Hashable, entry: Tuple[Any, Hashable, ArrayTree]) -> None:
+        """Write an evicted entry to Redis, if configured."""
+        if self.redis_client is None:
+            return
+        try:
+            self.redis_client.setex(self._redis_key(entity_key), self.redis_ttl_seconds, self._encode_entry(entry))
+            self.spills += 1
+        except Exception as e:
+            logger.warning(f"Could not spill MCTS tree of {entity_key} to Redis: {str(e)}")
+    
+    def _load_spilled(self, entity_key: Hashable) -> Optional[Tuple[Any, Hashable, ArrayTree]]:
+        """Read and remove a spilled entry from Redis, if configured."""
+        if self.redis_client is None:
+            return None
+        try:
+            key = self._redis_key(entity_key)
+            data = self.redis_client.get(key)
+            if data is None:
+                return None
+            self.redis_client.delete(key)
+            return self._decode_entry(data)
+        except Exception as e:
+            logger.warning(f"Could not load spilled MCTS tree of {entity_key} from Redis: {str(e)}")
+            return None
+    
+    def _encode_entry(self, entry: Tuple[Any, Hashable, ArrayTree]) -> bytes:
+        """Serialize an entry as a JSON header line followed by the npz node arrays."""
+        world_version, reuse_key, tree = entry
+        if self.action_type is not None:
+            actions = [action.to_dict() for action in tree.actions]
+        else:
+            actions = [encode_json_key(action) for action in tree.actions]
+        header = {
+            "world_version": encode_json_key(world_version),
+            "reuse_key": encode_json_key(reuse_key),
+            "actions": actions
+        }
+        
+        arrays = io.BytesIO()
+        np.savez(arrays, **tree.to_arrays())
+        return json.dumps(header).encode("utf-8") + b"\n" + arrays.getvalue()
+    
+    def _decode_entry(self, data: bytes) -> Tuple[Any, Hashable, ArrayTree]:
+        """Rebuild an entry written by ``_encode_entry``."""
+        header_bytes, _, array_bytes = data.partition(b"\n")
+        header = json.loads(header_bytes.decode("utf-8"))
+        if self.action_type is not None:
+            actions = [self.action_type.from_dict(action) for action in header["actions"]]
+        else:
+            actions = [decode_json_key(action) for action in header["actions"]]
+        
+        with np.load(io.BytesIO(array_bytes), allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in NODE_ARRAYS}
+        tree = ArrayTree.from_arrays(arrays, actions)
+        return decode_json_key(header["world_version"]), decode_json_key(header["reuse_key"]), tree
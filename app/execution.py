@@ -0,0 +1,281 @@
+# app/execution.py
+"""Bounded execution of blocking and CPU-bound work for the API.
+
+Most endpoints are ``async def`` but use the synchronous SQLAlchemy session,
+and the MCTS decision endpoint runs a CPU-heavy search, so a single request
+could block the event loop and hold up every other request. Work is routed
+to two bounded pools instead:
+
+- the "blocking" thread pool runs database work; its size matches the
+  connection pool of the engine (``pool_size + max_overflow``), so threads
+  do not queue for connections
+- the "cpu" process pool runs searches and other CPU-bound functions; their
+  arguments and results must be picklable
+
+Each pool admits at most ``max_workers + max_queued`` calls at once; further
+calls fail with ``PoolOverloaded``, answered with 503 and a Retry-After
+header. A call that does not finish within the pool's ``timeout`` fails with
+``PoolTimeout``, answered with 504. A timed-out call keeps its slot until it
+has actually finished, so work that cannot be interrupted still counts
+against the limit.
+
+Routers are created with ``route_class=OffloadedRoute``, which runs each
+endpoint in the blocking pool. The sessions of ``get_db`` and ``get_read_db``
+parameters are opened and closed by the pool thread itself, since a call that
+timed out keeps running after the request has ended and its dependencies
+have been cleaned up. Endpoints that do their own offloading, e.g.
+to send a search to the cpu pool, or that use the async session of
+``database.connection.get_async_db``, are marked with ``runs_on_event_loop``;
+routers whose endpoints all use the async session keep the default route class.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import functools
+import inspect
+import logging
+import multiprocessing
+import os
+import threading
+
+from fastapi import FastAPI, params
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from database.connection import POOL_SETTINGS, ReadSessionLocal, SessionLocal, get_db, get_read_db, pool_capacity
+
+logger = logging.getLogger(__name__)
+
+# Options per pool
+EXECUTION_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "blocking": {
+        # Connections the engine can open; 15 threads when PgBouncer does the pooling
+        "max_workers": pool_capacity(POOL_SETTINGS) or 15,
+        "max_queued": 60,   # Calls waiting for a thread before new calls are refused
+        "timeout": 30.0     # Seconds a call may take
+    },
+    "cpu": {
+        "max_workers": os.cpu_count() or 1,
+        "max_queued": 2 * (os.cpu_count() or 1),
+        "timeout": 10.0
+    }
+}
+
+# Seconds clients are asked to wait before retrying a refused call
+RETRY_AFTER = 1
+
+# Session dependencies that offloaded endpoints get from their pool thread,
+# with the session factory used instead
+SESSION_DEPENDENCIES: Dict[Callable, Callable] = {
+    get_db: SessionLocal,
+    get_read_db: ReadSessionLocal
+}
+
+
+class PoolOverloaded(Exception):
+    """Raised when a pool has no room for another call."""
+
+
+class PoolTimeout(Exception):
+    """Raised when a call does not finish within its timeout."""
+
+
+class BoundedPool:
+    """
+    An executor that admits a limited number of calls and times them out.
+    """
+
+    def __init__(self,
+                 name: str,
+                 create_executor: Callable[[int], Executor],
+                 max_workers: int,
+                 max_queued: int,
+                 timeout: float):
+        """
+        Initialize the pool; its executor is created on first use.
+
+        Args:
+            name: Pool name, used in errors
+            create_executor: Creates the executor for a number of workers
+            max_workers: Number of workers of the executor
+            max_queued: Calls admitted while all workers are busy
+            timeout: Default seconds a call may take
+        """
+        self.name = name
+        self.create_executor = create_executor
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.in_flight = 0
+
+        self._executor: Optional[Executor] = None
+        self._executor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a function in the pool.
+
+        Args:
+            fn: Function to run
+            *args: Positional arguments of the function
+            timeout: Seconds the call may take; the pool's timeout if None
+            **kwargs: Keyword arguments of the function
+
+        Returns:
+            The function's result
+
+        Raises:
+            PoolOverloaded: If the pool has no room for the call
+            PoolTimeout: If the call does not finish in time
+        """
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queued:
+                raise PoolOverloaded(f"The {self.name} pool is overloaded ({self.in_flight} calls in flight)")
+            self.in_flight += 1
+
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+        limit = timeout if timeout is not None else self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), limit)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"{getattr(fn, '__name__', 'Call')} did not finish within {limit:.0f}s")
+
+    def shutdown(self) -> None:
+        """Shut the executor down, waiting for running calls."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> Executor:
+        """Get the executor of this process (a new one after a fork)."""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = self.create_executor(self.max_workers)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _release(self) -> None:
+        """Free the slot of a finished call."""
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _thread_pool(max_workers: int) -> Executor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+
+
+def _process_pool(max_workers: int) -> Executor:
+    # The API process runs threads, so workers are spawned rather than forked
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+pools: Dict[str, BoundedPool] = {
+    "blocking": BoundedPool("blocking", _thread_pool, **EXECUTION_SETTINGS["blocking"]),
+    "cpu": BoundedPool("cpu", _process_pool, **EXECUTION_SETTINGS["cpu"])
+}
+
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    """Run blocking (database) work in the blocking pool; see BoundedPool.run."""
+    return await pools["blocking"].run(fn, *args, **kwargs)
+
+
+async def run_cpu_bound(fn: Callable, *args, **kwargs) -> Any:
+    """Run a picklable CPU-bound function in the cpu pool; see BoundedPool.run."""
+    return await pools["cpu"].run(fn, *args, **kwargs)
+
+
+def runs_on_event_loop(endpoint: Callable) -> Callable:
+    """Mark an async endpoint that offloads its own blocking work, so OffloadedRoute runs it as is."""
+    endpoint.runs_on_event_loop = True
+    return endpoint
+
+
+def offload(endpoint: Callable) -> Callable:
+    """
+    Wrap an endpoint to run in the blocking pool.
+
+    Synchronous endpoints are called in a pool thread; async endpoints, whose
+    services do synchronous database work, are run to completion on an event
+    loop of their own in a pool thread. The wrapper keeps the endpoint's
+    signature, so FastAPI resolves its parameters as before, except for
+    parameters depending on a session dependency (SESSION_DEPENDENCIES): the
+    pool thread opens those sessions and closes them when the call returns,
+    even if the request timed out long before.
+
+    Args:
+        endpoint: Endpoint function
+
+    Returns:
+        An async endpoint
+    """
+    if getattr(endpoint, "runs_on_event_loop", False) or getattr(endpoint, "offloaded", False):
+        return endpoint
+
+    signature = inspect.signature(endpoint)
+    sessions = {
+        name: parameter.default.dependency
+        for name, parameter in signature.parameters.items()
+        if isinstance(parameter.default, params.Depends) and parameter.default.dependency in SESSION_DEPENDENCIES
+    }
+    is_async = asyncio.iscoroutinefunction(endpoint)
+
+    def call(**kwargs):
+        opened = {name: SESSION_DEPENDENCIES[dependency]() for name, dependency in sessions.items()}
+        try:
+            if is_async:
+                return asyncio.run(endpoint(**kwargs, **opened))
+            return endpoint(**kwargs, **opened)
+        finally:
+            for session in opened.values():
+                session.close()
+
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        return await run_blocking(call, **kwargs)
+
+    wrapper.__signature__ = signature.replace(
+        parameters=[parameter for name, parameter in signature.parameters.items() if name not in sessions]
+    )
+    wrapper.offloaded = True
+    return wrapper
+
+
+class OffloadedRoute(APIRoute):
+    """Route whose endpoint runs in the blocking pool (see offload)."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, endpoint=offload(endpoint), **kwargs)
+
+
+def register_execution(app: FastAPI) -> None:
+    """
+    Answer overloaded pools and timed-out calls, and shut the pools down with the app.
+
+    Args:
+        app: FastAPI application
+    """
+    @app.exception_handler(PoolOverloaded)
+    async def pool_overloaded(request, exc: PoolOverloaded):
+        logger.warning(str(exc))
+        return JSONResponse(status_code=503, content={"detail": str(exc)},
+                            headers={"Retry-After": str(RETRY_AFTER)})
+
+    @app.exception_handler(PoolTimeout)
+    async def pool_timeout(request, exc: PoolTimeout):
+        logger.warning(str(exc))
+        return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+    @app.on_event("shutdown")
+    def shutdown_pools():
+        for pool in pools.values():
+            pool.shutdown()
@@ -0,0 +1,230 @@
+# app/game_state/action_log_partitions.py
+"""Monthly partitions and retention of the entity action log.
+
+``entity_action_log`` is range-partitioned by the month of its timestamp.
+Each month has a partition named ``entity_action_log_yYYYYmMM``; rows outside
+every monthly partition land in ``entity_action_log_default``. The
+``(entity_id, timestamp, log_id)`` and ``(world_id, game_day)`` indexes are
+defined on the parent table and so exist on every partition.
+
+``maintain_action_log`` runs once a day:
+
+- it creates the partitions of the current month and the next
+  ``months_ahead`` months, moving rows that already landed in the default
+  partition into them
+- partitions whose month ended more than ``retention_days`` ago are rolled
+  up into ``entity_action_daily_summary`` (action counts per day, entity and
+  action type) and dropped; expired rows of the default partition are rolled
+  up and deleted
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Options of the action log maintenance
+DEFAULT_RETENTION_SETTINGS: Dict[str, Any] = {
+    "retention_days": 90,  # Rows older than this are rolled up and dropped
+    "months_ahead": 2      # Monthly partitions created in advance
+}
+
+PARENT_TABLE = "entity_action_log"
+DEFAULT_PARTITION = "entity_action_log_default"
+SUMMARY_TABLE = "entity_action_daily_summary"
+
+# Name of a monthly partition, e.g. entity_action_log_y2026m10
+PARTITION_NAME_PATTERN = re.compile(r"^entity_action_log_y(\d{4})m(\d{2})$")
+
+# Adds the daily action counts of the selected rows to the summary
+ROLLUP_SQL = """
+INSERT INTO entity_action_daily_summary (
+    day, world_id, entity_id, entity_type, action_type, action_subtype,
+    action_count, first_game_day, last_game_day
+)
+SELECT CAST(timestamp AS DATE), world_id, entity_id, entity_type, action_type, COALESCE(action_subtype, ''),
+       COUNT(*), MIN(game_day), MAX(game_day)
+FROM {table}
+WHERE timestamp < :cutoff
+GROUP BY CAST(timestamp AS DATE), world_id, entity_id, entity_type, action_type, COALESCE(action_subtype, '')
+ON CONFLICT (day, world_id, entity_id, entity_type, action_type, action_subtype) DO UPDATE SET
+    action_count = entity_action_daily_summary.action_count + EXCLUDED.action_count,
+    first_game_day = LEAST(entity_action_daily_summary.first_game_day, EXCLUDED.first_game_day),
+    last_game_day = GREATEST(entity_action_daily_summary.last_game_day, EXCLUDED.last_game_day)
+"""
+
+
+def month_start(value: date) -> date:
+    """Get the first day of the month of a date."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    Get the first day of the month a number of months after a month.
+
+    Args:
+        month: First day of a month
+        months: Number of months to add (may be negative)
+
+    Returns:
+        First day of the resulting month
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Get the name of the partition of a month."""
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Get the month of a monthly partition, or None for other tables."""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_bounds(month: date) -> Tuple[date, date]:
+    """Get the range of timestamps of a month's partition (lower bound inclusive)."""
+    return month, add_months(month, 1)
+
+
+def months_to_create(now: datetime, months_ahead: int) -> List[date]:
+    """Get the months whose partitions should exist: the current month and the next months_ahead."""
+    current = month_start(now.date())
+    return [add_months(current, offset) for offset in range(months_ahead + 1)]
+
+
+def expired_partitions(names: List[str], cutoff: datetime) -> List[str]:
+    """
+    Get the monthly partitions holding only rows older than a cutoff.
+
+    Args:
+        names: Partition names
+        cutoff: Rows before this time have expired
+
+    Returns:
+        Names of the partitions whose month ends at or before the cutoff, oldest first
+    """
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and datetime.combine(partition_bounds(month)[1], datetime.min.time()) <= cutoff:
+            expired.append((month, name))
+    return [name for _, name in sorted(expired)]
+
+
+def list_partitions(db: Session) -> List[str]:
+    """Get the names of the partitions of the action log."""
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE}).fetchall()
+    return [row[0] for row in rows]
+
+
+def ensure_partition(db: Session, month: date) -> bool:
+    """
+    Create the partition of a month if it does not exist.
+
+    The partition is created detached, filled with the month's rows from the
+    default partition and then attached, since a partition cannot be added
+    while the default partition holds rows of its range.
+
+    Args:
+        db: Database session
+        month: First day of the month
+
+    Returns:
+        True if the partition was created
+    """
+    name = partition_name(month)
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+
+    start, end = partition_bounds(month)
+    bounds = {"start": start, "end": end}
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE timestamp >= :start AND timestamp < :end
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds)
+    db.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    logger.info(f"Created action log partition {name}")
+    return True
+
+
+def drop_expired_partition(db: Session, name: str, cutoff: datetime) -> None:
+    """Roll up the rows of an expired monthly partition and drop it."""
+    db.execute(text(ROLLUP_SQL.format(table=name)), {"cutoff": cutoff})
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    db.execute(text(f"DROP TABLE {name}"))
+    logger.info(f"Rolled up and dropped action log partition {name}")
+
+
+def expire_default_rows(db: Session, cutoff: datetime) -> int:
+    """Roll up and delete the expired rows of the default partition."""
+    db.execute(text(ROLLUP_SQL.format(table=DEFAULT_PARTITION)), {"cutoff": cutoff})
+    result = db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"), {"cutoff": cutoff})
+    return result.rowcount or 0
+
+
+def maintain_action_log(db: Session, now: Optional[datetime] = None, **settings) -> Dict[str, Any]:
+    """
+    Create upcoming partitions of the action log and apply its retention.
+
+    Each step is committed on its own, so a failing step does not undo the others.
+
+    Args:
+        db: Database session
+        now: Current time (UTC); defaults to now
+        **settings: Options overriding DEFAULT_RETENTION_SETTINGS
+
+    Returns:
+        Dictionary with the created and dropped partitions and the deleted default rows
+    """
+    options = dict(DEFAULT_RETENTION_SETTINGS)
+    options.update(settings)
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=options["retention_days"])
+    result = {"created": [], "dropped": [], "default_rows_deleted": 0, "errors": []}
+
+    steps = [("create", month) for month in months_to_create(now, options["months_ahead"])]
+    steps += [("drop", name) for name in expired_partitions(list_partitions(db), cutoff)]
+    steps.append(("default", DEFAULT_PARTITION))
+
+    for step, target in steps:
+        try:
+            if step == "create":
+                if ensure_partition(db, target):
+                    result["created"].append(partition_name(target))
+            elif step == "drop":
+                drop_expired_partition(db, target, cutoff)
+                result["dropped"].append(target)
+            else:
+                result["default_rows_deleted"] = expire_default_rows(db, cutoff)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Action log maintenance step {step} {target} failed: {str(e)}")
+            result["errors"].append(f"{step} {target}: {str(e)}")
+
+    return result
@@ -1,5 +1,5 @@
 # app/game_state/decision_makers/trader_decision_maker.py
-from app.ai.mcts.core import MCTS
+from app.ai.mcts.settings import create_mcts
 from app.ai.mcts.states.trader_state import TraderState, TraderAction
 import logging
 import json
@@ -58,73 +58,16 @@ class TraderDecisionMaker:
                 logger.error(f"Trader {trader.trader_id} has no current location")
                 return None
                 
-            # Create world data
-            from app.models.core import Settlements
+            # Shared snapshot of the trader's world
+            from app.game_state.services.world_snapshot_service import WorldSnapshotService
             
-            settlement_db = self.db.query(Settlements).filter(
-                Settlements.settlement_id == current_location_id
-            ).first()
-            
-            if not settlement_db:
+            world_data = WorldSnapshotService(self.db).get_snapshot(trader_db.world_id)
+            if not world_data or current_location_id not in world_data["settlements"]:
                 logger.error(f"Could not find settlement {current_location_id}")
                 return None
-                
-            # Build minimal world data for state creation
-            world_data = {
-                "world_id": str(trader_db.world_id),
-                "settlements": {
-                    current_location_id: {
-                        "id": current_location_id,
-                        "name": settlement_db.settlement_name,
-                        "biome": getattr(settlement_db, 'biome', "temperate"),
-                        "connections": []
-                    }
-                },
-                "markets": {
-                    current_location_id: {
-                        "buying": {},
-                        "selling": {}
-                    }
-                }
-            }
-            
-            # Add connections
-            if settlement_db.connections:
-                try:
-                    connections = settlement_db.connections
-                    if isinstance(connections, str):
-                        connections = json.loads(connections)
-                        
-                    world_data["settlements"][current_location_id]["connections"] = connections
-                    
-                    # Add connected settlements to world data
-                    for connection in connections:
-                        dest_id = connection.get('destination_id')
-                        if not dest_id or dest_id.startswith('11111') or dest_id == '00000000-0000-0000-0000-000000000000':
-                            continue
-                            
-                        dest_settlement = self.db.query(Settlements).filter(
-                            Settlements.settlement_id == dest_id
-                        ).first()
-                        
-                        if dest_settlement:
-                            world_data["settlements"][dest_id] = {
-                                "id": dest_id,
-                                "name": dest_settlement.settlement_name,
-                                "biome": getattr(dest_settlement, 'biome', "temperate"),
-                                "connections": []
-                            }
-                            
-                            # Add basic market data
-                            world_data["markets"][dest_id] = {
-                                "buying": {},
-                                "selling": {}
-                            }
-                except Exception as e:
-                    logger.error(f"Error processing settlement connections: {e}")
             
             # Create the state
-            return TraderState(trader=trader, world_info=world_data)
+            return TraderState.from_trader_entity(trader, world_data)
             
         except Exception as e:
             logger.exception(f"Error creating trader state: {e}")
@@ -133,15 +76,8 @@ class TraderDecisionMaker:
     async def _run_mcts_search(self, state):
         """Run MCTS search to find the best action."""
         try:
-            mcts = MCTS(exploration_weight=1.0)
-            best_action = mcts.search(
-                root_state=state,
-                get_legal_actions_fn=lambda s: s.get_legal_actions(),
-                apply_action_fn=lambda s, a: s.apply_action(a),
-                is_terminal_fn=lambda s: s.is_terminal(),
-                get_reward_fn=lambda s: s.get_reward(),
-                num_simulations=self.num_simulations
-            )
+            mcts = create_mcts("trader", sample_states=[state])
+            best_action = mcts.search_state(state, self.num_simulations)
             
             return best_action
             
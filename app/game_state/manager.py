@@ -2,8 +2,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import String, cast, text
 from app.models.core import Worlds, Settlements, Characters, Traders, TravelRoutes, Areas
-from app.game_state.mcts import MCTS
-from app.ai.mcts.trader_state import TraderState, TraderAction
+from app.ai.mcts.trader_decisions import search_trader_decision
 import logging
 import random as rand
 import json
@@ -24,8 +23,8 @@ class GameStateManager:
         # Get season information if available
         current_season_info = None
         if hasattr(world, 'current_season') and world.current_season:
-            from app.models.seasons import Seasons
-            season = self.db.query(Seasons).filter(Seasons.name == world.current_season).first()
+            from app.game_state.reference_data import get_reference_data
+            season = get_reference_data().season(world.current_season)
             if season:
                 current_season_info = {
                     "name": season.name,
@@ -56,17 +55,38 @@ class GameStateManager:
         logger.info(f"Advanced world {world_id} to day {world.current_game_day}")
         return world.current_game_day
     
-    def get_mcts_trader_decision(self, trader_id, num_simulations=100):
+    def get_mcts_trader_decision(self, trader_id, num_simulations=100, time_budget_ms=None):
         """
         Use MCTS to determine the next best move for a trader.
         
         Args:
             trader_id: The ID of the trader
-            num_simulations: Number of MCTS simulations to run
+            num_simulations: Maximum number of MCTS simulations to run
+            time_budget_ms: Optional wall-clock budget for the search; the search
+                returns its best action so far when it runs out
             
         Returns:
             Dictionary containing the decision details and MCTS stats
         """
+        inputs = self.prepare_mcts_trader_decision(trader_id)
+        if inputs["status"] != "success":
+            return inputs
+        return search_trader_decision(inputs["trader_data"], inputs["world_data"], num_simulations, time_budget_ms)
+    
+    def prepare_mcts_trader_decision(self, trader_id):
+        """
+        Load the state an MCTS decision for a trader searches from.
+        
+        The result holds only plain data, so the search can run in another
+        process (see search_trader_decision).
+        
+        Args:
+            trader_id: The ID of the trader
+            
+        Returns:
+            Dictionary with the status and the "trader_data" and "world_data"
+            of the trader's TraderState
+        """
         logger.info(f"MCTS TRACE: Starting MCTS decision process for trader {trader_id}")
         
         trader = self.db.query(Traders).filter(Traders.trader_id == trader_id).first()
@@ -277,83 +297,4 @@ class GameStateManager:
             settlement_id = settlement["settlement_id"]
             world_data_for_state["settlements"][settlement_id] = settlement
         
-        # Create TraderState for MCTS
-        state = TraderState(trader_data, world_data_for_state)
-        
-        # Pre-check legal actions
-        logger.info(f"MCTS TRACE: Initializing TraderState with {len(settlements_data)} settlements and {len(travel_routes)} routes")
-        legal_actions_initial = state.get_legal_actions()
-        logger.info(f"MCTS TRACE: Legal actions before MCTS: {len(legal_actions_initial)}")
-        for i, action in enumerate(legal_actions_initial):
-            logger.info(f"MCTS TRACE: Legal action {i+1}: Move to {action.destination_name} ({action.destination_id})")
-        
-        # If no legal actions, return error immediately
-        if not legal_actions_initial:
-            logger.error(f"MCTS TRACE: No legal actions available for trader {trader_id} before starting MCTS")
-            return {"status": "error", "message": "No legal actions available"}
-        
-        # Initialize MCTS and run search
-        import random
-        random.seed(42)  # For reproducible results
-        
-        logger.info(f"MCTS TRACE: Starting MCTS search with {num_simulations} simulations")
-        mcts = MCTS(exploration_weight=1.0)
-        best_action = mcts.search(
-            root_state=state,
-            get_legal_actions_fn=lambda s: s.get_legal_actions(),
-            apply_action_fn=lambda s, a: s.apply_action(a),
-            is_terminal_fn=lambda s: s.is_terminal(),
-            get_reward_fn=lambda s: s.get_reward(),
-            num_simulations=num_simulations
-        )
-        
-        logger.info(f"MCTS TRACE: MCTS search completed, best_action: {best_action}")
-        
-        # Get legal actions directly from the state again to double-check
-        legal_actions = state.get_legal_actions()
-        logger.info(f"MCTS TRACE: Legal actions after MCTS: {len(legal_actions)}")
-        for i, action in enumerate(legal_actions):
-            logger.info(f"MCTS TRACE: Legal action after MCTS {i+1}: {action}")
-        
-        # WORKAROUND: Force to use the first legal action - the MCTS is failing to run properly
-        if legal_actions:
-            if not best_action:
-                logger.warning(f"MCTS TRACE: MCTS workaround triggered - using first legal action instead")
-                logger.info(f"MCTS TRACE: First legal action: {legal_actions[0]}")
-                best_action = legal_actions[0]
-                logger.info(f"MCTS TRACE: Set best_action to {best_action}")
-            else:
-                logger.info(f"MCTS TRACE: MCTS returned a valid action: {best_action}")
-        elif not best_action:
-            logger.error(f"MCTS TRACE: No legal actions available AND no best_action from MCTS")
-            return {"status": "error", "message": "No legal actions available"}
-            
-        # Final check for best_action
-        if not best_action:
-            logger.error(f"MCTS TRACE: Still no best_action after workaround attempt")
-            return {"status": "error", "message": "No valid action found"}
-            
-        # Extract decision and stats
-        decision = {
-            "status": "success",
-            "next_settlement_id": best_action.destination_id,
-            "next_settlement_name": best_action.destination_name,
-            "path": best_action.area_path,
-            "reverse_path": best_action.reverse_path,
-            "trader_id": str(trader.trader_id),
-            "trader_name": trader.npc_name,
-            "mcts_stats": mcts.decision_stats if hasattr(mcts, 'decision_stats') else {}
-        }
-        
-        logger.info(f"MCTS TRACE: Final decision: Move to {best_action.destination_name}")
-        
-        # Log detailed stats if available
-        if hasattr(mcts, 'decision_stats'):
-            stats = mcts.decision_stats
-            logger.info(f"MCTS stats: {stats.get('simulations', 0)} simulations, {stats.get('actions_evaluated', 0)} actions evaluated")
-            
-            # Log action details
-            for action, action_stats in stats.get("action_stats", {}).items():
-                logger.info(f"Action: {action}, Visits: {action_stats.get('visits')}, Avg Value: {action_stats.get('average_value', 0):.2f}")
-        
-        return decision
\ No newline at end of file
+        return {"status": "success", "trader_data": trader_data, "world_data": world_data_for_state}
@@ -4,7 +4,7 @@ import logging
 from typing import List, Optional
 from sqlalchemy import select, insert, update, delete
 from sqlalchemy.orm import Session
-from database.connection import SessionLocal
+from database.unit_of_work import unit_of_work
 
 from app.game_state.entities.area import Area
 from app.models.area import AreaModel
@@ -16,7 +16,13 @@ class AreaManager:
     Manages persistence and lifecycle for Area entities.
     Responsible for loading, saving, creating, and querying Areas.
     """
-    def __init__(self):
+    def __init__(self, db: Optional[Session] = None):
+        """
+        Args:
+            db: Session to work in; if None, calls join the current unit of work
+                or open their own
+        """
+        self.db = db
         self.entities = {}  # Cache of loaded areas
         logger.info("AreaManager initialized")
     
@@ -39,24 +45,22 @@ class AreaManager:
         if area_id in self.entities:
             return self.entities[area_id]
         
-        session: Session = SessionLocal()
         try:
-            stmt = select(AreaModel).where(AreaModel.area_id == area_id)
-            result = session.execute(stmt).scalars().first()
-            if not result:
-                logger.warning(f"Area not found: {area_id}")
-                return None
-            # Assuming AreaModel has a to_dict() method for conversion
-            area_data = result.to_dict()
-            area = Area.from_dict(area_data)
-            self.entities[area_id] = area
-            logger.info(f"Loaded area: {area.area_name} (ID: {area_id})")
-            return area
+            with unit_of_work(self.db) as session:
+                stmt = select(AreaModel).where(AreaModel.area_id == area_id)
+                result = session.execute(stmt).scalars().first()
+                if not result:
+                    logger.warning(f"Area not found: {area_id}")
+                    return None
+                # Assuming AreaModel has a to_dict() method for conversion
+                area_data = result.to_dict()
+                area = Area.from_dict(area_data)
+                self.entities[area_id] = area
+                logger.info(f"Loaded area: {area.area_name} (ID: {area_id})")
+                return area
         except Exception as e:
             logger.error(f"Error loading area {area_id}: {e}")
             return None
-        finally:
-            session.close()
 
     def save_entity(self, area: Area) -> bool:
         """
@@ -67,41 +71,37 @@ class AreaManager:
 
         try:
             area_dict = area.to_dict()
-            session: Session = SessionLocal()
             try:
-                # Try to load an existing record
-                stmt = select(AreaModel).where(AreaModel.area_id == area.area_id)
-                existing = session.execute(stmt).scalars().first()
-                if existing:
-                    # Update the existing record
-                    stmt = (
-                        update(AreaModel)
-                        .where(AreaModel.area_id == area.area_id)
-                        .values(
-                            area_name=area.area_name,
-                            description=area.description,
-                            area_type=area.area_type,
-                            controlling_faction=area.controlling_faction,
-                            dominant_species=area.dominant_species,
-                            weather=area.weather,
-                            quests=area.quests  # if your column supports JSON
+                with unit_of_work(self.db) as session:
+                    # Try to load an existing record
+                    stmt = select(AreaModel).where(AreaModel.area_id == area.area_id)
+                    existing = session.execute(stmt).scalars().first()
+                    if existing:
+                        # Update the existing record
+                        stmt = (
+                            update(AreaModel)
+                            .where(AreaModel.area_id == area.area_id)
+                            .values(
+                                area_name=area.area_name,
+                                description=area.description,
+                                area_type=area.area_type,
+                                controlling_faction=area.controlling_faction,
+                                dominant_species=area.dominant_species,
+                                weather=area.weather,
+                                quests=area.quests  # if your column supports JSON
+                            )
                         )
-                    )
-                    session.execute(stmt)
-                else:
-                    # Create a new record using the model's constructor
-                    new_area = AreaModel(**area_dict)
-                    session.add(new_area)
-                session.commit()
+                        session.execute(stmt)
+                    else:
+                        # Create a new record using the model's constructor
+                        new_area = AreaModel(**area_dict)
+                        session.add(new_area)
                 area.mark_clean()
                 logger.info(f"Saved area: {area.area_name} (ID: {area.area_id})")
                 return True
             except Exception as e:
-                session.rollback()
                 logger.error(f"Failed to save area {area.area_id}: {e}")
                 return False
-            finally:
-                session.close()
         except Exception as e:
             logger.error(f"Error serializing area {area.area_id}: {e}")
             return False
@@ -111,78 +111,68 @@ class AreaManager:
         Delete an Area entity from the database and remove it from cache.
         """
         self.entities.pop(area_id, None)
-        session: Session = SessionLocal()
         try:
-            stmt = delete(AreaModel).where(AreaModel.area_id == area_id)
-            session.execute(stmt)
-            session.commit()
-            logger.info(f"Deleted area: {area_id}")
-            return True
+            with unit_of_work(self.db) as session:
+                stmt = delete(AreaModel).where(AreaModel.area_id == area_id)
+                session.execute(stmt)
+                logger.info(f"Deleted area: {area_id}")
+                return True
         except Exception as e:
-            session.rollback()
             logger.error(f"Failed to delete area {area_id}: {e}")
             return False
-        finally:
-            session.close()
 
     def get_all_entities(self) -> List[Area]:
         """
         Retrieve all Area entities from the database.
         """
-        session: Session = SessionLocal()
         try:
-            stmt = select(AreaModel)
-            results = session.execute(stmt).scalars().all()
-            areas = []
-            for model in results:
-                area = Area.from_dict(model.to_dict())
-                self.entities[area.area_id] = area
-                areas.append(area)
-            return areas
+            with unit_of_work(self.db) as session:
+                stmt = select(AreaModel)
+                results = session.execute(stmt).scalars().all()
+                areas = []
+                for model in results:
+                    area = Area.from_dict(model.to_dict())
+                    self.entities[area.area_id] = area
+                    areas.append(area)
+                return areas
         except Exception as e:
             logger.error(f"Error fetching all areas: {e}")
             return []
-        finally:
-            session.close()
 
     def get_entities_at_location(self, location_id: str) -> List[Area]:
         """
         Get all Area entities that match the given location.
         """
-        session: Session = SessionLocal()
         try:
-            stmt = select(AreaModel).where(AreaModel.location_id == location_id)
-            results = session.execute(stmt).scalars().all()
-            areas = []
-            for model in results:
-                area = Area.from_dict(model.to_dict())
-                self.entities[area.area_id] = area
-                areas.append(area)
-            return areas
+            with unit_of_work(self.db) as session:
+                stmt = select(AreaModel).where(AreaModel.location_id == location_id)
+                results = session.execute(stmt).scalars().all()
+                areas = []
+                for model in results:
+                    area = Area.from_dict(model.to_dict())
+                    self.entities[area.area_id] = area
+                    areas.append(area)
+                return areas
         except Exception as e:
             logger.error(f"Error fetching areas at location {location_id}: {e}")
             return []
-        finally:
-            session.close()
 
     def get_entity_by_name(self, name: str) -> Optional[Area]:
         """
         Retrieve an Area entity by its name.
         """
-        session: Session = SessionLocal()
         try:
-            stmt = select(AreaModel).where(AreaModel.name == name)
-            result = session.execute(stmt).scalars().first()
-            if result:
-                area = Area.from_dict(result.to_dict())
-                self.entities[area.area_id] = area
-                return area
-            return None
+            with unit_of_work(self.db) as session:
+                stmt = select(AreaModel).where(AreaModel.name == name)
+                result = session.execute(stmt).scalars().first()
+                if result:
+                    area = Area.from_dict(result.to_dict())
+                    self.entities[area.area_id] = area
+                    return area
+                return None
         except Exception as e:
             logger.error(f"Error fetching area by name {name}: {e}")
             return None
-        finally:
-            session.close()
 
     def update_entity_location(self, area_id: str, location_id: str) -> bool:
         """
@@ -210,13 +200,11 @@ class AreaManager:
         """
         Return the total number of Area entities in the database.
         """
-        session: Session = SessionLocal()
         try:
-            stmt = select(AreaModel)
-            results = session.execute(stmt).scalars().all()
-            return len(results)
+            with unit_of_work(self.db) as session:
+                stmt = select(AreaModel)
+                results = session.execute(stmt).scalars().all()
+                return len(results)
         except Exception as e:
             logger.error(f"Error counting areas: {e}")
             return 0
-        finally:
-            session.close()
@@ -7,6 +7,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session, joinedload
 from database.connection import SessionLocal,get_db
 from app.models.buildings import BuildingType, SettlementBuilding
+from database.unit_of_work import current_session
 from database.connection import SessionLocal
 from app.game_state.services.logging_service import LoggingService
 
@@ -25,7 +26,7 @@ class BuildingManager:
         Args:
             db (Session, optional): Database session
         """
-        self.db = db or SessionLocal()
+        self.db = db or current_session() or SessionLocal()
         self.building_types = {}  # Cache of building types
         
     def get_building_type(self, building_type_id: str) -> Optional[Dict[str, Any]]:
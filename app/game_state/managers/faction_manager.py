@@ -261,8 +261,38 @@ class FactionManager:
         if not faction:
             return None
             
-        from ..states.faction_state import FactionState
-        return FactionState(faction)
+        from app.ai.mcts.states.faction_state import FactionState
+        return FactionState.from_faction_entity(faction)
+    
+    async def get_faction_decision(self, faction_id, num_simulations=200):
+        """
+        Use MCTS to determine the next action of a faction.
+        
+        Faction states have some of the largest action spaces, so the search
+        uses the "faction" search settings, which search root-parallel trees
+        on all cores where the process may start a process pool.
+        
+        Internal Usage: Faction AI worker
+        
+        Args:
+            faction_id (str): ID of the faction
+            num_simulations (int): Simulations per tree
+            
+        Returns:
+            dict: Decision with the chosen action and the search stats
+        """
+        state = await self.get_faction_state(faction_id)
+        if not state:
+            return {"status": "error", "message": "Faction not found"}
+        
+        from app.ai.mcts.settings import create_mcts
+        mcts = create_mcts("faction")
+        best_action = mcts.search_state(state, num_simulations)
+        if best_action is None:
+            return {"status": "error", "message": "No valid action found"}
+        
+        stats = {key: value for key, value in mcts.decision_stats.items() if key != "best_action"}
+        return {"status": "success", "faction_id": faction_id, "action": best_action.to_dict(), "stats": stats}
     
     #----------------------------------------
     # Cache Management
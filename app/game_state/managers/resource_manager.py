@@ -611,7 +611,7 @@ class ResourceManager:
             updated_sites = []
             
             from app.game_state.managers.settlement_manager import SettlementManager
-            settlement_manager = SettlementManager()
+            settlement_manager = SettlementManager(self.db)
             settlement = settlement_manager.load_settlement(settlement_id)
             
             if not settlement:
@@ -3,8 +3,9 @@ import uuid
 import logging
 from typing import List, Optional, Dict, Any
 from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database.connection import SessionLocal
+from database.unit_of_work import unit_of_work
 
 from app.models.settlement import SettlementModel
 from app.game_state.entities.settlement import Settlement
@@ -23,7 +24,13 @@ class SettlementManager:
       5. Providing query methods.
     """
     
-    def __init__(self):
+    def __init__(self, db: Optional[Session] = None):
+        """
+        Args:
+            db: Session to work in; if None, calls join the current unit of work
+                or open their own
+        """
+        self.db = db
         self.settlements = {}  # Cache: settlement_id -> Settlement (domain entity)
         logger.info(f"{self.__class__.__name__} initialized")
     
@@ -47,79 +54,77 @@ class SettlementManager:
         if settlement_id in self.settlements:
             return self.settlements[settlement_id]
         
-        session: Session = SessionLocal()
         try:
-            # Load settlement data from both models to get complete information
-            stmt_model = select(SettlementModel).where(SettlementModel.settlement_id == settlement_id)
-            result_model = session.execute(stmt_model).scalars().first()
+            with unit_of_work(self.db) as session:
+                # Load settlement data from both models to get complete information
+                stmt_model = select(SettlementModel).where(SettlementModel.settlement_id == settlement_id)
+                result_model = session.execute(stmt_model).scalars().first()
             
-            # Also load from Settlements in core.py to get world_id
-            from app.models.core import Settlements
-            stmt_core = select(Settlements).where(Settlements.settlement_id == settlement_id)
-            result_core = session.execute(stmt_core).scalars().first()
+                # Also load from Settlements in core.py to get world_id
+                from app.models.core import Settlements
+                stmt_core = select(Settlements).where(Settlements.settlement_id == settlement_id)
+                result_core = session.execute(stmt_core).scalars().first()
             
-            if not result_model or not result_core:
-                logger.warning(f"Settlement not found: {settlement_id}")
-                return None
+                if not result_model or not result_core:
+                    logger.warning(f"Settlement not found: {settlement_id}")
+                    return None
             
-            # Convert the ORM model to a dictionary, then to a domain Settlement
-            settlement_data = result_model.to_dict()
+                # Convert the ORM model to a dictionary, then to a domain Settlement
+                settlement_data = result_model.to_dict()
             
-            # Create the settlement entity
-            settlement = Settlement.from_dict(settlement_data)
+                # Create the settlement entity
+                settlement = Settlement.from_dict(settlement_data)
             
-            # Add world_id from core model
-            settlement.set_property("world_id", result_core.world_id)
+                # Add world_id from core model
+                settlement.set_property("world_id", result_core.world_id)
             
-            # Load buildings for this settlement
-            from app.models.buildings import SettlementBuilding
-            buildings_query = session.query(SettlementBuilding).filter(
-                SettlementBuilding.settlement_id == settlement_id
-            )
-            buildings = buildings_query.all()
+                # Load buildings for this settlement
+                from app.models.buildings import SettlementBuilding
+                buildings_query = session.query(SettlementBuilding).filter(
+                    SettlementBuilding.settlement_id == settlement_id
+                )
+                buildings = buildings_query.all()
             
-            # Add buildings to settlement
-            buildings_data = []
-            for building in buildings:
-                building_data = {
-                    "building_id": str(building.settlement_building_id),
-                    "type": str(building.building_type_id) if building.building_type_id else "unknown",
-                    "construction_status": building.construction_status,
-                    "construction_progress": float(building.construction_progress) if building.construction_progress else 0,
-                    "is_operational": building.is_operational,
-                    "health": building.health,
-                    "constructed_at": building.constructed_at.isoformat() if building.constructed_at else None
-                }
-                buildings_data.append(building_data)
+                # Add buildings to settlement
+                buildings_data = []
+                for building in buildings:
+                    building_data = {
+                        "building_id": str(building.settlement_building_id),
+                        "type": str(building.building_type_id) if building.building_type_id else "unknown",
+                        "construction_status": building.construction_status,
+                        "construction_progress": float(building.construction_progress) if building.construction_progress else 0,
+                        "is_operational": building.is_operational,
+                        "health": building.health,
+                        "constructed_at": building.constructed_at.isoformat() if building.constructed_at else None
+                    }
+                    buildings_data.append(building_data)
             
-            # Store buildings in settlement entity
-            settlement.set_property("buildings", buildings_data)
+                # Store buildings in settlement entity
+                settlement.set_property("buildings", buildings_data)
             
-            # Load resources for this settlement
-            from app.models.core import SettlementResources
-            resources_query = session.query(SettlementResources).filter(
-                SettlementResources.settlement_id == settlement_id
-            )
-            resources = resources_query.all()
+                # Load resources for this settlement
+                from app.models.core import SettlementResources
+                resources_query = session.query(SettlementResources).filter(
+                    SettlementResources.settlement_id == settlement_id
+                )
+                resources = resources_query.all()
             
-            # Add resources to settlement
-            resources_data = {}
-            for resource in resources:
-                resources_data[resource.resource_type_id] = resource.quantity
+                # Add resources to settlement
+                resources_data = {}
+                for resource in resources:
+                    resources_data[resource.resource_type_id] = resource.quantity
             
-            # Store resources in settlement entity
-            settlement.set_property("resources", resources_data)
+                # Store resources in settlement entity
+                settlement.set_property("resources", resources_data)
             
-            # Cache and return the settlement
-            self.settlements[settlement_id] = settlement
-            logger.info(f"Loaded settlement: {settlement.settlement_name} (ID: {settlement_id}) with {len(buildings_data)} buildings and {len(resources_data)} resource types")
-            return settlement
+                # Cache and return the settlement
+                self.settlements[settlement_id] = settlement
+                logger.info(f"Loaded settlement: {settlement.settlement_name} (ID: {settlement_id}) with {len(buildings_data)} buildings and {len(resources_data)} resource types")
+                return settlement
             
         except Exception as e:
             logger.error(f"Error loading settlement {settlement_id}: {e}")
             return None
-        finally:
-            session.close()
 
     def save_settlement(self, settlement: Settlement) -> bool:
         """
@@ -172,142 +177,128 @@ class SettlementManager:
             logger.error(f"Error serializing settlement {settlement.settlement_id}: {e}")
             return False
 
-        session: Session = SessionLocal()
         try:
-            # Check if a record already exists
-            stmt = select(SettlementModel).where(SettlementModel.settlement_id == settlement.settlement_id)
-            existing = session.execute(stmt).scalars().first()
+            with unit_of_work(self.db) as session:
+                # Check if a record already exists
+                stmt = select(SettlementModel).where(SettlementModel.settlement_id == settlement.settlement_id)
+                existing = session.execute(stmt).scalars().first()
 
-            if existing:
-                # Update record
-                upd = (
-                    update(SettlementModel)
-                    .where(SettlementModel.settlement_id == settlement.settlement_id)
-                    .values(
-                        settlement_name=settlement.settlement_name,
-                        description=settlement.description,
-                        location_id=settlement.location_id,
-                        relations=settlement_dict.get("relations", {}),  # Use the UUID-converted dict
-                        is_repairable=settlement.is_repairable,
-                        is_damaged=settlement.is_damaged,
-                        has_started_building=settlement.has_started_building,
-                        is_under_repair=settlement.is_under_repair,
-                        is_built=settlement.is_built,
-                        properties=settlement_dict.get("properties", {})  # Use the UUID-converted dict
+                if existing:
+                    # Update record
+                    upd = (
+                        update(SettlementModel)
+                        .where(SettlementModel.settlement_id == settlement.settlement_id)
+                        .values(
+                            settlement_name=settlement.settlement_name,
+                            description=settlement.description,
+                            location_id=settlement.location_id,
+                            relations=settlement_dict.get("relations", {}),  # Use the UUID-converted dict
+                            is_repairable=settlement.is_repairable,
+                            is_damaged=settlement.is_damaged,
+                            has_started_building=settlement.has_started_building,
+                            is_under_repair=settlement.is_under_repair,
+                            is_built=settlement.is_built,
+                            properties=settlement_dict.get("properties", {})  # Use the UUID-converted dict
+                        )
                     )
-                )
-                session.execute(upd)
-            else:
-                # Insert new record - create a new dict with the correct field names
-                model_dict = {
-                    "settlement_id": settlement_dict.get("id"),
-                    "settlement_name": settlement_dict.get("name"),
-                    "description": settlement_dict.get("description"),
-                    "location_id": settlement_dict.get("location_id"),
-                    "relations": settlement_dict.get("relations", {}),
-                    "is_repairable": settlement_dict.get("is_repairable", False),
-                    "is_damaged": settlement_dict.get("is_damaged", False),
-                    "has_started_building": settlement_dict.get("has_started_building", False),
-                    "is_under_repair": settlement_dict.get("is_under_repair", False),
-                    "is_built": settlement_dict.get("is_built", False),
-                    "properties": settlement_dict.get("properties", {})
-                }
-                new_settlement = SettlementModel(**model_dict)
-                session.add(new_settlement)
-            session.commit()
+                    session.execute(upd)
+                else:
+                    # Insert new record - create a new dict with the correct field names
+                    model_dict = {
+                        "settlement_id": settlement_dict.get("id"),
+                        "settlement_name": settlement_dict.get("name"),
+                        "description": settlement_dict.get("description"),
+                        "location_id": settlement_dict.get("location_id"),
+                        "relations": settlement_dict.get("relations", {}),
+                        "is_repairable": settlement_dict.get("is_repairable", False),
+                        "is_damaged": settlement_dict.get("is_damaged", False),
+                        "has_started_building": settlement_dict.get("has_started_building", False),
+                        "is_under_repair": settlement_dict.get("is_under_repair", False),
+                        "is_built": settlement_dict.get("is_built", False),
+                        "properties": settlement_dict.get("properties", {})
+                    }
+                    new_settlement = SettlementModel(**model_dict)
+                    session.add(new_settlement)
             settlement.clean()
             logger.info(f"Saved settlement: {settlement.settlement_name} (ID: {settlement.settlement_id})")
             return True
         except Exception as e:
-            session.rollback()
             logger.error(f"Failed to save settlement {settlement.settlement_id}: {e}")
             return False
-        finally:
-            session.close()
 
     def delete_settlement(self, settlement_id: str) -> bool:
         """
         Delete a settlement from the database and cache.
         """
         self.settlements.pop(settlement_id, None)
-        session: Session = SessionLocal()
         try:
-            stmt = delete(SettlementModel).where(SettlementModel.settlement_id == settlement_id)
-            session.execute(stmt)
-            session.commit()
-            logger.info(f"Deleted settlement: {settlement_id}")
-            return True
+            with unit_of_work(self.db) as session:
+                stmt = delete(SettlementModel).where(SettlementModel.settlement_id == settlement_id)
+                session.execute(stmt)
+                logger.info(f"Deleted settlement: {settlement_id}")
+                return True
         except Exception as e:
-            session.rollback()
             logger.error(f"Failed to delete settlement {settlement_id}: {e}")
             return False
-        finally:
-            session.close()
 
     def get_all_settlements(self) -> List[Settlement]:
         """
         Retrieve all settlements from the database.
         """
-        session: Session = SessionLocal()
         try:
-            # Get all settlement IDs first
-            stmt = select(SettlementModel.settlement_id)
-            results = session.execute(stmt).scalars().all()
-            settlements = []
+            with unit_of_work(self.db) as session:
+                # Get all settlement IDs first
+                stmt = select(SettlementModel.settlement_id)
+                results = session.execute(stmt).scalars().all()
+                settlements = []
             
-            # Load each settlement individually to get complete data
-            for settlement_id in results:
-                settlement = self.load_settlement(settlement_id)
-                if settlement:
-                    settlements.append(settlement)
+                # Load each settlement individually to get complete data
+                for settlement_id in results:
+                    settlement = self.load_settlement(settlement_id)
+                    if settlement:
+                        settlements.append(settlement)
                     
-            return settlements
+                return settlements
         except Exception as e:
             logger.error(f"Error fetching all settlements: {e}")
             return []
-        finally:
-            session.close()
 
     def get_settlements_by_location(self, location_id: str) -> List[Settlement]:
         """
         Retrieve settlements at a specific location.
         """
-        session: Session = SessionLocal()
         try:
-            # Get settlement IDs at this location
-            stmt = select(SettlementModel.settlement_id).where(SettlementModel.location_id == location_id)
-            results = session.execute(stmt).scalars().all()
-            settlements = []
+            with unit_of_work(self.db) as session:
+                # Get settlement IDs at this location
+                stmt = select(SettlementModel.settlement_id).where(SettlementModel.location_id == location_id)
+                results = session.execute(stmt).scalars().all()
+                settlements = []
             
-            # Load each settlement individually to get complete data
-            for settlement_id in results:
-                settlement = self.load_settlement(settlement_id)
-                if settlement:
-                    settlements.append(settlement)
+                # Load each settlement individually to get complete data
+                for settlement_id in results:
+                    settlement = self.load_settlement(settlement_id)
+                    if settlement:
+                        settlements.append(settlement)
                     
-            return settlements
+                return settlements
         except Exception as e:
             logger.error(f"Error fetching settlements at location {location_id}: {e}")
             return []
-        finally:
-            session.close()
 
     def get_settlement_by_name(self, name: str) -> Optional[Settlement]:
         """
         Find a settlement by name.
         """
-        session: Session = SessionLocal()
         try:
-            stmt = select(SettlementModel.settlement_id).where(SettlementModel.settlement_name == name)
-            result = session.execute(stmt).scalars().first()
-            if result:
-                return self.load_settlement(result)
-            return None
+            with unit_of_work(self.db) as session:
+                stmt = select(SettlementModel.settlement_id).where(SettlementModel.settlement_name == name)
+                result = session.execute(stmt).scalars().first()
+                if result:
+                    return self.load_settlement(result)
+                return None
         except Exception as e:
             logger.error(f"Error fetching settlement by name {name}: {e}")
             return None
-        finally:
-            session.close()
 
     def update_settlement_location(self, settlement_id: str, location_id: str) -> bool:
         """
@@ -335,16 +326,14 @@ class SettlementManager:
         """
         Return the total number of settlements in the database.
         """
-        session: Session = SessionLocal()
         try:
-            stmt = select(SettlementModel)
-            results = session.execute(stmt).scalars().all()
-            return len(results)
+            with unit_of_work(self.db) as session:
+                stmt = select(SettlementModel)
+                results = session.execute(stmt).scalars().all()
+                return len(results)
         except Exception as e:
             logger.error(f"Error counting settlements: {e}")
             return 0
-        finally:
-            session.close()
 
     def soft_delete_settlement(self, settlement_id: str) -> bool:
         """
@@ -376,8 +365,7 @@ class SettlementManager:
         from app.models.resource_sites import ResourceSite, SiteType
         import random
         
-        session = SessionLocal()
-        try:
+        with unit_of_work(self.db) as session:
             # Get undiscovered sites for this settlement
             undiscovered_sites = session.query(ResourceSite).filter(
                 ResourceSite.settlement_id == settlement_id,
@@ -412,15 +400,11 @@ class SettlementManager:
                         "Rumors of a potential resource site have been circulating among the villagers."
                     )
             
-            # Commit changes
+            # Changes are committed with the unit of work
             if updated_sites:
-                session.commit()
                 logger.info(f"Updated {len(updated_sites)} resource sites to 'rumored' status for settlement {settlement_id}")
                 
             return len(updated_sites)
-        
-        finally:
-            session.close()
 
     def _add_settlement_event(self, settlement_id: str, message: str) -> bool:
         """
@@ -472,8 +456,7 @@ class SettlementManager:
         """
         from app.models.resource_sites import ResourceSite, SiteType
         
-        session = SessionLocal()
-        try:
+        with unit_of_work(self.db) as session:
             # Get the settlement's resource sites
             sites = session.query(ResourceSite, SiteType).join(
                 SiteType, ResourceSite.site_type_id == SiteType.site_type_id
@@ -501,9 +484,6 @@ class SettlementManager:
                 })
             
             return site_data
-            
-        finally:
-            session.close()
 
         # Additional methods (pagination, cache refresh, bulk operations, etc.)
         def clear_cache(self) -> None:
@@ -517,3 +497,60 @@ class SettlementManager:
             if settlement:
                 self.settlements[settlement_id] = settlement
             return settlement
+
+
+class AsyncSettlementManager:
+    """
+    Native async reads of settlements and their buildings and resources on an
+    AsyncSession, for the settlement API routes.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Args:
+            db: Async session to work in
+        """
+        self.db = db
+    
+    async def get_settlements(self, world_id: Optional[str] = None) -> list:
+        """
+        Get the settlements, optionally of one world.
+        """
+        from app.models.core import Settlements
+        stmt = select(Settlements)
+        if world_id:
+            stmt = stmt.where(Settlements.world_id == world_id)
+        return (await self.db.execute(stmt)).scalars().all()
+    
+    async def get_settlement(self, settlement_id: str):
+        """
+        Get a settlement row, or None if it does not exist.
+        """
+        from app.models.core import Settlements
+        stmt = select(Settlements).where(Settlements.settlement_id == settlement_id)
+        return (await self.db.execute(stmt)).scalars().first()
+    
+    async def get_buildings(self, settlement_id: str) -> list:
+        """
+        Get the buildings of a settlement as (SettlementBuildings, building name) pairs.
+        """
+        from app.models.core import BuildingTypes, SettlementBuildings
+        stmt = (
+            select(SettlementBuildings, BuildingTypes.building_name)
+            .join(BuildingTypes, SettlementBuildings.building_type_id == BuildingTypes.building_type_id)
+            .where(SettlementBuildings.settlement_id == settlement_id)
+        )
+        return (await self.db.execute(stmt)).all()
+    
+    async def get_resources(self, settlement_id: str) -> list:
+        """
+        Get the resources of a settlement as (SettlementResources, resource name) pairs.
+        """
+        from app.models.core import SettlementResources
+        from app.models.resource import Resource
+        stmt = (
+            select(SettlementResources, Resource.resource_name)
+            .join(Resource, SettlementResources.resource_type_id == Resource.resource_type_id)
+            .where(SettlementResources.settlement_id == settlement_id)
+        )
+        return (await self.db.execute(stmt)).all()
@@ -4,8 +4,9 @@ import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, update
 
 from app.models.tasks import Tasks, TaskTypes
 from app.models.core import Characters, Worlds
@@ -13,6 +14,42 @@ from app.game_state.entities.task import Task
 
 logger = logging.getLogger(__name__)
 
+def task_from_record(task_record: Tasks, task_type_code: Optional[str]) -> Task:
+    """
+    Create a Task entity from a task record.
+    
+    Args:
+        task_record: Task row
+        task_type_code: Code of the task's type, if known
+        
+    Returns:
+        Task entity
+    """
+    return Task(
+        task_id=str(task_record.task_id),
+        title=task_record.title,
+        description=task_record.description,
+        task_type_id=str(task_record.task_type_id),
+        task_type_code=task_type_code,
+        world_id=str(task_record.world_id),
+        location_id=task_record.location_id,
+        target_id=task_record.target_id,
+        character_id=str(task_record.character_id) if task_record.character_id else None,
+        status=task_record.status,
+        progress=task_record.progress,
+        created_at=task_record.created_at,
+        start_time=task_record.start_time,
+        deadline=task_record.deadline,
+        completion_time=task_record.completion_time,
+        requirements=task_record.requirements,
+        rewards=task_record.rewards,
+        task_data=task_record.task_data,
+        difficulty=task_record.difficulty,
+        duration_minutes=task_record.duration_minutes,
+        repeatable=task_record.repeatable,
+        is_active=task_record.is_active
+    )
+
 class TaskManager:
     """
     Manager class for task-related operations.
@@ -143,32 +180,7 @@ class TaskManager:
             ).first()
             
             # Create a Task entity
-            task = Task(
-                task_id=str(task_record.task_id),
-                title=task_record.title,
-                description=task_record.description,
-                task_type_id=str(task_record.task_type_id),
-                task_type_code=task_type.code if task_type else None,
-                world_id=str(task_record.world_id),
-                location_id=task_record.location_id,
-                target_id=task_record.target_id,
-                character_id=str(task_record.character_id) if task_record.character_id else None,
-                status=task_record.status,
-                progress=task_record.progress,
-                created_at=task_record.created_at,
-                start_time=task_record.start_time,
-                deadline=task_record.deadline,
-                completion_time=task_record.completion_time,
-                requirements=task_record.requirements,
-                rewards=task_record.rewards,
-                task_data=task_record.task_data,
-                difficulty=task_record.difficulty,
-                duration_minutes=task_record.duration_minutes,
-                repeatable=task_record.repeatable,
-                is_active=task_record.is_active
-            )
-            
-            return task
+            return task_from_record(task_record, task_type.code if task_type else None)
             
         except Exception as e:
             logger.exception(f"Error loading task: {e}")
@@ -516,4 +528,392 @@ class TaskManager:
             
         except Exception as e:
             logger.exception(f"Error getting tasks by target: {e}")
-            return []
\ No newline at end of file
+            return []
+
+class AsyncTaskManager:
+    """
+    Native async version of TaskManager on an AsyncSession.
+    Lists of tasks are loaded together with their type codes in one query.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize with an async database session.
+        
+        Args:
+            db (AsyncSession): SQLAlchemy async database session
+        """
+        self.db = db
+    
+    async def create_task(self, 
+                   title: str, 
+                   description: str, 
+                   task_type_code: str,
+                   world_id: str,
+                   location_id: Optional[str] = None,
+                   target_id: Optional[str] = None,
+                   difficulty: int = 1,
+                   duration_minutes: int = 0,
+                   requirements: Dict[str, Any] = None,
+                   rewards: Dict[str, Any] = None,
+                   task_data: Dict[str, Any] = None,
+                   repeatable: bool = False) -> Optional[Task]:
+        """
+        Create a new task in the database and return a Task entity.
+        See TaskManager.create_task for the arguments.
+        
+        Returns:
+            Task entity if created successfully, None otherwise
+        """
+        # Get the task type ID from the code
+        task_type = (await self.db.execute(
+            select(TaskTypes).where(TaskTypes.code == task_type_code)
+        )).scalars().first()
+        if not task_type:
+            logger.error(f"Task type with code {task_type_code} not found")
+            return None
+        
+        # Validate the world exists
+        world_exists = (await self.db.execute(
+            select(Worlds.world_id).where(Worlds.world_id == world_id)
+        )).first()
+        if not world_exists:
+            logger.error(f"World with ID {world_id} not found")
+            return None
+        
+        requirements = requirements or {}
+        rewards = rewards or {}
+        task_data = task_data or {}
+            
+        # Add base rewards from the task type
+        if 'xp' not in rewards:
+            rewards['xp'] = task_type.base_xp
+        if 'gold' not in rewards and task_type.base_gold > 0:
+            rewards['gold'] = task_type.base_gold
+        
+        try:
+            new_task = Tasks(
+                task_id=str(uuid.uuid4()),
+                title=title,
+                description=description,
+                task_type_id=task_type.task_type_id,
+                world_id=world_id,
+                location_id=location_id,
+                target_id=target_id,
+                difficulty=difficulty,
+                duration_minutes=duration_minutes,
+                requirements=requirements,
+                rewards=rewards,
+                task_data=task_data,
+                repeatable=repeatable,
+                status='available',
+                is_active=True,
+                created_at=datetime.utcnow()
+            )
+            
+            self.db.add(new_task)
+            await self.db.commit()
+            await self.db.refresh(new_task)
+            
+            return task_from_record(new_task, task_type.code)
+            
+        except Exception as e:
+            logger.exception(f"Error creating task: {e}")
+            await self.db.rollback()
+            return None
+    
+    async def load_task(self, task_id: str) -> Optional[Task]:
+        """
+        Load a task from the database into a Task entity.
+        
+        Args:
+            task_id: ID of the task to load
+            
+        Returns:
+            Task entity if found, None otherwise
+        """
+        try:
+            tasks = await self._load_tasks(Tasks.task_id == task_id)
+            if not tasks:
+                logger.warning(f"Task with ID {task_id} not found")
+                return None
+            return tasks[0]
+            
+        except Exception as e:
+            logger.exception(f"Error loading task: {e}")
+            return None
+    
+    async def save_task(self, task: Task) -> bool:
+        """
+        Save changes to a Task entity back to the database.
+        
+        Args:
+            task: Task entity to save
+            
+        Returns:
+            True if saved successfully, False otherwise
+        """
+        try:
+            result = await self.db.execute(
+                update(Tasks).where(Tasks.task_id == task.task_id).values(
+                    title=task.title,
+                    description=task.description,
+                    location_id=task.location_id,
+                    target_id=task.target_id,
+                    character_id=task.character_id,
+                    status=task.status,
+                    progress=task.progress,
+                    is_active=task.is_active,
+                    start_time=task.start_time,
+                    deadline=task.deadline,
+                    completion_time=task.completion_time,
+                    requirements=task.requirements,
+                    rewards=task.rewards,
+                    task_data=task.task_data,
+                    difficulty=task.difficulty,
+                    duration_minutes=task.duration_minutes,
+                    repeatable=task.repeatable
+                )
+            )
+            if not result.rowcount:
+                logger.warning(f"Task with ID {task.task_id} not found for update")
+                await self.db.rollback()
+                return False
+            
+            await self.db.commit()
+            return True
+            
+        except Exception as e:
+            logger.exception(f"Error saving task: {e}")
+            await self.db.rollback()
+            return False
+    
+    async def get_available_tasks(self, 
+                           world_id: str, 
+                           location_id: Optional[str] = None,
+                           character_id: Optional[str] = None,
+                           task_type_code: Optional[str] = None) -> List[Task]:
+        """
+        Get available tasks for a given world, optionally filtered by location, character, or type.
+        See TaskManager.get_available_tasks for the arguments.
+        
+        Returns:
+            List of available Task entities
+        """
+        conditions = [Tasks.world_id == world_id, Tasks.status == 'available', Tasks.is_active == True]
+        if location_id:
+            conditions.append(Tasks.location_id == location_id)
+        if character_id:
+            # Tasks with no character_id (available to all) OR specifically for this character
+            conditions.append(or_(Tasks.character_id == None, Tasks.character_id == character_id))
+        if task_type_code:
+            conditions.append(TaskTypes.code == task_type_code)
+        
+        try:
+            return await self._load_tasks(*conditions)
+        except Exception as e:
+            logger.exception(f"Error getting available tasks: {e}")
+            return []
+    
+    async def get_character_tasks(self, character_id: str, status: Optional[str] = None) -> List[Task]:
+        """
+        Get tasks assigned to a specific character, optionally filtered by status.
+        
+        Args:
+            character_id: Character to get tasks for
+            status: Optional status to filter by
+            
+        Returns:
+            List of Task entities assigned to the character
+        """
+        conditions = [Tasks.character_id == character_id]
+        if status:
+            conditions.append(Tasks.status == status)
+        
+        try:
+            return await self._load_tasks(*conditions)
+        except Exception as e:
+            logger.exception(f"Error getting character tasks: {e}")
+            return []
+    
+    async def accept_task(self, task_id: str, character_id: str) -> Optional[Task]:
+        """
+        Assign a task to a character and mark it as accepted.
+        
+        Args:
+            task_id: ID of the task to accept
+            character_id: ID of the character accepting the task
+            
+        Returns:
+            Updated Task entity if successful, None otherwise
+        """
+        try:
+            # Check if the character exists
+            character_exists = (await self.db.execute(
+                select(Characters.character_id).where(Characters.character_id == character_id)
+            )).first()
+            if not character_exists:
+                logger.warning(f"Character {character_id} not found")
+                return None
+            
+            # Claim the task only if it is still available
+            result = await self.db.execute(
+                update(Tasks).where(
+                    Tasks.task_id == task_id,
+                    Tasks.status == 'available',
+                    Tasks.is_active == True
+                ).values(character_id=character_id, status='accepted', start_time=datetime.utcnow())
+            )
+            if not result.rowcount:
+                logger.warning(f"Task {task_id} not found or not available")
+                await self.db.rollback()
+                return None
+            
+            await self.db.commit()
+            
+            # Reload and return the updated task
+            return await self.load_task(task_id)
+            
+        except Exception as e:
+            logger.exception(f"Error accepting task: {e}")
+            await self.db.rollback()
+            return None
+    
+    async def complete_task(self, task_id: str, character_id: str) -> Dict[str, Any]:
+        """
+        Mark a task as completed by a character and process rewards.
+        
+        Args:
+            task_id: ID of the task to complete
+            character_id: ID of the character completing the task
+            
+        Returns:
+            Dictionary with completion results and rewards
+        """
+        try:
+            task_record = (await self.db.execute(
+                select(Tasks).where(
+                    Tasks.task_id == task_id,
+                    Tasks.character_id == character_id,
+                    Tasks.status.in_(['accepted', 'in_progress']),
+                    Tasks.is_active == True
+                )
+            )).scalars().first()
+            
+            if not task_record:
+                logger.warning(f"Task {task_id} not found, not assigned to character {character_id}, or not in progress")
+                return {
+                    "status": "error",
+                    "message": "Task not found or not assigned to your character",
+                    "task_id": task_id,
+                    "rewards": {}
+                }
+            
+            rewards = task_record.rewards or {}
+            
+            task_record.status = 'completed'
+            task_record.progress = 100.0
+            task_record.completion_time = datetime.utcnow()
+            
+            await self._release_trader(task_record, "completed")
+            await self.db.commit()
+            
+            return {
+                "status": "success",
+                "message": "Task completed successfully",
+                "task_id": task_id,
+                "rewards": rewards,
+                "xp_gained": rewards.get("xp", 0)
+            }
+            
+        except Exception as e:
+            logger.exception(f"Error completing task: {e}")
+            await self.db.rollback()
+            return {
+                "status": "error",
+                "message": f"Error completing task: {str(e)}",
+                "task_id": task_id,
+                "rewards": {}
+            }
+    
+    async def fail_task(self, task_id: str, reason: str = "Failed to complete") -> bool:
+        """
+        Mark a task as failed.
+        
+        Args:
+            task_id: ID of the task to fail
+            reason: Reason for failure
+            
+        Returns:
+            True if marked as failed successfully, False otherwise
+        """
+        try:
+            task_record = (await self.db.execute(
+                select(Tasks).where(Tasks.task_id == task_id)
+            )).scalars().first()
+            if not task_record:
+                logger.warning(f"Task {task_id} not found")
+                return False
+            
+            task_record.status = 'failed'
+            task_record.completion_time = datetime.utcnow()
+            task_record.task_data = {
+                **(task_record.task_data or {}),
+                "failure_reason": reason
+            }
+            
+            await self._release_trader(task_record, "failed")
+            await self.db.commit()
+            return True
+            
+        except Exception as e:
+            logger.exception(f"Error failing task: {e}")
+            await self.db.rollback()
+            return False
+    
+    async def get_tasks_by_target(self, target_id: str, status: Optional[str] = None) -> List[Task]:
+        """
+        Get tasks associated with a specific target entity (e.g., a trader).
+        
+        Args:
+            target_id: ID of the target entity
+            status: Optional status to filter by
+            
+        Returns:
+            List of Task entities targeting the entity
+        """
+        conditions = [Tasks.target_id == target_id]
+        if status:
+            conditions.append(Tasks.status == status)
+        
+        try:
+            return await self._load_tasks(*conditions)
+        except Exception as e:
+            logger.exception(f"Error getting tasks by target: {e}")
+            return []
+    
+    async def _load_tasks(self, *conditions) -> List[Task]:
+        """Load the tasks matching the conditions with their type codes in one query."""
+        result = await self.db.execute(
+            select(Tasks, TaskTypes.code)
+            .outerjoin(TaskTypes, TaskTypes.task_type_id == Tasks.task_type_id)
+            .where(*conditions)
+        )
+        return [task_from_record(task_record, code) for task_record, code in result.all()]
+    
+    async def _release_trader(self, task_record: Tasks, outcome: str) -> None:
+        """Clear the active task of the trader the task targets, allowing it to move again."""
+        if not task_record.target_id:
+            return
+        try:
+            from app.models.trader import TraderModel
+            result = await self.db.execute(
+                update(TraderModel).where(
+                    TraderModel.trader_id == task_record.target_id,
+                    TraderModel.active_task_id == str(task_record.task_id)
+                ).values(active_task_id=None, can_move=True)
+            )
+            if result.rowcount:
+                logger.info(f"Cleared active_task_id of trader {task_record.target_id} as task {task_record.task_id} {outcome}")
+        except Exception as e:
+            logger.warning(f"Error updating trader after task {outcome}: {e}")
@@ -1,8 +1,9 @@
 from app.ai.mcts.states.trader_state import TraderState
 from sqlalchemy import Column, String, Text, Table, MetaData
 from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database.connection import SessionLocal
+from database.unit_of_work import unit_of_work
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Union
 import logging as logger
@@ -142,23 +143,8 @@ class TraderManager:
         Returns:
             list: List of all trader instances
         """
-        # Use the existing db session when possible
-        if self.db:
-            stmt = select(self.traders_table.c.trader_id)
-            results = self.db.execute(stmt).fetchall()
-            
-            traders = []
-            for result in results:
-                trader_id = result[0]
-                trader = self.load_trader(trader_id)
-                if trader:
-                    traders.append(trader)
-            
-            return traders
-        
-        # Fallback to creating a new session if needed
-        db = SessionLocal()
-        try:
+        # Use the existing db session or unit of work when possible
+        with unit_of_work(self.db) as db:
             stmt = select(self.traders_table.c.trader_id)
             results = db.execute(stmt).fetchall()
             
@@ -170,8 +156,6 @@ class TraderManager:
                     traders.append(trader)
             
             return traders
-        finally:
-            db.close()
     
     def get_traders_at_location(self, location_id):
         """
@@ -183,23 +167,8 @@ class TraderManager:
         Returns:
             list: List of trader instances at the location
         """
-        # Use the existing db session when possible
-        if self.db:
-            stmt = select(self.traders_table.c.trader_id).where(self.traders_table.c.location_id == location_id)
-            results = self.db.execute(stmt).fetchall()
-            
-            traders = []
-            for result in results:
-                trader_id = result[0]
-                trader = self.load_trader(trader_id)
-                if trader:
-                    traders.append(trader)
-            
-            return traders
-            
-        # Fallback to creating a new session if needed
-        db = SessionLocal()
-        try:
+        # Use the existing db session or unit of work when possible
+        with unit_of_work(self.db) as db:
             stmt = select(self.traders_table.c.trader_id).where(self.traders_table.c.location_id == location_id)
             results = db.execute(stmt).fetchall()
             
@@ -211,8 +180,6 @@ class TraderManager:
                     traders.append(trader)
             
             return traders
-        finally:
-            db.close()
     
     def delete_trader(self, trader_id):
         """
@@ -228,33 +195,16 @@ class TraderManager:
         if trader_id in self.traders:
             del self.traders[trader_id]
         
-        # Delete from database using existing session when possible
-        if self.db:
-            try:
-                stmt = delete(self.traders_table).where(self.traders_table.c.trader_id == trader_id)
-                self.db.execute(stmt)
-                self.db.commit()
-                logger.info(f"Deleted trader: {trader_id}")
-                return True
-            except Exception as e:
-                self.db.rollback()
-                logger.error(f"Failed to delete trader {trader_id}: {str(e)}")
-                return False
-                
-        # Fallback to creating a new session if needed
-        db = SessionLocal()
+        # Delete from database using existing session or unit of work when possible
         try:
-            stmt = delete(self.traders_table).where(self.traders_table.c.trader_id == trader_id)
-            db.execute(stmt)
-            db.commit()
+            with unit_of_work(self.db) as db:
+                stmt = delete(self.traders_table).where(self.traders_table.c.trader_id == trader_id)
+                db.execute(stmt)
             logger.info(f"Deleted trader: {trader_id}")
             return True
         except Exception as e:
-            db.rollback()
             logger.error(f"Failed to delete trader {trader_id}: {str(e)}")
             return False
-        finally:
-            db.close()
     
     def update_trader_location(self, trader_id, location_id):
         """
@@ -349,22 +299,8 @@ class TraderManager:
         # 2. Filter based on trader preferences
         # 3. Consider distance, safety, trade opportunities, etc.
         
-        # Use the existing db session when possible
-        if self.db:
-            from app.models.settlement import Settlement
-            
-            # Query for settlements
-            current_location_id = trader.get_property("current_location_id")
-            stmt = select(Settlement.settlement_id).where(
-                Settlement.settlement_id != current_location_id
-            ).limit(5)
-            
-            results = self.db.execute(stmt).fetchall()
-            return [str(row[0]) for row in results]
-            
-        # Fallback to creating a new session if needed
-        db = SessionLocal()
-        try:
+        # Use the existing db session or unit of work when possible
+        with unit_of_work(self.db) as db:
             from app.models.settlement import Settlement
             
             # Query for settlements
@@ -375,8 +311,6 @@ class TraderManager:
             
             results = db.execute(stmt).fetchall()
             return [str(row[0]) for row in results]
-        finally:
-            db.close()
     
     def save_all_traders(self):
         """
@@ -403,26 +337,14 @@ class TraderManager:
         Returns:
             Trader: The trader with the given name, or None if not found
         """
-        # Use the existing db session when possible
-        if self.db:
-            stmt = select(self.traders_table.c.trader_id).where(self.traders_table.c.name == name)
-            result = self.db.execute(stmt).first()
-            
-            if result:
-                return self.load_trader(result[0])
-            return None
-            
-        # Fallback to creating a new session if needed
-        db = SessionLocal()
-        try:
+        # Use the existing db session or unit of work when possible
+        with unit_of_work(self.db) as db:
             stmt = select(self.traders_table.c.trader_id).where(self.traders_table.c.name == name)
             result = db.execute(stmt).first()
             
             if result:
                 return self.load_trader(result[0])
             return None
-        finally:
-            db.close()
     
     def get_trader_count(self):
         """
@@ -431,20 +353,11 @@ class TraderManager:
         Returns:
             int: The total count of traders
         """
-        # Use the existing db session when possible
-        if self.db:
-            stmt = select(self.traders_table)
-            result = self.db.execute(stmt).all()
-            return len(result)
-            
-        # Fallback to creating a new session if needed
-        db = SessionLocal()
-        try:
+        # Use the existing db session or unit of work when possible
+        with unit_of_work(self.db) as db:
             stmt = select(self.traders_table)
             result = db.execute(stmt).all()
             return len(result)
-        finally:
-            db.close()
     
     def generate_random_trader(self, location_id=None):
         """
@@ -512,24 +425,13 @@ class TraderManager:
         """
         settlements_list = []
         
-        # Get all available settlements using the existing db session when possible
-        if self.db:
+        # Get all available settlements using the existing db session or unit of work when possible
+        with unit_of_work(self.db) as db:
             from app.models.settlement import Settlement
             
             # Query for settlements
             stmt = select(Settlement.settlement_id)
-            settlements_list = [str(row[0]) for row in self.db.execute(stmt).fetchall()]
-        else:
-            # Fallback to creating a new session if needed
-            db = SessionLocal()
-            try:
-                from app.models.settlement import Settlement
-                
-                # Query for settlements
-                stmt = select(Settlement.settlement_id)
-                settlements_list = [str(row[0]) for row in db.execute(stmt).fetchall()]
-            finally:
-                db.close()
+            settlements_list = [str(row[0]) for row in db.execute(stmt).fetchall()]
         
         if not settlements_list:
             logger.warning("No settlements found for trader initialization")
@@ -543,4 +445,55 @@ class TraderManager:
             traders.append(trader)
         
         logger.info(f"Initialized {len(traders)} random traders")
-        return traders
\ No newline at end of file
+        return traders
+
+class AsyncTraderManager:
+    """Native async reads of traders and their inventories on an AsyncSession, for the trader API routes."""
+    
+    def __init__(self, db: AsyncSession):
+        """Initialize the AsyncTraderManager with the async session to work in."""
+        self.db = db
+    
+    async def get_trader(self, trader_id):
+        """
+        Get a trader row.
+        
+        Args:
+            trader_id (str): The ID of the trader
+            
+        Returns:
+            Traders: The trader, or None if not found
+        """
+        from app.models.core import Traders
+        stmt = select(Traders).where(Traders.trader_id == trader_id)
+        return (await self.db.execute(stmt)).scalars().first()
+    
+    async def get_traders(self, settlement_id=None):
+        """
+        Get the traders, optionally those currently in a settlement.
+        
+        Args:
+            settlement_id (str): Optional ID of the settlement
+            
+        Returns:
+            list: List of trader rows
+        """
+        from app.models.core import Traders
+        stmt = select(Traders)
+        if settlement_id:
+            stmt = stmt.where(Traders.current_settlement_id == settlement_id)
+        return (await self.db.execute(stmt)).scalars().all()
+    
+    async def get_inventory(self, trader_id):
+        """
+        Get the inventory rows of a trader.
+        
+        Args:
+            trader_id (str): The ID of the trader
+            
+        Returns:
+            list: List of TraderInventory rows
+        """
+        from app.models.core import TraderInventory
+        stmt = select(TraderInventory).where(TraderInventory.trader_id == trader_id)
+        return (await self.db.execute(stmt)).scalars().all()
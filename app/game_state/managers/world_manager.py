@@ -11,6 +11,7 @@ from sqlalchemy import Column, String, Text, Table, MetaData
 from sqlalchemy import select, insert, update, delete
 from sqlalchemy.orm import Session
 from database.connection import get_db
+from database.unit_of_work import unit_of_work
 #from app.models.template import Template  # Replace with your actual model class
 
 # Import your world class
@@ -32,8 +33,16 @@ class WorldManager:
     Each world type should have its own manager class.
     """
     
-    def __init__(self):
-        """Initialize the manager."""
+    def __init__(self, db: Optional[Session] = None):
+        """
+        Initialize the manager.
+        
+        Args:
+            db: Session to work in; if None, calls join the current unit of work
+                or open their own
+        """
+        self.db = db
+        
         # Cache of loaded entities
         self.entities = {}  # Dictionary to store loaded entities by ID
         
@@ -625,10 +634,8 @@ class WorldManager:
         """
         # For now, we'll use a direct database query to the Worlds table
         from app.models.core import Worlds
-        from database.connection import SessionLocal
         
-        db = SessionLocal()
-        try:
+        with unit_of_work(self.db) as db:
             world = db.query(Worlds).filter(Worlds.world_id == world_id).first()
             
             if not world:
@@ -647,8 +654,6 @@ class WorldManager:
             }
             
             return world_info
-        finally:
-            db.close()
     
     def get_current_day(self) -> int:
         """
@@ -660,10 +665,8 @@ class WorldManager:
         """
         # For now, use a direct query to get the current day of the first world
         from app.models.core import Worlds
-        from database.connection import SessionLocal
         
-        db = SessionLocal()
-        try:
+        with unit_of_work(self.db) as db:
             # Get the first world (or a specific world in a more realistic scenario)
             world = db.query(Worlds).first()
             
@@ -672,8 +675,6 @@ class WorldManager:
                 return 1
             
             return world.current_game_day or 1
-        finally:
-            db.close()
             
     def get_location_state(self, location_id: str) -> Dict[str, Any]:
         """
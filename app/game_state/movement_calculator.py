@@ -5,6 +5,7 @@ import random
 from sqlalchemy.orm import Session
 
 from app.models.seasons import Seasons
+from app.game_state.reference_data import get_reference_data
 
 # Define these classes here temporarily since they're not available in models yet
 class Biome:
@@ -50,7 +51,11 @@ class MovementFactors:
         self.additional_modifiers = additional_modifiers
         
     def calculate_total_speed(self):
-        return 1.0  # Placeholder
+        speed = (self.base_speed * self.biome_modifier * self.road_modifier * self.weather_modifier *
+                 self.season_modifier * self.transport_modifier)
+        for modifier in self.additional_modifiers.values():
+            speed *= modifier
+        return speed
 
 class MovementParams:
     pass
@@ -206,10 +211,8 @@ class MovementCalculator:
         return self.db.query(Worlds).filter(Worlds.world_id == world_id).first()
     
     def _get_season(self, season_name: str) -> Season:
-        """Get season data from database."""
-        # Implement based on your ORM model
-        from app.models.seasons import Seasons
-        season_data = self.db.query(Seasons).filter(Seasons.name == season_name).first()
+        """Get season data from the reference data cache."""
+        season_data = get_reference_data().season(season_name)
         
         # Convert to Pydantic model
         return Season.from_orm(season_data)
@@ -224,13 +227,11 @@ class MovementCalculator:
         return Area.from_orm(area_data)
     
     def _get_biome(self, biome_id: int) -> Biome:
-        """Get biome data from database."""
-        # Implement based on your ORM model
-        from app.models.biomes import Biomes
-        biome_data = self.db.query(Biomes).filter(Biomes.biome_id == biome_id).first()
+        """Get biome data from the reference data cache."""
+        biome_data = get_reference_data().biome(biome_id)
         
         # Convert to Pydantic model
-        return Biomes.has_attribute(biome_data)
+        return Biome.has_attribute(biome_data)
     
     def _get_road_between(self, area1_id: str, area2_id: str) -> Optional[RoadType]:
         """Get road type between two areas if one exists."""
@@ -0,0 +1,350 @@
+# app/game_state/reference_data.py
+"""Process-wide cache of the static game reference tables.
+
+Seasons, biomes, resource types, resource site types and stages, building
+types and area encounter types and outcomes change only when the game data is
+edited, but were queried again in every tick loop and request. A
+``ReferenceData`` snapshot loads each of these tables with one query and
+indexes it by the keys the game looks rows up by. Rows are kept as plain
+read-only records, detached from any session, so the same snapshot is shared
+by every request of a FastAPI process and every task of a Celery worker.
+
+``get_reference_data`` returns the snapshot of the process and reloads it,
+with a session of its own, when it is invalidated:
+
+- ``bump_reference_data_version`` increments a version number in Redis and
+  publishes it on a pub/sub channel; each process listens on the channel and
+  drops its snapshot as soon as the message arrives. Migrations and the
+  seeding scripts that edit the tables bump the version
+- as a fallback for missed messages, processes compare their snapshot with
+  the Redis version every ``VERSION_CHECK_INTERVAL`` seconds
+- without Redis, snapshots are reloaded every ``RELOAD_INTERVAL`` seconds
+"""
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Redis URL of the version key and the invalidation channel; the Celery broker
+# if unset, and process-local caching if set to an empty string
+REFERENCE_DATA_REDIS_URL: Optional[str] = os.environ.get("REFERENCE_DATA_REDIS_URL")
+
+# Redis key of the reference data version and the channel announcing new versions
+VERSION_KEY = "reference_data:version"
+INVALIDATION_CHANNEL = "reference_data:invalidate"
+
+# Seconds between checks of the Redis version
+VERSION_CHECK_INTERVAL = 30.0
+
+# Seconds after which a snapshot is reloaded when Redis is not available
+RELOAD_INTERVAL = 600.0
+
+# Seconds to wait before connecting to Redis again after a failed attempt
+REDIS_RETRY_INTERVAL = 30.0
+
+# Snapshot of the process with the time its version was last checked
+_snapshot: Optional['ReferenceData'] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+# Redis client of the process (False if disabled), when to retry connecting
+# after a failure, and the process ID the invalidation listener runs in
+_redis_client: Any = None
+_redis_retry_at = 0.0
+_listener_pid: Optional[int] = None
+
+
+def to_record(row: Any) -> SimpleNamespace:
+    """
+    Copy the column values of an ORM row into a plain record.
+
+    Args:
+        row: ORM row
+
+    Returns:
+        Record with one attribute per column
+    """
+    return SimpleNamespace(**{column.key: getattr(row, column.key) for column in row.__mapper__.column_attrs})
+
+
+class ReferenceData:
+    """
+    One loaded version of the reference tables.
+    """
+
+    def __init__(self, tables: Dict[str, List[Any]], version: int = 0):
+        """
+        Index the rows of the reference tables.
+
+        Args:
+            tables: Records per table name ("seasons", "biomes", "resource_types",
+                "site_types", "site_stages", "building_types", "encounter_types",
+                "encounter_outcomes")
+            version: Reference data version the rows were loaded at
+        """
+        self.version = version
+        self.loaded_at = time.time()
+
+        self.seasons: Dict[str, Any] = {row.name: row for row in tables.get("seasons", [])}
+        biomes = tables.get("biomes", [])
+        self.biomes: Dict[int, Any] = {row.biome_id: row for row in biomes}
+        self.biomes_by_name: Dict[str, Any] = {row.name: row for row in biomes}
+        resource_types = tables.get("resource_types", [])
+        self.resource_types: Dict[str, Any] = {str(row.resource_type_id): row for row in resource_types}
+        self.resource_types_by_code: Dict[str, Any] = {row.resource_code: row for row in resource_types}
+        self.site_types: Dict[str, Any] = {str(row.site_type_id): row for row in tables.get("site_types", [])}
+        self.site_stages: Dict[Tuple[str, str], Any] = {
+            (str(row.site_type_id), row.stage_code): row for row in tables.get("site_stages", [])
+        }
+        self.building_types: Dict[str, Any] = {
+            str(row.building_type_id): row for row in tables.get("building_types", [])
+        }
+        self.encounter_types: Dict[str, Any] = {
+            str(row.encounter_type_id): row for row in tables.get("encounter_types", [])
+        }
+        outcomes = tables.get("encounter_outcomes", [])
+        self.encounter_outcomes: Dict[str, Any] = {str(row.outcome_id): row for row in outcomes}
+        self.outcomes_by_encounter_type: Dict[str, List[Any]] = {}
+        for row in outcomes:
+            self.outcomes_by_encounter_type.setdefault(str(row.encounter_type_id), []).append(row)
+
+    @classmethod
+    def load(cls, db: Session, version: int = 0) -> 'ReferenceData':
+        """
+        Load the reference tables with one query per table.
+
+        Tables that do not exist yet (e.g. before their migration) stay empty.
+        A failed table rolls the session back, so it should be a session of
+        its own rather than one holding the caller's changes.
+
+        Args:
+            db: Database session used only for loading
+            version: Reference data version being loaded
+
+        Returns:
+            The loaded reference data
+        """
+        from app.models.core import (
+            AreaEncounterOutcomes, AreaEncounterTypes, BuildingTypes, ResourceSiteStages, ResourceSiteTypes,
+            ResourceTypes
+        )
+        from app.models.biomes import Biomes
+        from app.models.seasons import Seasons
+
+        models = {
+            "seasons": Seasons,
+            "biomes": Biomes,
+            "resource_types": ResourceTypes,
+            "site_types": ResourceSiteTypes,
+            "site_stages": ResourceSiteStages,
+            "building_types": BuildingTypes,
+            "encounter_types": AreaEncounterTypes,
+            "encounter_outcomes": AreaEncounterOutcomes
+        }
+        tables = {}
+        for name, model in models.items():
+            try:
+                tables[name] = [to_record(row) for row in db.query(model).all()]
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Could not load reference table {model.__tablename__}: {str(e)}")
+                tables[name] = []
+
+        data = cls(tables, version)
+        logger.info(f"Loaded reference data version {version}: " +
+                    ", ".join(f"{len(rows)} {name}" for name, rows in tables.items()))
+        return data
+
+    def season(self, name: Optional[str]) -> Optional[Any]:
+        """Get a season by name."""
+        return self.seasons.get(name)
+
+    def biome(self, biome_id: int) -> Optional[Any]:
+        """Get a biome by ID."""
+        return self.biomes.get(biome_id)
+
+    def biome_movement_modifiers(self) -> Dict[str, float]:
+        """Get the base movement modifier of every biome by name."""
+        return {
+            name: biome.base_movement_modifier for name, biome in self.biomes_by_name.items()
+            if biome.base_movement_modifier is not None
+        }
+
+    def resource_type(self, resource_type_id: Any) -> Optional[Any]:
+        """Get a resource type by ID."""
+        return self.resource_types.get(str(resource_type_id))
+
+    def resource_type_by_code(self, resource_code: str) -> Optional[Any]:
+        """Get a resource type by code."""
+        return self.resource_types_by_code.get(resource_code)
+
+    def site_type(self, site_type_id: Any) -> Optional[Any]:
+        """Get a resource site type by ID."""
+        return self.site_types.get(str(site_type_id))
+
+    def site_stage(self, site_type_id: Any, stage_code: Optional[str]) -> Optional[Any]:
+        """Get the stage of a resource site type by stage code."""
+        return self.site_stages.get((str(site_type_id), stage_code))
+
+    def building_type(self, building_type_id: Any) -> Optional[Any]:
+        """Get a building type by ID."""
+        return self.building_types.get(str(building_type_id))
+
+    def encounter_type(self, encounter_type_id: Any) -> Optional[Any]:
+        """Get an area encounter type by ID."""
+        return self.encounter_types.get(str(encounter_type_id))
+
+    def all_encounter_types(self) -> List[Any]:
+        """Get every area encounter type."""
+        return list(self.encounter_types.values())
+
+    def encounter_outcome(self, outcome_id: Any) -> Optional[Any]:
+        """Get an area encounter outcome by ID."""
+        return self.encounter_outcomes.get(str(outcome_id))
+
+    def outcomes_for(self, encounter_type_id: Any) -> List[Any]:
+        """Get the outcomes of an area encounter type."""
+        return self.outcomes_by_encounter_type.get(str(encounter_type_id), [])
+
+
+def get_reference_data() -> ReferenceData:
+    """
+    Get the reference data of the process, loading it if it is missing or stale.
+
+    Returns:
+        The shared reference data; its records must not be modified
+    """
+    global _snapshot, _checked_at
+    _ensure_listener()
+
+    now = time.time()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+            return _snapshot
+
+        version = _read_version()
+        if _snapshot is not None:
+            unchanged = _snapshot.version == version if version is not None else now - _snapshot.loaded_at < RELOAD_INTERVAL
+            if unchanged:
+                _checked_at = now
+                return _snapshot
+
+        _snapshot = _load(version or 0)
+        _checked_at = now
+        return _snapshot
+
+
+def bump_reference_data_version() -> int:
+    """
+    Invalidate the reference data of every process after the tables were edited.
+
+    Returns:
+        The new version, or 0 if Redis is not available (only this process is invalidated)
+    """
+    invalidate_reference_data()
+    client = _get_redis_client()
+    if not client:
+        return 0
+    try:
+        version = int(client.incr(VERSION_KEY))
+        client.publish(INVALIDATION_CHANNEL, version)
+        logger.info(f"Bumped reference data version to {version}")
+        return version
+    except Exception as e:
+        logger.warning(f"Could not bump the reference data version: {str(e)}")
+        return 0
+
+
+def invalidate_reference_data() -> None:
+    """Drop the reference data of this process."""
+    global _snapshot
+    _snapshot = None
+
+
+def _load(version: int) -> ReferenceData:
+    """Load a snapshot with a session of its own."""
+    from database.connection import SessionLocal
+    session = SessionLocal()
+    try:
+        return ReferenceData.load(session, version)
+    finally:
+        session.close()
+
+
+def _get_redis_client():
+    """
+    Get the Redis client of the process, or None if Redis is not available.
+
+    A failed connection is retried after REDIS_RETRY_INTERVAL seconds.
+    """
+    global _redis_client, _redis_retry_at
+    if _redis_client is None:
+        if REFERENCE_DATA_REDIS_URL == "":
+            _redis_client = False
+        elif time.monotonic() >= _redis_retry_at:
+            try:
+                import redis
+                url = REFERENCE_DATA_REDIS_URL
+                if url is None:
+                    from app.workers.celery_app import app
+                    url = app.conf.broker_url
+                client = redis.Redis.from_url(url)
+                client.ping()
+                _redis_client = client
+            except Exception as e:
+                logger.warning(f"Redis is not available, reference data is reloaded every {RELOAD_INTERVAL:.0f}s "
+                               f"(retrying in {REDIS_RETRY_INTERVAL:.0f}s): {str(e)}")
+                _redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+    return _redis_client or None
+
+
+def _read_version() -> Optional[int]:
+    """Read the reference data version from Redis, or None if Redis is not available."""
+    client = _get_redis_client()
+    if client is None:
+        return None
+    try:
+        return int(client.get(VERSION_KEY) or 0)
+    except Exception as e:
+        logger.warning(f"Could not read the reference data version: {str(e)}")
+        return None
+
+
+def _ensure_listener() -> None:
+    """Start the invalidation listener of this process (again after a fork, or once Redis is up)."""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+
+    with _lock:
+        if _listener_pid == os.getpid():
+            return
+        client = _get_redis_client()
+        if client is None:
+            return
+        _listener_pid = os.getpid()
+        thread = threading.Thread(target=_listen, args=(client,), name="reference-data-invalidation", daemon=True)
+        thread.start()
+
+
+def _listen(client) -> None:
+    """Drop the snapshot of this process whenever a new version is published."""
+    try:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(INVALIDATION_CHANNEL)
+        for message in pubsub.listen():
+            if message.get("type") == "message":
+                invalidate_reference_data()
+    except Exception as e:
+        logger.warning(f"Reference data invalidation listener stopped: {str(e)}")
@@ -0,0 +1,561 @@
+# app/game_state/route_table.py
+"""Precomputed all-pairs settlement routes of a world.
+
+The area router, trader journey planning and the MCTS states ask for the same
+settlement-to-settlement routes over and over. A ``RouteTable`` runs one
+Dijkstra search per settlement over the ``TravelGraph`` of a world and keeps
+the results as NumPy arrays, so a route lookup is two dictionary lookups and
+an array read. The searches run in SciPy's ``csgraph.dijkstra``, all sources
+of a batch at once:
+
+- ``travel_time``, ``distance``, ``danger`` and ``exit_area`` are
+  settlements x settlements matrices (the danger of a route is the highest
+  danger level on it)
+- ``parents`` holds the shortest path tree of every settlement over the
+  areas; paths are rebuilt from it on first use and memoized
+
+Single changes are applied incrementally: ``add_area``, ``connect_areas``,
+``connect_area_to_settlement`` and ``update_area`` update the graph and
+re-solve only the settlements whose shortest paths can change, recording the
+changed pairs in ``changed_pairs`` for ``persist``, which writes them to the
+existing ``TravelRoutes`` rows.
+
+``get_route_table`` keeps one table per world in process, sharing the cached
+``TravelGraph``; the ``record_*`` functions apply topology changes made by
+``AreaService`` to the cached table and graph.
+"""
+
+import json
+import logging
+import math
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from sqlalchemy.orm import Session
+
+from app.game_state.travel_graph import (
+    DEFAULT_HOP_DISTANCE, TravelGraph, cached_travel_graph, discard_travel_graph, get_travel_graph,
+    invalidate_travel_graph
+)
+
+logger = logging.getLogger(__name__)
+
+# Parent markers of the shortest path trees
+ENTERED_FROM_SOURCE = -1
+UNREACHED = -2
+
+# Smallest edge cost; the sparse graph would drop edges of cost zero
+MIN_EDGE_COST = 1e-9
+
+# Process-wide route tables per world ID
+_route_tables: Dict[Optional[str], 'RouteTable'] = {}
+
+
+class Route(NamedTuple):
+    """A settlement-to-settlement route."""
+    path: Tuple[str, ...]
+    distance: float
+    danger_level: int
+    travel_time: float
+
+
+class RouteTable:
+    """
+    All-pairs shortest routes between the settlements of a travel graph.
+    
+    Travel time is the graph's cost (distance divided by speed); distance is
+    the straight-line length of the route.
+    """
+    
+    def __init__(self, graph: TravelGraph):
+        """
+        Solve the routes between all settlements of a graph.
+        
+        Args:
+            graph: Travel graph of the world; updates through the table also
+                update the graph
+        """
+        self.graph = graph
+        self.settlement_ids: List[str] = sorted(graph.settlement_areas)
+        self.settlement_index: Dict[str, int] = {sid: i for i, sid in enumerate(self.settlement_ids)}
+        
+        num_settlements, num_areas = len(self.settlement_ids), len(graph.area_ids)
+        self.travel_time = np.full((num_settlements, num_settlements), np.inf)
+        self.distance = np.full((num_settlements, num_settlements), np.inf)
+        self.danger = np.zeros((num_settlements, num_settlements), dtype=np.int16)
+        self.exit_area = np.full((num_settlements, num_settlements), UNREACHED, dtype=np.int32)
+        self.parents = np.full((num_settlements, num_areas), UNREACHED, dtype=np.int32)
+        self.area_time = np.full((num_settlements, num_areas), np.inf)
+        self.area_distance = np.full((num_settlements, num_areas), np.inf)
+        self.area_danger = np.zeros((num_settlements, num_areas), dtype=np.int16)
+        
+        self._paths: Dict[Tuple[int, int], Tuple[str, ...]] = {}
+        self.changed_pairs: Set[Tuple[str, str]] = set()
+        
+        self._solve_sources(np.arange(num_settlements))
+        self._solve_exits(np.arange(num_settlements), range(num_settlements))
+    
+    def __len__(self) -> int:
+        return len(self.settlement_ids)
+    
+    def route(self, start_id: str, end_id: str) -> Optional[Route]:
+        """
+        Look up the route between two settlements.
+        
+        Returns:
+            The route (an empty path between a settlement and itself), or None
+            if either settlement is unknown or there is no route
+        """
+        s, t = self.settlement_index.get(start_id), self.settlement_index.get(end_id)
+        if s is None or t is None:
+            return None
+        if s == t:
+            return Route((), 0.0, 0, 0.0)
+        if self.exit_area[s, t] < 0:
+            return None
+        return Route(self._path(s, t), float(self.distance[s, t]), int(self.danger[s, t]),
+                     float(self.travel_time[s, t]))
+    
+    def steps(self, start_id: str, end_id: str) -> Optional[int]:
+        """Get the number of hops (areas plus one) between two settlements, or None without a route."""
+        route = self.route(start_id, end_id)
+        if route is None:
+            return None
+        return len(route.path) + 1 if route.path else 0
+    
+    def connect_areas(self, area_id: str, other_area_id: str) -> bool:
+        """
+        Connect two areas and re-solve the settlements whose routes get shorter.
+        
+        Returns:
+            True if the graph changed
+        
+        Raises:
+            KeyError: If an area is not in the graph
+        """
+        if not self.graph.add_connection(area_id, other_area_id):
+            return False
+        
+        i, j = self.graph.area_index[area_id], self.graph.area_index[other_area_id]
+        # A new edge only helps sources that reach one end cheaper through the other
+        affected = ((self.area_time[:, i] + self.graph.hop_cost(i, j) < self.area_time[:, j]) |
+                    (self.area_time[:, j] + self.graph.hop_cost(j, i) < self.area_time[:, i]))
+        self._resolve(np.flatnonzero(affected))
+        return True
+    
+    def connect_area_to_settlement(self, area_id: str, settlement_id: str) -> bool:
+        """
+        Make an area an entry area of a settlement and update its routes.
+        
+        Returns:
+            True if the graph changed
+        
+        Raises:
+            KeyError: If the area is not in the graph
+        """
+        if not self.graph.add_settlement_connection(area_id, settlement_id):
+            return False
+        
+        if settlement_id not in self.settlement_index:
+            self._add_settlement(settlement_id)
+        t = self.settlement_index[settlement_id]
+        
+        # Routes from the settlement, and routes to it through the new area
+        self._resolve(np.array([t]), columns=[t])
+        return True
+    
+    def add_area(self, area: Any) -> None:
+        """
+        Add a new area and update the routes of the settlements it connects to.
+        
+        Args:
+            area: ``Areas`` row of the new area
+        """
+        self.graph.add_area(area)
+        i = self.graph.area_index[str(area.area_id)]
+        
+        self.parents = np.hstack([self.parents, np.full((len(self), 1), UNREACHED, dtype=np.int32)])
+        self.area_time = np.hstack([self.area_time, np.full((len(self), 1), np.inf)])
+        self.area_distance = np.hstack([self.area_distance, np.full((len(self), 1), np.inf)])
+        self.area_danger = np.hstack([self.area_danger, np.zeros((len(self), 1), dtype=np.int16)])
+        
+        # Only the settlements it is an entry area of can reach the new area
+        entry_of = [sid for sid, areas in self.graph.settlement_areas.items() if i in areas]
+        for settlement_id in entry_of:
+            if settlement_id not in self.settlement_index:
+                self._add_settlement(settlement_id)
+        rows = [self.settlement_index[sid] for sid in entry_of]
+        self._resolve(np.array(rows, dtype=np.int64), columns=rows)
+    
+    def update_area(self, area: Any) -> None:
+        """
+        Update an area's position, speed or danger and re-solve the affected settlements.
+        
+        Args:
+            area: ``Areas`` row with the new values
+        
+        Raises:
+            KeyError: If the area is not in the graph
+        """
+        i = self.graph.area_index[str(area.area_id)]
+        
+        # Hops into the area and, with new coordinates, into its neighbours change cost
+        changed = [i] + self.graph.neighbours(i)
+        used = np.zeros(len(self), dtype=bool)
+        for area_index in changed:
+            used |= (self.parents == area_index).any(axis=1) | (self.exit_area == area_index).any(axis=1)
+        
+        self.graph.update_area(area)
+        
+        improved = np.zeros(len(self), dtype=bool)
+        for area_index in changed:
+            improved |= self._improves(area_index)
+        columns = [t for t, sid in enumerate(self.settlement_ids)
+                   if any(a in self.graph.settlement_areas[sid] for a in changed)]
+        self._resolve(np.flatnonzero(used | improved), columns=columns)
+    
+    def persist(self, db: Session, world_id: Optional[str], pairs: Optional[Iterable[Tuple[str, str]]] = None) -> int:
+        """
+        Write routes to the ``TravelRoutes`` table, updating existing rows.
+        
+        The caller commits the session.
+        
+        Args:
+            db: Database session
+            world_id: World the routes belong to
+            pairs: (start, end) settlement pairs to write; by default the pairs
+                changed since the last call, which after construction is all
+        
+        Returns:
+            Number of rows written
+        """
+        from app.models.core import TravelRoutes
+        
+        if pairs is None:
+            pairs = self.changed_pairs if self.changed_pairs else [
+                (start, end) for start in self.settlement_ids for end in self.settlement_ids if start != end
+            ]
+        pairs = list(pairs)
+        
+        query = db.query(TravelRoutes)
+        if world_id is not None:
+            query = query.filter(TravelRoutes.world_id == world_id)
+        existing = {(row.start_settlement_id, row.end_settlement_id): row for row in query.all()}
+        
+        now = datetime.now()
+        written = 0
+        for start_id, end_id in pairs:
+            route = self.route(start_id, end_id)
+            if route is None or not route.path:
+                continue
+            row = existing.get((start_id, end_id))
+            if row is None:
+                row = TravelRoutes(route_id=str(uuid.uuid4()), world_id=world_id,
+                                   start_settlement_id=start_id, end_settlement_id=end_id, created_at=now)
+                db.add(row)
+            row.path = json.dumps(list(route.path))
+            row.total_distance = route.distance
+            row.danger_level = route.danger_level
+            row.travel_time = int(math.ceil(route.travel_time))
+            row.last_updated = now
+            written += 1
+        
+        self.changed_pairs.clear()
+        logger.info(f"Persisted {written} travel routes of world {world_id}")
+        return written
+    
+    def _path(self, s: int, t: int) -> Tuple[str, ...]:
+        """Rebuild the area path of a route from the shortest path tree, memoized."""
+        path = self._paths.get((s, t))
+        if path is None:
+            areas = []
+            area = int(self.exit_area[s, t])
+            while area != ENTERED_FROM_SOURCE:
+                areas.append(self.graph.area_ids[area])
+                area = int(self.parents[s, area])
+            path = tuple(reversed(areas))
+            self._paths[(s, t)] = path
+        return path
+    
+    def _solve_sources(self, rows: np.ndarray) -> None:
+        """
+        Solve the shortest path trees of some source settlements, filling their rows.
+        
+        Runs SciPy's Dijkstra on the area graph extended by one node per
+        settlement with edges into its entry areas, then accumulates the
+        distance and danger along the trees by pointer jumping.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return
+        graph = self.graph
+        num_areas, num_settlements = len(graph.area_ids), len(self)
+        
+        # Settlement node s is num_areas + s; explicit zero costs would be dropped
+        entry_sources, entry_areas, entry_costs = [], [], []
+        for s, settlement_id in enumerate(self.settlement_ids):
+            for area in graph.settlement_areas.get(settlement_id, []):
+                entry_sources.append(num_areas + s)
+                entry_areas.append(area)
+                entry_costs.append(max(graph.entry_cost(settlement_id, area), MIN_EDGE_COST))
+        edge_sources = np.repeat(np.arange(num_areas), np.diff(graph.indptr))
+        matrix = csr_matrix(
+            (np.concatenate([np.maximum(graph.costs, MIN_EDGE_COST), entry_costs]),
+             (np.concatenate([edge_sources, entry_sources]).astype(np.int64),
+              np.concatenate([graph.indices, entry_areas]).astype(np.int64))),
+            shape=(num_areas + num_settlements, num_areas + num_settlements)
+        )
+        times, predecessors = dijkstra(matrix, directed=True, indices=num_areas + rows, return_predecessors=True)
+        times, predecessors = times[:, :num_areas], predecessors[:, :num_areas]
+        
+        reached = np.isfinite(times)
+        from_source = predecessors >= num_areas
+        parents = np.where(reached, np.where(from_source, ENTERED_FROM_SOURCE, predecessors), UNREACHED)
+        
+        # Length and danger of the last hop into every area
+        own = np.broadcast_to(np.arange(num_areas), parents.shape)
+        previous = np.where(parents >= 0, parents, own)
+        hops = np.hypot(graph.x[own] - graph.x[previous], graph.y[own] - graph.y[previous])
+        settlement_positions = np.array([graph.settlement_positions.get(self.settlement_ids[s], (np.nan, np.nan))
+                                         for s in rows], dtype=np.float64).reshape(len(rows), 2)
+        entry_hops = np.hypot(graph.x[own] - settlement_positions[:, :1], graph.y[own] - settlement_positions[:, 1:])
+        hops = np.where(parents == ENTERED_FROM_SOURCE, entry_hops, hops)
+        hops = np.where(np.isnan(hops), DEFAULT_HOP_DISTANCE, hops)
+        
+        # Pointer jumping: add up (and take the max of) the hops along the
+        # trees; tree roots point to a sentinel column with nothing to add
+        sentinel = num_areas
+        distance = np.hstack([np.where(reached, hops, np.inf), np.zeros((len(rows), 1))])
+        danger = np.hstack([np.where(reached, graph.danger[own], 0), np.zeros((len(rows), 1), dtype=np.int64)])
+        pointer = np.hstack([np.where(parents >= 0, parents, sentinel), np.full((len(rows), 1), sentinel)])
+        row_index = np.arange(len(rows))[:, None]
+        while (pointer != sentinel).any():
+            distance = distance + distance[row_index, pointer]
+            danger = np.maximum(danger, danger[row_index, pointer])
+            pointer = pointer[row_index, pointer]
+        distance, danger = distance[:, :num_areas], danger[:, :num_areas]
+        
+        self.parents[rows] = parents
+        self.area_time[rows] = times
+        self.area_distance[rows] = distance
+        self.area_danger[rows] = danger
+    
+    def _solve_exits(self, rows: np.ndarray, columns: Iterable[int]) -> None:
+        """Pick the cheapest entry area of each target settlement for some source rows."""
+        for t in columns:
+            target_id = self.settlement_ids[t]
+            entries = np.array(self.graph.settlement_areas.get(target_id, []), dtype=np.int64)
+            if len(entries) == 0 or len(rows) == 0:
+                continue
+            exit_costs = np.array([self.graph.entry_cost(target_id, a) for a in entries])
+            exit_distances = np.array([self.graph.settlement_distance(target_id, a) for a in entries])
+            
+            totals = self.area_time[np.ix_(rows, entries)] + exit_costs
+            best = np.argmin(totals, axis=1)
+            best_areas = entries[best]
+            reachable = np.isfinite(totals[np.arange(len(rows)), best])
+            
+            self.travel_time[rows, t] = np.where(reachable, totals[np.arange(len(rows)), best], np.inf)
+            self.distance[rows, t] = np.where(reachable, self.area_distance[rows, best_areas] + exit_distances[best],
+                                              np.inf)
+            self.danger[rows, t] = np.where(reachable, self.area_danger[rows, best_areas], 0)
+            self.exit_area[rows, t] = np.where(reachable, best_areas, UNREACHED)
+        
+        # A settlement's route to itself is empty
+        for s in rows:
+            if s < len(self.settlement_ids):
+                self.travel_time[s, s] = self.distance[s, s] = 0.0
+                self.danger[s, s] = 0
+                self.exit_area[s, s] = UNREACHED
+    
+    def _resolve(self, rows: np.ndarray, columns: Optional[List[int]] = None) -> None:
+        """
+        Re-solve some source settlements and target columns, recording changed pairs.
+        
+        Args:
+            rows: Source settlements whose trees may have changed
+            columns: Target settlements whose entry areas changed, re-solved
+                for every source
+        """
+        columns = columns or []
+        old_time, old_exit = self.travel_time.copy(), self.exit_area.copy()
+        
+        self._solve_sources(rows)
+        self._solve_exits(rows, range(len(self)))
+        self._solve_exits(np.arange(len(self)), columns)
+        
+        changed = (old_time != self.travel_time) | (old_exit != self.exit_area)
+        for s, t in zip(*np.nonzero(changed)):
+            self.changed_pairs.add((self.settlement_ids[s], self.settlement_ids[t]))
+        rows_set = {int(s) for s in rows}
+        columns_set = set(columns)
+        self._paths = {key: path for key, path in self._paths.items()
+                       if key[0] not in rows_set and key[1] not in columns_set}
+        logger.debug(f"Re-solved {len(rows)} of {len(self)} settlements, {int(changed.sum())} routes changed")
+    
+    def _improves(self, area: int) -> np.ndarray:
+        """Find the sources that now reach an area cheaper than their tree does."""
+        graph = self.graph
+        edge_positions = np.flatnonzero(graph.indices == area)
+        sources = np.searchsorted(graph.indptr, edge_positions, side="right") - 1
+        improved = np.zeros(len(self), dtype=bool)
+        if len(edge_positions):
+            via = (self.area_time[:, sources] + graph.costs[edge_positions]).min(axis=1)
+            improved |= via < self.area_time[:, area]
+        for s, settlement_id in enumerate(self.settlement_ids):
+            if area in graph.settlement_areas[settlement_id]:
+                improved[s] |= graph.entry_cost(settlement_id, area) < self.area_time[s, area]
+        return improved
+    
+    def _add_settlement(self, settlement_id: str) -> None:
+        """Grow the matrices by one unreachable settlement."""
+        self.settlement_index[settlement_id] = len(self.settlement_ids)
+        self.settlement_ids.append(settlement_id)
+        
+        def grow(matrix: np.ndarray, fill: Any, both_axes: bool = True) -> np.ndarray:
+            matrix = np.vstack([matrix, np.full((1, matrix.shape[1]), fill, dtype=matrix.dtype)])
+            if both_axes:
+                matrix = np.hstack([matrix, np.full((matrix.shape[0], 1), fill, dtype=matrix.dtype)])
+            return matrix
+        
+        self.travel_time = grow(self.travel_time, np.inf)
+        self.distance = grow(self.distance, np.inf)
+        self.danger = grow(self.danger, 0)
+        self.exit_area = grow(self.exit_area, UNREACHED)
+        self.parents = grow(self.parents, UNREACHED, both_axes=False)
+        self.area_time = grow(self.area_time, np.inf, both_axes=False)
+        self.area_distance = grow(self.area_distance, np.inf, both_axes=False)
+        self.area_danger = grow(self.area_danger, 0, both_axes=False)
+
+
+def get_route_table(db: Session, world_id: Optional[str] = None) -> RouteTable:
+    """
+    Get the route table of a world, solving it on first use.
+    
+    The table shares the cached travel graph of the world. When the graph
+    was rebuilt from the database (it expired) and differs from the table's,
+    the table is solved again.
+    
+    Args:
+        db: Database session used if the graph has to be built
+        world_id: World ID, or None for all areas
+    
+    Returns:
+        The world's route table
+    """
+    graph = get_travel_graph(db, world_id)
+    table = _route_tables.get(world_id)
+    if table is not None:
+        if table.graph is graph:
+            return table
+        if table.graph.same_as(graph):
+            table.graph = graph
+            return table
+    
+    table = RouteTable(graph)
+    _route_tables[world_id] = table
+    logger.info(f"Solved {len(table) ** 2} settlement routes of world {world_id}")
+    return table
+
+
+def _apply_change(world_id: Optional[str], change) -> None:
+    """
+    Apply a topology change to the cached route table of a world, or to its graph.
+    
+    Args:
+        world_id: World that changed
+        change: Function applying the change to a ``RouteTable`` or ``TravelGraph``
+    """
+    table = _route_tables.get(world_id)
+    graph = cached_travel_graph(world_id)
+    try:
+        if table is not None and table.graph is graph:
+            change(table)
+        elif graph is not None:
+            _route_tables.pop(world_id, None)
+            change(graph)
+    except (KeyError, ValueError):
+        # The change involves an area the cached graph does not know (or already knows)
+        invalidate_route_table(world_id)
+        return
+    
+    if world_id is not None:
+        # The all-areas graph contains every world
+        _route_tables.pop(None, None)
+        discard_travel_graph(None)
+
+
+def record_area_connection(world_id: Optional[str], area_id: str, other_area_id: str) -> None:
+    """Apply a new area connection to the cached routes of a world."""
+    _apply_change(world_id, lambda target: (target.connect_areas if isinstance(target, RouteTable)
+                                            else target.add_connection)(area_id, other_area_id))
+
+
+def record_settlement_connection(world_id: Optional[str], area_id: str, settlement_id: str) -> None:
+    """Apply a new area-to-settlement connection to the cached routes of a world."""
+    _apply_change(world_id, lambda target: (target.connect_area_to_settlement if isinstance(target, RouteTable)
+                                            else target.add_settlement_connection)(area_id, settlement_id))
+
+
+def record_area_created(world_id: Optional[str], area: Any) -> None:
+    """Add a new area to the cached routes of a world."""
+    _apply_change(world_id, lambda target: target.add_area(area))
+
+
+def record_area_update(world_id: Optional[str], area: Any) -> None:
+    """Apply changed area values (position, type, danger) to the cached routes of a world."""
+    _apply_change(world_id, lambda target: target.update_area(area))
+
+
+def invalidate_route_table(world_id: Optional[str] = None) -> None:
+    """
+    Drop cached route tables and travel graphs.
+    
+    Args:
+        world_id: World to drop, or None to drop all
+    """
+    if world_id is None:
+        _route_tables.clear()
+    else:
+        _route_tables.pop(world_id, None)
+        _route_tables.pop(None, None)
+    invalidate_travel_graph(world_id)
+
+
+def find_settlement_path(db: Session, start_id: str, end_id: str, world_id: Optional[str] = None) -> List[str]:
+    """
+    Find a path of areas between two settlements in the route table of their world.
+    
+    Args:
+        db: Database session
+        start_id: Starting settlement ID
+        end_id: Destination settlement ID
+        world_id: World of the settlements, or None to look it up
+    
+    Returns:
+        List of area IDs forming a path. If the settlements have areas but no
+        connected path, the first area of each; empty if either has no areas.
+    """
+    if world_id is None:
+        from app.models.core import Settlements
+        world_id = db.query(Settlements.world_id).filter(Settlements.settlement_id == start_id).scalar()
+        world_id = str(world_id) if world_id is not None else None
+    
+    table = get_route_table(db, world_id)
+    route = table.route(start_id, end_id)
+    if route is not None and route.path:
+        logger.info(f"Found path between settlements {start_id} and {end_id} through {len(route.path)} areas")
+        return list(route.path)
+    
+    start_areas = table.graph.settlement_connected_areas(start_id)
+    end_areas = table.graph.settlement_connected_areas(end_id)
+    if not start_areas or not end_areas:
+        logger.warning(f"No connected areas found for settlement {start_id if not start_areas else end_id}")
+        return []
+    
+    logger.info(f"No path found, returning simple path with first areas from each end")
+    return [start_areas[0], end_areas[0]]
@@ -0,0 +1,298 @@
+# app/game_state/services/action_log_sink.py
+"""Buffered writer of the entity action log.
+
+``LoggingService.log_action`` used to look up the world's game day, add one
+``EntityActionLog`` row and commit for every logged action, from inside the
+per-trader loops of the trader ticks. An ``ActionLogSink`` instead keeps the
+rows of the process in memory and writes them in batches on a connection of
+its own, so logging no longer costs a round trip or a commit of the caller's
+transaction:
+
+- a background thread flushes the buffer every ``flush_interval`` seconds, and
+  as soon as it holds ``flush_size`` rows
+- batches are written with multi-row ``INSERT`` statements, or with ``COPY``
+  once they reach ``copy_threshold`` rows
+- the buffer is flushed when the process exits; Celery worker processes and
+  the API flush it from their shutdown hooks
+- a batch that cannot be written is logged and dropped; the action log is
+  telemetry and must not hold up or grow a tick without bound
+
+``cached_game_day`` keeps the game day of each world for ``GAME_DAY_TTL``
+seconds, well below the interval at which game days advance, so the game day
+is looked up once per world and tick instead of once per row.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import atexit
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Options of the sink of the process
+DEFAULT_SINK_SETTINGS: Dict[str, Any] = {
+    "flush_size": 500,        # Rows that trigger a flush before the interval has passed
+    "flush_interval": 5.0,    # Seconds between flushes of the background thread
+    "copy_threshold": 2000,   # Batches of at least this many rows are written with COPY
+    "max_buffered": 50000     # Rows kept while writing lags behind; older rows are dropped
+}
+
+# Seconds a world's game day is reused for rows logged without one
+GAME_DAY_TTL = 60.0
+
+# Marker of NULL values in the COPY data
+COPY_NULL = "\\N"
+
+# Sink of the process and the game day cache: world ID -> (game day, time it was read)
+_sink: Optional['ActionLogSink'] = None
+_sink_lock = threading.Lock()
+_game_days: Dict[str, Tuple[Optional[int], float]] = {}
+
+
+def action_log_columns() -> List[str]:
+    """Get the column names of the entity action log in table order."""
+    from app.models.logging import EntityActionLog
+    return [column.name for column in EntityActionLog.__table__.columns]
+
+
+def to_copy_value(value: Any) -> Any:
+    """
+    Format a row value for the CSV data of a COPY.
+
+    Args:
+        value: Column value
+
+    Returns:
+        Value for the CSV writer
+    """
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class ActionLogSink:
+    """
+    In-memory buffer of action log rows, written in batches.
+    """
+
+    def __init__(self,
+                 writer: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 background: bool = True,
+                 **settings):
+        """
+        Initialize the sink.
+
+        Args:
+            writer: Writes a batch of rows; the batch is written to the database if None
+            background: Flush from a background thread; if False, rows are
+                flushed by the call that fills the buffer and by ``flush``
+            **settings: Options overriding DEFAULT_SINK_SETTINGS
+        """
+        self.settings = dict(DEFAULT_SINK_SETTINGS)
+        self.settings.update(settings)
+        self.writer = writer or self.write
+        self.background = background
+        self.dropped = 0
+
+        self._rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread_pid: Optional[int] = None
+
+    def append(self, row: Dict[str, Any]) -> str:
+        """
+        Buffer an action log row.
+
+        Args:
+            row: Column values; log_id, timestamp and details are filled in if missing
+
+        Returns:
+            str: ID of the log entry
+        """
+        row.setdefault("log_id", uuid.uuid4())
+        row.setdefault("timestamp", datetime.utcnow())
+        if row.get("details") is None:
+            row["details"] = {}
+
+        with self._lock:
+            self._rows.append(row)
+            overflow = len(self._rows) - self.settings["max_buffered"]
+            if overflow > 0:
+                del self._rows[:overflow]
+                self.dropped += overflow
+            full = len(self._rows) >= self.settings["flush_size"]
+
+        if self.background:
+            self._ensure_thread()
+            if full:
+                self._wake.set()
+        elif full:
+            self.flush()
+        return str(row["log_id"])
+
+    def pending(self) -> int:
+        """Get the number of buffered rows."""
+        with self._lock:
+            return len(self._rows)
+
+    def flush(self) -> int:
+        """
+        Write all buffered rows.
+
+        Returns:
+            int: Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            try:
+                self.writer(rows)
+                return len(rows)
+            except Exception as e:
+                self.dropped += len(rows)
+                logger.exception(f"Dropped {len(rows)} action log rows that could not be written: {str(e)}")
+                return 0
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Write a batch of rows to the entity action log.
+
+        Args:
+            rows: Column values per row
+        """
+        if len(rows) >= self.settings["copy_threshold"]:
+            try:
+                self._copy(rows)
+                return
+            except Exception as e:
+                logger.warning(f"COPY of {len(rows)} action log rows failed, inserting them: {str(e)}")
+        self._insert(rows)
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        """Write rows with multi-row INSERT statements of at most flush_size rows."""
+        from sqlalchemy import insert
+        from app.models.logging import EntityActionLog
+        from database.connection import engine
+
+        columns = action_log_columns()
+        size = max(1, self.settings["flush_size"])
+        with engine.begin() as connection:
+            for start in range(0, len(rows), size):
+                values = [{name: row.get(name) for name in columns} for row in rows[start:start + size]]
+                connection.execute(insert(EntityActionLog.__table__).values(values))
+
+    def _copy(self, rows: List[Dict[str, Any]]) -> None:
+        """Write rows with one COPY from CSV data."""
+        from database.connection import engine
+
+        columns = action_log_columns()
+        data = io.StringIO()
+        writer = csv.writer(data)
+        for row in rows:
+            writer.writerow([to_copy_value(row.get(name)) for name in columns])
+        data.seek(0)
+
+        connection = engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY entity_action_log ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                    data
+                )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _ensure_thread(self) -> None:
+        """Start the flush thread of this process (again after a fork)."""
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        thread = threading.Thread(target=self._run, name="action-log-sink", daemon=True)
+        thread.start()
+
+    def _run(self) -> None:
+        """Flush the buffer every interval, or earlier when it is full."""
+        while True:
+            self._wake.wait(self.settings["flush_interval"])
+            self._wake.clear()
+            self.flush()
+
+
+def get_action_log_sink() -> ActionLogSink:
+    """
+    Get the action log sink of the process.
+
+    Returns:
+        The shared sink, flushed when the process exits
+    """
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = ActionLogSink()
+                atexit.register(_sink.flush)
+    return _sink
+
+
+def flush_action_logs() -> int:
+    """
+    Write the buffered action log rows of the process.
+
+    Returns:
+        int: Number of rows written
+    """
+    if _sink is None:
+        return 0
+    return _sink.flush()
+
+
+def cached_game_day(db: Session, world_id: str) -> Optional[int]:
+    """
+    Get the current game day of a world, reading it at most once per GAME_DAY_TTL.
+
+    Args:
+        db: Session to read the world with
+        world_id: ID of the world
+
+    Returns:
+        The world's game day, or None if the world does not exist
+    """
+    key = str(world_id)
+    now = time.time()
+    cached = _game_days.get(key)
+    if cached is not None and now - cached[1] < GAME_DAY_TTL:
+        return cached[0]
+
+    from app.models.core import Worlds
+    world = db.query(Worlds.current_game_day).filter(Worlds.world_id == world_id).first()
+    game_day = world.current_game_day if world else None
+    _game_days[key] = (game_day, now)
+    return game_day
+
+
+def clear_game_day_cache() -> None:
+    """Forget the cached game days."""
+    _game_days.clear()
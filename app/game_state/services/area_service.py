@@ -10,7 +10,10 @@ from sqlalchemy.orm import Session
 
 from app.game_state.entities.area import Area
 from app.game_state.managers.area_manager import AreaManager
-from app.models.core import Areas, AreaEncounters, AreaEncounterTypes, ResourceSites
+from app.game_state.route_table import record_area_connection, record_area_update, record_settlement_connection
+from app.game_state.reference_data import get_reference_data
+from app.models.core import Areas, AreaEncounters, AreaSettlements, ResourceSites
+from database.unit_of_work import unit_of_work
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +33,7 @@ class AreaService:
             db (Session): SQLAlchemy database session
         """
         self.db = db
-        self.area_manager = AreaManager()
+        self.area_manager = AreaManager(db)
     
     def get_area(self, area_id: str) -> Optional[Area]:
         """
@@ -131,6 +134,7 @@ class AreaService:
                 logger.error(f"Failed to save area {connected_area_id} after connecting")
                 return False
             
+            record_area_connection(area.get_property("world_id"), area_id, connected_area_id)
             logger.info(f"Connected areas {area.area_name} and {connected_area.area_name}")
             return True
             
@@ -162,11 +166,19 @@ class AreaService:
                 settlement_connections.append(settlement_id)
                 area.set_property("connected_settlements", settlement_connections)
             
-            # Save area
-            if not self.area_manager.save_entity(area):
-                logger.error(f"Failed to save area {area_id} after connecting to settlement")
-                return False
+            # Save the area and the settlement -> areas index in one transaction
+            with unit_of_work(self.db):
+                if not self.area_manager.save_entity(area):
+                    logger.error(f"Failed to save area {area_id} after connecting to settlement")
+                    return False
+                
+                self.db.merge(AreaSettlements(
+                    area_id=area_id,
+                    settlement_id=settlement_id,
+                    world_id=area.get_property("world_id")
+                ))
             
+            record_settlement_connection(area.get_property("world_id"), area_id, settlement_id)
             logger.info(f"Connected area {area.area_name} to settlement {settlement_id}")
             return True
             
@@ -174,6 +186,18 @@ class AreaService:
             logger.exception(f"Error connecting area {area_id} to settlement {settlement_id}: {e}")
             return False
     
+    def get_settlement_area_ids(self, settlement_id: str) -> List[str]:
+        """
+        Get the IDs of the areas connected to a settlement.
+        
+        Args:
+            settlement_id (str): ID of the settlement
+            
+        Returns:
+            List[str]: IDs of the connected areas
+        """
+        return get_settlement_area_ids(self.db, settlement_id)
+    
     def generate_encounter(self, area_id: str, entity_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a random encounter in an area.
@@ -203,7 +227,7 @@ class AreaService:
                 return {"status": "success", "result": "no_encounter"}
             
             # Get available encounter types
-            encounter_types = self.db.query(AreaEncounterTypes).all()
+            encounter_types = get_reference_data().all_encounter_types()
             if not encounter_types:
                 logger.warning("No encounter types found in database")
                 return {"status": "success", "result": "no_encounter"}
@@ -288,9 +312,7 @@ class AreaService:
                 return {"status": "error", "message": f"Active encounter {encounter_id} not found"}
             
             # Get the encounter type
-            encounter_type = self.db.query(AreaEncounterTypes).filter(
-                AreaEncounterTypes.encounter_type_id == encounter.encounter_type_id
-            ).first()
+            encounter_type = get_reference_data().encounter_type(encounter.encounter_type_id)
             
             if not encounter_type:
                 return {"status": "error", "message": "Encounter type not found"}
@@ -415,6 +437,10 @@ class AreaService:
             
             # Save changes
             if self.area_manager.save_entity(area):
+                # Route costs and danger depend on the area, so re-solve the cached routes
+                area_row = self.db.query(Areas).filter(Areas.area_id == area_id).first()
+                if area_row is not None:
+                    record_area_update(area.get_property("world_id"), area_row)
                 logger.info(f"Updated danger level for area {area.area_name} to {new_danger_level}")
                 return {
                     "status": "success",
@@ -478,3 +504,36 @@ class AreaService:
         except Exception as e:
             logger.exception(f"Error processing all areas: {e}")
             return {"status": "error", "message": f"Error processing areas: {str(e)}"}
+
+
+def get_settlement_area_ids(db: Session, settlement_id: str) -> List[str]:
+    """
+    Get the IDs of the areas connected to a settlement from the ``area_settlements`` index.
+    
+    Args:
+        db (Session): Database session
+        settlement_id (str): ID of the settlement
+    
+    Returns:
+        List[str]: IDs of the connected areas
+    """
+    rows = db.query(AreaSettlements.area_id).filter(AreaSettlements.settlement_id == str(settlement_id)).all()
+    return [area_id for area_id, in rows]
+
+
+def link_area_to_settlements(db: Session, area_id: str, settlement_ids: List[str],
+                             world_id: Optional[str] = None) -> None:
+    """
+    Add ``area_settlements`` rows for a new area's settlement connections.
+    
+    Rows are only added to the session; the caller commits them together
+    with the area.
+    
+    Args:
+        db (Session): Database session
+        area_id (str): ID of the area
+        settlement_ids (List[str]): IDs of the settlements the area connects to
+        world_id (Optional[str]): ID of the world the area belongs to
+    """
+    for settlement_id in dict.fromkeys(str(s) for s in settlement_ids):
+        db.add(AreaSettlements(area_id=str(area_id), settlement_id=settlement_id, world_id=world_id))
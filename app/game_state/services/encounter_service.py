@@ -469,7 +469,7 @@ class EncounterService:
     def _get_world_state(self, location_id: str) -> Dict[str, Any]:
         """Get current world state for a location"""
         from app.game_state.managers.world_manager import WorldManager
-        world_manager = WorldManager()
+        world_manager = WorldManager(self.db)
         return world_manager.get_location_state(location_id) or {}
     
     def _get_faction_presence(self, location_id: str) -> Dict[str, float]:
@@ -1,12 +1,14 @@
 # app/game_state/services/logging_service.py
+import base64
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.models.logging import EntityActionLog
-from app.models.core import Worlds
+from app.game_state.services.action_log_sink import cached_game_day, get_action_log_sink
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +47,8 @@ class LoggingService:
                   game_day: Optional[int] = None,
                   game_time: Optional[str] = None) -> str:
         """
-        Log an entity action to the database.
+        Log an entity action. The entry is buffered and written to the
+        database with the next batch of the action log sink.
         
         Args:
             entity_id: ID of the entity performing the action
@@ -71,44 +74,38 @@ class LoggingService:
             str: ID of the created log entry
         """
         try:
-            # If game_day is not provided, try to get it from the world
+            # If game_day is not provided, use the world's cached game day
             if game_day is None:
-                world = self.db.query(Worlds).filter(Worlds.world_id == world_id).first()
-                if world:
-                    game_day = world.current_game_day
-            print("Logging action")
-            # Create the log entry
-            log_entry = EntityActionLog(
-                entity_id=entity_id,
-                entity_type=entity_type,
-                entity_name=entity_name,
-                action_type=action_type,
-                action_subtype=action_subtype,
-                from_location_id=from_location_id,
-                from_location_type=from_location_type,
-                from_location_name=from_location_name,
-                to_location_id=to_location_id,
-                to_location_type=to_location_type,
-                to_location_name=to_location_name,
-                related_entity_id=related_entity_id,
-                related_entity_type=related_entity_type,
-                related_entity_name=related_entity_name,
-                details=details or {},
-                world_id=world_id,
-                game_day=game_day,
-                game_time=game_time,
-                timestamp=datetime.utcnow()
-            )
-            
-            self.db.add(log_entry)
-            self.db.commit()
-            
-            logger.info(f"Logged {action_type} action for {entity_type} {entity_id}")
-            return str(log_entry.log_id)
+                game_day = cached_game_day(self.db, world_id)
+
+            # Buffer the log entry; the sink writes it with the next batch
+            log_id = get_action_log_sink().append({
+                "entity_id": entity_id,
+                "entity_type": entity_type,
+                "entity_name": entity_name,
+                "action_type": action_type,
+                "action_subtype": action_subtype,
+                "from_location_id": from_location_id,
+                "from_location_type": from_location_type,
+                "from_location_name": from_location_name,
+                "to_location_id": to_location_id,
+                "to_location_type": to_location_type,
+                "to_location_name": to_location_name,
+                "related_entity_id": related_entity_id,
+                "related_entity_type": related_entity_type,
+                "related_entity_name": related_entity_name,
+                "details": details or {},
+                "world_id": world_id,
+                "game_day": game_day,
+                "game_time": game_time,
+                "timestamp": datetime.utcnow()
+            })
+
+            logger.debug(f"Logged {action_type} action for {entity_type} {entity_id}")
+            return log_id
             
         except Exception as e:
             logger.exception(f"Error logging action: {e}")
-            self.db.rollback()
             return None
     
     def log_trader_movement(self,
@@ -223,49 +220,115 @@ class LoggingService:
             details=details
         )
     
-    def get_trader_action_history(self, trader_id: str, limit: int = 100) -> list:
+    def get_trader_action_history(self,
+                                  trader_id: str,
+                                  limit: int = 100,
+                                  action_type: Optional[str] = None,
+                                  cursor: Optional[str] = None) -> list:
         """
-        Get action history for a specific trader.
+        Get action history for a specific trader, newest first.
         
         Args:
             trader_id: ID of the trader
             limit: Maximum number of records to return
+            action_type: Optional filter for a specific action type
+            cursor: Optional cursor of the last record of the previous page
+                (see next_cursor); only older records are returned
             
         Returns:
             list: List of action log entries
-        """
-        try:
-            query = self.db.query(EntityActionLog).filter(
-                EntityActionLog.entity_id == trader_id,
-                EntityActionLog.entity_type == 'trader'
-            ).order_by(EntityActionLog.timestamp.desc()).limit(limit)
-            
-            return query.all()
             
-        except Exception as e:
-            logger.exception(f"Error retrieving trader action history: {e}")
-            return []
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        return self._history(trader_id, limit, action_type, cursor)
     
-    def get_trader_movement_history(self, trader_id: str, limit: int = 100) -> list:
+    def get_trader_movement_history(self, trader_id: str, limit: int = 100, cursor: Optional[str] = None) -> list:
         """
-        Get movement history for a specific trader.
+        Get movement history for a specific trader, newest first.
         
         Args:
             trader_id: ID of the trader
             limit: Maximum number of records to return
+            cursor: Optional cursor of the last record of the previous page
+                (see next_cursor); only older records are returned
             
         Returns:
             list: List of movement log entries
+            
+        Raises:
+            ValueError: If the cursor is invalid
         """
+        return self._history(trader_id, limit, "movement", cursor)
+    
+    def _history(self, trader_id: str, limit: int, action_type: Optional[str], cursor: Optional[str]) -> list:
+        """Get one page of a trader's log entries, seeking past the cursor on the (entity_id, timestamp, log_id) index."""
+        before = decode_cursor(cursor) if cursor else None
         try:
             query = self.db.query(EntityActionLog).filter(
                 EntityActionLog.entity_id == trader_id,
-                EntityActionLog.entity_type == 'trader',
-                EntityActionLog.action_type == 'movement'
-            ).order_by(EntityActionLog.timestamp.desc()).limit(limit)
+                EntityActionLog.entity_type == 'trader'
+            )
+            if action_type:
+                query = query.filter(EntityActionLog.action_type == action_type)
+            if before:
+                query = query.filter(tuple_(EntityActionLog.timestamp, EntityActionLog.log_id) < tuple_(*before))
             
-            return query.all()
+            return query.order_by(
+                EntityActionLog.timestamp.desc(), EntityActionLog.log_id.desc()
+            ).limit(limit).all()
             
         except Exception as e:
-            logger.exception(f"Error retrieving trader movement history: {e}")
-            return []
\ No newline at end of file
+            logger.exception(f"Error retrieving trader action history: {e}")
+            return []
+
+
+def encode_cursor(timestamp: datetime, log_id: Any) -> str:
+    """
+    Encode the position of a log entry as an opaque pagination cursor.
+    
+    Args:
+        timestamp: Timestamp of the entry
+        log_id: ID of the entry
+        
+    Returns:
+        str: URL-safe cursor
+    """
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{log_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a pagination cursor.
+    
+    Args:
+        cursor: Cursor from encode_cursor
+        
+    Returns:
+        Tuple of the timestamp and the log ID of the entry
+        
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    try:
+        timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), uuid.UUID(log_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def next_cursor(logs: list, limit: int) -> Optional[str]:
+    """
+    Get the cursor of the page after a page of log entries.
+    
+    Args:
+        logs: Entries of the page
+        limit: Page size the page was requested with
+        
+    Returns:
+        The cursor of the last entry, or None if the page was the last one
+    """
+    if not logs or len(logs) < limit:
+        return None
+    return encode_cursor(logs[-1].timestamp, logs[-1].log_id)
+
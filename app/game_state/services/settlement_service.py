@@ -10,6 +10,8 @@ from app.game_state.entities.settlement import Settlement
 from app.game_state.managers.building_manager import BuildingManager
 from app.game_state.managers.resource_manager import ResourceManager
 from app.game_state.services.logging_service import LoggingService
+from app.ai.mcts.settings import create_mcts
+from app.ai.mcts.states.settlement_state import SettlementState
 from database.connection import SessionLocal
 
 logger = logging.getLogger(__name__)
@@ -21,6 +23,9 @@ class SettlementService:
     but instead work through domain entities and managers.
     """
     
+    # Simulations per tree of a settlement decision
+    MCTS_SIMULATIONS = 200
+    
     def __init__(self, db=None):
         """
         Initialize the settlement service.
@@ -29,7 +34,7 @@ class SettlementService:
             db: Database session (passed to managers that need it)
         """
         self.db = db
-        self.settlement_manager = SettlementManager()
+        self.settlement_manager = SettlementManager(db)
         self.building_type_manager = BuildingManager(db)
         self.resource_site_manager = ResourceManager(db)
 
@@ -53,50 +58,141 @@ class SettlementService:
             if world_id:
                 settlements = [s for s in settlements if s.get_property("world_id") == world_id]
             
-            processed_count = 0
-            results = []
-            tasks_generated = 0
+            return await self._process_settlements(settlements)
             
-            # Process each settlement
-            for settlement in settlements:
-                try:
-                    # Get world_id for this settlement
-                    world_id_for_tasks = settlement.get_property("world_id")
-                    
-                    # Process this settlement's growth
-                    growth_result = self.process_settlement_growth(str(settlement.settlement_id))
-                    
-                    # Process tasks for this settlement
-                    task_result = await self.process_settlement_tasks(str(settlement.settlement_id), world_id_for_tasks)
-                    tasks_generated += task_result.get("tasks_generated", 0)
-                    
-                    results.append({
-                        "settlement_id": str(settlement.settlement_id),
-                        "name": settlement.settlement_name,
-                        "growth_result": growth_result,
-                        "task_result": task_result
-                    })
-                    
-                    if growth_result["status"] == "success":
-                        processed_count += 1
-                    else:
-                        logger.warning(f"Failed to process settlement {settlement.settlement_id}: {growth_result.get('message')}")
-                        
-                except Exception as e:
-                    logger.exception(f"Error processing settlement {settlement.settlement_id}: {e}")
+        except Exception as e:
+            logger.exception(f"Error processing all settlements: {e}")
+            return {"status": "error", "message": f"Error processing settlements: {str(e)}"}
+
+    async def process_settlement_batch(self, settlement_ids: List[str], world_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process a batch of settlements, as dispatched by the settlement beat.
+        
+        Args:
+            settlement_ids (List[str]): IDs of the settlements to process
+            world_id (Optional[str]): World of the settlements; if given, their
+                growth is computed in one batched production run
             
-            return {
-                "status": "success",
-                "total": len(settlements),
-                "processed": processed_count,
-                "tasks_generated": tasks_generated,
-                "results": results
-            }
+        Returns:
+            Dict[str, Any]: Result of processing the batch, in the format of
+            process_all_settlements
+        """
+        logger.info(f"Processing batch of {len(settlement_ids)} settlements")
+        
+        try:
+            if world_id:
+                return await self._process_settlements_batched(world_id, settlement_ids)
+            
+            settlements = []
+            for settlement_id in settlement_ids:
+                settlement = self.settlement_manager.load_settlement(settlement_id)
+                if settlement:
+                    settlements.append(settlement)
+                else:
+                    logger.warning(f"Settlement {settlement_id} not found")
+            
+            return await self._process_settlements(settlements)
             
         except Exception as e:
-            logger.exception(f"Error processing all settlements: {e}")
+            logger.exception(f"Error processing settlement batch: {e}")
             return {"status": "error", "message": f"Error processing settlements: {str(e)}"}
 
+    async def _process_settlements(self, settlements: List[Any]) -> Dict[str, Any]:
+        """
+        Process growth and task generation of settlement entities one by one.
+        
+        Args:
+            settlements (List[Any]): Settlement entities
+            
+        Returns:
+            Dict[str, Any]: Result of processing the settlements
+        """
+        processed_count = 0
+        results = []
+        tasks_generated = 0
+        
+        # Process each settlement
+        for settlement in settlements:
+            try:
+                # Get world_id for this settlement
+                world_id_for_tasks = settlement.get_property("world_id")
+                
+                # Process this settlement's growth
+                growth_result = self.process_settlement_growth(str(settlement.settlement_id))
+                
+                # Process tasks for this settlement
+                task_result = await self.process_settlement_tasks(str(settlement.settlement_id), world_id_for_tasks)
+                tasks_generated += task_result.get("tasks_generated", 0)
+                
+                results.append({
+                    "settlement_id": str(settlement.settlement_id),
+                    "name": settlement.settlement_name,
+                    "growth_result": growth_result,
+                    "task_result": task_result
+                })
+                
+                if growth_result["status"] == "success":
+                    processed_count += 1
+                else:
+                    logger.warning(f"Failed to process settlement {settlement.settlement_id}: {growth_result.get('message')}")
+                    
+            except Exception as e:
+                logger.exception(f"Error processing settlement {settlement.settlement_id}: {e}")
+        
+        return {
+            "status": "success",
+            "total": len(settlements),
+            "processed": processed_count,
+            "tasks_generated": tasks_generated,
+            "results": results
+        }
+
+    async def _process_settlements_batched(self, world_id: str, settlement_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Process the growth of settlements of a world in one batched production
+        run, then their task generation one by one.
+        
+        Args:
+            world_id (str): The world ID
+            settlement_ids (Optional[List[str]]): Settlements to process, or None for all of the world
+            
+        Returns:
+            Dict[str, Any]: Result of processing the settlements
+        """
+        production = self.process_world_production(world_id, settlement_ids)
+        if production["status"] != "success":
+            return production
+        
+        tasks_generated = 0
+        for result in production["results"]:
+            task_result = await self.process_settlement_tasks(result["settlement_id"], world_id)
+            tasks_generated += task_result.get("tasks_generated", 0)
+            result["task_result"] = task_result
+        
+        production["tasks_generated"] = tasks_generated
+        return production
+
+    def process_world_production(self, world_id: str, settlement_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Process resource production, food consumption, population growth and
+        building construction for all settlements of a world at once.
+        
+        Args:
+            world_id (str): The world ID
+            settlement_ids (Optional[List[str]]): Settlements to process, or None for all of the world
+            
+        Returns:
+            Dict[str, Any]: Summary with the growth result of each settlement
+        """
+        from app.game_state.settlement_production import SettlementProduction
+        
+        logger.info(f"Processing batched production for world {world_id}")
+        try:
+            return SettlementProduction(self.db, world_id, settlement_ids).run()
+        except Exception as e:
+            logger.exception(f"Error processing production for world {world_id}: {e}")
+            return {"status": "error", "message": f"Error processing production: {str(e)}"}
+
     def process_settlement_growth(self, settlement_id: str) -> Dict[str, Any]:
         """
         Process population growth, resource production, and building construction for a settlement.
@@ -119,7 +215,7 @@ class SettlementService:
         try:
             # Get the world info through a world manager
             from app.game_state.managers.world_manager import WorldManager
-            world_manager = WorldManager()
+            world_manager = WorldManager(self.db)
             world_info = world_manager.get_world_info(settlement.get_property("world_id"))
             
             if not world_info:
@@ -157,6 +253,48 @@ class SettlementService:
             logger.exception(f"Error processing settlement {settlement_id}: {e}")
             return {"status": "error", "message": f"Error processing settlement: {str(e)}"}
     
+    def get_settlement_decision(self, settlement_id: str) -> Dict[str, Any]:
+        """
+        Use MCTS to determine the next action of a settlement.
+        
+        Settlement states have some of the largest action spaces, so the
+        search uses the "settlement" search settings, which search
+        root-parallel trees on all cores where the process may start a
+        process pool.
+        
+        Args:
+            settlement_id (str): The ID of the settlement
+            
+        Returns:
+            Dict[str, Any]: Decision with the chosen action and the search stats
+        """
+        settlement = self.settlement_manager.load_settlement(settlement_id)
+        if not settlement:
+            logger.error(f"Settlement {settlement_id} not found")
+            return {"status": "error", "message": "Settlement not found"}
+        
+        try:
+            from app.game_state.managers.world_manager import WorldManager
+            world_info = WorldManager(self.db).get_world_info(settlement.get_property("world_id")) or {}
+            
+            # The state reads the settlement's properties at the top level
+            settlement_data = settlement.to_dict()
+            state = SettlementState({**settlement_data["properties"],
+                                     "id": settlement_data["id"], "name": settlement_data["name"]}, world_info)
+            
+            mcts = create_mcts("settlement")
+            best_action = mcts.search_state(state, self.MCTS_SIMULATIONS)
+            if best_action is None:
+                return {"status": "error", "message": "No valid action found"}
+            
+            stats = {key: value for key, value in mcts.decision_stats.items() if key != "best_action"}
+            return {"status": "success", "settlement_id": settlement_id,
+                    "action": best_action.to_dict(), "stats": stats}
+            
+        except Exception as e:
+            logger.exception(f"Error deciding for settlement {settlement_id}: {e}")
+            return {"status": "error", "message": f"Error deciding for settlement: {str(e)}"}
+    
     def _process_resource_production(self, settlement: Settlement, world_info: Dict) -> Dict[str, Any]:
         """
         Process resource production for a settlement.
@@ -479,7 +617,7 @@ class SettlementService:
             
             # Get current game day from world manager
             from app.game_state.managers.world_manager import WorldManager
-            world_manager = WorldManager()
+            world_manager = WorldManager(self.db)
             world_day = world_manager.get_current_day()
             
             # Process settlement needs less frequently (every 7 days)
@@ -1,12 +1,13 @@
 # app/game_state/services/task_service.py
 import logging
 import uuid
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.game_state.managers.task_manager import TaskManager
+from app.game_state.managers.task_manager import AsyncTaskManager, TaskManager
 from app.game_state.entities.task import Task
 from app.models.tasks import TaskTypes, Tasks
 
@@ -18,15 +19,16 @@ class TaskService:
     Acts as a bridge between the API routes, Celery workers, and the TaskManager.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Union[Session, AsyncSession]):
         """
         Initialize with a database session.
         
         Args:
-            db (Session): SQLAlchemy database session
+            db: SQLAlchemy database session; with an AsyncSession (API routes),
+                tasks are managed by the native async AsyncTaskManager
         """
         self.db = db
-        self.task_manager = TaskManager(db)
+        self.task_manager = AsyncTaskManager(db) if isinstance(db, AsyncSession) else TaskManager(db)
     
     async def create_task(self,
                    task_type: str,
@@ -7,14 +7,19 @@ from datetime import datetime
 
 from app.game_state.decision_makers.trader_decision_maker import TraderDecisionMaker
 from app.game_state.movement_calculator import MovementCalculator
+from app.game_state.route_table import find_settlement_path
+from app.game_state.services.world_snapshot_service import WorldSnapshotService
+from app.game_state.reference_data import get_reference_data
 from app.game_state.managers.trader_manager import TraderManager
 from app.game_state.entities.trader import Trader
 from app.ai.mcts.states.trader_state import TraderState
 from app.ai.mcts.core import MCTS
+from app.ai.mcts.batch import BatchMCTS
+from app.ai.mcts.settings import create_mcts, get_rollout_settings, get_tree_cache
 from typing import List, Dict, Optional, Any, Tuple
 from sqlalchemy.orm import Session
 
-from app.models.core import Areas, Traders, Settlements, Worlds
+from app.models.core import Areas, Traders, Settlements
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,10 @@ class TraderService:
     making it easier to use from the Celery worker tasks.
     """
     
+    # Limits of a single trader's MCTS decision; the search stops at whichever comes first
+    MCTS_MAX_SIMULATIONS = 100
+    MCTS_TIME_BUDGET_MS = 200
+    
     def __init__(self, db: Session):
         """
         Initialize the trader service with a database session.
@@ -165,140 +174,33 @@ class TraderService:
             if not trader_db or not trader_db.world_id:
                 return {"status": "error", "message": "Trader has no associated world"}
             
-            world = self.db.query(Worlds).filter(Worlds.world_id == trader_db.world_id).first()
-            if not world:
+            world_data = WorldSnapshotService(self.db).get_snapshot(trader_db.world_id)
+            if not world_data:
                 return {"status": "error", "message": "Trader's world not found"}
             
-            # Get current settlement data
+            # The current settlement must be part of the trader's world
             current_location_id = trader.get_property("current_location_id")
-            current_settlement = self.db.query(Settlements).filter(
-                Settlements.settlement_id == current_location_id
-            ).first()
-            
-            if not current_settlement:
+            if current_location_id not in world_data["settlements"]:
                 return {"status": "error", "message": "Current settlement not found"}
             
-            # Get available connections from this settlement
-            settlement_connections = []
-            if current_settlement.connections:
-                if isinstance(current_settlement.connections, str):
-                    try:
-                        settlement_connections = json.loads(current_settlement.connections)
-                    except (json.JSONDecodeError, TypeError) as e:
-                        logger.error(f"Invalid connections JSON for settlement {current_settlement.settlement_id}: {e}")
-                        return {"status": "error", "message": "Invalid settlement connections data"}
-                elif isinstance(current_settlement.connections, list):
-                    settlement_connections = current_settlement.connections
-            
-            # Prepare world data for decision making
-            world_data = {
-                "world_id": str(world.world_id),
-                "current_game_day": world.current_game_day,
-                "current_season": getattr(world, 'current_season', "summer"),
-                "locations": {},  # Will be populated with location data
-                "markets": {},    # Will be populated with market data
-                "settlements": {}  # Settlement data for the MCTS format
-            }
-            
-            # Add location data for current settlement
-            world_data["locations"][current_location_id] = {
-                "id": current_location_id,
-                "name": current_settlement.settlement_name,
-                "biome": getattr(current_settlement, 'biome', "temperate"),
-                "population": getattr(current_settlement, 'population', 100),
-                "settlement_type": getattr(current_settlement, 'settlement_type', "village")
-            }
-            
-            # Add settlement data in format expected by MCTS
-            world_data["settlements"][current_location_id] = {
-                "id": current_location_id,
-                "name": current_settlement.settlement_name,
-                "biome": getattr(current_settlement, 'biome', "temperate"),
-                "connections": settlement_connections,
-                "settlement_type": getattr(current_settlement, 'settlement_type', "village")
-            }
-            
-            # Add market data for current settlement
-            world_data["markets"][current_location_id] = {
-                "buying": {},  # What the settlement buys (trader sells)
-                "selling": {}  # What the settlement sells (trader buys)
-            }
-            
-            # For each connected settlement, add basic info to world data
-            for connection in settlement_connections:
-                dest_id = connection.get('destination_id')
-                if not dest_id or dest_id.startswith('11111') or dest_id == '00000000-0000-0000-0000-000000000000':
-                    continue
-                    
-                dest_settlement = self.db.query(Settlements).filter(
-                    Settlements.settlement_id == dest_id
-                ).first()
-                
-                if dest_settlement:
-                    # Add to locations for backward compatibility
-                    world_data["locations"][dest_id] = {
-                        "id": dest_id,
-                        "name": dest_settlement.settlement_name,
-                        "biome": getattr(dest_settlement, 'biome', "temperate"),
-                        "population": getattr(dest_settlement, 'population', 100),
-                        "settlement_type": getattr(dest_settlement, 'settlement_type', "village")
-                    }
-                    
-                    # Get destination's connections for proper world model
-                    dest_connections = []
-                    if hasattr(dest_settlement, 'connections') and dest_settlement.connections:
-                        if isinstance(dest_settlement.connections, str):
-                            try:
-                                dest_connections = json.loads(dest_settlement.connections)
-                            except:
-                                pass
-                        elif isinstance(dest_settlement.connections, list):
-                            dest_connections = dest_settlement.connections
-                    
-                    # Add to settlements data for MCTS
-                    world_data["settlements"][dest_id] = {
-                        "id": dest_id,
-                        "name": dest_settlement.settlement_name,
-                        "biome": getattr(dest_settlement, 'biome', "temperate"),
-                        "connections": dest_connections,
-                        "settlement_type": getattr(dest_settlement, 'settlement_type', "village")
-                    }
-            
             # Create TraderState for MCTS
-            trader_state = TraderState(
-                trader=trader,
-                world_info=world_data
-            )
+            trader_state = TraderState.from_trader_entity(trader, world_data)
             
-            # Run MCTS search
-            from app.ai.mcts.core import MCTS
-            mcts = MCTS(exploration_weight=1.0)
-            num_simulations = 100  # Configure as needed
-            
-            best_action = mcts.search(
-                root_state=trader_state,
-                get_legal_actions_fn=lambda s: s.get_possible_actions(),
-                apply_action_fn=lambda s, a: s.apply_action(a),
-                is_terminal_fn=lambda s: s.is_terminal(),
-                get_reward_fn=lambda s: s.get_reward(),
-                num_simulations=num_simulations
-            )
+            # Run an anytime MCTS search bounded by simulations and wall-clock time
+            mcts = create_mcts("trader", sample_states=[trader_state], time_budget_ms=self.MCTS_TIME_BUDGET_MS, early_stopping=True)
+            best_action = mcts.search_state(trader_state, self.MCTS_MAX_SIMULATIONS)
             
             # Check if we got a valid action
-            if not best_action or best_action.get("action_type") != "move":
+            if not best_action or best_action.action_type != "move":
                 # If no valid movement action, return an error
                 return {"status": "error", "message": "No valid movement action found"}
             
             # Get destination settlement info
-            destination_id = best_action["destination_id"]
-            destination_name = best_action.get("destination_name", "Unknown")
+            destination_id = best_action.destination_id
+            destination_name = best_action.destination_name or "Unknown"
             
             if not destination_name or destination_name == "Unknown":
-                destination_settlement = self.db.query(Settlements).filter(
-                    Settlements.settlement_id == destination_id
-                ).first()
-                if destination_settlement:
-                    destination_name = destination_settlement.settlement_name
+                destination_name = world_data["settlements"].get(destination_id, {}).get("name", destination_name)
             
             # Format and return the decision
             return {
@@ -307,8 +209,10 @@ class TraderService:
                 "next_settlement_id": destination_id,
                 "next_settlement_name": destination_name,
                 "mcts_stats": {
-                    "simulations": num_simulations,
-                    "actions_evaluated": len(trader_state.get_possible_actions())
+                    "simulations": mcts.decision_stats["simulations"],
+                    "stop_reason": mcts.decision_stats["stop_reason"],
+                    "elapsed_ms": mcts.decision_stats["elapsed_ms"],
+                    "actions_evaluated": len(trader_state.get_legal_actions())
                 }
             }
             
@@ -316,6 +220,133 @@ class TraderService:
             logger.exception(f"Error making MCTS decision: {e}")
             return {"status": "error", "message": f"Error making decision: {str(e)}"}
     
+    def build_trader_world_data(self, world_id: str) -> Dict[str, Any]:
+        """
+        Get the MCTS world snapshot with every settlement of a world.
+        
+        The snapshot is memoized by WorldSnapshotService, so it is built with a
+        few bulk queries once per world and tick and shared by the decisions of
+        every trader in the world.
+        
+        Args:
+            world_id (str): The world ID
+            
+        Returns:
+            Dict[str, Any]: World data in the format expected by TraderState
+        """
+        world_data = WorldSnapshotService(self.db).get_snapshot(world_id)
+        if world_data is None:
+            raise ValueError(f"World {world_id} not found")
+        return world_data
+    
+    def _trader_record_to_state_data(self, trader_record: Any) -> Dict[str, Any]:
+        """
+        Convert a trader database record into TraderState data.
+        
+        Args:
+            trader_record (Any): Traders or TraderModel row
+            
+        Returns:
+            Dict[str, Any]: Trader data for TraderState
+        """
+        def json_field(name: str, default: Any) -> Any:
+            value = getattr(trader_record, name, None)
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except (json.JSONDecodeError, TypeError):
+                    return default
+            return value if value is not None else default
+        
+        current_settlement_id = trader_record.current_settlement_id
+        visited_settlements = list(json_field("visited_settlements", []))
+        if current_settlement_id and current_settlement_id not in visited_settlements:
+            visited_settlements.append(current_settlement_id)
+        
+        return {
+            "trader_id": str(trader_record.trader_id),
+            "name": getattr(trader_record, "npc_name", None),
+            "current_location_id": current_settlement_id,
+            "destination_id": getattr(trader_record, "destination_id", None),
+            "gold": getattr(trader_record, "gold", None) or 0,
+            "inventory": json_field("inventory", {}),
+            "preferred_settlements": json_field("preferred_settlements", []),
+            "preferred_biomes": json_field("preferred_biomes", []),
+            "visited_settlements": visited_settlements,
+            "is_retired": bool(getattr(trader_record, "is_retired", False)),
+            "life_goals": json_field("life_goals", [])
+        }
+    
+    def make_batch_mcts_decisions(self, 
+                                  trader_records: List[Any], 
+                                  world_data: Dict[str, Any],
+                                  num_simulations: int = 100) -> Dict[str, Dict[str, Any]]:
+        """
+        Decide the next move of many traders with one batched MCTS search.
+        
+        All traders share the same world snapshot; their rollouts and reward
+        evaluations are batched across traders (see BatchMCTS). Each trader's
+        search continues from the subtree kept from its previous decision when
+        the world snapshot version is unchanged (see TreeCache).
+        
+        Args:
+            trader_records (List[Any]): Trader rows located in settlements
+            world_data (Dict[str, Any]): Shared snapshot from build_trader_world_data
+            num_simulations (int): Number of simulations per trader
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Decision per trader ID, in the format of
+            _make_mcts_decision for moves, or {"status": "success", "action": <type>}
+            for traders whose best action is not a move
+        """
+        if not trader_records:
+            return {}
+        
+        states = [
+            TraderState(self._trader_record_to_state_data(trader_record), world_data)
+            for trader_record in trader_records
+        ]
+        
+        # Rollouts are cut off and valued by the trader value model when it can be fitted
+        search_settings = {"max_rollout_depth": 20}
+        search_settings.update(get_rollout_settings("trader", states[:1]))
+        mcts = BatchMCTS(exploration_weight=1.0, tree_cache=get_tree_cache("trader"), **search_settings)
+        best_actions = mcts.search_batch(
+            states,
+            get_legal_actions_fn=lambda s: s.get_legal_actions(),
+            apply_action_fn=lambda s, a: s.apply_action(a),
+            is_terminal_fn=lambda s: s.is_terminal(),
+            num_simulations=num_simulations,
+            batch_reward_fn=TraderState.batch_rewards,
+            tree_keys=[str(trader_record.trader_id) for trader_record in trader_records],
+            world_version=world_data.get("version")
+        )
+        
+        decisions = {}
+        for trader_record, state, best_action, stats in zip(trader_records, states, best_actions, mcts.agent_stats):
+            mcts_stats = {
+                "simulations": stats["simulations"],
+                "reused_visits": stats.get("reused_visits", 0),
+                "actions_evaluated": stats["children"]
+            }
+            if best_action is None:
+                decision = {"status": "error", "message": "No valid action found"}
+            elif best_action.action_type == "move":
+                decision = {
+                    "status": "success",
+                    "action": "move",
+                    "next_settlement_id": best_action.destination_id,
+                    "next_settlement_name": state._get_settlement_name(best_action.destination_id),
+                    "mcts_stats": mcts_stats
+                }
+            else:
+                decision = {"status": "success", "action": best_action.action_type, "mcts_stats": mcts_stats}
+            decisions[str(trader_record.trader_id)] = decision
+        
+        logger.info(f"Made {len(decisions)} batched MCTS decisions "
+                    f"({mcts.decision_stats['rollout_steps']} rollout steps)")
+        return decisions
+    
     async def _execute_movement_decision(self, trader: Trader, decision: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute a movement decision for a trader.
@@ -353,14 +384,7 @@ class TraderService:
                 return {"status": "error", "message": "Trader database record not found"}
             
             # Update trader record to indicate they are now traveling
-            trader_db.current_settlement_id = None  # Leaving settlement
-            trader_db.destination_id = destination_id
-            trader_db.destination_settlement_name = decision["next_settlement_name"]
-            trader_db.journey_started = datetime.now()
-            trader_db.journey_progress = 0
-            trader_db.current_area_id = path[0]  # Enter first area
-            trader_db.journey_path = json.dumps(path)
-            trader_db.path_position = 0
+            self._start_journey(trader_db, decision, path)
             
             # Commit changes to database
             self.db.commit()
@@ -390,6 +414,24 @@ class TraderService:
             logger.exception(f"Error executing movement decision: {e}")
             return {"status": "error", "message": f"Error executing movement: {str(e)}"}
     
+    def _start_journey(self, trader_db: Traders, decision: Dict[str, Any], path: List[str]) -> None:
+        """
+        Update a trader record to start travelling along a path (without committing).
+        
+        Args:
+            trader_db (Traders): The trader record
+            decision (Dict[str, Any]): Move decision with next_settlement_id/name
+            path (List[str]): Area IDs of the journey
+        """
+        trader_db.current_settlement_id = None  # Leaving settlement
+        trader_db.destination_id = decision["next_settlement_id"]
+        trader_db.destination_settlement_name = decision["next_settlement_name"]
+        trader_db.journey_started = datetime.now()
+        trader_db.journey_progress = 0
+        trader_db.current_area_id = path[0]  # Enter first area
+        trader_db.journey_path = json.dumps(path)
+        trader_db.path_position = 0
+    
     async def continue_area_travel(self, trader_id: str) -> Dict[str, Any]:
         """
         Continue a trader's journey through areas.
@@ -502,142 +544,30 @@ class TraderService:
             logger.exception(f"Error continuing area travel: {e}")
             return {"status": "error", "message": f"Error continuing travel: {str(e)}"}
     
-    async def _find_path_between_settlements(self, start_id: str, end_id: str) -> List[str]:
+    async def _find_path_between_settlements(self, start_id: str, end_id: str,
+                                             world_id: Optional[str] = None) -> List[str]:
         """
         Find a path of areas between two settlements.
         
+        Uses A* on the cached travel graph of the world (see
+        ``app.game_state.travel_graph``), so no query is made per area.
+        
         Args:
             start_id (str): Starting settlement ID
             end_id (str): Destination settlement ID
+            world_id (Optional[str]): World of the settlements, looked up if None
             
         Returns:
             List[str]: List of area IDs forming a path, or empty list if no path
         """
-        # This is where you would implement pathfinding logic
-        # For now, we'll return a placeholder implementation
-        # In a full implementation, this would use a graph search algorithm
-        
         logger.info(f"Finding path between settlements {start_id} and {end_id}")
         
         try:
-            # Get areas connected to start settlement
-            start_areas = await self._get_settlement_connected_areas(start_id)
-            if not start_areas:
-                logger.warning(f"No connected areas found for settlement {start_id}")
-                return []
-            
-            # Get areas connected to destination settlement
-            end_areas = await self._get_settlement_connected_areas(end_id)
-            if not end_areas:
-                logger.warning(f"No connected areas found for settlement {end_id}")
-                return []
-            
-            # Check if settlements share a common area (direct connection)
-            common_areas = set(start_areas).intersection(set(end_areas))
-            if common_areas:
-                common_area = list(common_areas)[0]
-                logger.info(f"Settlements share common area {common_area}")
-                return [common_area]
-            
-            # For now, we'll implement a simple breadth-first search
-            # In a real implementation, you'd want to use A* with proper distance heuristics
-            from collections import deque
-            
-            queue = deque([(area_id, [area_id]) for area_id in start_areas])
-            visited = set(start_areas)
-            
-            while queue:
-                current_area, path = queue.popleft()
-                
-                # Get connected areas
-                neighbors = await self._get_area_connected_areas(current_area)
-                
-                for neighbor in neighbors:
-                    if neighbor in end_areas:
-                        # Found a path to destination
-                        final_path = path + [neighbor]
-                        logger.info(f"Found path through {len(final_path)} areas")
-                        return final_path
-                    
-                    if neighbor not in visited:
-                        visited.add(neighbor)
-                        queue.append((neighbor, path + [neighbor]))
-            
-            # If we get here, no path was found - return a simple direct path as fallback
-            if start_areas and end_areas:
-                logger.info(f"No path found, returning simple path with first areas from each end")
-                return [start_areas[0], end_areas[0]]
-            
-            return []
-            
+            return find_settlement_path(self.db, start_id, end_id, world_id)
         except Exception as e:
             logger.exception(f"Error finding path between settlements: {e}")
             return []
     
-    async def _get_settlement_connected_areas(self, settlement_id: str) -> List[str]:
-        """
-        Get all areas directly connected to a settlement.
-        
-        Args:
-            settlement_id (str): The settlement ID
-            
-        Returns:
-            List[str]: List of connected area IDs
-        """
-        try:
-            # Query the areas table for connections to this settlement
-            # This is a simplified implementation and would need to be adapted to your schema
-            areas = self.db.query(Areas).all()
-            
-            connected_areas = []
-            for area in areas:
-                # Check if this area has connected_settlements attribute
-                if not hasattr(area, 'connected_settlements'):
-                    continue
-                
-                # Parse the connected_settlements JSON if it exists
-                if area.connected_settlements:
-                    try:
-                        settlement_ids = json.loads(area.connected_settlements)
-                        if settlement_id in settlement_ids:
-                            connected_areas.append(area.area_id)
-                    except (json.JSONDecodeError, TypeError):
-                        continue
-            
-            return connected_areas
-            
-        except Exception as e:
-            logger.exception(f"Error getting connected areas for settlement {settlement_id}: {e}")
-            return []
-    
-    async def _get_area_connected_areas(self, area_id: str) -> List[str]:
-        """
-        Get all areas directly connected to another area.
-        
-        Args:
-            area_id (str): The area ID
-            
-        Returns:
-            List[str]: List of connected area IDs
-        """
-        try:
-            area = self.db.query(Areas).filter(Areas.area_id == area_id).first()
-            if not area or not hasattr(area, 'connected_areas'):
-                return []
-            
-            # Parse connected_areas JSON if it exists
-            if area.connected_areas:
-                try:
-                    return json.loads(area.connected_areas)
-                except (json.JSONDecodeError, TypeError):
-                    logger.warning(f"Invalid connected_areas JSON for area {area_id}")
-            
-            return []
-            
-        except Exception as e:
-            logger.exception(f"Error getting connected areas for area {area_id}: {e}")
-            return []
-    
     async def _check_and_resolve_encounters(self, trader_id: str, area_id: str) -> Dict[str, Any]:
         """
         Check if the trader has any active encounters and resolve them.
@@ -651,7 +581,7 @@ class TraderService:
             Dict[str, Any]: Result of encounter resolution
         """
         from sqlalchemy import select, text
-        from app.models.core import AreaEncounters, AreaEncounterTypes, Areas, Traders
+        from app.models.core import AreaEncounters, Areas, Traders
         
         logger.info(f"Checking encounters for trader {trader_id} in area {area_id}")
         
@@ -697,9 +627,7 @@ class TraderService:
             area_name = area.area_name if hasattr(area, 'area_name') else "unknown area"
             
             # Get encounter type information
-            encounter_type = self.db.query(AreaEncounterTypes).filter(
-                AreaEncounterTypes.encounter_type_id == encounter_type_id
-            ).first()
+            encounter_type = get_reference_data().encounter_type(encounter_type_id)
             
             encounter_name = "unknown encounter"
             if encounter_type and hasattr(encounter_type, 'encounter_name'):
@@ -899,8 +827,6 @@ class TraderService:
         Returns:
             Dict[str, Any]: Result of encounter generation
         """
-        from app.models.core import AreaEncounterTypes
-        
         logger.info(f"Generating potential encounter for trader {trader_id} in area {area_id}")
         
         try:
@@ -922,7 +848,7 @@ class TraderService:
                 return {"status": "success", "result": "no_encounter"}
             
             # Get a random encounter type
-            encounter_types = self.db.query(AreaEncounterTypes).limit(10).all()
+            encounter_types = get_reference_data().all_encounter_types()[:10]
             if not encounter_types:
                 logger.warning("No encounter types found in database")
                 return {"status": "success", "result": "no_encounter"}
@@ -1287,6 +1213,9 @@ class TraderService:
         """
         Process movement for all traders in a world.
         
+        Traders waiting in a settlement are decided together: one world snapshot
+        is shared per world and one batched MCTS search covers all of its traders.
+        
         Args:
             world_id (Optional[str]): The world ID, or None for all worlds
             
@@ -1296,46 +1225,59 @@ class TraderService:
         logger.info(f"Processing all traders" + (f" in world {world_id}" if world_id else ""))
         
         try:
-            # Query all traders in the world
             query = self.db.query(Traders)
             if world_id:
                 query = query.filter(Traders.world_id == world_id)
-            
-            try:
-                traders = query.all()
-                total_traders = len(traders)
+            traders = query.all()
+            total_traders = len(traders)
+            
+            # Only traders waiting in a settlement need a decision
+            traders_by_world: Dict[str, List[Traders]] = {}
+            for trader_db in traders:
+                if trader_db.current_settlement_id and not trader_db.current_area_id and trader_db.world_id:
+                    traders_by_world.setdefault(str(trader_db.world_id), []).append(trader_db)
+            in_settlement_count = sum(len(world_traders) for world_traders in traders_by_world.values())
+            
+            processed_count = 0
+            journeys_started = 0
+            for trader_world_id, world_traders in traders_by_world.items():
+                world_data = WorldSnapshotService(self.db).get_snapshot(trader_world_id)
+                if world_data is None:
+                    logger.warning(f"Skipping {len(world_traders)} traders of missing world {trader_world_id}")
+                    continue
+                decisions = self.make_batch_mcts_decisions(world_traders, world_data)
                 
-                # Debug: print first trader data to check structure
-                if traders and len(traders) > 0:
-                    first_trader = traders[0]
-                    try:
-                        logger.info(f"Trader Data: {first_trader}")
-                        if hasattr(first_trader, 'data') and first_trader.data:
-                            try:
-                                parsed_data = json.loads(first_trader.data)
-                                logger.info(f"Trader data parsed successfully")
-                            except json.JSONDecodeError as json_err:
-                                logger.error(f"JSON decoding error for trader {first_trader.trader_id}: {json_err}")
-                    except Exception as debug_err:
-                        logger.error(f"Error debugging trader data: {debug_err}")
-            except Exception as e:
-                logger.exception(f"Error querying traders: {e}")
-                total_traders = 0
-            
-            # Just return a placeholder success to avoid processing errors
-            waiting_for_task_count = total_traders  # Assume all are waiting for now
-            
-            logger.info(f"Found {total_traders} traders" + (f" in world {world_id}" if world_id else ""))
+                for trader_db in world_traders:
+                    decision = decisions.get(str(trader_db.trader_id), {})
+                    if decision.get("status") != "success":
+                        continue
+                    processed_count += 1
+                    if decision.get("action") != "move":
+                        continue
+                    
+                    path = await self._find_path_between_settlements(
+                        trader_db.current_settlement_id, decision["next_settlement_id"], trader_world_id
+                    )
+                    if path:
+                        self._start_journey(trader_db, decision, path)
+                        journeys_started += 1
+            
+            self.db.commit()
+            
+            logger.info(f"Found {total_traders} traders" + (f" in world {world_id}" if world_id else "") +
+                        f", decided {processed_count} of {in_settlement_count} in settlements, "
+                        f"started {journeys_started} journeys")
             
             return {
                 "status": "success",
                 "total": total_traders,
-                "processed": 0,
+                "processed": processed_count,
+                "journeys_started": journeys_started,
                 "retired": 0,
-                "waiting_for_task": waiting_for_task_count,
-                "message": f"Processing skipped for {total_traders} traders"
+                "traveling": total_traders - in_settlement_count,
+                "message": f"Decided {processed_count} of {in_settlement_count} traders in settlements"
             }
             
         except Exception as e:
             logger.exception(f"Error processing all traders: {e}")
-            return {"status": "error", "message": f"Error processing traders: {str(e)}"}
\ No newline at end of file
+            return {"status": "error", "message": f"Error processing traders: {str(e)}"}
@@ -0,0 +1,244 @@
+# app/game_state/services/world_snapshot_service.py
+import logging
+import json
+from typing import List, Dict, Optional, Any, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.ai.mcts.tree_cache import snapshot_version
+from app.models.core import Worlds, Settlements, SettlementResources, ResourceTypes
+from app.game_state.reference_data import get_reference_data
+from app.game_state.route_table import get_route_table
+
+logger = logging.getLogger(__name__)
+
+# Placeholder destination IDs left in settlement connections by world generation
+PLACEHOLDER_DESTINATION_PREFIX = '11111'
+NULL_DESTINATION_ID = '00000000-0000-0000-0000-000000000000'
+
+# Snapshots per world ID, with the (game_day, data_version) they were built for
+_snapshots: Dict[str, Tuple[Tuple[Any, Any], Dict[str, Any]]] = {}
+
+
+def parse_valid_connections(connections: Any) -> List[Dict[str, Any]]:
+    """
+    Parse a settlement's connections and drop placeholder destinations.
+
+    Args:
+        connections (Any): Connections as stored (JSON string or list)
+
+    Returns:
+        List[Dict[str, Any]]: Connections with a real destination_id
+    """
+    if isinstance(connections, str):
+        try:
+            connections = json.loads(connections)
+        except (json.JSONDecodeError, TypeError):
+            return []
+    if not isinstance(connections, list):
+        return []
+
+    return [
+        connection for connection in connections
+        if isinstance(connection, dict)
+        and connection.get('destination_id')
+        and not str(connection['destination_id']).startswith(PLACEHOLDER_DESTINATION_PREFIX)
+        and connection['destination_id'] != NULL_DESTINATION_ID
+    ]
+
+
+class WorldSnapshotService:
+    """
+    Builds the read-only world snapshot that MCTS trader decisions plan with.
+
+    A snapshot holds every settlement of a world with its parsed connections,
+    the settlement markets and the current season, loaded with a handful of
+    bulk queries and the reference data cache. Snapshots are memoized per (world_id, game_day, version),
+    where the version is a cheap aggregate over the settlement and resource
+    rows, so every trader decided in the same world and tick shares one
+    snapshot. Shared snapshots must not be modified by their users.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initialize the service with a database session.
+
+        Args:
+            db (Session): SQLAlchemy database session
+        """
+        self.db = db
+
+    def get_snapshot(self, world_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the snapshot of a world, building it if the world changed.
+
+        Args:
+            world_id (str): The world ID
+
+        Returns:
+            Optional[Dict[str, Any]]: World data in the format expected by
+            TraderState, or None if the world does not exist
+        """
+        world_id = str(world_id)
+        world = self.db.query(Worlds).filter(Worlds.world_id == world_id).first()
+        if not world:
+            return None
+
+        key = (world.current_game_day, self._data_version(world_id))
+        cached = _snapshots.get(world_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        snapshot = self._build(world)
+        _snapshots[world_id] = (key, snapshot)
+        logger.info(f"Built world snapshot of world {world_id} for day {world.current_game_day}: "
+                    f"{len(snapshot['settlements'])} settlements")
+        return snapshot
+
+    def _data_version(self, world_id: str) -> Tuple[Any, ...]:
+        """
+        Get a fingerprint of the settlement and market rows of a world with one query.
+
+        Args:
+            world_id (str): The world ID
+
+        Returns:
+            Tuple[Any, ...]: Settlement count and the latest settlement and
+            resource update times
+        """
+        settlement_ids = self.db.query(Settlements.settlement_id).filter(Settlements.world_id == world_id)
+        resources = self.db.query(
+            func.count(SettlementResources.settlement_resource_id),
+            func.max(SettlementResources.last_updated)
+        ).filter(SettlementResources.settlement_id.in_(settlement_ids.scalar_subquery())).subquery()
+        settlements = self.db.query(
+            func.count(Settlements.settlement_id),
+            func.max(Settlements.last_updated)
+        ).filter(Settlements.world_id == world_id).subquery()
+        return tuple(self.db.query(settlements, resources).one())
+
+    def _build(self, world: Any) -> Dict[str, Any]:
+        """
+        Build the snapshot of a world: one query each for settlements and markets.
+
+        Args:
+            world (Any): Worlds row
+
+        Returns:
+            Dict[str, Any]: World data in the format expected by TraderState
+        """
+        world_id = str(world.world_id)
+        season_name = getattr(world, 'current_season', None) or "summer"
+        world_data = {
+            "world_id": world_id,
+            "current_game_day": world.current_game_day,
+            "current_season": season_name,
+            "season": self._load_season(season_name),
+            "locations": {},
+            "markets": {},
+            "settlements": {}
+        }
+
+        settlements = self.db.query(Settlements).filter(Settlements.world_id == world_id).all()
+        for settlement in settlements:
+            settlement_id = str(settlement.settlement_id)
+            world_data["locations"][settlement_id] = {
+                "id": settlement_id,
+                "name": settlement.settlement_name,
+                "biome": getattr(settlement, 'biome', None) or "temperate",
+                "population": getattr(settlement, 'population', None) or 100,
+                "settlement_type": getattr(settlement, 'area_type', None) or "village"
+            }
+            world_data["settlements"][settlement_id] = {
+                "id": settlement_id,
+                "name": settlement.settlement_name,
+                "biome": getattr(settlement, 'biome', None) or "temperate",
+                "connections": parse_valid_connections(settlement.connections),
+                "settlement_type": getattr(settlement, 'area_type', None) or "village"
+            }
+            world_data["markets"][settlement_id] = {"buying": {}, "selling": {}}
+
+        self._load_markets(world_id, world_data["markets"])
+        world_data["version"] = snapshot_version(world_data)
+        # Shared with the area router and kept up to date by it, so not part of the version
+        world_data["route_table"] = self._load_route_table(world_id)
+        return world_data
+
+    def _load_route_table(self, world_id: str) -> Optional[Any]:
+        """
+        Get the route table of a world, for the route dangers of move actions.
+
+        Args:
+            world_id (str): The world ID
+
+        Returns:
+            Optional[Any]: The world's RouteTable, or None if it cannot be solved
+        """
+        try:
+            return get_route_table(self.db, world_id)
+        except Exception as e:
+            logger.warning(f"Could not load the route table of world {world_id}: {str(e)}")
+            return None
+
+    def _load_markets(self, world_id: str, markets: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+        """
+        Fill the markets of a world's settlements from their resource stock.
+
+        Settlements sell the resources they have in stock and buy the ones
+        they have run out of, at the resource's base value.
+
+        Args:
+            world_id (str): The world ID
+            markets (Dict): Markets per settlement ID, filled in place
+        """
+        rows = self.db.query(
+            SettlementResources.settlement_id,
+            SettlementResources.resource_type_id,
+            SettlementResources.quantity,
+            ResourceTypes.base_value
+        ).join(
+            ResourceTypes, ResourceTypes.resource_type_id == SettlementResources.resource_type_id
+        ).join(
+            Settlements, Settlements.settlement_id == SettlementResources.settlement_id
+        ).filter(Settlements.world_id == world_id).all()
+
+        for settlement_id, resource_type_id, quantity, base_value in rows:
+            market = markets.get(str(settlement_id))
+            if market is None or not base_value:
+                continue
+            side = "selling" if (quantity or 0) > 0 else "buying"
+            market[side][str(resource_type_id)] = float(base_value)
+
+    def _load_season(self, season_name: str) -> Dict[str, Any]:
+        """
+        Get the travel and resource modifiers of a season from the reference data cache.
+
+        Args:
+            season_name (str): Name of the season
+
+        Returns:
+            Dict[str, Any]: Season info, with neutral modifiers if the season
+            is not configured
+        """
+        season = get_reference_data().season(season_name)
+        if not season:
+            return {"name": season_name, "travel_modifier": 1.0, "resource_modifiers": {}}
+        return {
+            "name": season.name,
+            "travel_modifier": season.travel_modifier if season.travel_modifier is not None else 1.0,
+            "resource_modifiers": season.resource_modifiers or {}
+        }
+
+
+def invalidate_world_snapshot(world_id: Optional[str] = None) -> None:
+    """
+    Drop memoized world snapshots.
+
+    Args:
+        world_id (Optional[str]): World whose snapshot to drop, or None for all
+    """
+    if world_id is None:
+        _snapshots.clear()
+    else:
+        _snapshots.pop(str(world_id), None)
@@ -0,0 +1,416 @@
+# app/game_state/settlement_production.py
+"""Batched settlement production for a whole world.
+
+``SettlementService.process_settlement_growth`` works on one settlement at a
+time: it loads the settlement and its world in their own sessions, walks the
+buildings and resource sites in Python and saves the result with another
+select and update. A ``SettlementProduction`` run instead works on all
+settlements of a world (or a batch of them) at once:
+
+- one query per table loads the settlements, their buildings, their
+  productive resource sites and their stock
+- production, food consumption, population growth and construction progress
+  are computed on NumPy arrays over (settlement x resource)
+- stock changes are written with one upsert into ``settlement_resources``
+  that adds them to the stored quantities, so resources traded in the
+  meantime are kept; populations, buildings and sites are written with bulk
+  updates, all in one transaction: the run's unit of work (the batch's, if
+  it runs in one) commits it once
+"""
+
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.game_state.reference_data import get_reference_data
+from app.models.core import ResourceSites, SettlementBuildings, SettlementResources, Settlements, Worlds
+from database.unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+# Resources produced per tick by each resource site stage
+SITE_STAGE_PRODUCTION = {
+    # Gold Vein stages
+    "gold_mine": {"gold": 3, "stone": 2},
+
+    # Iron Vein stages
+    "small_mine": {"iron": 5, "stone": 2},
+    "established_mine": {"iron": 12, "stone": 3},
+
+    # Stone Quarry stages
+    "small_quarry": {"stone": 10},
+    "quarry": {"stone": 25},
+
+    # Forest Grove stages
+    "small_lumber_camp": {"wood": 10, "herbs": 2},
+    "lumber_camp": {"wood": 20, "herbs": 3},
+
+    # Herb Grove stages
+    "herb_garden": {"herbs": 12, "food": 4},
+
+    # Fertile Soil stages
+    "small_farm": {"food": 12},
+    "established_farm": {"food": 20},
+
+    # Default for discovered sites
+    "discovered": {"food": 3, "wood": 3, "herbs": 2}
+}
+
+# Resource type IDs of the produced resource codes
+RESOURCE_CODE_IDS = {
+    "iron": "6e7e41a9-c3f6-4723-b510-50bd9f537b8a",  # Iron Ore
+    "gold": "aa09429d-4df0-4834-a503-b2653e5a52bd",  # Gold
+    "stone": "ba009e21-4bbd-4998-ad15-e7cb32a19636",  # Stone
+    "wood": "c4aa2349-409f-4107-ac8a-71331e5f9e92",   # Logs
+    "herbs": "51c21030-d6f4-42c4-b63f-343d11a818f5",  # Herbs
+    "fish": "ad4b90c1-2e0d-4c1e-9beb-84cfc18f8f5b",   # Fish
+    "food": "7bf0d22e-cdef-4ecc-aff6-33ae9c47f21e",   # Meat
+    "water": "fc5a66f8-4faa-43ad-a20f-9e386afab6b1",  # Water
+}
+
+# Production bonus of a fully developed site
+DEVELOPMENT_BONUS = 0.5
+
+# Depletion per tick of mining sites
+MINING_DEPLETION_RATE = 0.01
+
+# Housing of operational buildings by building code, on top of the base capacity
+HOUSING_CAPACITY = {"house": 5, "apartment": 20, "mansion": 10}
+BASE_HOUSING_CAPACITY = 10
+
+# Population growth per day before food, housing and season modifiers
+BASE_GROWTH_RATE = 0.02
+
+# Growth modifier per season
+SEASON_GROWTH_MODIFIERS = {"winter": 0.5}
+
+# Construction progress per tick, in percent
+CONSTRUCTION_STEP = 10
+
+
+def grow_population(population: np.ndarray, food: np.ndarray, housing: np.ndarray,
+                    season_modifier: float = 1.0) -> np.ndarray:
+    """
+    Compute the population of every settlement after one day of growth.
+
+    Args:
+        population: Current population per settlement
+        food: Food in stock per settlement, after production
+        housing: Housing capacity per settlement
+        season_modifier: Growth modifier of the current season
+
+    Returns:
+        New population per settlement, capped at the housing capacity
+    """
+    population = np.asarray(population, dtype=np.int64)
+    food_modifier = np.minimum(1.0, food / np.maximum(1, population))
+    housing_modifier = np.minimum(1.0, housing / np.maximum(1, population + 1))
+    growth_rate = BASE_GROWTH_RATE * food_modifier * housing_modifier * season_modifier
+    increase = np.floor(population * growth_rate).astype(np.int64)
+    return np.minimum(population + increase, housing)
+
+
+def advance_construction(progress: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Advance the construction of buildings in progress by one step.
+
+    Args:
+        progress: Construction progress per building, in percent
+
+    Returns:
+        New progress and a mask of the buildings that were completed
+    """
+    new_progress = np.minimum(100.0, np.asarray(progress, dtype=np.float64) + CONSTRUCTION_STEP)
+    return new_progress, new_progress >= 100.0
+
+
+class SettlementProduction:
+    """
+    One production tick for the settlements of a world.
+    """
+
+    def __init__(self, db: Session, world_id: str, settlement_ids: Optional[List[str]] = None):
+        """
+        Initialize the production tick.
+
+        Args:
+            db: Database session
+            world_id: World of the settlements
+            settlement_ids: Settlements to process, or None for all settlements of the world
+        """
+        self.db = db
+        self.world_id = world_id
+        self.settlement_ids = settlement_ids
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the production tick and commit its changes with its unit of work.
+
+        Returns:
+            Dict: Summary with one result per settlement
+        """
+        with unit_of_work(self.db):
+            return self._run()
+
+    def _run(self) -> Dict[str, Any]:
+        """Run the production tick in the current unit of work."""
+        world = self.db.query(Worlds.current_season).filter(Worlds.world_id == self.world_id).first()
+        if not world:
+            return {"status": "error", "message": f"World {self.world_id} not found"}
+        current_season = world.current_season or "spring"
+
+        query = self.db.query(Settlements.settlement_id, Settlements.settlement_name, Settlements.population).filter(
+            Settlements.world_id == self.world_id
+        )
+        if self.settlement_ids is not None:
+            query = query.filter(Settlements.settlement_id.in_(self.settlement_ids))
+        settlements = query.all()
+        if not settlements:
+            return {"status": "success", "total": 0, "processed": 0, "results": []}
+        ids = [str(settlement.settlement_id) for settlement in settlements]
+
+        buildings = self.db.query(
+            SettlementBuildings.settlement_building_id, SettlementBuildings.settlement_id,
+            SettlementBuildings.building_type_id, SettlementBuildings.is_operational,
+            SettlementBuildings.construction_status, SettlementBuildings.construction_progress
+        ).filter(SettlementBuildings.settlement_id.in_(ids)).all()
+        sites = self.db.query(ResourceSites).filter(
+            ResourceSites.settlement_id.in_(ids),
+            ResourceSites.current_stage.notin_(["undiscovered", "depleted"])
+        ).all()
+        stock = self.db.query(
+            SettlementResources.settlement_id, SettlementResources.resource_type_id, SettlementResources.quantity
+        ).filter(SettlementResources.settlement_id.in_(ids)).all()
+
+        season = get_reference_data().season(current_season)
+        resource_modifiers = (season.resource_modifiers if season else None) or {}
+        growth_modifier = SEASON_GROWTH_MODIFIERS.get(current_season, 1.0)
+
+        result = self.compute(settlements, buildings, sites, stock, resource_modifiers, growth_modifier)
+        self._flush(result)
+        return result["summary"]
+
+    def compute(self, settlements: List[Any], buildings: List[Any], sites: List[Any], stock: List[Any],
+                resource_modifiers: Dict[str, float], growth_modifier: float = 1.0) -> Dict[str, Any]:
+        """
+        Compute the changes of one tick without writing them.
+
+        Args:
+            settlements: Rows with settlement_id, settlement_name and population
+            buildings: Building rows of the settlements
+            sites: Productive resource site rows of the settlements
+            stock: Rows with settlement_id, resource_type_id and quantity
+            resource_modifiers: Seasonal production modifier per resource code
+            growth_modifier: Seasonal population growth modifier
+
+        Returns:
+            Dict with the stock deltas, populations, building and site updates,
+            and the summary of the tick
+        """
+        settlement_index = {str(settlement.settlement_id): i for i, settlement in enumerate(settlements)}
+        resource_ids = sorted({str(row.resource_type_id) for row in stock if row.resource_type_id}
+                              | set(RESOURCE_CODE_IDS.values()))
+        resource_index = {resource_id: j for j, resource_id in enumerate(resource_ids)}
+        shape = (len(settlements), len(resource_ids))
+
+        stock_levels = np.zeros(shape, dtype=np.int64)
+        for row in stock:
+            j = resource_index.get(str(row.resource_type_id))
+            if j is not None:
+                stock_levels[settlement_index[str(row.settlement_id)], j] += row.quantity or 0
+
+        produced, site_updates = self._produce_from_sites(sites, settlement_index, resource_index, shape,
+                                                          resource_modifiers)
+
+        # Population grows on the food in stock after production, then eats the old population's food
+        food = resource_index[RESOURCE_CODE_IDS["food"]]
+        available = stock_levels + produced
+        population = np.fromiter((settlement.population or 0 for settlement in settlements),
+                                 dtype=np.int64, count=len(settlements))
+        housing = self._housing_capacity(buildings, settlement_index)
+        new_population = grow_population(population, available[:, food], housing, growth_modifier)
+
+        consumed = np.zeros(shape, dtype=np.int64)
+        consumed[:, food] = np.minimum(population, available[:, food])
+        deltas = produced - consumed
+
+        building_updates = self._advance_buildings(buildings)
+
+        results = []
+        for i, settlement in enumerate(settlements):
+            production = {resource_ids[j]: int(produced[i, j]) for j in np.flatnonzero(produced[i])}
+            results.append({
+                "settlement_id": str(settlement.settlement_id),
+                "name": settlement.settlement_name,
+                "growth_result": {
+                    "status": "success",
+                    "production": production,
+                    "population": {
+                        "previous": int(population[i]),
+                        "current": int(new_population[i]),
+                        "growth": int(new_population[i] - population[i]),
+                        "food_supply": int(available[i, food]),
+                        "housing_capacity": int(housing[i])
+                    }
+                }
+            })
+
+        return {
+            "deltas": {
+                (str(settlements[i].settlement_id), resource_ids[j]): int(deltas[i, j])
+                for i, j in zip(*np.nonzero(deltas))
+            },
+            "populations": [
+                {"settlement_id": settlements[i].settlement_id, "population": int(new_population[i])}
+                for i in np.flatnonzero(new_population != population)
+            ],
+            "buildings": building_updates,
+            "sites": site_updates,
+            "summary": {
+                "status": "success",
+                "total": len(settlements),
+                "processed": len(settlements),
+                "buildings_advanced": len(building_updates),
+                "results": results
+            }
+        }
+
+    def _produce_from_sites(self, sites: List[Any], settlement_index: Dict[str, int],
+                            resource_index: Dict[str, int], shape: Tuple[int, int],
+                            resource_modifiers: Dict[str, float]) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """
+        Compute the resources produced by the productive sites of every settlement.
+
+        Args:
+            sites: Resource site rows
+            settlement_index: Row of each settlement ID
+            resource_index: Column of each resource type ID
+            shape: Shape of the (settlement x resource) arrays
+            resource_modifiers: Seasonal production modifier per resource code
+
+        Returns:
+            Produced amounts per (settlement, resource), and the depletion
+            updates of mining sites
+        """
+        reference_data = get_reference_data()
+        rows, columns, amounts, factors = [], [], [], []
+        site_updates = []
+        for site in sites:
+            rates = SITE_STAGE_PRODUCTION.get(site.current_stage)
+            site_type = reference_data.site_type(site.site_type_id)
+            if not rates or not site_type:
+                continue
+
+            multiplier = site.production_multiplier if site.production_multiplier else 1.0
+            development = site.development_level if site.development_level is not None else 0.0
+            factor = multiplier * (1.0 + development * DEVELOPMENT_BONUS)
+            for resource_code, amount in rates.items():
+                rows.append(settlement_index[str(site.settlement_id)])
+                columns.append(resource_index[RESOURCE_CODE_IDS[resource_code]])
+                amounts.append(amount)
+                factors.append(factor * resource_modifiers.get(resource_code, 1.0))
+
+            # Mining sites deplete over time
+            if site_type.site_category == "mining" and site.depletion_level is not None:
+                depletion = min(1.0, site.depletion_level + MINING_DEPLETION_RATE)
+                update = {"site_id": site.site_id, "depletion_level": depletion}
+                if depletion >= 1.0:
+                    update["current_stage"] = "depleted"
+                site_updates.append(update)
+
+        produced = np.zeros(shape, dtype=np.int64)
+        if amounts:
+            site_amounts = np.floor(np.asarray(amounts, dtype=np.float64) * np.asarray(factors)).astype(np.int64)
+            np.add.at(produced, (np.asarray(rows), np.asarray(columns)), site_amounts)
+        return produced, site_updates
+
+    def _housing_capacity(self, buildings: List[Any], settlement_index: Dict[str, int]) -> np.ndarray:
+        """
+        Compute the housing capacity of every settlement from its operational buildings.
+
+        Args:
+            buildings: Building rows
+            settlement_index: Row of each settlement ID
+
+        Returns:
+            Housing capacity per settlement
+        """
+        reference_data = get_reference_data()
+        housing = np.full(len(settlement_index), BASE_HOUSING_CAPACITY, dtype=np.int64)
+        for building in buildings:
+            if not building.is_operational:
+                continue
+            building_type = reference_data.building_type(building.building_type_id)
+            capacity = HOUSING_CAPACITY.get(building_type.building_code) if building_type else None
+            if capacity:
+                housing[settlement_index[str(building.settlement_id)]] += capacity
+        return housing
+
+    def _advance_buildings(self, buildings: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Advance every building under construction by one step.
+
+        Args:
+            buildings: Building rows
+
+        Returns:
+            Bulk update mappings of the buildings
+        """
+        in_progress = [building for building in buildings if building.construction_status == 'in_progress']
+        if not in_progress:
+            return []
+
+        progress = np.fromiter((building.construction_progress or 0 for building in in_progress),
+                               dtype=np.float64, count=len(in_progress))
+        new_progress, completed = advance_construction(progress)
+
+        now = datetime.now()
+        updates = []
+        for building, value, done in zip(in_progress, new_progress, completed):
+            update = {"settlement_building_id": building.settlement_building_id,
+                      "construction_progress": float(value), "last_updated": now}
+            if done:
+                update.update(construction_status='completed', is_operational=True, constructed_at=now)
+            updates.append(update)
+        return updates
+
+    def _flush(self, result: Dict[str, Any]) -> None:
+        """
+        Write the changes of a tick with one upsert and bulk updates, left for the unit of work to commit.
+
+        Args:
+            result: Result of compute
+        """
+        now = datetime.now()
+        if result["deltas"]:
+            stmt = insert(SettlementResources).values([
+                {"settlement_resource_id": str(uuid.uuid4()), "settlement_id": settlement_id,
+                 "resource_type_id": resource_type_id, "quantity": delta, "last_updated": now, "created_at": now}
+                for (settlement_id, resource_type_id), delta in result["deltas"].items()
+            ])
+            # Add the deltas to the stored stock instead of overwriting it
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[SettlementResources.settlement_id, SettlementResources.resource_type_id],
+                set_={
+                    "quantity": func.greatest(SettlementResources.quantity + stmt.excluded.quantity, 0),
+                    "last_updated": stmt.excluded.last_updated
+                }
+            )
+            self.db.execute(stmt)
+        if result["populations"]:
+            self.db.bulk_update_mappings(Settlements, result["populations"])
+        if result["buildings"]:
+            self.db.bulk_update_mappings(SettlementBuildings, result["buildings"])
+        if result["sites"]:
+            self.db.bulk_update_mappings(ResourceSites, [dict(site, last_updated=now) for site in result["sites"]])
+        self.db.flush()
+
+        logger.info(f"Settlement production of world {self.world_id}: {len(result['deltas'])} stock changes, "
+                    f"{len(result['populations'])} populations, {len(result['buildings'])} buildings, "
+                    f"{len(result['sites'])} sites")
@@ -0,0 +1,475 @@
+# app/game_state/trader_tick.py
+"""Set-based trader tick for a whole world.
+
+The trader beat used to walk every trader in Python: one task query, one
+commit and one ``journey_path`` decode per trader. A ``TraderTick`` instead
+works on all traders of a world at once:
+
+- one query loads the tick columns of every trader, and one query finds the
+  active tasks targeting any of them
+- all travelling traders advance one area together; positions, arrivals and
+  journey progress are computed on NumPy arrays, and journey paths are
+  decoded once per distinct path
+- only traders sitting in a settlement load their full record and go through
+  the batched MCTS decision of their world
+- every change is collected and written with one bulk update; the tick's
+  unit of work (the batch's, if it runs in one) commits it once
+- journey starts, area moves and arrivals go to the action log, with the
+  names of all areas and settlements involved read in one query each
+
+Encounter tasks are added after the bulk update, in the same transaction,
+each in a savepoint so a failed task does not undo the tick.
+"""
+
+import json
+import logging
+import random
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.game_state.route_table import find_settlement_path
+from app.game_state.services.logging_service import LoggingService
+from app.game_state.services.world_snapshot_service import WorldSnapshotService
+from app.models.core import Areas, Settlements, Traders
+from app.models.tasks import Tasks
+from database.unit_of_work import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+# Task statuses that block a trader from moving
+ACTIVE_TASK_STATUSES = ('available', 'accepted', 'in_progress')
+
+# Chance of an encounter when a trader enters the next area of its journey
+ENCOUNTER_CHANCE = 0.2
+ENCOUNTER_ISSUE_TYPES = ["bandit_attack", "broken_cart", "sick_animals", "lost_cargo", "food_shortage"]
+
+# Chance that a trader without an MCTS decision leaves for a random connection
+RANDOM_MOVE_CHANCE = 0.3
+
+# Columns a tick reads for every trader
+TICK_COLUMNS = (
+    Traders.trader_id, Traders.world_id, Traders.npc_name, Traders.current_settlement_id, Traders.current_area_id,
+    Traders.active_task_id, Traders.destination_id, Traders.journey_path, Traders.path_position,
+    Traders.journey_started
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_journey_path(journey_path: str) -> Tuple[str, ...]:
+    """
+    Decode a stored journey path; traders on the same route share one decode.
+
+    Args:
+        journey_path: Journey path as stored (JSON list of area IDs)
+
+    Returns:
+        Area IDs of the journey, empty if the path cannot be decoded
+    """
+    try:
+        path = json.loads(journey_path)
+    except (json.JSONDecodeError, TypeError):
+        return ()
+    return tuple(str(area_id) for area_id in path) if isinstance(path, list) else ()
+
+
+def advance_journeys(paths: Sequence[Tuple[str, ...]], positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Move travelling traders one area further along their journeys.
+
+    Args:
+        paths: Journey path of each trader
+        positions: Current path position of each trader
+
+    Returns:
+        New positions, a mask of traders that reached their destination, and
+        the journey progress (0-100) of each trader
+    """
+    lengths = np.fromiter((len(path) for path in paths), dtype=np.int64, count=len(paths))
+    new_positions = np.asarray(positions, dtype=np.int64) + 1
+    arrived = new_positions >= lengths
+    progress = np.floor(new_positions / np.maximum(lengths - 1, 1) * 100).astype(np.int64)
+    progress[arrived] = 100
+    return new_positions, arrived, progress
+
+
+def load_active_task_ids(db: Session, world_id: Optional[str] = None,
+                         trader_ids: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Find the active task of every trader with one query.
+
+    Args:
+        db: Database session
+        world_id: World of the traders, or None for all worlds
+        trader_ids: Traders to look at, or None for all traders of the world
+
+    Returns:
+        Task ID per trader ID, for traders with an active task
+    """
+    traders = db.query(Traders.trader_id)
+    if world_id:
+        traders = traders.filter(Traders.world_id == world_id)
+    if trader_ids is not None:
+        traders = traders.filter(Traders.trader_id.in_(trader_ids))
+
+    rows = db.query(Tasks.target_id, Tasks.task_id).filter(
+        Tasks.target_id.in_(traders.scalar_subquery()),
+        Tasks.status.in_(ACTIVE_TASK_STATUSES),
+        Tasks.is_active == True
+    ).all()
+
+    active_tasks = {}
+    for target_id, task_id in rows:
+        active_tasks.setdefault(str(target_id), str(task_id))
+    return active_tasks
+
+
+class TraderTick:
+    """
+    One tick of trader movement for a world, all worlds, or a batch of traders.
+    """
+
+    def __init__(self,
+                 db: Session,
+                 world_id: Optional[str] = None,
+                 trader_ids: Optional[List[str]] = None,
+                 use_mcts: bool = True,
+                 num_simulations: int = 100,
+                 rng: Optional[np.random.Generator] = None):
+        """
+        Initialize the tick.
+
+        Args:
+            db: Database session
+            world_id: World to tick, or None for all worlds
+            trader_ids: Traders to tick, or None for all traders of the world
+            use_mcts: Decide settlement traders with batched MCTS instead of
+                random moves
+            num_simulations: MCTS simulations per trader
+            rng: Random generator for encounters and random moves
+        """
+        self.db = db
+        self.world_id = world_id
+        self.trader_ids = trader_ids
+        self.use_mcts = use_mcts
+        self.num_simulations = num_simulations
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.logging_service = LoggingService(db)
+        # Column changes per trader ID, written in one bulk update
+        self.updates: Dict[str, Dict[str, Any]] = {}
+        # (trader_id, area_id, world_id) of traders that ran into an encounter
+        self.encounters: List[Tuple[str, str, str]] = []
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the tick and commit its changes with its unit of work.
+
+        Returns:
+            Dict: Summary of processing results
+        """
+        with unit_of_work(self.db):
+            return self._run()
+
+    def _run(self) -> Dict[str, Any]:
+        """Run the tick in the current unit of work."""
+        query = self.db.query(*TICK_COLUMNS)
+        if self.world_id:
+            query = query.filter(Traders.world_id == self.world_id)
+        if self.trader_ids is not None:
+            query = query.filter(Traders.trader_id.in_(self.trader_ids))
+        traders = query.all()
+        active_tasks = load_active_task_ids(self.db, self.world_id, self.trader_ids)
+
+        travelling, in_settlement = [], []
+        for trader in traders:
+            trader_id = str(trader.trader_id)
+            active_task_id = active_tasks.get(trader_id)
+            if trader.active_task_id != active_task_id:
+                # Keep active_task_id in sync with the task table
+                self._update(trader_id, active_task_id=active_task_id)
+            if active_task_id:
+                continue
+            if trader.current_area_id:
+                if trader.journey_path and trader.path_position is not None:
+                    travelling.append(trader)
+            elif trader.current_settlement_id and trader.world_id:
+                in_settlement.append(trader)
+
+        arrived_count = self._advance(travelling)
+        journeys_started = self._decide(in_settlement)
+
+        self._flush()
+        tasks_created = self._create_encounter_tasks()
+
+        available = len(traders) - len(active_tasks)
+        processed = len(travelling) + journeys_started
+        return {
+            "status": "success",
+            "total": len(traders),
+            "available": available,
+            "waiting_for_task": len(active_tasks),
+            "processed": processed,
+            "arrived": arrived_count,
+            "journeys_started": journeys_started,
+            "new_tasks_created": tasks_created,
+            "message": f"Successfully processed {processed} of {available} available traders, "
+                       f"{len(active_tasks)} waiting for tasks, created {tasks_created} new tasks"
+        }
+
+    def _advance(self, traders: List[Any]) -> int:
+        """
+        Advance all travelling traders by one area.
+
+        Args:
+            traders: Tick rows of travelling traders
+
+        Returns:
+            Number of traders that reached their destination
+        """
+        if not traders:
+            return 0
+
+        paths = [parse_journey_path(trader.journey_path) for trader in traders]
+        positions = np.fromiter((trader.path_position for trader in traders), dtype=np.int64, count=len(traders))
+        new_positions, arrived, progress = advance_journeys(paths, positions)
+        encounters = self.rng.random(len(traders)) < ENCOUNTER_CHANCE
+
+        area_ids = {str(trader.current_area_id) for trader in traders}
+        area_ids.update(paths[i][new_positions[i]] for i in range(len(traders)) if not arrived[i])
+        area_names = self._names(Areas.area_id, Areas.area_name, area_ids)
+        settlement_names = self._names(
+            Settlements.settlement_id, Settlements.settlement_name,
+            {str(trader.destination_id) for i, trader in enumerate(traders) if arrived[i]}
+        )
+
+        now = datetime.now()
+        for i, trader in enumerate(traders):
+            trader_id = str(trader.trader_id)
+            if arrived[i]:
+                self._update(trader_id, current_settlement_id=trader.destination_id, current_area_id=None,
+                             journey_path=None, path_position=None, journey_progress=100)
+                self._log_movement(
+                    trader,
+                    to_location_id=str(trader.destination_id),
+                    to_location_type="settlement",
+                    to_location_name=settlement_names.get(str(trader.destination_id), "Unknown"),
+                    details={
+                        "action": "journey_completed",
+                        "journey_duration": (now - trader.journey_started).total_seconds() if trader.journey_started else None,
+                        "final_progress": 100
+                    }
+                )
+                continue
+
+            next_area_id = paths[i][new_positions[i]]
+            self._update(trader_id, current_area_id=next_area_id, path_position=int(new_positions[i]),
+                         journey_progress=int(progress[i]))
+            self._log_movement(
+                trader,
+                from_location_id=str(trader.current_area_id),
+                from_location_type="area",
+                from_location_name=area_names.get(str(trader.current_area_id), "Unknown Area"),
+                to_location_id=next_area_id,
+                to_location_type="area",
+                to_location_name=area_names.get(next_area_id, "Unknown Area"),
+                details={
+                    "action": "area_moved",
+                    "progress": int(progress[i]),
+                    "path_position": int(new_positions[i]),
+                    "destination_id": str(trader.destination_id)
+                }
+            )
+            if encounters[i]:
+                self.encounters.append((trader_id, next_area_id, str(trader.world_id)))
+
+        arrived_count = int(arrived.sum())
+        logger.info(f"Advanced {len(traders)} travelling traders, {arrived_count} arrived")
+        return arrived_count
+
+    def _decide(self, traders: List[Any]) -> int:
+        """
+        Decide and start the journeys of traders sitting in a settlement.
+
+        Args:
+            traders: Tick rows of traders in a settlement
+
+        Returns:
+            Number of journeys started
+        """
+        traders_by_world: Dict[str, List[Any]] = {}
+        for trader in traders:
+            traders_by_world.setdefault(str(trader.world_id), []).append(trader)
+
+        journeys_started = 0
+        for world_id, world_traders in traders_by_world.items():
+            world_data = WorldSnapshotService(self.db).get_snapshot(world_id)
+            if world_data is None:
+                logger.warning(f"Skipping {len(world_traders)} traders of missing world {world_id}")
+                continue
+
+            decisions = self._mcts_decisions(world_traders, world_data) if self.use_mcts else {}
+            for trader in world_traders:
+                destination_id = self._choose_destination(trader, decisions, world_data)
+                if destination_id and self._start_journey(trader, destination_id, world_id, world_data):
+                    journeys_started += 1
+        return journeys_started
+
+    def _mcts_decisions(self, traders: List[Any], world_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run one batched MCTS search over the settlement traders of a world.
+
+        Args:
+            traders: Tick rows of traders in a settlement of the world
+            world_data: Shared world snapshot
+
+        Returns:
+            Decision per trader ID (see TraderService.make_batch_mcts_decisions)
+        """
+        from app.game_state.services.trader_service import TraderService
+
+        trader_ids = [trader.trader_id for trader in traders]
+        records = self.db.query(Traders).filter(Traders.trader_id.in_(trader_ids)).all()
+        try:
+            return TraderService(self.db).make_batch_mcts_decisions(
+                records, world_data, num_simulations=self.num_simulations
+            )
+        except Exception as e:
+            logger.exception(f"Error making batched trader decisions for world {world_data.get('world_id')}: {e}")
+            return {}
+
+    def _choose_destination(self, trader: Any, decisions: Dict[str, Dict[str, Any]],
+                            world_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Choose where a settlement trader goes: its MCTS decision when there is
+        one, otherwise a random connection some of the time.
+
+        Args:
+            trader: Tick row of the trader
+            decisions: MCTS decisions per trader ID
+            world_data: Shared world snapshot
+
+        Returns:
+            Destination settlement ID, or None to stay
+        """
+        decision = decisions.get(str(trader.trader_id))
+        if decision is not None:
+            return decision["next_settlement_id"] if decision.get("action") == "move" else None
+
+        settlement = world_data["settlements"].get(str(trader.current_settlement_id))
+        connections = settlement["connections"] if settlement else []
+        if connections and self.rng.random() < RANDOM_MOVE_CHANCE:
+            return connections[self.rng.integers(len(connections))]["destination_id"]
+        return None
+
+    def _start_journey(self, trader: Any, destination_id: str, world_id: str, world_data: Dict[str, Any]) -> bool:
+        """
+        Start a trader's journey to a settlement, if there is a path to it.
+
+        Args:
+            trader: Tick row of the trader
+            destination_id: Destination settlement ID
+            world_id: World of the trader
+            world_data: Shared world snapshot
+
+        Returns:
+            bool: True if the journey was started
+        """
+        path = find_settlement_path(self.db, trader.current_settlement_id, destination_id, world_id)
+        if not path:
+            return False
+
+        destination_name = world_data["settlements"].get(destination_id, {}).get("name", "Unknown")
+        current_settlement = world_data["settlements"].get(str(trader.current_settlement_id), {})
+        self._update(str(trader.trader_id), current_settlement_id=None, destination_id=destination_id,
+                     destination_settlement_name=destination_name, journey_started=datetime.now(),
+                     journey_progress=0, current_area_id=path[0], journey_path=json.dumps(path), path_position=0)
+        self._log_movement(
+            trader,
+            from_location_id=str(trader.current_settlement_id),
+            from_location_type="settlement",
+            from_location_name=current_settlement.get("name", "Unknown"),
+            to_location_id=destination_id,
+            to_location_type="settlement",
+            to_location_name=destination_name,
+            details={"action": "journey_started", "path_length": len(path), "first_area": path[0]}
+        )
+        logger.info(f"Trader {trader.trader_id} started journey to {destination_name}")
+        return True
+
+    def _names(self, id_column: Any, name_column: Any, ids: set) -> Dict[str, str]:
+        """
+        Read the names of a set of areas or settlements with one query.
+
+        Args:
+            id_column: ID column of the table
+            name_column: Name column of the table
+            ids: IDs to look up
+
+        Returns:
+            Name per ID, for the IDs that exist
+        """
+        if not ids:
+            return {}
+        rows = self.db.query(id_column, name_column).filter(id_column.in_(list(ids))).all()
+        return {str(row_id): name for row_id, name in rows}
+
+    def _log_movement(self, trader: Any, **movement: Any) -> None:
+        """
+        Log a movement of a trader in the action log.
+
+        Args:
+            trader: Tick row of the trader
+            **movement: Locations and details (see LoggingService.log_trader_movement)
+        """
+        try:
+            self.logging_service.log_trader_movement(
+                trader_id=str(trader.trader_id),
+                trader_name=trader.npc_name or f"Trader {trader.trader_id}",
+                world_id=str(trader.world_id),
+                **movement
+            )
+        except Exception as e:
+            logger.warning(f"Failed to log movement of trader {trader.trader_id}: {e}")
+
+    def _update(self, trader_id: str, **changes: Any) -> None:
+        """
+        Record column changes of a trader for the bulk update.
+
+        Args:
+            trader_id: The trader ID
+            **changes: Column values to set
+        """
+        self.updates.setdefault(trader_id, {"trader_id": trader_id}).update(changes)
+
+    def _flush(self) -> None:
+        """Write all recorded changes with one bulk update, left for the unit of work to commit."""
+        if self.updates:
+            self.db.bulk_update_mappings(Traders, list(self.updates.values()))
+        self.db.flush()
+        logger.info(f"Updated {len(self.updates)} traders")
+
+    def _create_encounter_tasks(self) -> int:
+        """
+        Create the assistance tasks of traders that ran into an encounter.
+
+        Returns:
+            Number of tasks created
+        """
+        from app.workers.task_worker import add_trader_assistance_task
+
+        created = 0
+        for trader_id, area_id, world_id in self.encounters:
+            issue_type = random.choice(ENCOUNTER_ISSUE_TYPES)
+            try:
+                with self.db.begin_nested():
+                    result = add_trader_assistance_task(self.db, trader_id, area_id, world_id, issue_type)
+            except Exception as e:
+                logger.warning(f"Could not create event '{issue_type}' for trader {trader_id}: {str(e)}")
+                continue
+            if result.get("status") == "success":
+                created += 1
+                logger.info(f"Created event '{issue_type}' for trader {trader_id} in area {area_id}")
+        return created
@@ -0,0 +1,461 @@
+# app/game_state/travel_graph.py
+"""In-memory travel graph of a world, with A* pathfinding between settlements.
+
+Finding a path used to query the database for every area a breadth-first
+search expanded, and to load and JSON-parse every ``Areas`` row just to find
+the areas next to one settlement. A ``TravelGraph`` is built once per world
+from ``Areas``, ``AreaSettlements``, ``Settlements`` and ``TravelRoutes``, with
+the biome modifiers of the reference data cache, and keeps the area adjacency
+as CSR arrays:
+
+- ``indptr[i]:indptr[i + 1]`` indexes the neighbours of area ``i`` in
+  ``indices`` and the cost of travelling to them in ``costs``
+- the cost of entering an area is the distance to it divided by the travel
+  speed through it, from the ``MovementCalculator`` movement factors (the
+  biome modifier of the area's type)
+- A* uses the straight-line distance to the destination settlement divided by
+  the fastest speed in the world as its heuristic, so paths stay optimal
+
+``get_travel_graph`` keeps one graph per world in process. Topology changes
+made by ``AreaService`` are applied to the cached graph in place (see
+``app.game_state.route_table``); graphs also expire after
+``GRAPH_MAX_AGE_SECONDS`` so workers in other processes pick up changes.
+"""
+
+import heapq
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.game_state.movement_calculator import MovementFactors
+from app.game_state.reference_data import get_reference_data
+
+logger = logging.getLogger(__name__)
+
+# Seconds after which a cached graph is rebuilt from the database
+GRAPH_MAX_AGE_SECONDS = 300
+
+# Distance used for hops between locations without coordinates
+DEFAULT_HOP_DISTANCE = 1.0
+
+# Process-wide graphs per world ID, with the time they were built
+_graphs: Dict[Optional[str], Tuple[float, 'TravelGraph']] = {}
+
+
+def _parse_id_list(value: Any) -> List[str]:
+    """Parse a JSON array of IDs as stored in the ``connected_*`` and ``path`` columns."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    try:
+        parsed = json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return [str(item) for item in parsed] if isinstance(parsed, list) else []
+
+
+def area_speed(biome_modifier: float) -> float:
+    """Travel speed through an area, from the movement factors of its biome."""
+    factors = MovementFactors(
+        base_speed=1.0,
+        biome_modifier=biome_modifier,
+        road_modifier=1.0,
+        weather_modifier=1.0,
+        season_modifier=1.0,
+        transport_modifier=1.0,
+        additional_modifiers={}
+    )
+    return factors.calculate_total_speed()
+
+
+class TravelGraph:
+    """
+    Area adjacency of one world and A* pathfinding over it.
+    
+    Areas are numbered ``0..n-1`` in the order they were loaded; settlements
+    are not graph nodes but sets of entry areas at a position.
+    """
+    
+    def __init__(self,
+                 areas: Iterable[Any],
+                 settlements: Iterable[Any] = (),
+                 routes: Iterable[Any] = (),
+                 biome_modifiers: Optional[Dict[str, float]] = None,
+                 settlement_links: Optional[Iterable[Tuple[str, str]]] = None):
+        """
+        Build the graph from database rows.
+        
+        Args:
+            areas: ``Areas`` rows (or objects with the same attributes)
+            settlements: ``Settlements`` rows, for their coordinates
+            routes: ``TravelRoutes`` rows; consecutive areas of a route path
+                are connected, and its ends to the route's settlements
+            biome_modifiers: ``Biomes.base_movement_modifier`` by biome name,
+                matched against the area type
+            settlement_links: ``(area_id, settlement_id)`` rows of
+                ``AreaSettlements``, or None to read the areas'
+                ``connected_settlements`` JSON instead
+        """
+        biome_modifiers = biome_modifiers or {}
+        areas = list(areas)
+        
+        self.area_ids: List[str] = [str(area.area_id) for area in areas]
+        self.area_index: Dict[str, int] = {area_id: i for i, area_id in enumerate(self.area_ids)}
+        num_areas = len(self.area_ids)
+        
+        self.x = np.array([np.nan if area.location_x is None else area.location_x for area in areas], dtype=np.float64)
+        self.y = np.array([np.nan if area.location_y is None else area.location_y for area in areas], dtype=np.float64)
+        self.biome_modifiers = biome_modifiers
+        self.speed = np.array([self._area_speed(area) for area in areas], dtype=np.float64)
+        self.danger = np.array([getattr(area, "danger_level", None) or 1 for area in areas], dtype=np.int64)
+        
+        # Settlement entry areas and coordinates
+        self.settlement_areas: Dict[str, List[int]] = {}
+        self.settlement_positions: Dict[str, Tuple[float, float]] = {}
+        for settlement in settlements:
+            if settlement.location_x is not None and settlement.location_y is not None:
+                self.settlement_positions[str(settlement.settlement_id)] = (settlement.location_x, settlement.location_y)
+        
+        self._edges = set()
+        edges = self._edges
+        for i, area in enumerate(areas):
+            for neighbour_id in _parse_id_list(area.connected_areas):
+                j = self.area_index.get(neighbour_id)
+                if j is not None and j != i:
+                    edges.add((i, j))
+            if settlement_links is None:
+                for settlement_id in _parse_id_list(area.connected_settlements):
+                    self._add_settlement_area(settlement_id, i)
+        
+        for area_id, settlement_id in settlement_links or ():
+            i = self.area_index.get(str(area_id))
+            if i is not None:
+                self._add_settlement_area(str(settlement_id), i)
+        
+        for route in routes:
+            path = [self.area_index[area_id] for area_id in _parse_id_list(route.path) if area_id in self.area_index]
+            for i, j in zip(path, path[1:]):
+                if i != j:
+                    edges.update(((i, j), (j, i)))
+            if path:
+                self._add_settlement_area(str(route.start_settlement_id), path[0])
+                self._add_settlement_area(str(route.end_settlement_id), path[-1])
+        
+        self._build_adjacency()
+    
+    @classmethod
+    def load(cls, db: Session, world_id: Optional[str] = None) -> 'TravelGraph':
+        """
+        Build the graph of a world with one query per table.
+        
+        Args:
+            db: Database session
+            world_id: World to load, or None for all areas
+        
+        Returns:
+            The travel graph
+        """
+        from app.models.core import Areas, AreaSettlements, Settlements, TravelRoutes
+        
+        area_query = db.query(Areas)
+        settlement_query = db.query(Settlements)
+        route_query = db.query(TravelRoutes)
+        link_query = db.query(AreaSettlements.area_id, AreaSettlements.settlement_id)
+        if world_id is not None:
+            area_query = area_query.filter(Areas.world_id == world_id)
+            settlement_query = settlement_query.filter(Settlements.world_id == world_id)
+            route_query = route_query.filter(TravelRoutes.world_id == world_id)
+            link_query = link_query.filter(AreaSettlements.world_id == world_id)
+        
+        biome_modifiers = get_reference_data().biome_movement_modifiers()
+        graph = cls(area_query.all(), settlement_query.all(), route_query.all(), biome_modifiers,
+                    settlement_links=link_query.all())
+        logger.info(f"Built travel graph of world {world_id}: {len(graph.area_ids)} areas, "
+                    f"{len(graph.indices)} connections, {len(graph.settlement_areas)} settlements")
+        return graph
+    
+    def add_area(self, area: Any) -> None:
+        """
+        Add a new area with its connections to areas already in the graph.
+        
+        Args:
+            area: ``Areas`` row of the new area
+        
+        Raises:
+            ValueError: If the area is already in the graph
+        """
+        area_id = str(area.area_id)
+        if area_id in self.area_index:
+            raise ValueError(f"Area {area_id} is already in the travel graph")
+        
+        i = len(self.area_ids)
+        self.area_ids.append(area_id)
+        self.area_index[area_id] = i
+        self.x = np.append(self.x, np.nan if area.location_x is None else area.location_x)
+        self.y = np.append(self.y, np.nan if area.location_y is None else area.location_y)
+        self.speed = np.append(self.speed, self._area_speed(area))
+        self.danger = np.append(self.danger, getattr(area, "danger_level", None) or 1)
+        
+        for neighbour_id in _parse_id_list(area.connected_areas):
+            j = self.area_index.get(neighbour_id)
+            if j is not None and j != i:
+                self._edges.add((i, j))
+        for settlement_id in _parse_id_list(area.connected_settlements):
+            self._add_settlement_area(settlement_id, i)
+        self._build_adjacency()
+    
+    def add_connection(self, area_id: str, other_area_id: str) -> bool:
+        """
+        Connect two areas in both directions.
+        
+        Returns:
+            True if the graph changed, False if the areas were already connected
+        
+        Raises:
+            KeyError: If an area is not in the graph
+        """
+        i, j = self.area_index[area_id], self.area_index[other_area_id]
+        if i == j or ((i, j) in self._edges and (j, i) in self._edges):
+            return False
+        self._edges.update(((i, j), (j, i)))
+        self._build_adjacency()
+        return True
+    
+    def add_settlement_connection(self, area_id: str, settlement_id: str) -> bool:
+        """
+        Make an area an entry area of a settlement.
+        
+        Returns:
+            True if the graph changed, False if it already was one
+        
+        Raises:
+            KeyError: If the area is not in the graph
+        """
+        i = self.area_index[area_id]
+        if i in self.settlement_areas.get(settlement_id, []):
+            return False
+        self._add_settlement_area(settlement_id, i)
+        return True
+    
+    def update_area(self, area: Any) -> None:
+        """
+        Update the position, speed and danger of an area already in the graph.
+        
+        Args:
+            area: ``Areas`` row with the new values
+        
+        Raises:
+            KeyError: If the area is not in the graph
+        """
+        i = self.area_index[str(area.area_id)]
+        self.x[i] = np.nan if area.location_x is None else area.location_x
+        self.y[i] = np.nan if area.location_y is None else area.location_y
+        self.speed[i] = self._area_speed(area)
+        self.danger[i] = getattr(area, "danger_level", None) or 1
+        self._build_adjacency()
+    
+    def neighbours(self, area: int) -> List[int]:
+        """Get the indices of the areas connected to an area index."""
+        return self._indices_list[self._indptr_list[area]:self._indptr_list[area + 1]]
+    
+    def hop_cost(self, from_area: int, to_area: int) -> float:
+        """Get the cost of travelling between two connected area indices."""
+        start = self._indptr_list[from_area]
+        return self._costs_list[start + self.neighbours(from_area).index(to_area)]
+    
+    def entry_cost(self, settlement_id: str, area: int) -> float:
+        """Get the cost of the hop between a settlement and one of its entry areas."""
+        return self.settlement_distance(settlement_id, area) / self.speed[area]
+    
+    def settlement_distance(self, settlement_id: str, area: int) -> float:
+        """Distance between a settlement and one of its entry areas."""
+        position = self.settlement_positions.get(settlement_id)
+        if position is None or math.isnan(self.x[area]) or math.isnan(self.y[area]):
+            return DEFAULT_HOP_DISTANCE
+        return math.hypot(self.x[area] - position[0], self.y[area] - position[1])
+    
+    def hop_distance(self, from_area: int, to_area: int) -> float:
+        """Get the straight-line distance between two area indices."""
+        return float(self._hop_distances(np.array([from_area]), np.array([to_area]))[0])
+    
+    def same_as(self, other: 'TravelGraph') -> bool:
+        """Check if another graph has the same areas, connections and area values."""
+        return (self.area_ids == other.area_ids and self._edges == other._edges and
+                self.settlement_areas == other.settlement_areas and
+                self.settlement_positions == other.settlement_positions and
+                np.array_equal(self.x, other.x, equal_nan=True) and np.array_equal(self.y, other.y, equal_nan=True) and
+                np.array_equal(self.speed, other.speed) and np.array_equal(self.danger, other.danger))
+    
+    def connected_areas(self, area_id: str) -> List[str]:
+        """Get the IDs of the areas directly connected to an area."""
+        i = self.area_index.get(area_id)
+        if i is None:
+            return []
+        return [self.area_ids[j] for j in self._indices_list[self._indptr_list[i]:self._indptr_list[i + 1]]]
+    
+    def settlement_connected_areas(self, settlement_id: str) -> List[str]:
+        """Get the IDs of the areas directly connected to a settlement."""
+        return [self.area_ids[i] for i in self.settlement_areas.get(settlement_id, [])]
+    
+    def find_path(self, start_id: str, end_id: str) -> List[str]:
+        """
+        Find the cheapest path of areas between two settlements with A*.
+        
+        Args:
+            start_id: Starting settlement ID
+            end_id: Destination settlement ID
+        
+        Returns:
+            List of area IDs from an area next to the start settlement to one
+            next to the destination, or an empty list if there is no path
+        """
+        start_areas = self.settlement_areas.get(start_id, [])
+        end_areas = set(self.settlement_areas.get(end_id, []))
+        if not start_areas or not end_areas:
+            return []
+        
+        heuristic = self._heuristic(end_id)
+        exit_costs = {i: self.entry_cost(end_id, i) for i in end_areas}
+        
+        # g-costs start with the hop from the start settlement into its areas
+        best_cost: Dict[int, float] = {}
+        parents: Dict[int, int] = {}
+        heap: List[Tuple[float, float, int]] = []
+        for i in start_areas:
+            cost = self.entry_cost(start_id, i)
+            if cost < best_cost.get(i, math.inf):
+                best_cost[i] = cost
+                parents[i] = -1
+                heapq.heappush(heap, (cost + heuristic[i], cost, i))
+        
+        # Reaching an end area is not the goal yet: the exit hop into the
+        # destination settlement is pushed as a goal entry (node -1 - area)
+        closed = set()
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node < 0:
+                return [self.area_ids[i] for i in self._reconstruct(parents, -1 - node)]
+            if node in closed or cost > best_cost.get(node, math.inf):
+                continue
+            closed.add(node)
+            
+            if node in end_areas:
+                heapq.heappush(heap, (cost + exit_costs[node], cost + exit_costs[node], -1 - node))
+            
+            for k in range(self._indptr_list[node], self._indptr_list[node + 1]):
+                neighbour = self._indices_list[k]
+                new_cost = cost + self._costs_list[k]
+                if new_cost < best_cost.get(neighbour, math.inf):
+                    best_cost[neighbour] = new_cost
+                    parents[neighbour] = node
+                    heapq.heappush(heap, (new_cost + heuristic[neighbour], new_cost, neighbour))
+        
+        return []
+    
+    def path_cost(self, path: List[str]) -> float:
+        """Get the travel cost along a path of connected area IDs (without the settlement hops)."""
+        return sum(self.hop_cost(self.area_index[from_id], self.area_index[to_id])
+                   for from_id, to_id in zip(path, path[1:]))
+    
+    def _area_speed(self, area: Any) -> float:
+        return max(area_speed(self.biome_modifiers.get(getattr(area, "area_type", None), 1.0)), 1e-6)
+    
+    def _build_adjacency(self) -> None:
+        """Build the CSR arrays, sorted by source area, from the edge set."""
+        num_areas = len(self.area_ids)
+        edge_array = np.array(sorted(self._edges), dtype=np.int64).reshape(-1, 2)
+        self.indptr = np.zeros(num_areas + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_array[:, 0], minlength=num_areas), out=self.indptr[1:])
+        self.indices = edge_array[:, 1].copy()
+        self.costs = self._hop_distances(edge_array[:, 0], edge_array[:, 1]) / self.speed[self.indices]
+        
+        self.max_speed = float(self.speed.max()) if num_areas else 1.0
+        self.has_coordinates = bool(num_areas) and not (np.isnan(self.x).any() or np.isnan(self.y).any())
+        
+        # Python lists of the CSR arrays for the A* inner loop
+        self._indptr_list = self.indptr.tolist()
+        self._indices_list = self.indices.tolist()
+        self._costs_list = self.costs.tolist()
+    
+    def _add_settlement_area(self, settlement_id: str, area: int) -> None:
+        areas = self.settlement_areas.setdefault(settlement_id, [])
+        if area not in areas:
+            areas.append(area)
+    
+    def _hop_distances(self, sources: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Straight-line distances between areas, or the default hop where coordinates are missing."""
+        distances = np.hypot(self.x[targets] - self.x[sources], self.y[targets] - self.y[sources])
+        return np.where(np.isnan(distances), DEFAULT_HOP_DISTANCE, distances)
+    
+    def _heuristic(self, end_id: str) -> List[float]:
+        """
+        Lower bound of the cost from every area to a settlement.
+        
+        Hops without coordinates are not bounded by the straight-line distance,
+        so the heuristic is zero (Dijkstra) unless every area has coordinates.
+        """
+        position = self.settlement_positions.get(end_id)
+        if position is None or not self.has_coordinates:
+            return [0.0] * len(self.area_ids)
+        return (np.hypot(self.x - position[0], self.y - position[1]) / self.max_speed).tolist()
+    
+    @staticmethod
+    def _reconstruct(parents: Dict[int, int], area: int) -> List[int]:
+        path = []
+        while area != -1:
+            path.append(area)
+            area = parents[area]
+        return path[::-1]
+
+
+def get_travel_graph(db: Session, world_id: Optional[str] = None) -> TravelGraph:
+    """
+    Get the cached travel graph of a world, building it on first use.
+    
+    Args:
+        db: Database session used if the graph has to be built
+        world_id: World ID, or None for a graph of all areas
+    
+    Returns:
+        The world's travel graph
+    """
+    entry = _graphs.get(world_id)
+    if entry is not None and time.monotonic() - entry[0] < GRAPH_MAX_AGE_SECONDS:
+        return entry[1]
+    
+    graph = TravelGraph.load(db, world_id)
+    _graphs[world_id] = (time.monotonic(), graph)
+    return graph
+
+
+def cached_travel_graph(world_id: Optional[str] = None) -> Optional[TravelGraph]:
+    """Get the cached graph of a world without building it, or None."""
+    entry = _graphs.get(world_id)
+    return entry[1] if entry is not None else None
+
+
+def discard_travel_graph(world_id: Optional[str]) -> None:
+    """Drop the cached graph of exactly one world (None: the all-areas graph)."""
+    _graphs.pop(world_id, None)
+
+
+def invalidate_travel_graph(world_id: Optional[str] = None) -> None:
+    """
+    Drop cached travel graphs after a topology change.
+    
+    Args:
+        world_id: World whose graph changed, or None to drop all graphs
+    """
+    if world_id is None:
+        _graphs.clear()
+    else:
+        discard_travel_graph(world_id)
+        # The all-areas graph contains every world
+        discard_travel_graph(None)
+
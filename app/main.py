@@ -4,15 +4,31 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 
-from database.connection import get_db
+from database.connection import async_engine, async_read_engine, get_db, get_pool_metrics
+from app.game_state.services.action_log_sink import flush_action_logs
+from app.execution import register_execution
+from app.workers.pool_metrics import get_worker_pool_metrics
 from app.routers import world, player, settlement, trader, area, animal, item, equipment, task
 from app.routers import trader_router_new
 
 from typing import Dict, List
 
 app = FastAPI(title="RPG Game API")
+register_execution(app)
 active_connections: Dict[str, List[WebSocket]] = {}
 
+@app.on_event("shutdown")
+def flush_action_log_buffer():
+    """Write the buffered action log rows before the API exits."""
+    flush_action_logs()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Close the connections of the async engines."""
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket.accept()
@@ -70,4 +86,9 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/pools")
+async def pool_metrics():
+    """Get the connection pool metrics of this API process and of the worker processes."""
+    return {"api": get_pool_metrics(), "workers": get_worker_pool_metrics()}
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -197,6 +197,8 @@ class SettlementBuildings(Base):
 
 class SettlementResources(Base):
     __tablename__ = 'settlement_resources'
+    # One row per settlement and resource, the conflict target of the production upsert
+    __table_args__ = (UniqueConstraint('settlement_id', 'resource_type_id', name='uq_settlement_resources_settlement_resource'),)
     settlement_resource_id = Column(String, nullable=False, primary_key=True)
     settlement_id = Column(String, nullable=True)
     resource_type_id = Column(String, nullable=True)
@@ -261,6 +263,8 @@ class Traders(Base):
     journey_progress = Column(Integer, nullable=True)
     journey_started = Column(DateTime, nullable=True)
     destination_settlement_name = Column(String, nullable=True)
+    # Task the trader waits for; kept in sync with the tasks table by the trader tick
+    active_task_id = Column(String, nullable=True)
 
 class TraderInventory(Base):
     __tablename__ = 'trader_inventory'
@@ -303,6 +307,13 @@ class Areas(Base):
     connected_areas = Column(String, nullable=True)  # JSON array of area IDs
     type = Column(String, nullable=True)  # 'wilderness', 'dungeon', 'settlement', etc.
     
+class AreaSettlements(Base):
+    # Indexed copy of Areas.connected_settlements, for settlement -> areas lookups
+    __tablename__ = 'area_settlements'
+    area_id = Column(String, ForeignKey('areas.area_id', ondelete='CASCADE'), nullable=False, primary_key=True)
+    settlement_id = Column(String, nullable=False, primary_key=True, index=True)
+    world_id = Column(String, nullable=True, index=True)
+    
 class AreaEncounterTypes(Base):
     __tablename__ = 'area_encounter_types'
     encounter_type_id = Column(String, nullable=False, primary_key=True)
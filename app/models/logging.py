@@ -1,5 +1,5 @@
 # app/models/logging.py
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.models.core import Base
@@ -7,11 +7,21 @@ import uuid
 from datetime import datetime
 
 class EntityActionLog(Base):
-    """Table for logging entity actions including trader movements"""
+    """Table for logging entity actions including trader movements.
+
+    Partitioned by month of the timestamp (see app/game_state/action_log_partitions.py),
+    so the timestamp is part of the primary key.
+    """
     __tablename__ = 'entity_action_log'
+    __table_args__ = (
+        # Keyset pagination of an entity's history, newest first
+        Index('ix_entity_action_log_entity_timestamp', 'entity_id', 'timestamp', 'log_id'),
+        Index('ix_entity_action_log_world_game_day', 'world_id', 'game_day'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'}
+    )
     
     log_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
+    timestamp = Column(DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
     
     # Entity information
     entity_id = Column(UUID(as_uuid=True), nullable=False)
@@ -42,4 +52,19 @@ class EntityActionLog(Base):
     # Tracking fields
     world_id = Column(UUID(as_uuid=True), nullable=False)
     game_day = Column(Integer)
-    game_time = Column(String(50))
\ No newline at end of file
+    game_time = Column(String(50))
+
+
+class EntityActionDailySummary(Base):
+    """Daily action counts per entity, kept after old action log partitions are dropped"""
+    __tablename__ = 'entity_action_daily_summary'
+
+    day = Column(Date, primary_key=True)
+    world_id = Column(UUID(as_uuid=True), primary_key=True)
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)
+    entity_type = Column(String(50), primary_key=True)
+    action_type = Column(String(50), primary_key=True)
+    action_subtype = Column(String(50), primary_key=True, default='')  # '' when the actions had no subtype
+    action_count = Column(Integer, nullable=False, default=0)
+    first_game_day = Column(Integer)
+    last_game_day = Column(Integer)
@@ -5,11 +5,12 @@ from typing import List, Optional
 from uuid import UUID
 
 from database.connection import get_db
+from app.execution import OffloadedRoute
 from app.models.animals import Animal
 # Removed duplicate import
 from app.schemas.animal import AnimalCreate, AnimalResponse
 
-router = APIRouter(prefix="/animal", tags=["animals"])
+router = APIRouter(prefix="/animal", tags=["animals"], route_class=OffloadedRoute)
 
 @router.post("/", response_model=AnimalResponse, status_code=status.HTTP_201_CREATED)
 async def create_player(player: AnimalCreate, db: Session = Depends(get_db)):
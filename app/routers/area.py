@@ -8,10 +8,10 @@ import random
 from datetime import datetime
 
 from database.connection import get_db
+from app.execution import OffloadedRoute
 from app.models.core import (
     Areas, 
-    AreaEncounterTypes,
-    AreaEncounterOutcomes,
+    AreaSettlements,
     AreaEncounters,
     TravelRoutes,
     Settlements,
@@ -31,8 +31,11 @@ from app.schemas.area import (
     RouteResponse
 )
 from app.workers.area_worker import generate_encounter, resolve_encounter
+from app.game_state.reference_data import get_reference_data
+from app.game_state.route_table import record_area_created
+from app.game_state.services.area_service import link_area_to_settlements
 
-router = APIRouter(prefix="/areas", tags=["areas"])
+router = APIRouter(prefix="/areas", tags=["areas"], route_class=OffloadedRoute)
 
 @router.get("/", response_model=List[AreaResponse])
 async def get_areas(world_id: Optional[UUID] = None, db: Session = Depends(get_db)):
@@ -125,8 +128,10 @@ async def create_area(area_data: AreaCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_area)
+    link_area_to_settlements(db, new_area.area_id, area_data.connected_settlements, new_area.world_id)
     db.commit()
     db.refresh(new_area)
+    record_area_created(new_area.world_id, new_area)
     
     # Convert JSON fields back to Python objects for response
     connected_settlements_list = json.loads(new_area.connected_settlements) if new_area.connected_settlements else []
@@ -159,13 +164,12 @@ async def get_area_encounters(area_id: UUID, active_only: bool = True, db: Sessi
         query = query.filter(AreaEncounters.is_active == True)
         
     encounters = query.all()
+    reference_data = get_reference_data()
     
     result = []
     for encounter in encounters:
         # Get the encounter type details
-        encounter_type = db.query(AreaEncounterTypes).filter(
-            AreaEncounterTypes.encounter_type_id == encounter.encounter_type_id
-        ).first()
+        encounter_type = reference_data.encounter_type(encounter.encounter_type_id)
         
         if not encounter_type:
             continue
@@ -179,9 +183,8 @@ async def get_area_encounters(area_id: UUID, active_only: bool = True, db: Sessi
         possible_outcomes = []
         if encounter_type.possible_outcomes:
             outcome_ids = json.loads(encounter_type.possible_outcomes)
-            outcomes = db.query(AreaEncounterOutcomes).filter(
-                AreaEncounterOutcomes.outcome_id.in_(outcome_ids)
-            ).all()
+            outcomes = [reference_data.encounter_outcome(outcome_id) for outcome_id in outcome_ids]
+            outcomes = [outcome for outcome in outcomes if outcome]
             
             for outcome in outcomes:
                 outcome_dict = {
@@ -249,8 +252,10 @@ async def travel_between_areas(travel_req: TravelRequest, background_tasks: Back
         if not current_settlement:
             raise HTTPException(status_code=404, detail="Current settlement not found")
             
-        connected_settlements = json.loads(destination.connected_settlements) if destination.connected_settlements else []
-        is_valid_travel = str(travel_req.current_settlement_id) in connected_settlements
+        is_valid_travel = db.query(AreaSettlements).filter(
+            AreaSettlements.area_id == destination.area_id,
+            AreaSettlements.settlement_id == str(travel_req.current_settlement_id)
+        ).first() is not None
     
     if not is_valid_travel:
         raise HTTPException(status_code=400, detail="Cannot travel directly to the specified destination")
@@ -336,23 +341,28 @@ async def get_routes_between_settlements(
     
     routes = query.all()
     
+    # Load the settlements and areas of all routes at once
+    route_paths = {route.route_id: json.loads(route.path) if route.path else [] for route in routes}
+    settlement_ids = {route.start_settlement_id for route in routes} | {route.end_settlement_id for route in routes}
+    settlements = {
+        settlement.settlement_id: settlement
+        for settlement in db.query(Settlements).filter(Settlements.settlement_id.in_(settlement_ids)).all()
+    } if settlement_ids else {}
+    path_area_ids = {area_id for path in route_paths.values() for area_id in path}
+    areas_by_id = {
+        area.area_id: area for area in db.query(Areas).filter(Areas.area_id.in_(path_area_ids)).all()
+    } if path_area_ids else {}
+    
     result = []
     for route in routes:
-        # Get settlement names
-        start_settlement = db.query(Settlements).filter(
-            Settlements.settlement_id == route.start_settlement_id
-        ).first()
-        
-        end_settlement = db.query(Settlements).filter(
-            Settlements.settlement_id == route.end_settlement_id
-        ).first()
+        start_settlement = settlements.get(route.start_settlement_id)
+        end_settlement = settlements.get(route.end_settlement_id)
         
         if not start_settlement or not end_settlement:
             continue
             
-        # Get areas in path
-        area_ids = json.loads(route.path) if route.path else []
-        areas = db.query(Areas).filter(Areas.area_id.in_(area_ids)).all()
+        # Areas in path order
+        areas = [areas_by_id[area_id] for area_id in route_paths[route.route_id] if area_id in areas_by_id]
         
         area_responses = []
         for area in areas:
@@ -3,11 +3,13 @@ from app.game_state.services.equipment_service import EquipmentService
 from app.schemas.equipment import EquipItemRequest, EquipmentResponse
 from sqlalchemy.orm import Session
 from database.connection import get_db
+from app.execution import OffloadedRoute
 from typing import Dict, Any
 
 router = APIRouter(
     prefix="/equipment",
-    tags=["equipment"]
+    tags=["equipment"],
+    route_class=OffloadedRoute
 )
 
 def get_equipment_service(db: Session = Depends(get_db)):
@@ -5,11 +5,12 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 
 from database.connection import get_db
+from app.execution import OffloadedRoute
 from app.models.item import Item
 from app.schemas.item import ItemBase, ItemResponse, ItemCreate
 from app.game_state.managers.item_manager import ItemManager
 
-router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(prefix="/items", tags=["items"], route_class=OffloadedRoute)
 
 @router.post("/", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_item(item: ItemCreate, db: Session = Depends(get_db)):
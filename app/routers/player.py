@@ -5,11 +5,12 @@ from typing import List, Optional
 from uuid import UUID
 
 from database.connection import get_db
+from app.execution import OffloadedRoute
 from app.models.core import Players, Characters, CharacterInventory
 from app.models.roles import CharacterSkill
 from app.schemas.player import PlayerCreate, PlayerResponse, CharacterCreate, CharacterResponse, InventoryResponse
 
-router = APIRouter(prefix="/players", tags=["players"])
+router = APIRouter(prefix="/players", tags=["players"], route_class=OffloadedRoute)
 
 @router.post("/", response_model=PlayerResponse, status_code=status.HTTP_201_CREATED)
 async def create_player(player: PlayerCreate, db: Session = Depends(get_db)):
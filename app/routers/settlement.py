@@ -1,5 +1,6 @@
 # routers/settlement.py
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Text
 from sqlalchemy.sql import text
@@ -9,8 +10,11 @@ import uuid
 from datetime import datetime
 from fastapi.encoders import jsonable_encoder
 
-from database.connection import get_db, SessionLocal
+from database.connection import get_async_read_db, get_db, SessionLocal
+from app.execution import OffloadedRoute, runs_on_event_loop
+from app.game_state.managers.settlement_manager import AsyncSettlementManager
 from app.game_state.services.settlement_service import SettlementService
+from app.game_state.reference_data import get_reference_data
 from app.workers.settlement_worker import (
     process_settlement_growth, 
     start_building_construction as worker_start_building_construction,
@@ -23,9 +27,6 @@ from app.models.core import (
     SettlementBuildings, 
     SettlementResources, 
     ResourceSites, 
-    ResourceSiteTypes,
-    ResourceSiteStages,
-    ResourceTypes,
     BuildingTypes
 )
 from app.schemas.settlement import (
@@ -39,31 +40,25 @@ from app.schemas.settlement import (
     BuildingCreate
 )
 
-router = APIRouter(prefix="/settlements", tags=["settlements"])
+router = APIRouter(prefix="/settlements", tags=["settlements"], route_class=OffloadedRoute)
 
 @router.get("/", response_model=List[SettlementResponse])
-async def get_settlements(world_id: Optional[UUID] = None, db: Session = Depends(get_db)):
-    query = db.query(Settlements)
-    if world_id:
-        query = query.filter(Settlements.world_id == world_id)
-    settlements = query.all()
-    return settlements
+@runs_on_event_loop
+async def get_settlements(world_id: Optional[UUID] = None, db: AsyncSession = Depends(get_async_read_db)):
+    return await AsyncSettlementManager(db).get_settlements(world_id)
 
 @router.get("/{settlement_id}", response_model=SettlementResponse)
-async def get_settlement(settlement_id: UUID, db: Session = Depends(get_db)):
-    settlement = db.query(Settlements).filter(Settlements.settlement_id == settlement_id).first()
+@runs_on_event_loop
+async def get_settlement(settlement_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
+    settlement = await AsyncSettlementManager(db).get_settlement(settlement_id)
     if settlement is None:
         raise HTTPException(status_code=404, detail="Settlement not found")
     return settlement
 
 @router.get("/{settlement_id}/buildings")  # , response_model=List[BuildingResponse])
-async def get_settlement_buildings(settlement_id: UUID, db: Session = Depends(get_db)):
-    buildings = (
-        db.query(SettlementBuildings, BuildingTypes.building_name)
-        .join(BuildingTypes, SettlementBuildings.building_type_id == BuildingTypes.building_type_id)
-        .filter(SettlementBuildings.settlement_id == settlement_id)
-        .all()
-    )
+@runs_on_event_loop
+async def get_settlement_buildings(settlement_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
+    buildings = await AsyncSettlementManager(db).get_buildings(settlement_id)
     
     # Serialise the query result
     serialised_buildings = [
@@ -77,13 +72,9 @@ async def get_settlement_buildings(settlement_id: UUID, db: Session = Depends(ge
     return serialised_buildings
 
 @router.get("/{settlement_id}/resources")  #,response_model=List[ResourceResponse])
-async def get_settlement_resources(settlement_id: UUID, db: Session = Depends(get_db)):
-    results = (
-        db.query(SettlementResources, Resource.resource_name)
-        .join(Resource, SettlementResources.resource_type_id == Resource.resource_type_id)
-        .filter(SettlementResources.settlement_id == settlement_id)
-        .all()
-    )
+@runs_on_event_loop
+async def get_settlement_resources(settlement_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
+    results = await AsyncSettlementManager(db).get_resources(settlement_id)
     return [
         {
             "id": settlement_resource.settlement_resource_id,
@@ -111,8 +102,9 @@ async def start_building_construction(
     }
 
 @router.get("/{settlement_id}/connections")
-async def get_settlement_connections(settlement_id: UUID, db: Session = Depends(get_db)):
-    settlement = db.query(Settlements).filter(Settlements.settlement_id == settlement_id).first()
+@runs_on_event_loop
+async def get_settlement_connections(settlement_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
+    settlement = await AsyncSettlementManager(db).get_settlement(settlement_id)
     if settlement is None:
         raise HTTPException(status_code=404, detail="Settlement not found")
     return settlement.connections
@@ -121,14 +113,13 @@ async def get_settlement_connections(settlement_id: UUID, db: Session = Depends(
 async def get_settlement_resource_sites(settlement_id: UUID, db: Session = Depends(get_db)):
     # Get all resource sites for this settlement
     sites = db.query(ResourceSites).filter(ResourceSites.settlement_id == settlement_id).all()
+    reference_data = get_reference_data()
     
     # Prepare response with full details
     result = []
     for site in sites:
         # Get site type information
-        site_type = db.query(ResourceSiteTypes).filter(
-            ResourceSiteTypes.site_type_id == site.site_type_id
-        ).first()
+        site_type = reference_data.site_type(site.site_type_id)
         
         if not site_type:
             continue
@@ -136,18 +127,13 @@ async def get_settlement_resource_sites(settlement_id: UUID, db: Session = Depen
         # Get primary resource information
         primary_resource = None
         if site_type.primary_resource_type_id:
-            resource = db.query(ResourceTypes).filter(
-                ResourceTypes.resource_type_id == site_type.primary_resource_type_id
-            ).first()
+            resource = reference_data.resource_type(site_type.primary_resource_type_id)
             if resource:
                 primary_resource = resource.resource_name
         
         # Get stage details
         stage_details = None
-        stage = db.query(ResourceSiteStages).filter(
-            ResourceSiteStages.site_type_id == site.site_type_id,
-            ResourceSiteStages.stage_code == site.current_stage
-        ).first()
+        stage = reference_data.site_stage(site.site_type_id, site.current_stage)
         
         if stage:
             # Parse JSON fields for the response
@@ -225,10 +211,8 @@ async def develop_resource_site(
         raise HTTPException(status_code=404, detail="Resource site not found")
     
     # Get the current stage information
-    current_stage = db.query(ResourceSiteStages).filter(
-        ResourceSiteStages.site_type_id == site.site_type_id,
-        ResourceSiteStages.stage_code == site.current_stage
-    ).first()
+    reference_data = get_reference_data()
+    current_stage = reference_data.site_stage(site.site_type_id, site.current_stage)
     
     if not current_stage:
         raise HTTPException(status_code=404, detail="Current site stage information not found")
@@ -238,10 +222,7 @@ async def develop_resource_site(
         raise HTTPException(status_code=400, detail="This site cannot be developed further")
     
     # Get the next stage information
-    next_stage = db.query(ResourceSiteStages).filter(
-        ResourceSiteStages.site_type_id == site.site_type_id,
-        ResourceSiteStages.stage_code == current_stage.next_stage
-    ).first()
+    next_stage = reference_data.site_stage(site.site_type_id, current_stage.next_stage)
     
     if not next_stage:
         raise HTTPException(status_code=404, detail="Next stage information not found")
@@ -253,9 +234,7 @@ async def develop_resource_site(
             
             for resource_code, amount in required_resources.items():
                 # Get the resource type ID
-                resource_type = db.query(ResourceTypes).filter(
-                    ResourceTypes.resource_code == resource_code
-                ).first()
+                resource_type = reference_data.resource_type_by_code(resource_code)
                 
                 if not resource_type:
                     raise HTTPException(status_code=400, detail=f"Required resource '{resource_code}' not found")
@@ -314,9 +293,8 @@ async def add_resource_site(
         raise HTTPException(status_code=404, detail="Settlement not found")
     
     # Check if site type exists
-    site_type = db.query(ResourceSiteTypes).filter(
-        ResourceSiteTypes.site_type_id == site_data.site_type_id
-    ).first()
+    reference_data = get_reference_data()
+    site_type = reference_data.site_type(site_data.site_type_id)
     if not site_type:
         raise HTTPException(status_code=404, detail="Resource site type not found")
     
@@ -356,18 +334,13 @@ async def add_resource_site(
     # Get primary resource information
     primary_resource = None
     if site_type.primary_resource_type_id:
-        resource = db.query(ResourceTypes).filter(
-            ResourceTypes.resource_type_id == site_type.primary_resource_type_id
-        ).first()
+        resource = reference_data.resource_type(site_type.primary_resource_type_id)
         if resource:
             primary_resource = resource.resource_name
     
     # Get stage details
     stage_details = None
-    stage = db.query(ResourceSiteStages).filter(
-        ResourceSiteStages.site_type_id == new_site.site_type_id,
-        ResourceSiteStages.stage_code == new_site.current_stage
-    ).first()
+    stage = reference_data.site_stage(new_site.site_type_id, new_site.current_stage)
     
     if stage:
         # Parse JSON fields for the response
@@ -1,10 +1,10 @@
 # app/routers/task.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 
-from database.connection import get_db
+from database.connection import get_async_db
 from app.game_state.services.task_service import TaskService
 from app.schemas.tasks import (
     TaskCreate, 
@@ -16,6 +16,7 @@ from app.schemas.tasks import (
     TaskCompleteResponse
 )
 
+# Endpoints use the async session and run on the event loop
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 @router.get("/", response_model=TaskListResponse)
@@ -23,7 +24,7 @@ async def get_tasks(
     world_id: UUID,
     location_id: Optional[str] = None,
     character_id: Optional[UUID] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get available tasks in a world, optionally filtered by location or character.
@@ -41,7 +42,7 @@ async def get_tasks(
 async def get_character_tasks(
     character_id: UUID,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get tasks assigned to a specific character.
@@ -55,7 +56,7 @@ async def get_character_tasks(
     return {"tasks": tasks, "count": len(tasks)}
 
 @router.get("/{task_id}", response_model=TaskResponse)
-async def get_task(task_id: UUID, db: Session = Depends(get_db)):
+async def get_task(task_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """
     Get details of a specific task.
     """
@@ -71,7 +72,7 @@ async def get_task(task_id: UUID, db: Session = Depends(get_db)):
 async def accept_task(
     task_id: UUID,
     request: TaskAcceptRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Accept a task for a character.
@@ -91,7 +92,7 @@ async def accept_task(
 async def complete_task(
     task_id: UUID,
     request: TaskCompleteRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Complete a task and receive rewards.
@@ -108,7 +109,7 @@ async def complete_task(
     return result
 
 @router.get("/trader/{trader_id}", response_model=TaskListResponse)
-async def get_trader_tasks(trader_id: UUID, db: Session = Depends(get_db)):
+async def get_trader_tasks(trader_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """
     Get tasks related to a specific trader.
     """
@@ -121,7 +122,7 @@ async def get_trader_tasks(trader_id: UUID, db: Session = Depends(get_db)):
 async def get_location_tasks(
     location_id: str,
     world_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get tasks available at a specific location.
@@ -142,7 +143,7 @@ async def create_test_task(
     location_id: Optional[str] = None,
     target_id: Optional[str] = None,
     task_type: str = "trader_assistance",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a test task for development purposes.
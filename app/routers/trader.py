@@ -1,42 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
-from database.connection import get_db
-from app.models.core import Traders, TraderInventory, ResourceTypes
+from database.connection import get_async_read_db, get_db, get_read_db, SessionLocal
+from app.models.core import Traders
 from app.schemas.trader import TraderResponse, TraderInventoryResponse, TradeRequest
 from app.game_state.manager import GameStateManager
-from app.game_state.services.logging_service import LoggingService
-from app.models.logging import EntityActionLog
+from app.game_state.managers.trader_manager import AsyncTraderManager
+from app.game_state.reference_data import get_reference_data
+from app.game_state.services.logging_service import LoggingService, next_cursor
+from app.ai.mcts.trader_decisions import search_trader_decision
+from app.execution import OffloadedRoute, run_blocking, run_cpu_bound, runs_on_event_loop
 
-router = APIRouter(prefix="/traders", tags=["traders"])
+router = APIRouter(prefix="/traders", tags=["traders"], route_class=OffloadedRoute)
+
+# Default search time budget of /traders/{trader_id}/mcts_decision
+MCTS_DECISION_TIME_BUDGET_MS = 200
 
 @router.get("/", response_model=List[TraderResponse])
-async def get_traders(settlement_id: Optional[UUID] = None, db: Session = Depends(get_db)):
-    query = db.query(Traders)
-    if settlement_id:
-        query = query.filter(Traders.current_settlement_id == settlement_id)
-    traders = query.all()
-    return traders
+@runs_on_event_loop
+async def get_traders(settlement_id: Optional[UUID] = None, db: AsyncSession = Depends(get_async_read_db)):
+    return await AsyncTraderManager(db).get_traders(settlement_id)
 
 @router.get("/{trader_id}", response_model=TraderResponse)
-async def get_trader(trader_id: str, db: Session = Depends(get_db)):
-    trader = db.query(Traders).filter(Traders.trader_id == trader_id).first()
+@runs_on_event_loop
+async def get_trader(trader_id: str, db: AsyncSession = Depends(get_async_read_db)):
+    trader = await AsyncTraderManager(db).get_trader(trader_id)
     if trader is None:
         raise HTTPException(status_code=404, detail="Trader not found")
     return trader
 
 @router.get("/{trader_id}/inventory", response_model=List[TraderInventoryResponse])
-async def get_trader_inventory(trader_id: UUID, db: Session = Depends(get_db)):
+@runs_on_event_loop
+async def get_trader_inventory(trader_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
     # Get the trader inventory items
-    inventory_items = db.query(TraderInventory).filter(TraderInventory.trader_id == trader_id).all()
+    inventory_items = await AsyncTraderManager(db).get_inventory(trader_id)
     
-    # Get resource information to include names
+    # Get resource information to include names; loading a stale snapshot blocks
     inventory_with_details = []
+    reference_data = await run_blocking(get_reference_data)
     for item in inventory_items:
         # Get the resource details using the resource_id from inventory
-        resource = db.query(ResourceTypes).filter(ResourceTypes.resource_type_id == item.resource_type_id).first()
+        resource = reference_data.resource_type(item.resource_type_id)
         
         # Create the response object with all required fields
         inventory_item = {
@@ -71,42 +78,42 @@ async def trade_with_trader(
     }
 
 @router.get("/{trader_id}/schedule")
-async def get_trader_schedule(trader_id: UUID, db: Session = Depends(get_db)):
-    trader = db.query(Traders).filter(Traders.trader_id == trader_id).first()
+@runs_on_event_loop
+async def get_trader_schedule(trader_id: UUID, db: AsyncSession = Depends(get_async_read_db)):
+    trader = await AsyncTraderManager(db).get_trader(trader_id)
     if trader is None:
         raise HTTPException(status_code=404, detail="Trader not found")
     return trader.schedule
 
 @router.get("/{trader_id}/mcts_decision", response_model=Dict[str, Any])
+@runs_on_event_loop
 async def get_trader_mcts_decision(
     trader_id: UUID, 
     simulations: int = 100,
-    db: Session = Depends(get_db)
+    time_budget_ms: int = MCTS_DECISION_TIME_BUDGET_MS
 ):
     """
     Get the MCTS-based decision for a trader's next move.
     
+    The search is anytime: it stops after `simulations` simulations or
+    `time_budget_ms` milliseconds, whichever comes first, and earlier when the
+    best move can no longer change, so the response time stays bounded.
+    The trader's state is loaded in the blocking pool, with a session of its
+    own, and searched in the cpu pool, so the search does not hold up other
+    requests.
+    
     Args:
         trader_id: UUID of the trader
-        simulations: Number of MCTS simulations to run (default: 100)
+        simulations: Maximum number of MCTS simulations to run (default: 100)
+        time_budget_ms: Search time budget in milliseconds
         
     Returns:
         MCTS decision details including stats
     """
-    trader = db.query(Traders).filter(Traders.trader_id == trader_id).first()
-    if trader is None:
-        raise HTTPException(status_code=404, detail="Trader not found")
-    
-    # Only meaningful if trader is in a settlement
-    if not trader.current_settlement_id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Trader is not in a settlement, cannot make a new movement decision"
-        )
-    
-    # Use the game state manager to get MCTS decision
-    manager = GameStateManager(db)
-    mcts_decision = manager.get_mcts_trader_decision(str(trader_id), simulations)
+    inputs = await run_blocking(load_mcts_decision_inputs, trader_id)
+    mcts_decision = await run_cpu_bound(
+        search_trader_decision, inputs["trader_data"], inputs["world_data"], simulations, time_budget_ms
+    )
     
     if mcts_decision["status"] != "success":
         raise HTTPException(
@@ -116,6 +123,35 @@ async def get_trader_mcts_decision(
     
     return mcts_decision
 
+def load_mcts_decision_inputs(trader_id: UUID) -> Dict[str, Any]:
+    """
+    Load the search inputs of a trader's MCTS decision (see GameStateManager.prepare_mcts_trader_decision).
+    
+    Runs in the blocking pool, so it opens and closes a session of its own
+    instead of using one created on the event loop.
+    """
+    with SessionLocal() as db:
+        trader = db.query(Traders).filter(Traders.trader_id == trader_id).first()
+        if trader is None:
+            raise HTTPException(status_code=404, detail="Trader not found")
+        
+        # Only meaningful if trader is in a settlement
+        if not trader.current_settlement_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Trader is not in a settlement, cannot make a new movement decision"
+            )
+        
+        # Use the game state manager to load the trader's state
+        inputs = GameStateManager(db).prepare_mcts_trader_decision(str(trader_id))
+    
+    if inputs["status"] != "success":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"MCTS decision failed: {inputs.get('message', 'Unknown error')}"
+        )
+    return inputs
+
 @router.post("/{trader_id}/complete-task/{task_id}")
 async def complete_trader_task(
     trader_id: UUID,
@@ -141,28 +177,41 @@ async def complete_trader_task(
     
     return result
 
+def set_next_cursor(response: Response, logs: list, limit: int) -> None:
+    """Set the X-Next-Cursor header of a page of log entries, if there may be more."""
+    cursor = next_cursor(logs, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
 @router.get("/{trader_id}/movement_history")
 async def get_trader_movement_history(
     trader_id: UUID,
+    response: Response,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get the movement history for a trader.
+    Get the movement history for a trader, newest first.
     
     Args:
         trader_id: UUID of the trader
         limit: Maximum number of records to return (default: 100)
+        cursor: Cursor of the next page, from the X-Next-Cursor header of the previous page
         
     Returns:
-        List of movement logs
+        List of movement logs; the X-Next-Cursor header holds the cursor of the next page
     """
     trader = db.query(Traders).filter(Traders.trader_id == trader_id).first()
     if trader is None:
         raise HTTPException(status_code=404, detail="Trader not found")
     
     logging_service = LoggingService(db)
-    movement_logs = logging_service.get_trader_movement_history(str(trader_id), limit)
+    try:
+        movement_logs = logging_service.get_trader_movement_history(str(trader_id), limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, movement_logs, limit)
     
     # Format logs for API response
     formatted_logs = []
@@ -192,35 +241,34 @@ async def get_trader_movement_history(
 @router.get("/{trader_id}/action_history")
 async def get_trader_action_history(
     trader_id: UUID,
+    response: Response,
     limit: int = 100,
     action_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get the complete action history for a trader.
+    Get the complete action history for a trader, newest first.
     
     Args:
         trader_id: UUID of the trader
         limit: Maximum number of records to return (default: 100)
         action_type: Optional filter for specific action type ('movement', 'trade', etc.)
+        cursor: Cursor of the next page, from the X-Next-Cursor header of the previous page
         
     Returns:
-        List of action logs
+        List of action logs; the X-Next-Cursor header holds the cursor of the next page
     """
     trader = db.query(Traders).filter(Traders.trader_id == trader_id).first()
     if trader is None:
         raise HTTPException(status_code=404, detail="Trader not found")
     
-    # Query action logs
-    query = db.query(EntityActionLog).filter(
-        EntityActionLog.entity_id == str(trader_id),
-        EntityActionLog.entity_type == 'trader'
-    )
-    
-    if action_type:
-        query = query.filter(EntityActionLog.action_type == action_type)
-    
-    action_logs = query.order_by(EntityActionLog.timestamp.desc()).limit(limit).all()
+    logging_service = LoggingService(db)
+    try:
+        action_logs = logging_service.get_trader_action_history(str(trader_id), limit, action_type, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, action_logs, limit)
     
     # Format logs for API response
     formatted_logs = []
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from database.connection import get_db
+from app.execution import OffloadedRoute
 from app.schemas.trader import (
     TraderResponse, 
     TraderCreate, 
@@ -14,7 +15,7 @@ from app.game_state.managers.trader_manager import TraderManager
 from app.game_state.entities.trader import Trader as TraderEntity
 from app.workers.trader_worker import process_trader_movement, process_all_traders
 
-router = APIRouter(prefix="/traders", tags=["traders"])
+router = APIRouter(prefix="/traders", tags=["traders"], route_class=OffloadedRoute)
 
 # Helper function to convert between entity and response models
 def entity_to_response(entity: TraderEntity) -> TraderResponse:
@@ -5,13 +5,16 @@ from typing import List
 from uuid import UUID
 
 from database.connection import get_db
+from app.execution import OffloadedRoute
 from app.models.core import Worlds, Themes
 from app.schemas.world import WorldResponse, WorldStateResponse
 from app.game_state.manager import GameStateManager
+from app.game_state.reference_data import get_reference_data
 # Temporarily comment this out to get the server running
 from app.workers.time_worker import advance_game_day
+from app.workers.tick_scheduler import get_tick_metrics
 
-router = APIRouter(prefix="/worlds", tags=["worlds"])
+router = APIRouter(prefix="/worlds", tags=["worlds"], route_class=OffloadedRoute)
 
 @router.get("/", response_model=List[WorldResponse])
 async def get_worlds(db: Session = Depends(get_db)):
@@ -40,6 +43,11 @@ async def get_worlds(db: Session = Depends(get_db)):
     
     return result
 
+@router.get("/ticks/metrics")
+async def get_world_tick_metrics():
+    """Get the run, skip, duration, interval and lag metrics of the beat ticks."""
+    return get_tick_metrics()
+
 @router.get("/{world_id}", response_model=WorldResponse)
 async def get_world(world_id: UUID, db: Session = Depends(get_db)):
     # Query with join to Themes table
@@ -118,8 +126,6 @@ async def trigger_day_advance(world_id: UUID, background_tasks: BackgroundTasks)
 @router.get("/{world_id}/seasons")
 async def get_seasons(world_id: UUID, db: Session = Depends(get_db)):
     """Get information about all seasons and highlight the current one"""
-    from app.models.seasons import Seasons
-    
     # Check if world exists
     world = db.query(Worlds).filter(Worlds.world_id == str(world_id)).first()
     if not world:
@@ -129,7 +135,7 @@ async def get_seasons(world_id: UUID, db: Session = Depends(get_db)):
     current_season = getattr(world, "current_season", "spring")
     
     # Get all seasons
-    seasons = db.query(Seasons).all()
+    seasons = list(get_reference_data().seasons.values())
     if not seasons:
         # If seasons table doesn't exist yet or is empty, return default seasons
         default_seasons = [
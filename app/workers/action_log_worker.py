@@ -0,0 +1,31 @@
+# app/workers/action_log_worker.py
+import logging
+from typing import Dict, Any
+
+from app.workers.celery_app import app
+from database.connection import SessionLocal
+from app.game_state.action_log_partitions import maintain_action_log
+
+logger = logging.getLogger(__name__)
+
+@app.task
+def maintain_action_log_partitions() -> Dict[str, Any]:
+    """
+    Create the upcoming monthly partitions of the entity action log and roll
+    up and drop the partitions past their retention. Run once per day.
+    
+    Returns:
+        Dict with the created and dropped partitions
+    """
+    db = SessionLocal()
+    try:
+        result = maintain_action_log(db)
+        logger.info(f"Maintained action log: created {len(result['created'])} partitions, "
+                    f"dropped {len(result['dropped'])}, deleted {result['default_rows_deleted']} default rows")
+        result["status"] = "error" if result["errors"] else "success"
+        return result
+    except Exception as e:
+        logger.exception(f"Error maintaining the action log: {str(e)}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
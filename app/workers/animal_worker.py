@@ -1,5 +1,6 @@
 # workers/animal_worker.py
 from app.workers.celery_app import app
+from app.workers.tick_scheduler import guarded_tick
 from app.game_state.services.animal_service import AnimalService
 from sqlalchemy.orm import Session
 from database.connection import SessionLocal, get_db
@@ -40,6 +41,7 @@ def update_animal_state(animal_id: str):
         return {"status": "error", "message": str(e)}
 
 @app.task
+@guarded_tick("process_all_animals")
 def process_all_animals(world_id: str = None):
     """
     Process all animals in the world, handling movement, hunger, health, etc.
@@ -1,15 +1,16 @@
 # app/workers/area_worker.py
 import logging
 import random
-import json
 from typing import Dict, Any, Optional, Tuple, List
-from collections import deque
 from sqlalchemy.orm import Session
 
 from app.workers.celery_app import app
+from app.workers.tick_scheduler import guarded_tick
 from database.connection import SessionLocal
-from app.game_state.services.area_service import AreaService
-from app.models.core import Areas, Settlements
+from app.game_state.services.area_service import AreaService, get_settlement_area_ids
+from app.game_state.route_table import find_settlement_path, get_route_table
+from app.game_state.travel_graph import get_travel_graph
+from app.models.core import Areas
 
 logger = logging.getLogger(__name__)
 
@@ -30,53 +31,7 @@ def find_path_between_settlements(start_id: str, end_id: str, db: Session) -> Li
     logger.info(f"Finding path between settlements {start_id} and {end_id}")
     
     try:
-        # Get areas connected to start settlement
-        start_areas = get_settlement_connected_areas(start_id, db)
-        if not start_areas:
-            logger.warning(f"No connected areas found for settlement {start_id}")
-            return []
-        
-        # Get areas connected to destination settlement
-        end_areas = get_settlement_connected_areas(end_id, db)
-        if not end_areas:
-            logger.warning(f"No connected areas found for settlement {end_id}")
-            return []
-        
-        # Check if settlements share a common area (direct connection)
-        common_areas = set(start_areas).intersection(set(end_areas))
-        if common_areas:
-            common_area = list(common_areas)[0]
-            logger.info(f"Settlements share common area {common_area}")
-            return [common_area]
-        
-        # Simple breadth-first search
-        queue = deque([(area_id, [area_id]) for area_id in start_areas])
-        visited = set(start_areas)
-        
-        while queue:
-            current_area, path = queue.popleft()
-            
-            # Get connected areas
-            neighbors = get_area_connected_areas(current_area, db)
-            
-            for neighbor in neighbors:
-                if neighbor in end_areas:
-                    # Found a path to destination
-                    final_path = path + [neighbor]
-                    logger.info(f"Found path through {len(final_path)} areas")
-                    return final_path
-                
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor]))
-        
-        # If we get here, no path was found - return a simple direct path as fallback
-        if start_areas and end_areas:
-            logger.info(f"No path found, returning simple path with first areas from each end")
-            return [start_areas[0], end_areas[0]]
-        
-        return []
-        
+        return find_settlement_path(db, start_id, end_id)
     except Exception as e:
         logger.exception(f"Error finding path between settlements: {e}")
         return []
@@ -93,25 +48,7 @@ def get_settlement_connected_areas(settlement_id: str, db: Session) -> List[str]
         List[str]: List of connected area IDs
     """
     try:
-        # Query the areas table for connections to this settlement
-        areas = db.query(Areas).all()
-        
-        connected_areas = []
-        for area in areas:
-            # Check if this area has connected_settlements attribute
-            if not hasattr(area, 'connected_settlements'):
-                continue
-            
-            # Parse the connected_settlements JSON if it exists
-            if area.connected_settlements:
-                try:
-                    settlement_ids = json.loads(area.connected_settlements)
-                    if settlement_id in settlement_ids:
-                        connected_areas.append(area.area_id)
-                except (json.JSONDecodeError, TypeError):
-                    continue
-        
-        return connected_areas
+        return get_settlement_area_ids(db, settlement_id)
         
     except Exception as e:
         logger.exception(f"Error getting connected areas for settlement {settlement_id}: {e}")
@@ -129,18 +66,9 @@ def get_area_connected_areas(area_id: str, db: Session) -> List[str]:
         List[str]: List of connected area IDs
     """
     try:
-        area = db.query(Areas).filter(Areas.area_id == area_id).first()
-        if not area or not hasattr(area, 'connected_areas'):
-            return []
-        
-        # Parse connected_areas JSON if it exists
-        if area.connected_areas:
-            try:
-                return json.loads(area.connected_areas)
-            except (json.JSONDecodeError, TypeError):
-                logger.warning(f"Invalid connected_areas JSON for area {area_id}")
-        
-        return []
+        world_id = db.query(Areas.world_id).filter(Areas.area_id == area_id).scalar()
+        graph = get_travel_graph(db, str(world_id) if world_id is not None else None)
+        return graph.connected_areas(area_id)
         
     except Exception as e:
         logger.exception(f"Error getting connected areas for area {area_id}: {e}")
@@ -264,6 +192,7 @@ def connect_area_to_settlement(area_id: str, settlement_id: str) -> Dict[str, An
         db.close()
 
 @app.task
+@guarded_tick("process_all_areas")
 def process_all_areas(world_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Process all areas, updating state and generating ambient events.
@@ -365,4 +294,32 @@ def create_area(name: str, area_type: str, world_id: str,
         logger.exception(f"Error creating area: {e}")
         return {"status": "error", "message": f"Error creating area: {str(e)}"}
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@app.task
+def materialize_travel_routes(world_id: str) -> Dict[str, Any]:
+    """
+    Write the changed routes of a world's route table to the travel routes table.
+    
+    Args:
+        world_id (str): ID of the world
+        
+    Returns:
+        Dict[str, Any]: Number of routes written
+    """
+    logger.info(f"Materializing travel routes of world {world_id}")
+    
+    db = SessionLocal()
+    try:
+        table = get_route_table(db, world_id)
+        written = table.persist(db, world_id)
+        db.commit()
+        
+        return {"status": "success", "routes": written, "settlements": len(table)}
+        
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"Error materializing travel routes: {e}")
+        return {"status": "error", "message": f"Error materializing travel routes: {str(e)}"}
+    finally:
+        db.close()
@@ -10,9 +10,9 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+from app.game_state.reference_data import get_reference_data
 from app.models.core import (
     Areas, 
-    AreaEncounterTypes,
     AreaEncounterOutcomes,
     AreaEncounters,
     AreaSecrets,
@@ -154,9 +154,11 @@ def generate_encounter(character_id=None, trader_id=None, area_id=None):
             return {"status": "success", "result": "no_encounter"}
         
         # Get possible encounter types for this area
-        encounter_types = db.query(AreaEncounterTypes).filter(
-            AreaEncounterTypes.min_danger_level <= area.danger_level
-        ).all()
+        reference_data = get_reference_data()
+        encounter_types = [
+            encounter_type for encounter_type in reference_data.all_encounter_types()
+            if encounter_type.min_danger_level is not None and encounter_type.min_danger_level <= area.danger_level
+        ]
         
         valid_encounters = []
         for encounter_type in encounter_types:
@@ -170,9 +172,10 @@ def generate_encounter(character_id=None, trader_id=None, area_id=None):
         
         if not valid_encounters:
             # Add the uneventful travel encounter as fallback
-            uneventful = db.query(AreaEncounterTypes).filter(
-                AreaEncounterTypes.encounter_code == "uneventful_travel"
-            ).first()
+            uneventful = next((
+                encounter_type for encounter_type in reference_data.all_encounter_types()
+                if encounter_type.encounter_code == "uneventful_travel"
+            ), None)
             
             if uneventful:
                 valid_encounters.append(uneventful)
@@ -364,9 +367,7 @@ def resolve_encounter(encounter_id: str, character_id=None, trader_id=None, chos
             return {"status": "error", "message": f"Encounter {encounter_id} is already completed"}
         
         # Get the encounter type
-        encounter_type = db.query(AreaEncounterTypes).filter(
-            AreaEncounterTypes.encounter_type_id == encounter.encounter_type_id
-        ).first()
+        encounter_type = get_reference_data().encounter_type(encounter.encounter_type_id)
         
         if not encounter_type:
             return {"status": "error", "message": f"Encounter type not found for encounter {encounter_id}"}
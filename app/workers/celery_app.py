@@ -1,5 +1,12 @@
 # app/workers/celery_app.py
 from celery import Celery
+from celery.signals import task_postrun, worker_process_init, worker_process_shutdown, worker_shutdown
+
+from app.workers.tick_scheduler import get_tick_settings
+
+# Queue of the root-parallel MCTS decision tasks. Its workers must run tasks in a
+# non-daemonic process (solo or threads pool) to start a process pool, see docs/MCTS_WORKERS.md
+MCTS_QUEUE = 'mcts'
 
 # Create the Celery application
 app = Celery('rpg_game',
@@ -15,7 +22,9 @@ app = Celery('rpg_game',
                  'app.workers.area_worker',
                  'app.workers.world_worker',
                  'app.workers.shared_worker_utils',
-                 'app.workers.task_worker'
+                 'app.workers.task_worker',
+                 'app.workers.dispatch',
+                 'app.workers.action_log_worker'
              ])
 
 # Optional configurations
@@ -26,27 +35,27 @@ app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
-    # Define your beat schedule if needed
+    task_routes={
+        'app.workers.settlement_worker.decide_settlement_action': {'queue': MCTS_QUEUE},
+    },
+    # Define your beat schedule if needed. The process/advance ticks fire at their
+    # base interval; tick_scheduler skips beats until their adapted interval has passed.
     beat_schedule={
         'process-all-settlements': {
             'task': 'app.workers.settlement_worker.process_all_settlements',
-            'schedule': 10.0,  # Every 3 minutes
+            'schedule': get_tick_settings('process_all_settlements')['interval'],
         },
         'process-all-traders': {
             'task': 'app.workers.trader_worker.process_all_traders',
-            'schedule': 120.0,  # Every 2 minutes
-        },
-        'process-all-traders-mcts': {
-            'task': 'app.workers.trader_worker.process_all_traders',
-            'schedule': 300.0,  # Every 30 seconds
+            'schedule': get_tick_settings('process_all_traders')['interval'],
         },
         'advance-game-day': {
             'task': 'app.workers.world_worker.advance_game_day',
-            'schedule': 1200.0,  # Every 2 minutes (simulates daily time progression)
+            'schedule': get_tick_settings('advance_game_day')['interval'],  # Simulates daily time progression
         },
         'process-all-animals': {
             'task': 'app.workers.animal_worker.process_all_animals',
-            'schedule': 600.0,  # Every minute
+            'schedule': get_tick_settings('process_all_animals')['interval'],
         },
         'animal-migrations': {
             'task': 'app.workers.animal_worker.migrate_animals',
@@ -54,7 +63,7 @@ app.conf.update(
         },
         'process-all-areas': {
             'task': 'app.workers.area_worker.process_all_areas',
-            'schedule': 900.0,  # Every 90 seconds
+            'schedule': get_tick_settings('process_all_areas')['interval'],
         },
         'process-expired-tasks': {
             'task': 'app.workers.task_worker.process_expired_tasks',
@@ -73,12 +82,35 @@ app.conf.update(
             'schedule': 300.0,  # Every 30 seconds
             'kwargs': {'task_count': 2}  # Create 2 random tasks each time
         },
+        'maintain-action-log-partitions': {
+            'task': 'app.workers.action_log_worker.maintain_action_log_partitions',
+            'schedule': 86400.0,  # Once per day
+        },
         'process-all-items': {
             'task': 'app.workers.item_worker_new.process_all_items',
-            'schedule': 600.0,  # Every minute
+            'schedule': get_tick_settings('process_all_items')['interval'],
         }
     }
 )
 
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_action_logs_on_shutdown(**kwargs):
+    """Write the buffered action log rows before a worker (process) exits."""
+    from app.game_state.services.action_log_sink import flush_action_logs
+    flush_action_logs()
+
+@worker_process_init.connect
+def reset_connection_pools(**kwargs):
+    """Give each forked worker process connection pools of its own."""
+    from database.connection import dispose_engines_after_fork
+    dispose_engines_after_fork()
+
+@task_postrun.connect
+def publish_pool_metrics_after_task(**kwargs):
+    """Publish the pool metrics of the worker process now and then."""
+    from app.workers.pool_metrics import publish_pool_metrics
+    publish_pool_metrics()
+
 if __name__ == '__main__':
     app.start()
\ No newline at end of file
@@ -0,0 +1,305 @@
+# app/workers/dispatch.py
+"""Chunked fan-out of per-world entity processing.
+
+The ``process_all_*`` beat tasks used to run every entity of every world
+serially in one task, so one slow world held up the whole beat. With this
+module a beat task only lists the IDs of its entities per world; the IDs are
+split into batches (``ENTITY_BATCH_SETTINGS``) and each batch runs as its own
+subtask in a Celery ``chord``. The chord callback ``aggregate_batch_results``
+merges the summary dicts the batches return into one summary.
+
+When the beat task is a guarded tick (see ``app.workers.tick_scheduler``),
+the callback also finishes the tick, so its lock covers all batches.
+
+Every batch runs under a soft time limit. A batch that times out or raises
+reports an error summary instead of failing the chord, so the other batches
+still count and the failures are listed in ``failed_batches``. A batch killed
+by its hard time limit does fail the chord; the errback
+``aggregate_failed_batches`` then merges the batches that finished, lists the
+others as failed and finishes the tick in place of the callback.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from celery import chord, group
+from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+
+from app.workers.celery_app import app
+from app.workers.tick_scheduler import current_tick, finish_tick
+
+logger = logging.getLogger(__name__)
+
+# Options used for entity types without their own settings
+DEFAULT_BATCH_SETTINGS: Dict[str, Any] = {
+    "batch_size": 200,
+    "batch_timeout": 120  # Soft time limit per batch, in seconds
+}
+
+# Batch options per entity type, merged over DEFAULT_BATCH_SETTINGS
+ENTITY_BATCH_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "trader": {"batch_size": 1000, "batch_timeout": 90},
+    "settlement": {"batch_size": 50, "batch_timeout": 60}
+}
+
+# Seconds between the soft and the hard time limit of a batch
+HARD_TIME_LIMIT_GRACE = 30
+
+# Seconds the lock of a dispatching tick is held beyond the hard time limit
+# of its batches, for queueing and the chord callback
+CHORD_LOCK_MARGIN = 60
+
+# Summary keys that are not summed across batches
+NON_COUNT_KEYS = {"status", "message", "world_id", "batch_size"}
+
+
+def get_batch_settings(entity_type: str) -> Dict[str, Any]:
+    """
+    Get the batch options of an entity type.
+
+    Args:
+        entity_type: Entity type (e.g. "trader", "settlement")
+
+    Returns:
+        Dictionary with batch_size and batch_timeout
+    """
+    settings = dict(DEFAULT_BATCH_SETTINGS)
+    settings.update(ENTITY_BATCH_SETTINGS.get(entity_type, {}))
+    return settings
+
+
+def chunk(ids: Sequence[str], batch_size: int) -> List[List[str]]:
+    """
+    Split IDs into batches of at most batch_size.
+
+    Args:
+        ids: Entity IDs
+        batch_size: Maximum number of IDs per batch
+
+    Returns:
+        List of ID batches
+    """
+    batch_size = max(1, int(batch_size))
+    return [list(ids[i:i + batch_size]) for i in range(0, len(ids), batch_size)]
+
+
+def group_ids_by_world(rows: Iterable[Tuple[Any, Any]]) -> Dict[str, List[str]]:
+    """
+    Group (entity_id, world_id) rows by world.
+
+    Args:
+        rows: Entity ID and world ID pairs
+
+    Returns:
+        Entity IDs per world ID
+    """
+    ids_by_world: Dict[str, List[str]] = {}
+    for entity_id, world_id in rows:
+        ids_by_world.setdefault(str(world_id), []).append(str(entity_id))
+    return ids_by_world
+
+
+def run_batch(world_id: str, entity_ids: List[str], process: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Run one batch and turn timeouts and errors into an error summary.
+
+    Args:
+        world_id: World of the batch
+        entity_ids: Entity IDs of the batch
+        process: Function processing the batch and returning its summary
+
+    Returns:
+        Dict: The batch summary, tagged with its world and size
+    """
+    try:
+        result = process()
+    except SoftTimeLimitExceeded:
+        logger.error(f"Batch of {len(entity_ids)} entities in world {world_id} timed out")
+        result = {"status": "error", "message": "Batch timed out", "timed_out": True}
+    except Exception as e:
+        logger.exception(f"Error processing batch of {len(entity_ids)} entities in world {world_id}: {e}")
+        result = {"status": "error", "message": str(e)}
+
+    result = dict(result or {"status": "error", "message": "Batch returned no result"})
+    result["world_id"] = world_id
+    result["batch_size"] = len(entity_ids)
+    return result
+
+
+def merge_batch_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the summaries of all batches of a fan-out.
+
+    Numeric counts are summed and "results" lists are concatenated. Batches
+    that did not succeed are listed in failed_batches; the status is
+    "partial" when only some of them failed.
+
+    Args:
+        results: Summary of each batch
+
+    Returns:
+        Dict: Merged summary
+    """
+    summary: Dict[str, Any] = {"batches": len(results), "failed_batches": []}
+    for index, result in enumerate(results):
+        result = result if isinstance(result, dict) else {"status": "error", "message": str(result)}
+        if result.get("status") != "success":
+            summary["failed_batches"].append({
+                "batch": index,
+                "world_id": result.get("world_id"),
+                "batch_size": result.get("batch_size", 0),
+                "timed_out": bool(result.get("timed_out")),
+                "message": result.get("message", "Unknown error")
+            })
+            continue
+
+        for key, value in result.items():
+            if key in NON_COUNT_KEYS:
+                continue
+            if key == "results" and isinstance(value, list):
+                summary.setdefault("results", []).extend(value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                summary[key] = summary.get(key, 0) + value
+
+    failed = len(summary["failed_batches"])
+    if not failed:
+        summary["status"] = "success"
+    elif failed < len(results):
+        summary["status"] = "partial"
+    else:
+        summary["status"] = "error"
+    summary["message"] = f"{len(results) - failed} of {len(results)} batches succeeded"
+    return summary
+
+
+@app.task
+def aggregate_batch_results(results: List[Dict[str, Any]], entity_type: str = "entity",
+                            tick: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Chord callback merging the batch summaries of a fan-out.
+
+    Args:
+        results: Summary of each batch
+        entity_type: Entity type of the fan-out, for logging
+        tick: Run of the guarded tick that dispatched the batches, finished here
+
+    Returns:
+        Dict: Merged summary (see merge_batch_results)
+    """
+    summary = merge_batch_results(results)
+    log_level = logging.INFO if summary["status"] == "success" else logging.WARNING
+    logger.log(log_level, f"Processed {entity_type} batches: {summary['message']}"
+               + (f", failed: {summary['failed_batches']}" if summary["failed_batches"] else ""))
+    if tick is not None:
+        finish_tick(tick)
+    return summary
+
+
+def batch_result(result: Any, world_id: str, batch_size: int) -> Dict[str, Any]:
+    """
+    Get the summary of a batch from its task result.
+
+    Args:
+        result: AsyncResult of the batch task
+        world_id: World of the batch
+        batch_size: Number of entities of the batch
+
+    Returns:
+        Dict: The batch summary, or an error summary if the batch failed or
+        has not finished
+    """
+    if result.successful() and isinstance(result.result, dict):
+        return result.result
+    if not result.ready():
+        summary = {"status": "error", "message": "Batch did not finish"}
+    elif isinstance(result.result, TimeLimitExceeded):
+        summary = {"status": "error", "message": "Batch was killed at its hard time limit", "timed_out": True}
+    else:
+        summary = {"status": "error", "message": str(result.result)}
+    summary.update(world_id=world_id, batch_size=batch_size)
+    return summary
+
+
+@app.task
+def aggregate_failed_batches(request: Any, exc: Exception, traceback: Any,
+                             batches: Sequence[Sequence[Any]] = (), entity_type: str = "entity",
+                             tick: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Chord errback merging the batches that finished when a batch failed the chord.
+
+    Args:
+        request: Request of the failed task
+        exc: Exception that failed the chord
+        traceback: Traceback of the exception
+        batches: Task ID, world ID and size of each batch
+        entity_type: Entity type of the fan-out, for logging
+        tick: Run of the guarded tick that dispatched the batches, finished here
+
+    Returns:
+        Dict: Merged summary (see merge_batch_results)
+    """
+    try:
+        results = [batch_result(app.AsyncResult(task_id), world_id, size) for task_id, world_id, size in batches]
+        summary = merge_batch_results(results)
+        logger.error(f"{entity_type.capitalize()} batches failed the chord ({exc!r}): {summary['message']}, "
+                     f"failed: {summary['failed_batches']}")
+        return summary
+    finally:
+        if tick is not None:
+            finish_tick(tick)
+
+
+def dispatch_batches(batch_task: Any,
+                     ids_by_world: Dict[str, List[str]],
+                     entity_type: str,
+                     batch_size: Optional[int] = None,
+                     batch_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Fan the entities of each world out as batch subtasks of one chord.
+
+    Batch tasks are called as ``batch_task(world_id, entity_ids)`` and should
+    wrap their work in ``run_batch``.
+
+    Args:
+        batch_task: Celery task processing one batch
+        ids_by_world: Entity IDs per world ID
+        entity_type: Entity type, for the batch settings
+        batch_size: Entities per batch, overriding the settings
+        batch_timeout: Soft time limit per batch in seconds, overriding the settings
+
+    Returns:
+        Dict: Dispatch summary with the chord ID to fetch the merged summary
+        from, and the lock_timeout a guarded tick keeps its lock for
+    """
+    settings = get_batch_settings(entity_type)
+    batch_size = batch_size or settings["batch_size"]
+    batch_timeout = batch_timeout or settings["batch_timeout"]
+
+    signatures, batches = [], []
+    for world_id, entity_ids in ids_by_world.items():
+        for batch in chunk(entity_ids, batch_size):
+            signature = batch_task.si(world_id, batch).set(
+                soft_time_limit=batch_timeout, time_limit=batch_timeout + HARD_TIME_LIMIT_GRACE
+            )
+            # Fix the task ID up front, so the errback can look the batch up
+            batches.append([signature.freeze().id, world_id, len(batch)])
+            signatures.append(signature)
+    total = sum(len(entity_ids) for entity_ids in ids_by_world.values())
+    if not signatures:
+        return {"status": "success", "total": 0, "batches": 0, "message": f"No {entity_type} entities to process"}
+
+    tick = current_tick()
+    callback = aggregate_batch_results.s(entity_type=entity_type, tick=tick).on_error(
+        aggregate_failed_batches.s(batches=batches, entity_type=entity_type, tick=tick)
+    )
+    result = chord(group(signatures))(callback)
+    logger.info(f"Dispatched {total} {entity_type} entities of {len(ids_by_world)} worlds in {len(signatures)} batches")
+    return {
+        "status": "dispatched",
+        "total": total,
+        "worlds": len(ids_by_world),
+        "batches": len(signatures),
+        "chord_id": result.id,
+        "lock_timeout": batch_timeout + HARD_TIME_LIMIT_GRACE + CHORD_LOCK_MARGIN,
+        "message": f"Dispatched {total} {entity_type} entities in {len(signatures)} batches"
+    }
@@ -1,4 +1,5 @@
 from celery import shared_task
+from app.workers.tick_scheduler import guarded_tick
 from app.game_state.services.item_service import ItemService
 from sqlalchemy.orm import Session
 from database.connection import SessionLocal
@@ -41,6 +42,7 @@ def update_item_state(animal_id: str):
         return {"status": "error", "message": str(e)}
 
 @shared_task(name="app.workers.item_worker_new.process_all_items")
+@guarded_tick("process_all_items")
 def process_all_items(world_id: str = None):
     """
     Process all animals in the world, handling movement, hunger, health, etc.
@@ -0,0 +1,88 @@
+# app/workers/pool_metrics.py
+"""Connection pool metrics of the Celery worker processes.
+
+Each worker process has its own connection pools (see
+``database.connection``), so their state cannot be read from the API. After
+its tasks a worker process stores its ``get_pool_metrics`` in Redis, at most
+once every ``PUBLISH_INTERVAL`` seconds, under a key of its host and process
+ID that expires after ``METRICS_TTL`` seconds; ``get_worker_pool_metrics``
+returns the metrics of the processes that published recently.
+"""
+
+from typing import Any, Dict
+import json
+import logging
+import os
+import socket
+import time
+
+from database.connection import get_pool_metrics
+from app.workers.tick_scheduler import get_tick_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Seconds between publications of a process
+PUBLISH_INTERVAL = 30.0
+
+# Seconds the metrics of a process are kept after its last publication
+METRICS_TTL = 300
+
+# Prefix of the Redis keys of the metrics
+METRICS_KEY_PREFIX = "pool_metrics:"
+
+# Time of the last publication of this process
+_last_published = 0.0
+
+
+def metrics_key() -> str:
+    """Get the Redis key of the metrics of this process."""
+    return f"{METRICS_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+
+
+def publish_pool_metrics(force: bool = False) -> bool:
+    """
+    Store the pool metrics of this process in Redis.
+
+    Args:
+        force: Publish even if the last publication is recent
+
+    Returns:
+        True if the metrics were published
+    """
+    global _last_published
+    now = time.time()
+    if not force and now - _last_published < PUBLISH_INTERVAL:
+        return False
+
+    scheduler = get_tick_scheduler()
+    if scheduler is None:
+        return False
+    _last_published = now
+    try:
+        metrics = get_pool_metrics()
+        metrics["published_at"] = now
+        scheduler.redis.set(metrics_key(), json.dumps(metrics), ex=METRICS_TTL)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not publish pool metrics: {str(e)}")
+        return False
+
+
+def get_worker_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the last published pool metrics of the worker processes.
+
+    Returns:
+        Metrics per "<host>:<pid>", empty if Redis is not available
+    """
+    scheduler = get_tick_scheduler()
+    if scheduler is None:
+        return {}
+
+    metrics = {}
+    for key in scheduler.redis.scan_iter(match=f"{METRICS_KEY_PREFIX}*"):
+        key = key.decode() if isinstance(key, bytes) else key
+        value = scheduler.redis.get(key)
+        if value:
+            metrics[key[len(METRICS_KEY_PREFIX):]] = json.loads(value)
+    return metrics
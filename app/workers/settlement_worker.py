@@ -2,12 +2,19 @@
 import json
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import logging
 
 from app.workers.celery_app import app
 from app.workers.shared_worker_utils import get_seasonal_modifiers
+from app.game_state.reference_data import get_reference_data
+from app.game_state.settlement_production import (
+    DEVELOPMENT_BONUS, MINING_DEPLETION_RATE, RESOURCE_CODE_IDS, SITE_STAGE_PRODUCTION
+)
+from app.workers.dispatch import dispatch_batches, group_ids_by_world, run_batch
+from app.workers.tick_scheduler import guarded_tick
 from database.connection import SessionLocal, get_db
+from database.unit_of_work import unit_of_work
 
 from app.models.core import (
     Settlements,
@@ -42,7 +49,8 @@ def process_settlement_production(settlement_id):
         # Try the new class-based implementation first
         try:
             service = SettlementService(db)
-            result = service.process_settlement_growth(settlement_id)
+            with unit_of_work(db):
+                result = service.process_settlement_growth(settlement_id)
             if result["status"] == "success":
                 logger.info(f"Processed production for settlement {settlement_id} using new implementation")
                 return {"status": "success", "settlement_id": settlement_id}
@@ -100,72 +108,31 @@ def process_resource_sites(db, settlement_id):
     
     # Process each resource site
     timestamp = datetime.now()
+    reference_data = get_reference_data()
     for site in sites:
         # Get the site type information
-        site_type = db.query(ResourceSiteTypes).filter(
-            ResourceSiteTypes.site_type_id == site.site_type_id
-        ).first()
+        site_type = reference_data.site_type(site.site_type_id)
         
         if not site_type:
             logger.warning(f"Site type not found for site {site.site_id}")
             continue
         
-        # Hardcoded production rates for different site stages
-        site_stage_production = {
-            # Gold Vein stages
-            "gold_mine": {"gold": 3, "stone": 2},
-            
-            # Iron Vein stages
-            "small_mine": {"iron": 5, "stone": 2},
-            "established_mine": {"iron": 12, "stone": 3},
-            
-            # Stone Quarry stages
-            "small_quarry": {"stone": 10},
-            "quarry": {"stone": 25},
-            
-            # Forest Grove stages
-            "small_lumber_camp": {"wood": 10, "herbs": 2},
-            "lumber_camp": {"wood": 20, "herbs": 3},
-            
-            # Herb Grove stages
-            "herb_garden": {"herbs": 12, "food": 4},
-            
-            # Fertile Soil stages
-            "small_farm": {"food": 12},
-            "established_farm": {"food": 20},
-            
-            # Default for discovered sites
-            "discovered": {"food": 3, "wood": 3, "herbs": 2}
-        }
-        
         # Get production rates for this stage
-        production_rates = site_stage_production.get(site.current_stage)
+        production_rates = SITE_STAGE_PRODUCTION.get(site.current_stage)
         if not production_rates:
             # Default to minimal production for discovered sites
             if site.current_stage == "discovered":
-                production_rates = site_stage_production["discovered"]
+                production_rates = SITE_STAGE_PRODUCTION["discovered"]
             else:
                 logger.warning(f"No production data for stage {site.current_stage} of site {site.site_id}")
                 continue
             
-        # Map to use actual resource IDs in your database
-        resource_id_map = {
-            "iron": "6e7e41a9-c3f6-4723-b510-50bd9f537b8a",  # Iron Ore
-            "gold": "aa09429d-4df0-4834-a503-b2653e5a52bd",  # Gold
-            "stone": "ba009e21-4bbd-4998-ad15-e7cb32a19636",  # Stone
-            "wood": "c4aa2349-409f-4107-ac8a-71331e5f9e92",   # Logs
-            "herbs": "51c21030-d6f4-42c4-b63f-343d11a818f5",  # Herbs
-            "fish": "ad4b90c1-2e0d-4c1e-9beb-84cfc18f8f5b",   # Fish
-            "food": "7bf0d22e-cdef-4ecc-aff6-33ae9c47f21e",   # Meat
-            "water": "fc5a66f8-4faa-43ad-a20f-9e386afab6b1",  # Water
-        }
-        
         # Apply the site's production multiplier and development level
         multiplier = site.production_multiplier if site.production_multiplier else 1.0
         development = site.development_level if site.development_level is not None else 0.0
         
         # Increase production based on development level (0.0 to 1.0)
-        dev_bonus = 1.0 + (development * 0.5)  # Up to 50% bonus at full development
+        dev_bonus = 1.0 + (development * DEVELOPMENT_BONUS)  # Up to 50% bonus at full development
         
         # Update resources in the settlement's inventory
         for resource_code, amount in production_rates.items():
@@ -180,10 +147,10 @@ def process_resource_sites(db, settlement_id):
             logger.debug(f"Resource calculation for {resource_code}: {amount} * {multiplier} (site) * {dev_bonus} (dev) * {season_modifier} (season) = {produced_amount}")
             
             # Get the resource type ID using our mapping
-            resource_type_id = resource_id_map.get(resource_code)
+            resource_type_id = RESOURCE_CODE_IDS.get(resource_code)
             
             if not resource_type_id:
-                logger.warning(f"Resource type '{resource_code}' not found in resource_id_map")
+                logger.warning(f"Resource type '{resource_code}' not found in RESOURCE_CODE_IDS")
                 continue
             
             # Check if the settlement already has this resource
@@ -212,7 +179,7 @@ def process_resource_sites(db, settlement_id):
         # Update the resource site - increase depletion slightly for non-renewable resources
         if site_type.site_category == "mining":
             # Mining sites deplete over time
-            depletion_rate = 0.01  # 1% depletion per cycle
+            depletion_rate = MINING_DEPLETION_RATE  # 1% depletion per cycle
             if site.depletion_level is not None:
                 site.depletion_level += depletion_rate
                 
@@ -253,8 +220,9 @@ def process_settlement_growth(settlement_id: str):
         # Create service with the database session
         service = SettlementService(db)
         
-        # Delegate to service implementation
-        result = service.process_settlement_growth(settlement_id)
+        # Delegate to service implementation, in one unit of work
+        with unit_of_work(db):
+            result = service.process_settlement_growth(settlement_id)
         
         # Log the result
         if result["status"] == "success":
@@ -270,6 +238,26 @@ def process_settlement_growth(settlement_id: str):
     finally:
         db.close()
 
+@app.task
+def decide_settlement_action(settlement_id: str):
+    """
+    Decide the next action of a settlement with MCTS.
+    
+    Routed to the MCTS queue, whose solo or threads pool workers search
+    root-parallel trees on all cores (see docs/MCTS_WORKERS.md).
+    
+    Args:
+        settlement_id (str): The ID of the settlement
+        
+    Returns:
+        dict: Decision with the chosen action and the search stats
+    """
+    db = SessionLocal()
+    try:
+        return SettlementService(db).get_settlement_decision(settlement_id)
+    finally:
+        db.close()
+
 @app.task
 def create_new_settlement(name: str, location_id: str, world_id: str):
     """
@@ -380,47 +368,78 @@ def start_building_repair(settlement_id: str, building_id: str):
         db.close()
 
 @app.task
-def process_all_settlements(world_id: Optional[str] = None):
+@guarded_tick("process_all_settlements")
+def process_all_settlements(world_id: Optional[str] = None, batch_size: Optional[int] = None):
     """
     Process all settlements in a world (or all worlds if none specified).
     
-    This task delegates to the SettlementService, which contains the actual implementation
-    using the new class-based game state architecture.
+    The settlements of each world are split into batches that run as parallel
+    process_settlement_batch subtasks (see app.workers.dispatch); their
+    summaries are merged by the chord callback.
     
     Args:
         world_id (str, optional): The world ID to process settlements for, or None for all worlds
+        batch_size (int, optional): Settlements per batch, overriding the dispatch settings
         
     Returns:
-        dict: Result of processing all settlements
+        dict: Dispatch summary with the chord ID of the merged result
     """
     logger.info(f"Processing all settlements" + (f" in world {world_id}" if world_id else ""))
     
     # Create database session
     db = SessionLocal()
     try:
-        # Create service with the database session
-        service = SettlementService(db)
+        query = db.query(Settlements.settlement_id, Settlements.world_id).filter(Settlements.world_id.isnot(None))
+        if world_id:
+            query = query.filter(Settlements.world_id == world_id)
         
-        # Since we need to call an async method from a sync context, we'll use a helper
-        import asyncio
+        return dispatch_batches(process_settlement_batch, group_ids_by_world(query.all()), "settlement",
+                                batch_size=batch_size)
+    except Exception as e:
+        logger.exception(f"Error in process_all_settlements task: {e}")
+        return {"status": "error", "message": f"Task error: {str(e)}"}
+    finally:
+        db.close()
+
+@app.task
+def process_settlement_batch(world_id: str, settlement_ids: List[str]):
+    """
+    Process one batch of settlements of a world.
+    
+    This task delegates to SettlementService.process_settlement_batch, which
+    computes the growth of the whole batch in one production run.
+    
+    Args:
+        world_id (str): The world ID of the settlements
+        settlement_ids (List[str]): IDs of the settlements to process
+        
+    Returns:
+        dict: Result of processing the batch
+    """
+    # Create database session
+    db = SessionLocal()
+    try:
+        service = SettlementService(db)
         
-        # Create a new event loop for this task
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        def process():
+            # Since we need to call an async method from a sync context, run it on a new event loop
+            import asyncio
+            loop = asyncio.new_event_loop()
+            try:
+                # One unit of work for the batch, shared by the service and its managers
+                with unit_of_work(db):
+                    return loop.run_until_complete(service.process_settlement_batch(settlement_ids, world_id))
+            finally:
+                loop.close()
         
-        # Run the async method and get its result
-        result = loop.run_until_complete(service.process_all_settlements(world_id))
-        loop.close()
+        result = run_batch(world_id, settlement_ids, process)
         
         # Log the result
         if result["status"] == "success":
-            logger.info(f"Successfully processed {result.get('processed', 0)}/{result.get('total', 0)} settlements")
+            logger.info(f"Successfully processed {result.get('processed', 0)}/{result.get('total', 0)} settlements of world {world_id}")
         else:
-            logger.warning(f"Failed to process settlements: {result.get('message', 'Unknown error')}")
+            logger.warning(f"Failed to process settlements of world {world_id}: {result.get('message', 'Unknown error')}")
         
         return result
-    except Exception as e:
-        logger.exception(f"Error in process_all_settlements task: {e}")
-        return {"status": "error", "message": f"Task error: {str(e)}"}
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
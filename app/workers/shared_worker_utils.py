@@ -1,8 +1,7 @@
 from app.workers.celery_app import app
 from database.connection import SessionLocal
 from app.models.core import Settlements, Worlds
-from app.models.seasons import Seasons
-from sqlalchemy import text
+from app.game_state.reference_data import get_reference_data
 
 @app.task
 def get_seasonal_modifiers(world_id):
@@ -15,24 +14,10 @@ def get_seasonal_modifiers(world_id):
         
         current_season = world.current_season or "spring"
         
-        # Check if seasons table exists
-        if not db.execute(text("SELECT to_regclass('public.seasons')")).scalar():
-            # Return default modifiers if seasons table doesn't exist
-            return {
-                "season": current_season,
-                "modifiers": {
-                    "wood": 1.0,
-                    "food": 1.0,
-                    "stone": 1.0,
-                    "ore": 1.0,
-                    "herbs": 1.0
-                },
-                "travel_modifier": 1.0
-            }
-        
-        # Get season from database
-        season = db.query(Seasons).filter(Seasons.name == current_season).first()
+        # Get season from the reference data cache
+        season = get_reference_data().season(current_season)
         if not season:
+            # Return default modifiers if the season is not configured
             return {
                 "season": current_season,
                 "modifiers": {
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 
 from sqlalchemy.orm import Session
 from database.connection import SessionLocal
+from database.unit_of_work import unit_of_work
 from app.game_state.services.task_service import TaskService
 
 logger = logging.getLogger(__name__)
@@ -158,6 +159,161 @@ def notify_task_deadlines(hours_remaining: int = 24) -> Dict[str, Any]:
             "notification_count": 0
         }
 
+def add_trader_assistance_task(db: Session, trader_id: str, area_id: str, world_id: str,
+                               issue_type: str) -> Dict[str, Any]:
+    """
+    Add a task for a trader who needs assistance in an area, in the given session.
+    
+    The task and the trader's active_task_id are flushed, not committed, so
+    they are written in the caller's transaction (e.g. with the trader tick
+    that ran into the encounter).
+    
+    Args:
+        db: Database session
+        trader_id: The ID of the trader
+        area_id: The ID of the area
+        world_id: The ID of the world
+        issue_type: Type of issue the trader is facing (e.g., 'bandit_attack', 'broken_cart')
+        
+    Returns:
+        Dict with task creation result
+    """
+    # Get trader and area information
+    from app.models.trader import TraderModel
+    from app.models.area import AreaModel
+    
+    trader = db.query(TraderModel).filter(TraderModel.trader_id == trader_id).first()
+    logging.info(f"Trader: {trader.npc_name if trader else None}")
+    area = db.query(AreaModel).filter(AreaModel.area_id == area_id).first()
+    
+    if not trader or not area:
+        logger.error(f"Trader {trader_id} or area {area_id} not found")
+        return {"status": "error", "message": "Trader or area not found"}
+    
+    trader_name = trader.npc_name if trader.npc_name else f"Trader {trader_id}"
+    area_name = area.area_name if hasattr(area, 'area_name') else "unknown area"
+    area_danger_level = area.danger_level if hasattr(area, 'danger_level') else 0
+    controlling_faction = area.controlling_faction if hasattr(area, 'controlling_faction') else None
+
+    # Generate task details based on issue type
+    issue_descriptions = {
+        "bandit_attack": f"Trader {trader_name} is being attacked by bandits in {area_name}. Help fight them off so the trader can continue their journey.",
+        "broken_cart": f"Trader {trader_name}'s cart has broken down in {area_name}. They need materials and assistance to repair it.",
+        "sick_animals": f"The animals pulling Trader {trader_name}'s cart have fallen ill in {area_name}. They need medicine and care.",
+        "lost_cargo": f"Trader {trader_name} lost some valuable cargo in {area_name}. Help them recover it before someone else finds it.",
+        "food_shortage": f"Trader {trader_name} has run out of food in {area_name}. They need provisions to continue their journey."
+    }
+    
+    description = issue_descriptions.get(
+        issue_type, 
+        f"Trader {trader_name} needs assistance in {area_name}. Find them and help resolve their issue."
+    )
+    
+    # Create the task using task service
+    task_service = TaskService(db)
+    
+    # Use title that reflects the issue
+    issue_titles = {
+        "bandit_attack": f"Rescue trader from bandits in {area_name}",
+        "broken_cart": f"Repair trader's cart in {area_name}",
+        "sick_animals": f"Heal trader's animals in {area_name}",
+        "lost_cargo": f"Recover lost cargo in {area_name}",
+        "food_shortage": f"Provide food to stranded trader in {area_name}"
+    }
+    
+    title = issue_titles.get(issue_type, f"Help trader in {area_name}")
+    
+    # Generate rewards based on issue difficulty
+    difficulty_map = {
+        "bandit_attack": 8,  # Highest difficulty
+        "broken_cart": 5,
+        "sick_animals": 6,
+        "lost_cargo": 7,
+        "food_shortage": 4  # Lowest difficulty
+    }
+    
+    difficulty = difficulty_map.get(issue_type, 5)
+    
+    # Scale rewards based on difficulty
+    gold_reward = 20 + (difficulty * 10)
+    xp_reward = 30 + (difficulty * 15)
+    reputation_reward = 1 + (difficulty // 2)
+    
+    # Add guard bonus for escort quests
+    if issue_type == "bandit_attack" and hasattr(trader, 'hired_guards'):
+        gold_reward += trader.hired_guards * 15
+    
+    # Create the task using a direct database approach to avoid asyncio issues
+    from app.models.tasks import Tasks, TaskTypes
+    import uuid
+    import json
+    from datetime import datetime
+    
+    # Get the task type ID for trader assistance
+    task_type = db.query(TaskTypes).filter(TaskTypes.code == "trader_assistance").first()
+    if not task_type:
+        logger.error(f"Task type 'trader_assistance' not found")
+        return {"status": "error", "message": "Task type not found"}
+    
+    # Create task ID
+    task_id = str(uuid.uuid4())
+    
+    # Set up rewards
+    rewards = {
+        "gold": gold_reward,
+        "reputation": reputation_reward,
+        "xp": xp_reward
+    }
+    
+    # Create task data
+    task_data = {
+        "task_type_display": "Trader Assistance",
+        "issue_type": issue_type
+    }
+    
+    # Create the task record directly
+    new_task = Tasks(
+        task_id=task_id,
+        title=title,
+        description=description,
+        task_type_id=task_type.task_type_id,
+        world_id=world_id,
+        location_id=area_id,
+        target_id=trader_id,
+        difficulty=difficulty,
+        duration_minutes=30,  # Default 30 minutes
+        requirements={},
+        rewards=rewards,
+        task_data=task_data,
+        repeatable=False,
+        status='available',
+        is_active=True,
+        created_at=datetime.utcnow()
+    )
+    
+    # Add the task; the caller's unit of work commits it
+    db.add(new_task)
+    db.flush()
+    
+    result = {
+        "status": "success",
+        "message": "Task created successfully",
+        "task_id": task_id
+    }
+    
+    log_level = logging.ERROR if result.get("status") != "success" else logging.INFO
+    logger.log(log_level, f"Task creation result: {result}")
+    
+    if result.get("status") == "success" and result.get("task_id"):
+        # Update trader to be blocked by this task
+        trader.can_move = False
+        logging.info(f"Blocking trader {trader_id} from moving until task {result.get('task_id')} is completed")
+        trader.active_task_id = result.get("task_id")
+        db.flush()
+        logger.info(f"Trader {trader_id} is now waiting for task {result.get('task_id')} completion")
+    
+    return result
+
 @shared_task(name="tasks.create_trader_assistance_task")
 def create_trader_assistance_task(trader_id: str, area_id: str, world_id: str, issue_type: str) -> Dict[str, Any]:
     """
@@ -177,146 +333,8 @@ def create_trader_assistance_task(trader_id: str, area_id: str, world_id: str, i
     try:
         db = SessionLocal()
         try:
-            # Get trader and area information
-            from app.models.trader import TraderModel
-            from app.models.area import AreaModel
-            
-            trader = db.query(TraderModel).filter(TraderModel.trader_id == trader_id).first()
-            logging.info(f"Trader: {trader.npc_name if trader else None}")
-            area = db.query(AreaModel).filter(AreaModel.area_id == area_id).first()
-            
-            if not trader or not area:
-                logger.error(f"Trader {trader_id} or area {area_id} not found")
-                return {"status": "error", "message": "Trader or area not found"}
-            
-            trader_name = trader.npc_name if trader.npc_name else f"Trader {trader_id}"
-            area_name = area.area_name if hasattr(area, 'area_name') else "unknown area"
-            area_danger_level = area.danger_level if hasattr(area, 'danger_level') else 0
-            controlling_faction = area.controlling_faction if hasattr(area, 'controlling_faction') else None
-
-            # Generate task details based on issue type
-            issue_descriptions = {
-                "bandit_attack": f"Trader {trader_name} is being attacked by bandits in {area_name}. Help fight them off so the trader can continue their journey.",
-                "broken_cart": f"Trader {trader_name}'s cart has broken down in {area_name}. They need materials and assistance to repair it.",
-                "sick_animals": f"The animals pulling Trader {trader_name}'s cart have fallen ill in {area_name}. They need medicine and care.",
-                "lost_cargo": f"Trader {trader_name} lost some valuable cargo in {area_name}. Help them recover it before someone else finds it.",
-                "food_shortage": f"Trader {trader_name} has run out of food in {area_name}. They need provisions to continue their journey."
-            }
-            
-            description = issue_descriptions.get(
-                issue_type, 
-                f"Trader {trader_name} needs assistance in {area_name}. Find them and help resolve their issue."
-            )
-            
-            # Create the task using task service
-            task_service = TaskService(db)
-            
-            # Use title that reflects the issue
-            issue_titles = {
-                "bandit_attack": f"Rescue trader from bandits in {area_name}",
-                "broken_cart": f"Repair trader's cart in {area_name}",
-                "sick_animals": f"Heal trader's animals in {area_name}",
-                "lost_cargo": f"Recover lost cargo in {area_name}",
-                "food_shortage": f"Provide food to stranded trader in {area_name}"
-            }
-            
-            title = issue_titles.get(issue_type, f"Help trader in {area_name}")
-            
-            # Generate rewards based on issue difficulty
-            difficulty_map = {
-                "bandit_attack": 8,  # Highest difficulty
-                "broken_cart": 5,
-                "sick_animals": 6,
-                "lost_cargo": 7,
-                "food_shortage": 4  # Lowest difficulty
-            }
-            
-            difficulty = difficulty_map.get(issue_type, 5)
-            
-            # Scale rewards based on difficulty
-            gold_reward = 20 + (difficulty * 10)
-            xp_reward = 30 + (difficulty * 15)
-            reputation_reward = 1 + (difficulty // 2)
-            
-            # Add guard bonus for escort quests
-            if issue_type == "bandit_attack" and hasattr(trader, 'hired_guards'):
-                gold_reward += trader.hired_guards * 15
-            
-            # Create the task using a direct database approach to avoid asyncio issues
-            from app.models.tasks import Tasks, TaskTypes
-            import uuid
-            import json
-            from datetime import datetime
-            
-            # Get the task type ID for trader assistance
-            task_type = db.query(TaskTypes).filter(TaskTypes.code == "trader_assistance").first()
-            if not task_type:
-                logger.error(f"Task type 'trader_assistance' not found")
-                return {"status": "error", "message": "Task type not found"}
-            
-            # Create task ID
-            task_id = str(uuid.uuid4())
-            
-            # Set up rewards
-            rewards = {
-                "gold": gold_reward,
-                "reputation": reputation_reward,
-                "xp": xp_reward
-            }
-            
-            # Create task data
-            task_data = {
-                "task_type_display": "Trader Assistance",
-                "issue_type": issue_type
-            }
-            
-            # Create the task record directly
-            new_task = Tasks(
-                task_id=task_id,
-                title=title,
-                description=description,
-                task_type_id=task_type.task_type_id,
-                world_id=world_id,
-                location_id=area_id,
-                target_id=trader_id,
-                difficulty=difficulty,
-                duration_minutes=30,  # Default 30 minutes
-                requirements={},
-                rewards=rewards,
-                task_data=task_data,
-                repeatable=False,
-                status='available',
-                is_active=True,
-                created_at=datetime.utcnow()
-            )
-            
-            # Add and commit
-            db.add(new_task)
-            db.commit()
-            
-            result = {
-                "status": "success",
-                "message": "Task created successfully",
-                "task_id": task_id
-            }
-            
-            log_level = logging.ERROR if result.get("status") != "success" else logging.INFO
-            logger.log(log_level, f"Task creation result: {result}")
-            
-            if result.get("status") == "success" and result.get("task_id"):
-                # Update trader to be blocked by this task
-                trader.can_move = False
-                logging.info(f"Blocking trader {trader_id} from moving until task {result.get('task_id')} is completed")
-                db.refresh(trader)
-                trader.active_task_id = result.get("task_id")
-                db.commit()
-                
-                trader = db.query(TraderModel).filter(TraderModel.trader_id == trader_id).first()
-                logging.info(f"Trader: {trader.npc_name if trader else None}")
-                logging.info(f"Trader: {trader.active_task_id if trader else None}")
-                logger.info(f"Trader {trader_id} is now waiting for task {result.get('task_id')} completion")
-            
-            return result
+            with unit_of_work(db):
+                return add_trader_assistance_task(db, trader_id, area_id, world_id, issue_type)
         finally:
             db.close()
     except Exception as e:
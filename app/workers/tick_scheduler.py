@@ -0,0 +1,420 @@
+# app/workers/tick_scheduler.py
+"""Overrun protection and adaptive intervals for the beat ticks.
+
+Celery beat fires the ``process_all_*`` ticks at a fixed rate whether or not
+the previous run has finished, so under load ticks pile up and run
+concurrently against the same rows. The ``guarded_tick`` decorator puts every
+run of a tick behind a Redis lock:
+
+- a tick that fires while the previous run still holds the lock is skipped,
+  or, with the "coalesce" overrun policy, remembered once and started again
+  when the running tick has finished and the tick is due
+- the interval of a tick adapts to its measured duration: it is the smoothed
+  duration times ``headroom``, kept between the tick's base interval (its
+  beat schedule) and ``max_interval``; beats that fire before the adapted
+  interval has passed are skipped
+- each tick keeps metrics in Redis (runs, skips, durations, the adapted
+  interval and its lag, i.e. how long after it was due it actually started);
+  ``get_tick_metrics`` returns them
+
+Ticks that fan out into a chord (see ``app.workers.dispatch``) keep the lock
+until the chord callback, or its errback when a batch fails, has merged the
+batches. Once the batches are dispatched the lock expires after the
+``lock_timeout`` of the dispatch summary, the hard time limit of a batch plus
+a margin, instead of the tick's own ``lock_timeout``; a chord that never
+calls back only stalls its tick for that long.
+
+Without a reachable Redis the ticks run unguarded.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Options used for ticks without their own settings
+DEFAULT_TICK_SETTINGS: Dict[str, Any] = {
+    "interval": 60.0,       # Base interval in seconds, also the beat schedule
+    "max_interval": 900.0,  # Longest adapted interval
+    "overrun": "skip",      # "skip" or "coalesce" ticks that fire during a run
+    "lock_timeout": 1800,   # Seconds after which a lock of a crashed run expires (until it dispatches batches)
+    "headroom": 1.5,        # Adapted interval as a multiple of the smoothed duration
+    "smoothing": 0.3        # Weight of the latest duration in the smoothed duration
+}
+
+# Tick options per task name, merged over DEFAULT_TICK_SETTINGS
+TICK_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "process_all_settlements": {"interval": 10.0, "max_interval": 180.0, "overrun": "coalesce"},
+    "process_all_traders": {"interval": 120.0, "max_interval": 600.0, "overrun": "coalesce"},
+    "process_all_animals": {"interval": 600.0, "max_interval": 1800.0},
+    "process_all_items": {"interval": 600.0, "max_interval": 1800.0},
+    "process_all_areas": {"interval": 900.0, "max_interval": 1800.0},
+    "advance_game_day": {"interval": 1200.0, "max_interval": 1200.0}
+}
+
+# A beat counts as due this fraction of the base interval before the due time
+DUE_TOLERANCE = 0.25
+
+# Prefix of the Redis keys of the ticks
+REDIS_KEY_PREFIX = "tick:"
+
+# Deletes a lock only if it still holds the token of the run releasing it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Sets the expiry of a lock only if it still holds the token of the run
+RENEW_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Seconds to wait before connecting to Redis again after a failed attempt
+REDIS_RETRY_INTERVAL = 30.0
+
+# Redis client of the process, and when to retry connecting after a failure
+_redis_client: Any = None
+_redis_retry_at = 0.0
+
+# Tick run of the task executing in this thread
+_current = threading.local()
+
+
+class TickRun(NamedTuple):
+    """A started run of a tick holding its lock."""
+    key: str
+    token: str
+    started_at: float
+
+
+def get_tick_settings(name: str) -> Dict[str, Any]:
+    """
+    Get the options of a tick.
+
+    Args:
+        name: Task name of the tick (e.g. "process_all_traders")
+
+    Returns:
+        Dictionary of tick options
+    """
+    settings = dict(DEFAULT_TICK_SETTINGS)
+    settings.update(TICK_SETTINGS.get(name, {}))
+    return settings
+
+
+def tick_key(name: str, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Get the key of a tick; runs for a single world are guarded separately.
+
+    Args:
+        name: Task name of the tick
+        args: Positional task arguments
+        kwargs: Keyword task arguments
+
+    Returns:
+        Tick key, e.g. "process_all_traders" or "process_all_traders:<world_id>"
+    """
+    world_id = args[0] if args else (kwargs or {}).get("world_id")
+    return f"{name}:{world_id}" if world_id else name
+
+
+def adapt_interval(settings: Dict[str, Any], average_duration: float) -> float:
+    """
+    Get the interval of a tick for its smoothed duration.
+
+    Args:
+        settings: Tick options
+        average_duration: Smoothed run duration in seconds
+
+    Returns:
+        Interval in seconds between the base and the maximum interval
+    """
+    interval = average_duration * settings["headroom"]
+    return min(max(interval, settings["interval"]), max(settings["max_interval"], settings["interval"]))
+
+
+class TickScheduler:
+    """
+    Redis-backed locks, adaptive intervals and metrics of the beat ticks.
+    """
+
+    def __init__(self, redis_client, clock: Callable[[], float] = time.time):
+        """
+        Initialize the scheduler.
+
+        Args:
+            redis_client: Redis client holding locks and metrics
+            clock: Time source in seconds
+        """
+        self.redis = redis_client
+        self.clock = clock
+
+    def start(self, name: str, key: str, pending: Optional[Dict[str, Any]] = None) -> Optional[TickRun]:
+        """
+        Try to start a run of a tick.
+
+        Args:
+            name: Task name of the tick
+            key: Tick key (see tick_key)
+            pending: Task call to start again after the running tick, for
+                the coalesce overrun policy
+
+        Returns:
+            The started run, or None if the tick is skipped
+        """
+        settings = get_tick_settings(name)
+        now = self.clock()
+        metrics = self.get_metrics(key)
+
+        next_due = metrics.get("next_due")
+        if next_due is not None and now < next_due - settings["interval"] * DUE_TOLERANCE:
+            self.redis.hincrby(self._key(key, "metrics"), "not_due", 1)
+            return None
+
+        token = uuid.uuid4().hex
+        if not self.redis.set(self._key(key, "lock"), token, nx=True, ex=int(settings["lock_timeout"])):
+            if settings["overrun"] == "coalesce" and pending is not None:
+                self.redis.set(self._key(key, "pending"), json.dumps(pending), ex=int(settings["lock_timeout"]))
+                self.redis.hincrby(self._key(key, "metrics"), "coalesced", 1)
+                logger.info(f"Tick {key} is still running, coalescing this tick into one follow-up run")
+            else:
+                self.redis.hincrby(self._key(key, "metrics"), "skipped", 1)
+                logger.warning(f"Tick {key} is still running, skipping this tick")
+            return None
+
+        lag = max(0.0, now - next_due) if next_due is not None else 0.0
+        self.redis.hset(self._key(key, "metrics"), mapping={"last_started": now, "lag": lag})
+        return TickRun(key, token, now)
+
+    def finish(self, name: str, run: TickRun) -> Optional[Dict[str, Any]]:
+        """
+        Record a finished run, adapt the interval and release the lock.
+
+        Args:
+            name: Task name of the tick
+            run: The run to finish
+
+        Returns:
+            The coalesced task call, if a tick fired during the run, with the
+            countdown until the tick is due again
+        """
+        settings = get_tick_settings(name)
+        now = self.clock()
+        duration = max(0.0, now - run.started_at)
+        metrics = self.get_metrics(run.key)
+
+        previous = metrics.get("average_duration")
+        average = duration if previous is None else (
+            settings["smoothing"] * duration + (1 - settings["smoothing"]) * previous
+        )
+        interval = adapt_interval(settings, average)
+        self.redis.hset(self._key(run.key, "metrics"), mapping={
+            "last_duration": duration,
+            "average_duration": average,
+            "interval": interval,
+            "next_due": run.started_at + interval,
+            "last_finished": now
+        })
+        self.redis.hincrby(self._key(run.key, "metrics"), "runs", 1)
+        if duration > settings["interval"]:
+            self.redis.hincrby(self._key(run.key, "metrics"), "overruns", 1)
+
+        pending = self.redis.get(self._key(run.key, "pending"))
+        self.redis.delete(self._key(run.key, "pending"))
+        self.redis.eval(RELEASE_LOCK_SCRIPT, 1, self._key(run.key, "lock"), run.token)
+
+        logger.info(f"Tick {run.key} took {duration:.1f}s, next run in {interval:.0f}s")
+        if not pending:
+            return None
+        pending = json.loads(pending)
+        pending["countdown"] = max(0.0, run.started_at + interval - now)
+        return pending
+
+    def renew(self, run: TickRun, lock_timeout: float) -> bool:
+        """
+        Let the lock of a run expire after a new timeout.
+
+        Args:
+            run: The run holding the lock
+            lock_timeout: Seconds from now until the lock expires
+
+        Returns:
+            True if the run still held its lock
+        """
+        return bool(self.redis.eval(
+            RENEW_LOCK_SCRIPT, 1, self._key(run.key, "lock"), run.token, max(1, int(lock_timeout))
+        ))
+
+    def get_metrics(self, key: str) -> Dict[str, float]:
+        """
+        Get the metrics of a tick.
+
+        Args:
+            key: Tick key (see tick_key)
+
+        Returns:
+            Metrics by name, as numbers
+        """
+        raw = self.redis.hgetall(self._key(key, "metrics")) or {}
+        metrics = {}
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            metrics[field] = float(value)
+        return metrics
+
+    def get_all_metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the metrics of every tick, with the current lag of overdue ticks.
+
+        Returns:
+            Metrics per tick key
+        """
+        now = self.clock()
+        all_metrics = {}
+        suffix = ":metrics"
+        for redis_key in self.redis.scan_iter(match=f"{REDIS_KEY_PREFIX}*{suffix}"):
+            redis_key = redis_key.decode() if isinstance(redis_key, bytes) else redis_key
+            key = redis_key[len(REDIS_KEY_PREFIX):-len(suffix)]
+            metrics = self.get_metrics(key)
+            next_due = metrics.get("next_due")
+            metrics["current_lag"] = max(0.0, now - next_due) if next_due is not None else 0.0
+            metrics["running"] = float(bool(self.redis.exists(self._key(key, "lock"))))
+            all_metrics[key] = metrics
+        return all_metrics
+
+    @staticmethod
+    def _key(key: str, kind: str) -> str:
+        return f"{REDIS_KEY_PREFIX}{key}:{kind}"
+
+
+def get_tick_scheduler() -> Optional[TickScheduler]:
+    """
+    Get the tick scheduler of the process, connected to the Celery broker.
+
+    A failed connection is retried after REDIS_RETRY_INTERVAL seconds, so
+    the process gets its overrun protection back once Redis is up again.
+
+    Returns:
+        The scheduler, or None if Redis is not available
+    """
+    global _redis_client, _redis_retry_at
+    if _redis_client is None and time.monotonic() >= _redis_retry_at:
+        try:
+            import redis
+            from app.workers.celery_app import app
+            client = redis.Redis.from_url(app.conf.broker_url)
+            client.ping()
+            _redis_client = client
+        except Exception as e:
+            logger.warning(f"Redis is not available, ticks run without overrun protection "
+                           f"(retrying in {REDIS_RETRY_INTERVAL:.0f}s): {str(e)}")
+            _redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+    return TickScheduler(_redis_client) if _redis_client is not None else None
+
+
+def current_tick() -> Optional[Dict[str, Any]]:
+    """
+    Get the run of the tick executing in this thread, to hand to a chord callback.
+
+    Returns:
+        The run as a dictionary, or None outside a guarded tick
+    """
+    run = getattr(_current, "run", None)
+    return dict(run) if run is not None else None
+
+
+def finish_tick(tick: Dict[str, Any]) -> None:
+    """
+    Finish a tick run and start the coalesced follow-up run, if any.
+
+    Args:
+        tick: The run (see current_tick)
+    """
+    scheduler = get_tick_scheduler()
+    if scheduler is None:
+        return
+    try:
+        pending = scheduler.finish(tick["name"], TickRun(tick["key"], tick["token"], tick["started_at"]))
+    except Exception as e:
+        logger.exception(f"Error finishing tick {tick.get('key')}: {e}")
+        return
+    if pending:
+        from app.workers.celery_app import app
+        app.send_task(pending["task"], args=pending["args"], kwargs=pending["kwargs"],
+                      countdown=pending["countdown"])
+
+
+def guarded_tick(name: str):
+    """
+    Decorate a beat task so its runs never overlap and its interval adapts.
+
+    Apply it below the Celery task decorator. A task that returns a
+    "dispatched" summary with batches keeps its lock until the chord
+    callback or errback calls finish_tick; the lock then expires after the
+    summary's lock_timeout, if it has one.
+
+    Args:
+        name: Task name of the tick, for its settings
+
+    Returns:
+        The decorator
+    """
+    def decorator(fn: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        task_name = f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            scheduler = get_tick_scheduler()
+            if scheduler is None:
+                return fn(*args, **kwargs)
+
+            key = tick_key(name, args, kwargs)
+            pending = {"task": task_name, "args": list(args), "kwargs": kwargs}
+            try:
+                run = scheduler.start(name, key, pending)
+            except Exception as e:
+                logger.warning(f"Could not lock tick {key}, running it unguarded: {str(e)}")
+                return fn(*args, **kwargs)
+            if run is None:
+                return {"status": "skipped", "message": f"Tick {key} skipped: previous run still going or not due"}
+
+            tick = {"name": name, "key": run.key, "token": run.token, "started_at": run.started_at}
+            _current.run = tick
+            deferred = False
+            try:
+                result = fn(*args, **kwargs)
+                deferred = isinstance(result, dict) and result.get("status") == "dispatched" and bool(result.get("batches"))
+                if deferred and result.get("lock_timeout"):
+                    try:
+                        scheduler.renew(run, result["lock_timeout"])
+                    except Exception as e:
+                        logger.warning(f"Could not renew the lock of tick {run.key}: {str(e)}")
+                return result
+            finally:
+                _current.run = None
+                if not deferred:
+                    finish_tick(tick)
+
+        return wrapper
+    return decorator
+
+
+def get_tick_metrics() -> Dict[str, Dict[str, float]]:
+    """
+    Get the metrics of every tick (see TickScheduler.get_all_metrics).
+
+    Returns:
+        Metrics per tick key, empty if Redis is not available
+    """
+    scheduler = get_tick_scheduler()
+    return scheduler.get_all_metrics() if scheduler else {}
@@ -1,9 +1,8 @@
 # app/workers/time_worker.py
 from app.workers.celery_app import app
 from database.connection import SessionLocal
-from sqlalchemy import text
 from app.models.core import Worlds, Settlements
-from app.models.seasons import Seasons
+from app.game_state.reference_data import get_reference_data
 from app.workers.settlement_worker import process_all_settlements
 import logging
 
@@ -35,9 +34,10 @@ def advance_game_day(world_id=None):
                 # Get the next season from the seasons table
                 current_season_name = world.current_season if world.current_season else "spring"
                 
-                # First check if the seasons table exists (in case migration hasn't been run)
-                if db.execute(text("SELECT to_regclass('public.seasons')")).scalar():
-                    season = db.query(Seasons).filter(Seasons.name == current_season_name).first()
+                # The seasons stay empty if the table doesn't exist (in case migration hasn't been run)
+                reference_data = get_reference_data()
+                if reference_data.seasons:
+                    season = reference_data.season(current_season_name)
                     
                     if season:
                         # Set to the next season in the cycle
@@ -1,10 +1,14 @@
 from app.workers.celery_app import app
 from database.connection import SessionLocal
-from app.models.core import Settlements, Worlds, Areas, TravelRoutes, AreaEncounters, AreaEncounterTypes
+from database.unit_of_work import unit_of_work
+from app.models.core import Settlements, Worlds, Areas, TravelRoutes, AreaEncounters, Traders
 from app.models.trader import TraderModel
 from app.ai.simple_decision import SimpleDecisionEngine
 from app.game_state.manager import GameStateManager
 from app.game_state.services.trader_service import TraderService
+from app.game_state.trader_tick import TraderTick
+from app.workers.dispatch import dispatch_batches, group_ids_by_world, run_batch
+from app.workers.tick_scheduler import guarded_tick
 from app.game_state.services.logging_service import LoggingService
 from app.models.tasks import Tasks 
 from sqlalchemy import String, cast, select, text
@@ -551,224 +555,70 @@ def continue_area_travel(trader_id: str):
         db.close()
 
 @app.task
-def process_all_traders(world_id: Optional[str] = None):
+@guarded_tick("process_all_traders")
+def process_all_traders(world_id: Optional[str] = None, batch_size: Optional[int] = None):
     """
     Process movement for all traders in a world or all worlds.
     
+    The traders of each world are split into batches that run as parallel
+    process_trader_batch subtasks (see app.workers.dispatch); their summaries
+    are merged by the chord callback.
+    
     Args:
         world_id: Optional ID of the world to process traders for
+        batch_size: Traders per batch, overriding the dispatch settings
         
     Returns:
-        Dict: Summary of processing results
+        Dict: Dispatch summary with the chord ID of the merged result
     """
     logger.info(f"Processing all traders" + (f" in world {world_id}" if world_id else ""))
     
     db = SessionLocal()
     try:
-        # Get all traders
-        query = db.query(TraderModel)
+        query = db.query(Traders.trader_id, Traders.world_id).filter(Traders.world_id.isnot(None))
         if world_id:
-            query = query.filter(TraderModel.world_id == world_id)
-        
-        all_traders = query.all()
-        
-        # Filter out traders with active tasks by checking the Tasks table directly
-        traders_without_tasks = []
-        traders_with_tasks = []
-        
-        for trader in all_traders:
-            active_task_id = check_trader_active_tasks(db, str(trader.trader_id))
-            
-            if active_task_id:
-                # Update the trader's active_task_id field to ensure it stays in sync
-                if trader.active_task_id != active_task_id:
-                    trader.active_task_id = active_task_id
-                    db.commit()
-                    logger.info(f"Updated trader {trader.trader_id} active_task_id to {active_task_id}")
-                traders_with_tasks.append(trader)
-            else:
-                # If trader has active_task_id but no actual active tasks, clear it
-                if trader.active_task_id:
-                    logger.info(f"Trader {trader.trader_id} has active_task_id {trader.active_task_id} but no actual active tasks, clearing it")
-                    trader.active_task_id = None
-                    db.commit()
-                traders_without_tasks.append(trader)
-        
-        # Process only traders without active tasks
-        traders = traders_without_tasks
-        total_traders = len(all_traders)
-        available_traders = len(traders)
-        waiting_traders = len(traders_with_tasks)
+            query = query.filter(Traders.world_id == world_id)
         
-        logger.info(f"Found {total_traders} total traders, {available_traders} available for processing, {waiting_traders} waiting for tasks")
-        
-        # Process each trader
-        processed_count = 0
-        waiting_for_task_count = 0
+        return dispatch_batches(process_trader_batch, group_ids_by_world(query.all()), "trader",
+                                batch_size=batch_size)
+    
+    except Exception as e:
+        logger.exception(f"Error processing all traders: {e}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+@app.task
+def process_trader_batch(world_id: str, trader_ids: List[str]):
+    """
+    Process movement for one batch of traders of a world.
+    
+    The tick is set-based (see TraderTick): active tasks are found with one
+    query, all travelling traders advance together, only traders sitting in a
+    settlement are decided with batched MCTS, and all changes are written with
+    one bulk update.
+    
+    Args:
+        world_id: ID of the world of the traders
+        trader_ids: IDs of the traders to process
         
-        for trader in traders:
-            try:
-                # Check if trader should move or generate an event
-                trader_id = str(trader.trader_id)
-                logger.info(f"Processing trader {trader_id}")
-                
-                # First check if trader is in an area (traveling)
-                if trader.current_area_id:
-                    # Process area travel - chance for events
-                    
-                    # Calculate journey progress percentage
-                    if trader.journey_path and trader.path_position is not None:
-                        path = json.loads(trader.journey_path)
-                        current_position = trader.path_position
-                        
-                        # Update position
-                        current_position += 1
-                        
-                        # Check if reached destination
-                        if current_position >= len(path):
-                            # Journey complete, arrive at destination
-                            trader.current_settlement_id = trader.destination_id
-                            trader.current_area_id = None
-                            trader.journey_path = None
-                            trader.path_position = 0
-                            trader.journey_progress = 100
-                            
-                            logger.info(f"Trader {trader_id} arrived at destination: {trader.destination_settlement_name}")
-                            
-                        else:
-                            # Move to next area
-                            next_area_id = path[current_position]
-                            trader.current_area_id = next_area_id
-                            trader.path_position = current_position
-                            
-                            # Calculate journey progress percentage
-                            trader.journey_progress = int((current_position / (len(path) - 1)) * 100)
-                            
-                            # 20% chance to generate an encounter in the area
-                            if random.random() < 0.2:
-                                # Call a function similar to the updated create_trader_assistance_task
-                                # but without using asyncio
-                                from app.workers.task_worker import create_trader_assistance_task
-                                
-                                # Select a random issue type
-                                issue_types = [
-                                    "bandit_attack",
-                                    "broken_cart",
-                                    "sick_animals",
-                                    "lost_cargo",
-                                    "food_shortage"
-                                ]
-                                issue_type = random.choice(issue_types)
-                                
-                                # Create a task for the trader
-                                result = create_trader_assistance_task(
-                                    trader_id=trader_id,
-                                    area_id=next_area_id,
-                                    world_id=str(trader.world_id),
-                                    issue_type=issue_type
-                                )
-                                
-                                if result.get("status") == "success":
-                                    waiting_for_task_count += 1
-                                    logger.info(f"Created event '{issue_type}' for trader {trader_id} in area {next_area_id}")
-                            else:
-                                logger.info(f"Trader {trader_id} moved to area: {next_area_id} ({trader.journey_progress}% of journey)")
-                        
-                        # Commit changes
-                        db.commit()
-                        processed_count += 1
-                
-                # Otherwise trader is in a settlement and might start a new journey
-                elif trader.current_settlement_id and not trader.active_task_id:
-                    # Trader is in a settlement - decide on next destination
-                    # Simplified logic - just find a random connected settlement
-                    current_settlement = db.query(Settlements).filter(
-                        Settlements.settlement_id == trader.current_settlement_id
-                    ).first()
-                    
-                    if current_settlement and current_settlement.connections:
-                        # Parse connections
-                        connections = []
-                        if isinstance(current_settlement.connections, str):
-                            try:
-                                connections = json.loads(current_settlement.connections)
-                            except:
-                                pass
-                        elif isinstance(current_settlement.connections, list):
-                            connections = current_settlement.connections
-                        
-                        # Filter valid connections
-                        valid_connections = []
-                        for conn in connections:
-                            dest_id = conn.get('destination_id')
-                            if dest_id and not dest_id.startswith('11111') and dest_id != '00000000-0000-0000-0000-000000000000':
-                                valid_connections.append(conn)
-                        
-                        # Select a random destination
-                        if valid_connections:
-                            # 30% chance to start journey
-                            if random.random() < 0.3:
-                                # Choose random destination
-                                chosen_conn = random.choice(valid_connections)
-                                destination_id = chosen_conn.get('destination_id')
-                                
-                                # Get destination name
-                                dest_settlement = db.query(Settlements).filter(
-                                    Settlements.settlement_id == destination_id
-                                ).first()
-                                
-                                destination_name = dest_settlement.settlement_name if dest_settlement else "Unknown"
-                                
-                                # Try to find a path between settlements
-                                from app.workers.area_worker import find_path_between_settlements
-                                path = find_path_between_settlements(
-                                    start_id=trader.current_settlement_id,
-                                    end_id=destination_id,
-                                    db=db
-                                )
-                                
-                                if path:
-                                    # Start journey
-                                    trader.current_settlement_id = None
-                                    trader.destination_id = destination_id
-                                    trader.destination_settlement_name = destination_name
-                                    trader.journey_started = datetime.now()
-                                    trader.journey_progress = 0
-                                    trader.current_area_id = path[0]
-                                    trader.journey_path = json.dumps(path)
-                                    trader.path_position = 0
-                                    
-                                    logger.info(f"Trader {trader_id} started journey to {destination_name}")
-                                    
-                                    # Commit changes
-                                    db.commit()
-                                    processed_count += 1
-                            else:
-                                logger.info(f"Trader {trader_id} remains at {current_settlement.settlement_name}")
-            except Exception as e:
-                logger.exception(f"Error processing trader {trader.trader_id}: {e}")
-                # Continue with next trader
-                continue
+    Returns:
+        Dict: Summary of processing results
+    """
+    db = SessionLocal()
+    try:
+        def tick():
+            # One unit of work for the batch, shared with the services the tick calls
+            with unit_of_work(db):
+                return TraderTick(db, world_id, trader_ids, use_mcts=USE_MCTS,
+                                  num_simulations=MCTS_SIMULATIONS).run()
         
-        # Summary of results
-        result = {
-            "status": "success",
-            "total": total_traders,
-            "available": available_traders,
-            "waiting_for_task": waiting_traders,
-            "processed": processed_count,
-            "new_tasks_created": waiting_for_task_count,
-            "message": f"Successfully processed {processed_count} of {available_traders} available traders, {waiting_traders} waiting for tasks, created {waiting_for_task_count} new tasks"
-        }
+        result = run_batch(world_id, trader_ids, tick)
         
         log_level = logging.ERROR if result.get("status") != "success" else logging.INFO
-        logger.log(log_level, f"Process all traders result: {result}")
+        logger.log(log_level, f"Process trader batch result: {result}")
         
         return result
-    
-    except Exception as e:
-        logger.exception(f"Error processing all traders: {e}")
-        return {"status": "error", "message": str(e)}
     finally:
         db.close()
 
@@ -890,83 +740,3 @@ def create_random_trader_tasks(world_id: Optional[str] = None, task_count: int =
         return {"status": "error", "message": str(e)}
     finally:
         db.close()
-
-# Legacy functions to support backwards compatibility
-def generate_simple_encounter(trader_id=None, area_id=None):
-    """Simplified version of encounter generation that works with our actual database schema"""
-    if not area_id or not trader_id:
-        return {"status": "error", "error": "Must provide area_id and trader_id"}
-    
-
-    from database.connection import SessionLocal
-    db = SessionLocal()
-    try:
-        # Get the area
-        area = db.query(Areas).filter(Areas.area_id == area_id).first()
-        if not area:
-            return {"status": "error", "error": f"Area {area_id} not found"}
-        
-        # Get the trader
-        trader = db.query(TraderModel).filter(TraderModel.trader_id == trader_id).first()
-        if not trader:
-            return {"status": "error", "error": f"Trader {trader_id} not found"}
-        
-        # Determine if an encounter happens (based on area danger level)
-        # Default to danger level 1 if not specified
-        danger_level = getattr(area, 'danger_level', 1) or 1
-        encounter_chance = 0.1 + (danger_level * 0.05)  # 10% base chance + 5% per danger level
-        
-        # Roll for encounter
-        encounter_roll = random.random()
-        if encounter_roll > encounter_chance:
-            # No encounter this time
-            logger.info(f"No encounter generated for trader {trader_id} in area {area.area_name}")
-            return {"status": "success", "result": "no_encounter"}
-        
-        # Get a random encounter type
-        encounter_types = db.query(AreaEncounterTypes).limit(10).all()
-        if not encounter_types:
-            logger.warning("No encounter types found in database")
-            return {"status": "success", "result": "no_encounter"}
-        
-        selected_encounter = random.choice(encounter_types)
-        
-        # Create the encounter with only the fields that exist in our database
-        encounter_id = str(uuid.uuid4())
-        
-        # Use SQL directly to avoid using fields that don't exist in the database
-        db.execute(
-            text("""
-            INSERT INTO area_encounters
-                (encounter_id, area_id, encounter_type_id, is_active, is_completed, 
-                current_state, created_at, resolved_at, resolved_by, resolution_outcome_id, custom_narrative)
-            VALUES
-                (:encounter_id, :area_id, :encounter_type_id, true, false, 
-                'initial', CURRENT_TIMESTAMP, NULL, NULL, NULL, :narrative)
-            """),
-            {
-                "encounter_id": encounter_id,
-                "area_id": area_id,
-                "encounter_type_id": selected_encounter.encounter_type_id,
-                "narrative": f"Trader {trader.npc_name} encountered {selected_encounter.encounter_name} in {area.area_name}"
-            }
-        )
-        
-        db.commit()
-        
-        logger.info(f"Generated {selected_encounter.encounter_name} encounter for trader {trader_id} in {area.area_name}")
-        
-        return {
-            "status": "success", 
-            "result": "encounter_created",
-            "encounter_id": encounter_id,
-            "encounter_name": selected_encounter.encounter_name,
-            "description": selected_encounter.description if hasattr(selected_encounter, 'description') else "No description"
-        }
-        
-    except Exception as e:
-        db.rollback()
-        logger.exception(f"Error generating encounter: {e}")
-        return {"status": "error", "error": str(e)}
-    finally:
-        db.close()
\ No newline at end of file
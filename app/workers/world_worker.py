@@ -3,12 +3,14 @@ import logging
 from typing import Dict, Any, Optional
 
 from app.workers.celery_app import app
+from app.workers.tick_scheduler import guarded_tick
 from database.connection import SessionLocal
 from app.game_state.services.world_service import WorldService
 
 logger = logging.getLogger(__name__)
 
 @app.task
+@guarded_tick("advance_game_day")
 def advance_game_day(world_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Advance the game day for a specific world or all worlds.
@@ -0,0 +1,68 @@
+# database/unit_of_work.py
+"""Scoped unit of work: one session and one transaction per tick or request.
+
+Managers used to open a new ``SessionLocal()`` and commit for every call, even
+when their caller already held a session. ``unit_of_work`` makes a session the
+current one of the running context (thread or asyncio task):
+
+- the outermost ``unit_of_work`` uses the given session or opens one, commits
+  when its block succeeds, rolls back when it fails, and closes the session if
+  it opened it
+- a nested ``unit_of_work`` without a session, or with the current session,
+  joins the outer one: it yields the same session and leaves committing to the
+  outer block, so all writes of a tick are flushed together at its end
+
+Workers wrap a tick in ``unit_of_work(db)``; managers wrap each call in
+``unit_of_work(self.db)``, which joins the tick's unit of work when there is
+one and otherwise behaves like the old per-call session.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from database.connection import SessionLocal
+
+# Session of the unit of work of the running context
+_current_session: ContextVar[Optional[Session]] = ContextVar("unit_of_work_session", default=None)
+
+
+def current_session() -> Optional[Session]:
+    """Get the session of the current unit of work, or None outside of one."""
+    return _current_session.get()
+
+
+@contextmanager
+def unit_of_work(session: Optional[Session] = None) -> Iterator[Session]:
+    """
+    Run a block in the current unit of work, or in a new one.
+
+    Args:
+        session: Session to use; if None, the current unit of work's session
+            or a new session is used
+
+    Yields:
+        The session of the unit of work
+    """
+    current = _current_session.get()
+    if current is not None and (session is None or session is current):
+        # Join the outer unit of work, which commits at its end
+        yield current
+        return
+
+    owns_session = session is None
+    if owns_session:
+        session = SessionLocal()
+    token = _current_session.set(session)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _current_session.reset(token)
+        if owns_session:
+            session.close()
@@ -105,6 +105,20 @@ def run_migrations_online() -> None:
         with context.begin_transaction():
             context.run_migrations()
 
+    # Migrations seed and alter the reference tables (seasons, biomes,
+    # resource types), so running processes reload their cached copies
+    bump_reference_data_version()
+
+
+def bump_reference_data_version() -> None:
+    spec = importlib.util.spec_from_file_location(
+        "reference_data",
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "app/game_state/reference_data.py")
+    )
+    reference_data = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(reference_data)
+    reference_data.bump_reference_data_version()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
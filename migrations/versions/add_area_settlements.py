@@ -0,0 +1,45 @@
+"""Add area_settlements join table
+
+Revision ID: add_area_settlements
+Revises: 8a10babf05ea
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_area_settlements'
+down_revision = '8a10babf05ea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reverse index of areas.connected_settlements
+    op.create_table(
+        'area_settlements',
+        sa.Column('area_id', sa.String(), sa.ForeignKey('areas.area_id', ondelete='CASCADE'), nullable=False),
+        sa.Column('settlement_id', sa.String(), nullable=False),
+        sa.Column('world_id', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('area_id', 'settlement_id')
+    )
+    op.create_index('ix_area_settlements_settlement_id', 'area_settlements', ['settlement_id'])
+    op.create_index('ix_area_settlements_world_id', 'area_settlements', ['world_id'])
+
+    # Backfill from the JSON arrays
+    op.execute("""
+        INSERT INTO area_settlements (area_id, settlement_id, world_id)
+        SELECT DISTINCT a.area_id, s.settlement_id, a.world_id
+        FROM areas a
+        CROSS JOIN LATERAL json_array_elements_text(a.connected_settlements::json) AS s(settlement_id)
+        WHERE a.connected_settlements IS NOT NULL
+          AND a.connected_settlements LIKE '[%'
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_area_settlements_world_id', table_name='area_settlements')
+    op.drop_index('ix_area_settlements_settlement_id', table_name='area_settlements')
+    op.drop_table('area_settlements')
@@ -0,0 +1,133 @@
+"""Partition entity_action_log by month and add its daily summary
+
+Revision ID: entity_action_log_partitioned
+Revises: settlement_resources_unique
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'entity_action_log_partitioned'
+down_revision = 'settlement_resources_unique'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "log_id, timestamp, entity_id, entity_type, entity_name, action_type, action_subtype, "
+    "from_location_id, from_location_type, from_location_name, to_location_id, to_location_type, "
+    "to_location_name, related_entity_id, related_entity_type, related_entity_name, details, "
+    "world_id, game_day, game_time"
+)
+
+# Monthly partitions created after the current month; later ones are
+# created by the daily action log maintenance
+MONTHS_AHEAD = 2
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_month_partition(month):
+    end = add_months(month, 1)
+    op.execute(
+        f"CREATE TABLE entity_action_log_y{month.year:04d}m{month.month:02d} PARTITION OF entity_action_log "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    existing = sa.inspect(bind).has_table('entity_action_log')
+    first_month = None
+    if existing:
+        op.rename_table('entity_action_log', 'entity_action_log_unpartitioned')
+        op.execute("ALTER INDEX IF EXISTS entity_action_log_pkey RENAME TO entity_action_log_unpartitioned_pkey")
+        oldest = bind.execute(sa.text("SELECT MIN(timestamp) FROM entity_action_log_unpartitioned")).scalar()
+        if oldest is not None:
+            first_month = date(oldest.year, oldest.month, 1)
+
+    # The partition key has to be part of the primary key
+    op.create_table(
+        'entity_action_log',
+        sa.Column('log_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('entity_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('entity_name', sa.String(255)),
+        sa.Column('action_type', sa.String(50), nullable=False),
+        sa.Column('action_subtype', sa.String(50)),
+        sa.Column('from_location_id', UUID(as_uuid=True)),
+        sa.Column('from_location_type', sa.String(50)),
+        sa.Column('from_location_name', sa.String(255)),
+        sa.Column('to_location_id', UUID(as_uuid=True)),
+        sa.Column('to_location_type', sa.String(50)),
+        sa.Column('to_location_name', sa.String(255)),
+        sa.Column('related_entity_id', UUID(as_uuid=True)),
+        sa.Column('related_entity_type', sa.String(50)),
+        sa.Column('related_entity_name', sa.String(255)),
+        sa.Column('details', JSONB),
+        sa.Column('world_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('game_day', sa.Integer()),
+        sa.Column('game_time', sa.String(50)),
+        sa.PrimaryKeyConstraint('log_id', 'timestamp'),
+        postgresql_partition_by='RANGE (timestamp)'
+    )
+    op.create_index(
+        'ix_entity_action_log_entity_timestamp', 'entity_action_log', ['entity_id', 'timestamp', 'log_id']
+    )
+    op.create_index('ix_entity_action_log_world_game_day', 'entity_action_log', ['world_id', 'game_day'])
+
+    # Rows outside every monthly partition
+    op.execute("CREATE TABLE entity_action_log_default PARTITION OF entity_action_log DEFAULT")
+
+    current_month = date(datetime.utcnow().year, datetime.utcnow().month, 1)
+    month = min(first_month or current_month, current_month)
+    while month <= add_months(current_month, MONTHS_AHEAD):
+        create_month_partition(month)
+        month = add_months(month, 1)
+
+    if existing:
+        op.execute(f"INSERT INTO entity_action_log ({COLUMNS}) SELECT {COLUMNS} FROM entity_action_log_unpartitioned")
+        op.drop_table('entity_action_log_unpartitioned')
+
+    # Rolled up counts of dropped partitions
+    op.create_table(
+        'entity_action_daily_summary',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('world_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('entity_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('action_type', sa.String(50), nullable=False),
+        sa.Column('action_subtype', sa.String(50), nullable=False, server_default=''),
+        sa.Column('action_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('first_game_day', sa.Integer()),
+        sa.Column('last_game_day', sa.Integer()),
+        sa.PrimaryKeyConstraint('day', 'world_id', 'entity_id', 'entity_type', 'action_type', 'action_subtype')
+    )
+    op.create_index('ix_entity_action_daily_summary_entity_day', 'entity_action_daily_summary', ['entity_id', 'day'])
+
+
+def downgrade():
+    op.drop_index('ix_entity_action_daily_summary_entity_day', table_name='entity_action_daily_summary')
+    op.drop_table('entity_action_daily_summary')
+
+    op.execute("ALTER TABLE entity_action_log RENAME TO entity_action_log_partitioned")
+    op.execute("ALTER INDEX entity_action_log_pkey RENAME TO entity_action_log_partitioned_pkey")
+    op.execute(f"""
+        CREATE TABLE entity_action_log AS
+        SELECT {COLUMNS} FROM entity_action_log_partitioned
+    """)
+    op.execute("DROP TABLE entity_action_log_partitioned CASCADE")
+    op.create_primary_key('entity_action_log_pkey', 'entity_action_log', ['log_id'])
+    op.alter_column('entity_action_log', 'timestamp', nullable=False, server_default=sa.func.now())
+    op.create_index('entity_action_log_entity_id_idx', 'entity_action_log', ['entity_id'])
+    op.create_index('entity_action_log_timestamp_idx', 'entity_action_log', ['timestamp'])
+    op.create_index('entity_action_log_world_id_idx', 'entity_action_log', ['world_id'])
@@ -0,0 +1,49 @@
+"""Make settlement_resources unique per settlement and resource
+
+Revision ID: settlement_resources_unique
+Revises: add_area_settlements
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'settlement_resources_unique'
+down_revision = 'add_area_settlements'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Merge duplicate rows into the row with the lowest ID
+    op.execute("""
+        WITH totals AS (
+            SELECT settlement_id, resource_type_id,
+                   MIN(settlement_resource_id) AS keep_id, SUM(quantity) AS quantity
+            FROM settlement_resources
+            GROUP BY settlement_id, resource_type_id
+            HAVING COUNT(*) > 1
+        )
+        UPDATE settlement_resources r
+        SET quantity = t.quantity
+        FROM totals t
+        WHERE r.settlement_resource_id = t.keep_id
+    """)
+    op.execute("""
+        DELETE FROM settlement_resources r
+        USING settlement_resources k
+        WHERE r.settlement_id = k.settlement_id
+          AND r.resource_type_id = k.resource_type_id
+          AND r.settlement_resource_id > k.settlement_resource_id
+    """)
+
+    # Conflict target of the batched production upsert
+    op.create_unique_constraint(
+        'uq_settlement_resources_settlement_resource', 'settlement_resources', ['settlement_id', 'resource_type_id']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_settlement_resources_settlement_resource', 'settlement_resources', type_='unique')
@@ -136,6 +136,18 @@ class TestTraderState(unittest.TestCase):
         rest_actions = [a for a in actions if a.action_type == "rest"]
         self.assertEqual(len(rest_actions), 1)
         
+    def test_move_risk_from_route_danger(self):
+        """Test that move actions carry the danger of their route as risk level."""
+        route_table = MagicMock()
+        route_table.route.side_effect = lambda start, end: (
+            MagicMock(danger_level=5) if end == "settlement_2" else None
+        )
+        state = TraderState(self.trader_data, dict(self.world_data, route_table=route_table))
+        
+        risks = {a.destination_id: a.risk_level for a in state.get_legal_actions() if a.action_type == "move"}
+        self.assertEqual(risks, {"settlement_2": 0.5, "settlement_3": 0.0})
+        route_table.route.assert_any_call("settlement_1", "settlement_2")
+        
     def test_apply_action_move(self):
         """Test applying a move action."""
         # Create a move action to settlement_3 (Pine Forest)
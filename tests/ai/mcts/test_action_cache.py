@@ -0,0 +1,122 @@
+import unittest
+import copy
+import random
+from app.ai.mcts.action_cache import ActionCache, freeze
+from app.ai.mcts.states import TraderState, AnimalGroupState, VillagerState
+from tests.ai.mcts.test_transition import build_state_fixtures, random_rollout
+
+def entity_data(state):
+    """Get the entity data dict of a cached state class."""
+    for attribute in ("trader_data", "group_data", "villager_data"):
+        if hasattr(state, attribute):
+            return getattr(state, attribute)
+    raise AttributeError(attribute)
+
+def uncached_copy(state):
+    """Rebuild a state from its data, with a cache of its own."""
+    new_state = type(state)(copy.deepcopy(entity_data(state)), state.world_data)
+    if hasattr(state, "simulation_days"):
+        new_state.simulation_days = state.simulation_days
+    return new_state
+
+class TestActionCache(unittest.TestCase):
+    def test_actions_built_once_per_key(self):
+        """Test that action lists are built once per key and bypassed for None."""
+        cache = ActionCache()
+        calls = []
+        build = lambda: calls.append(1) or ["rest"]
+        
+        self.assertIs(cache.actions("a", build), cache.actions("a", build))
+        self.assertEqual(len(calls), 1)
+        cache.actions(None, build)
+        cache.actions(None, build)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    
+    def test_lru_bound(self):
+        """Test that the least recently used action list is evicted."""
+        cache = ActionCache(max_entries=2)
+        cache.actions("a", list)
+        cache.actions("b", list)
+        cache.actions("a", list)
+        cache.actions("c", list)
+        self.assertEqual(len(cache), 2)
+        cache.actions("b", list)
+        self.assertEqual(cache.misses, 4)
+    
+    def test_value_computed_once(self):
+        """Test that derived values are computed once per key."""
+        cache = ActionCache()
+        calls = []
+        compute = lambda: calls.append(1) or 0.7
+        self.assertEqual(cache.value(("score", "s1"), compute), 0.7)
+        self.assertEqual(cache.value(("score", "s1"), compute), 0.7)
+        self.assertEqual(len(calls), 1)
+    
+    def test_freeze(self):
+        """Test key parts for entity mappings."""
+        self.assertEqual(freeze({"a": 1}), frozenset({("a", 1)}))
+        self.assertEqual(freeze(None), frozenset())
+        self.assertIsNone(freeze({"a": [1]}))
+        self.assertIsNone(freeze(["item_1"]))
+
+class TestCachedStates(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        self.states = [state for state in build_state_fixtures()
+                       if type(state) in (TraderState, AnimalGroupState, VillagerState)]
+    
+    def test_states_share_one_cache(self):
+        """Test that every state of a rollout uses the root's cache."""
+        random.seed(3)
+        for root in self.states:
+            with self.subTest(state=type(root).__name__):
+                states = random_rollout(root, steps=10)
+                caches = {id(state._get_action_cache()) for state in states}
+                self.assertEqual(len(caches), 1)
+    
+    def test_cached_actions_match_fresh_generation(self):
+        """Test that cached actions and scores equal a fresh, uncached generation."""
+        for seed in range(5):
+            random.seed(seed)
+            for root in self.states:
+                with self.subTest(state=type(root).__name__, seed=seed):
+                    for state in random_rollout(root, steps=15):
+                        fresh = uncached_copy(state)
+                        self.assertEqual([action.to_dict() for action in state.get_legal_actions()],
+                                         [action.to_dict() for action in fresh.get_legal_actions()])
+                        if isinstance(state, TraderState):
+                            self.assertEqual(sorted(state.get_action_probabilities().values()),
+                                             sorted(fresh.get_action_probabilities().values()))
+    
+    def test_repeated_situations_hit_the_cache(self):
+        """Test that resting in place reuses the action list."""
+        trader = self.states[0]
+        rest = next(action for action in trader.get_legal_actions() if action.action_type == "rest")
+        rested = trader.apply_action(rest)
+        self.assertIs(rested.get_legal_actions(), trader.get_legal_actions())
+        self.assertGreaterEqual(trader._get_action_cache().hits, 1)
+    
+    def test_settlement_score_computed_once(self):
+        """Test that settlement scores are shared by the states of a search."""
+        trader = self.states[0]
+        calls = []
+        original = TraderState._compute_settlement_score
+        
+        def counting(state, settlement_id):
+            calls.append(settlement_id)
+            return original(state, settlement_id)
+        
+        TraderState._compute_settlement_score = counting
+        try:
+            random.seed(1)
+            for _ in range(20):
+                for state in random_rollout(trader, steps=10):
+                    state.get_reward()
+        finally:
+            TraderState._compute_settlement_score = original
+        
+        self.assertLessEqual(len(calls), len(trader.world_data["settlements"]))
+
+if __name__ == "__main__":
+    unittest.main()
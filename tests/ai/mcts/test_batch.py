@@ -0,0 +1,115 @@
+import unittest
+import random
+from app.ai.mcts.batch import BatchMCTS
+from app.ai.mcts.core import MCTS
+from app.ai.mcts.states.trader_state import TraderState
+from tests.ai.mcts.test_transition import build_state_fixtures, random_rollout
+
+class TestBatchMCTS(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(5)
+        
+        # Each agent walks a line towards its own target position
+        self.get_legal_actions = lambda s: [-1, 1] if s[1] < 3 else []
+        self.apply_action = lambda s, a: (s[0] + a, s[1] + 1, s[2])
+        self.is_terminal = lambda s: s[1] >= 3
+        self.get_reward = lambda s: -abs(s[0] - s[2])
+    
+    def test_one_decision_per_agent(self):
+        """Test that every agent gets its own best action."""
+        root_states = [(0, 0, 3), (0, 0, -3), (0, 0, 3)]
+        mcts = BatchMCTS()
+        best_actions = mcts.search_batch(
+            root_states, self.get_legal_actions, self.apply_action,
+            self.is_terminal, self.get_reward, num_simulations=100
+        )
+        
+        self.assertEqual(best_actions, [1, -1, 1])
+        self.assertEqual(len(mcts.agent_stats), 3)
+        self.assertEqual(mcts.decision_stats["agents"], 3)
+        self.assertEqual(mcts.decision_stats["simulations"], 300)
+        for stats in mcts.agent_stats:
+            self.assertEqual(stats["visits"], 100)
+            self.assertEqual(stats["simulations"], 100)
+    
+    def test_batch_reward_fn(self):
+        """Test that leaf states are evaluated with one call per round."""
+        calls = []
+        
+        def batch_reward_fn(states):
+            calls.append(len(states))
+            return [self.get_reward(state) for state in states]
+        
+        mcts = BatchMCTS()
+        mcts.search_batch(
+            [(0, 0, 3), (0, 0, -3)], self.get_legal_actions, self.apply_action,
+            self.is_terminal, num_simulations=20, batch_reward_fn=batch_reward_fn
+        )
+        
+        self.assertEqual(len(calls), 20)
+        self.assertTrue(all(count <= 2 for count in calls))
+    
+    def test_agents_without_actions(self):
+        """Test that agents with terminal roots get no action."""
+        mcts = BatchMCTS()
+        best_actions = mcts.search_batch(
+            [(0, 3, 0), (0, 0, 3)], self.get_legal_actions, self.apply_action,
+            self.is_terminal, self.get_reward, num_simulations=20
+        )
+        self.assertIsNone(best_actions[0])
+        self.assertEqual(best_actions[1], 1)
+    
+    def test_reward_function_required(self):
+        """Test that a reward function must be given."""
+        with self.assertRaises(ValueError):
+            BatchMCTS().search_batch([(0, 0, 0)], self.get_legal_actions, self.apply_action,
+                                     self.is_terminal, num_simulations=1)
+    
+    def test_options_are_passed_to_mcts(self):
+        """Test that the MCTS options apply and the storage is always an array tree."""
+        mcts = BatchMCTS(tree_storage="node", max_rollout_depth=1, transposition_table_size=8)
+        self.assertEqual(mcts.tree_storage, "array")
+        mcts.search_batch([(0, 0, 3)], self.get_legal_actions, self.apply_action,
+                          self.is_terminal, self.get_reward, num_simulations=10,
+                          state_key_fn=lambda s: s[:2])
+        self.assertIn("transposition", mcts.agent_stats[0])
+
+class TestBatchTraderSearch(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(11)
+        self.state = build_state_fixtures()[0]
+    
+    def test_batch_rewards_match_get_reward(self):
+        """Test that batched trader rewards equal the per-state rewards."""
+        states = [s for _ in range(10) for s in random_rollout(self.state)]
+        rewards = TraderState.batch_rewards(states)
+        
+        self.assertEqual(len(rewards), len(states))
+        for state, reward in zip(states, rewards):
+            self.assertAlmostEqual(reward, state.get_reward())
+    
+    def test_many_traders_share_one_world(self):
+        """Test a batched search over traders sharing one world snapshot."""
+        traders = []
+        for i in range(20):
+            trader_data = dict(self.state.trader_data, trader_id=f"trader_{i}", gold=100 * i)
+            traders.append(TraderState(trader_data, self.state.world_data))
+        
+        mcts = BatchMCTS(max_rollout_depth=10)
+        best_actions = mcts.search_batch(
+            traders,
+            lambda s: s.get_legal_actions(),
+            lambda s, a: s.apply_action(a),
+            lambda s: s.is_terminal(),
+            num_simulations=30,
+            batch_reward_fn=TraderState.batch_rewards
+        )
+        
+        self.assertEqual(len(best_actions), 20)
+        for state, action in zip(traders, best_actions):
+            self.assertIn(action.action_type, {a.action_type for a in state.get_legal_actions()})
+
+if __name__ == "__main__":
+    unittest.main()
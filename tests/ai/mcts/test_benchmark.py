@@ -0,0 +1,203 @@
+import unittest
+import copy
+import os
+import random
+import time
+from app.ai.mcts.core import MCTS
+from app.ai.mcts.states.trader_state import TraderState
+from app.ai.mcts.action_cache import ActionCache
+from app.ai.mcts.rollout import LinearValueModel, RandomRolloutPolicy, collect_value_samples
+from tests.ai.mcts.test_transition import build_state_fixtures
+
+BENCHMARK = os.environ.get("MCTS_BENCHMARK") == "1"
+
+# Decisions played per trader when comparing decision quality
+EPISODE_DECISIONS = 8
+
+def build_large_trader_world(num_settlements=200, items_per_market=20):
+    """Build a trader world with a realistic number of settlements and markets."""
+    settlement_ids = [f"settlement_{i}" for i in range(num_settlements)]
+    world_data = {"settlements": {}, "markets": {}, "items": {}}
+    
+    for i in range(items_per_market * 2):
+        world_data["items"][f"item_{i}"] = {"base_value": 10 + i, "name": f"Item {i}"}
+    
+    for i, settlement_id in enumerate(settlement_ids):
+        neighbours = [settlement_ids[(i + offset) % num_settlements] for offset in (1, 2, 3)]
+        world_data["settlements"][settlement_id] = {
+            "name": f"Settlement {i}",
+            "biome": random.choice(["forest", "plains", "mountains"]),
+            "connections": [
+                {"destination_id": n, "destination": n, "path": [f"area_{i}_{n}"]}
+                for n in neighbours
+            ]
+        }
+        world_data["markets"][settlement_id] = {
+            "selling": {f"item_{j}": 20 + j for j in range(items_per_market)},
+            "buying": {f"item_{j}": 30 + j for j in range(items_per_market, items_per_market * 2)}
+        }
+    
+    return world_data
+
+class LegacyCopyTraderState(TraderState):
+    """TraderState with the old transition cost: a deepcopy of trader and world per step."""
+    
+    def apply_action(self, action):
+        new_state = super().apply_action(action)
+        legacy_state = LegacyCopyTraderState(copy.deepcopy(new_state.trader_data),
+                                             copy.deepcopy(new_state.world_data))
+        legacy_state.simulation_days = new_state.simulation_days
+        return legacy_state
+
+class UncachedTraderState(TraderState):
+    """TraderState that regenerates its actions and scores in every state."""
+    
+    def _get_action_cache(self):
+        return ActionCache()
+    
+    def apply_action(self, action):
+        new_state = super().apply_action(action)
+        uncached_state = UncachedTraderState(new_state.trader_data, new_state.world_data)
+        uncached_state.simulation_days = new_state.simulation_days
+        return uncached_state
+
+@unittest.skipUnless(BENCHMARK, "Set MCTS_BENCHMARK=1 (or run_tests.py --benchmark) to run benchmarks")
+class TestTransitionBenchmark(unittest.TestCase):
+    """Benchmarks for the copy-on-write state transitions."""
+    
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(1)
+        self.trader_data = {
+            "trader_id": "trader_1",
+            "current_location_id": "settlement_0",
+            "gold": 400,
+            "inventory": {"item_0": 2},
+            "visited_settlements": ["settlement_0"]
+        }
+        self.world_data = build_large_trader_world()
+    
+    def _time_search(self, state_cls, num_simulations=100, max_rollout_depth=10, rollout_policy=None):
+        """Run a search and return the time per simulation in milliseconds."""
+        root_state = state_cls(copy.deepcopy(self.trader_data), self.world_data)
+        mcts = MCTS(tree_storage="array", max_rollout_depth=max_rollout_depth, rollout_policy=rollout_policy)
+        start = time.perf_counter()
+        mcts.search(
+            root_state,
+            lambda s: s.get_legal_actions(),
+            lambda s, a: s.apply_action(a),
+            lambda s: s.is_terminal(),
+            lambda s: s.get_reward(),
+            num_simulations=num_simulations
+        )
+        return (time.perf_counter() - start) * 1000 / num_simulations
+    
+    def test_per_simulation_cost(self):
+        """Compare the per-simulation cost of shared and deep-copied world snapshots."""
+        legacy_ms = self._time_search(LegacyCopyTraderState)
+        shared_ms = self._time_search(TraderState)
+        
+        print(f"\nTrader search, {len(self.world_data['settlements'])} settlements: "
+              f"deepcopy {legacy_ms:.2f} ms/simulation, copy-on-write {shared_ms:.2f} ms/simulation "
+              f"({legacy_ms / shared_ms:.1f}x faster)")
+        self.assertLess(shared_ms, legacy_ms)
+    
+    def test_action_cache_cost(self):
+        """Compare the per-simulation cost with and without the shared action cache."""
+        uncached_ms = self._time_search(UncachedTraderState, num_simulations=300)
+        cached_ms = self._time_search(TraderState, num_simulations=300)
+        
+        print(f"\nTrader search, {len(self.world_data['settlements'])} settlements: "
+              f"uncached actions {uncached_ms:.2f} ms/simulation, action cache {cached_ms:.2f} ms/simulation "
+              f"({uncached_ms / cached_ms:.1f}x faster)")
+    
+    def test_rollout_policy_cost(self):
+        """Compare the per-simulation cost of the rollout policies."""
+        root_state = TraderState(copy.deepcopy(self.trader_data), self.world_data)
+        samples = collect_value_samples(
+            [root_state], lambda s: s.get_legal_actions(), lambda s, a: s.apply_action(a),
+            lambda s: s.is_terminal(), lambda s: s.get_reward(), rollouts_per_state=50, max_depth=10
+        )
+        value_model = LinearValueModel().fit(*samples)
+        
+        random_ms = self._time_search(TraderState, num_simulations=300)
+        truncated_ms = self._time_search(TraderState, num_simulations=300, max_rollout_depth=3,
+                                         rollout_policy=RandomRolloutPolicy(value_model=value_model))
+        
+        print(f"\nTrader search, {len(self.world_data['settlements'])} settlements: "
+              f"random rollouts {random_ms:.2f} ms/simulation, "
+              f"depth 3 + value model {truncated_ms:.2f} ms/simulation")
+    
+    def test_rollout_policy_decisions(self):
+        """Compare value-model searches with uniform-rollout searches of ten times the simulations."""
+        # Items every market buys, so selling and exploring both pay off and their order matters
+        trader_data = dict(self.trader_data, inventory={"item_39": 3, "item_30": 3, "item_25": 2})
+        start_ids = [f"settlement_{i}" for i in range(0, 100, 20)]
+        
+        def root_state(start_id):
+            return TraderState(dict(copy.deepcopy(trader_data), current_location_id=start_id,
+                                    visited_settlements=[start_id]), self.world_data)
+        
+        samples = collect_value_samples(
+            [root_state(start_id) for start_id in start_ids], lambda s: s.get_legal_actions(),
+            lambda s, a: s.apply_action(a), lambda s: s.is_terminal(), lambda s: s.get_reward(),
+            rollouts_per_state=20, max_depth=10
+        )
+        value_model = LinearValueModel().fit(*samples)
+        
+        def play(num_simulations, **options):
+            """Let every trader make its decisions with a search; return the mean reward reached."""
+            rewards = []
+            for start_id in start_ids:
+                for seed in range(3):
+                    state = root_state(start_id)
+                    for step in range(EPISODE_DECISIONS):
+                        if state.is_terminal():
+                            break
+                        mcts = MCTS(tree_storage="array", seed=seed * 100 + step, **options)
+                        state = state.apply_action(mcts.search_state(state, num_simulations))
+                    rewards.append(state.get_reward())
+            return sum(rewards) / len(rewards)
+        
+        truncated = dict(max_rollout_depth=3, rollout_policy=RandomRolloutPolicy(value_model=value_model))
+        results = {}
+        for name, num_simulations, options in (("uniform rollouts", 100, dict(max_rollout_depth=10)),
+                                               ("uniform rollouts", 1000, dict(max_rollout_depth=10)),
+                                               ("depth 3 + value model", 100, truncated)):
+            start = time.perf_counter()
+            reward = play(num_simulations, **options)
+            results[(name, num_simulations)] = (reward, time.perf_counter() - start)
+        
+        print(f"\nTrader rewards after {EPISODE_DECISIONS} decisions:")
+        for (name, num_simulations), (reward, seconds) in results.items():
+            print(f"  {name}, {num_simulations} simulations/decision: mean reward {reward:.2f} ({seconds:.1f} s)")
+        # With the value model, a tenth of the simulations must close (nearly) all of the gap
+        # between uniform rollouts at 100 and at 1000 simulations
+        short_reward = results[("uniform rollouts", 100)][0]
+        long_reward = results[("uniform rollouts", 1000)][0]
+        self.assertGreaterEqual(results[("depth 3 + value model", 100)][0],
+                                long_reward - 0.25 * abs(long_reward - short_reward))
+    
+    def test_per_transition_cost(self):
+        """Compare the per-step transition cost of every state class."""
+        for state in build_state_fixtures():
+            action = state.get_legal_actions()[0]
+            entity_key = next(key for key in vars(state) if key.endswith("_data") and key != "world_data")
+            runs = 500
+            
+            start = time.perf_counter()
+            for _ in range(runs):
+                copy.deepcopy(getattr(state, entity_key))
+                copy.deepcopy(state.world_data)
+            legacy_us = (time.perf_counter() - start) * 1e6 / runs
+            
+            start = time.perf_counter()
+            for _ in range(runs):
+                state.apply_action(action)
+            shared_us = (time.perf_counter() - start) * 1e6 / runs
+            
+            print(f"{type(state).__module__}.{type(state).__name__}: deepcopy alone {legacy_us:.1f} us, "
+                  f"full apply_action {shared_us:.1f} us")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import random
+import time
+import numpy as np
+from app.ai.mcts.core import MCTS
+from app.ai.mcts.batch import BatchMCTS
+from app.ai.mcts.budget import (
+    SearchBudget, STOP_SIMULATIONS, STOP_TIME, STOP_NODES, STOP_MEMORY, STOP_EARLY, STOP_NO_ACTIONS
+)
+
+def no_nodes():
+    return 0
+
+def no_visits():
+    return np.zeros(0, dtype=np.int64)
+
+class TestSearchBudget(unittest.TestCase):
+    def test_requires_a_bound(self):
+        """Test that a budget without any limit is rejected."""
+        with self.assertRaises(ValueError):
+            SearchBudget()
+        with self.assertRaises(ValueError):
+            MCTS().search(0, lambda s: [1], lambda s, a: s + a, lambda s: False,
+                          lambda s: 0.0, num_simulations=None)
+    
+    def test_simulation_limit(self):
+        """Test that the simulation limit stops the search."""
+        budget = SearchBudget(num_simulations=10)
+        self.assertIsNone(budget.stop_reason(9, no_nodes, no_nodes, no_visits))
+        self.assertEqual(budget.stop_reason(10, no_nodes, no_nodes, no_visits), STOP_SIMULATIONS)
+    
+    def test_node_and_memory_limits(self):
+        """Test the node and memory limits."""
+        budget = SearchBudget(max_nodes=100, max_memory_bytes=1000)
+        self.assertIsNone(budget.stop_reason(0, lambda: 99, lambda: 999, no_visits))
+        self.assertEqual(budget.stop_reason(0, lambda: 100, lambda: 0, no_visits), STOP_NODES)
+        self.assertEqual(budget.stop_reason(0, lambda: 0, lambda: 1000, no_visits), STOP_MEMORY)
+    
+    def test_early_stopping(self):
+        """Test that the search stops once the best child cannot be overtaken."""
+        budget = SearchBudget(num_simulations=100, early_stopping=True)
+        
+        # 20 simulations left, lead of 15: the runner-up could still catch up
+        self.assertIsNone(budget.stop_reason(80, no_nodes, no_nodes, lambda: np.array([50, 35, 5])))
+        # 10 simulations left, lead of 15: decided
+        self.assertEqual(budget.stop_reason(90, no_nodes, no_nodes, lambda: np.array([55, 40, 5])), STOP_EARLY)
+    
+    def test_early_stopping_needs_a_bound(self):
+        """Test that early stopping never triggers without a simulation or time limit."""
+        budget = SearchBudget(max_nodes=10 ** 9, early_stopping=True)
+        self.assertIsNone(budget.stop_reason(1000, no_nodes, no_nodes, lambda: np.array([1000, 0])))
+
+class TestAnytimeSearch(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(13)
+        
+        # Pick a number from 0-9 on each of three steps; higher is better
+        self.get_legal_actions = lambda s: list(range(10)) if len(s) < 3 else []
+        self.apply_action = lambda s, a: s + (a,)
+        self.is_terminal = lambda s: len(s) >= 3
+        self.get_reward = lambda s: sum(s) / 27.0
+    
+    def _search(self, mcts, num_simulations):
+        return mcts.search((), self.get_legal_actions, self.apply_action,
+                           self.is_terminal, self.get_reward, num_simulations)
+    
+    def test_time_budget(self):
+        """Test that a time budget bounds the search for both storages."""
+        for tree_storage in MCTS.TREE_STORAGES:
+            with self.subTest(tree_storage=tree_storage):
+                slow_terminal = lambda s: time.sleep(0.0005) or self.is_terminal(s)
+                mcts = MCTS(tree_storage=tree_storage, time_budget_ms=30)
+                
+                start = time.perf_counter()
+                best_action = mcts.search((), self.get_legal_actions, self.apply_action,
+                                          slow_terminal, self.get_reward, None)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                
+                self.assertIsNotNone(best_action)
+                self.assertEqual(mcts.decision_stats["stop_reason"], STOP_TIME)
+                self.assertGreater(mcts.decision_stats["simulations"], 0)
+                self.assertLess(elapsed_ms, 500)
+    
+    def test_node_budget(self):
+        """Test that a node budget bounds the tree size."""
+        for tree_storage in MCTS.TREE_STORAGES:
+            with self.subTest(tree_storage=tree_storage):
+                mcts = MCTS(tree_storage=tree_storage, max_nodes=50)
+                self._search(mcts, 10000)
+                self.assertEqual(mcts.decision_stats["stop_reason"], STOP_NODES)
+                self.assertLess(mcts.decision_stats["simulations"], 10000)
+    
+    def test_memory_budget(self):
+        """Test that a memory budget bounds the tree size."""
+        mcts = MCTS(tree_storage="array", max_memory_mb=0.05)
+        self._search(mcts, 100000)
+        self.assertEqual(mcts.decision_stats["stop_reason"], STOP_MEMORY)
+    
+    def test_early_stopping_saves_simulations(self):
+        """Test that early stopping ends the search before the simulation limit."""
+        # One dominant action at the root
+        get_legal_actions = lambda s: [0, 1] if not s else []
+        get_reward = lambda s: 1.0 if s == (1,) else 0.0
+        
+        for tree_storage in MCTS.TREE_STORAGES:
+            with self.subTest(tree_storage=tree_storage):
+                mcts = MCTS(tree_storage=tree_storage, early_stopping=True, exploration_weight=0.1)
+                best_action = mcts.search((), get_legal_actions, self.apply_action,
+                                          lambda s: len(s) >= 1, get_reward, 1000)
+                
+                self.assertEqual(best_action, 1)
+                self.assertEqual(mcts.decision_stats["stop_reason"], STOP_EARLY)
+                self.assertLess(mcts.decision_stats["simulations"], 1000)
+    
+    def test_stats_report_simulations(self):
+        """Test that the stats report the simulations done and the stop reason."""
+        mcts = MCTS(tree_storage="array")
+        self._search(mcts, 40)
+        self.assertEqual(mcts.decision_stats["simulations"], 40)
+        self.assertEqual(mcts.decision_stats["stop_reason"], STOP_SIMULATIONS)
+        self.assertIn("elapsed_ms", mcts.decision_stats)
+    
+    def test_no_actions(self):
+        """Test that a root without actions stops immediately, even with only a time budget."""
+        for tree_storage in MCTS.TREE_STORAGES:
+            with self.subTest(tree_storage=tree_storage):
+                mcts = MCTS(tree_storage=tree_storage, time_budget_ms=10000)
+                best_action = mcts.search((1, 2, 3), self.get_legal_actions, self.apply_action,
+                                          self.is_terminal, self.get_reward, None)
+                self.assertIsNone(best_action)
+                self.assertEqual(mcts.decision_stats["stop_reason"], STOP_NO_ACTIONS)
+                self.assertEqual(mcts.decision_stats["simulations"], 0)
+    
+    def test_batch_time_budget(self):
+        """Test that a time budget bounds a batched search."""
+        mcts = BatchMCTS(time_budget_ms=20)
+        best_actions = mcts.search_batch([(), ()], self.get_legal_actions, self.apply_action,
+                                         self.is_terminal, self.get_reward, num_simulations=None)
+        self.assertEqual(len(best_actions), 2)
+        self.assertEqual(mcts.decision_stats["stop_reason"], STOP_TIME)
+
+if __name__ == "__main__":
+    unittest.main()
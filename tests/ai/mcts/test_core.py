@@ -1,7 +1,10 @@
 import unittest
 from unittest.mock import patch, MagicMock, call
 import math
+import random
 from app.ai.mcts.core import MCTS, MCTSNode
+from app.ai.mcts.array_tree import ArrayTree, NO_NODE, ucb1_scores
+import numpy as np
 
 class TestMCTSNode(unittest.TestCase):
     def setUp(self):
@@ -203,5 +206,229 @@ class TestMCTS(unittest.TestCase):
         self.assertEqual(get_legal_actions_mock.call_count, 1)
         self.assertEqual(is_terminal_mock.call_count, 0)  # Not called in our simplified version
 
+class TestArrayTree(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        self.tree = ArrayTree(capacity=2)
+        self.root = self.tree.add_root()
+        
+    def test_initialization(self):
+        """Test the root node of a new tree."""
+        self.assertEqual(self.root, 0)
+        self.assertEqual(len(self.tree), 1)
+        self.assertEqual(self.tree.parent[self.root], NO_NODE)
+        self.assertEqual(self.tree.children(self.root), [])
+        self.assertFalse(self.tree.has_actions(self.root))
+        self.assertFalse(self.tree.is_fully_expanded(self.root))
+        
+    def test_expand(self):
+        """Test that expansion creates one child per legal action."""
+        actions = ["action1", "action2", "action3"]
+        self.tree.set_actions(self.root, actions)
+        self.assertTrue(self.tree.has_actions(self.root))
+        
+        children = []
+        while self.tree.has_untried_actions(self.root):
+            children.append(self.tree.expand(self.root))
+        
+        # Capacity grows past the initial allocation
+        self.assertEqual(len(self.tree), 4)
+        self.assertGreaterEqual(self.tree.capacity, 4)
+        self.assertTrue(self.tree.is_fully_expanded(self.root))
+        self.assertEqual(sorted(self.tree.children(self.root)), sorted(children))
+        self.assertEqual(sorted(self.tree.action(c) for c in children), actions)
+        for child in children:
+            self.assertEqual(self.tree.parent[child], self.root)
+        
+    def test_no_legal_actions(self):
+        """Test that a node without legal actions is never fully expanded."""
+        self.tree.set_actions(self.root, [])
+        self.assertTrue(self.tree.has_actions(self.root))
+        self.assertFalse(self.tree.has_untried_actions(self.root))
+        self.assertFalse(self.tree.is_fully_expanded(self.root))
+        self.assertIsNone(self.tree.best_child(self.root))
+        
+    def test_backpropagate(self):
+        """Test that results are added along the whole path."""
+        self.tree.set_actions(self.root, ["action1"])
+        child = self.tree.expand(self.root)
+        
+        self.tree.backpropagate([self.root, child], 1.5)
+        self.tree.backpropagate([self.root, child], -0.5)
+        
+        self.assertEqual(self.tree.visits[self.root], 2)
+        self.assertEqual(self.tree.visits[child], 2)
+        self.assertAlmostEqual(self.tree.value_sums[child], 1.0)
+        
+    def test_select_child(self):
+        """Test select_child uses the UCB1 formula."""
+        self.tree.set_actions(self.root, ["action1", "action2", "action3"])
+        children = [self.tree.expand(self.root) for _ in range(3)]
+        for child, (visits, value) in zip(children, [(10, 5.0), (5, 4.0), (1, 0.1)]):
+            self.tree.visits[child] = visits
+            self.tree.value_sums[child] = value
+        self.tree.visits[self.root] = 16
+        
+        ucb1_scores = {
+            child: self.tree.value_sums[child] / self.tree.visits[child] + 
+                   (math.log(16) / self.tree.visits[child])**0.5
+            for child in children
+        }
+        self.assertEqual(self.tree.select_child(self.root, 1.0), max(ucb1_scores, key=ucb1_scores.get))
+        self.assertEqual(self.tree.select_child(self.root, 10.0), children[2])
+        
+        # Most visited child
+        self.assertEqual(self.tree.best_child(self.root), children[0])
+
+class TestMCTSArrayStorage(unittest.TestCase):
+    def setUp(self):
+        """Set up a small deterministic game for each test method."""
+        # States are tuples of the actions taken; the game ends after two moves
+        # and the reward only depends on the first move.
+        self.rewards = {"good": 10.0, "bad": 1.0, "neutral": 5.0}
+        self.get_legal_actions_fn = lambda s: ["good", "bad", "neutral"]
+        self.apply_action_fn = lambda s, a: s + (a,)
+        self.is_terminal_fn = lambda s: len(s) >= 2
+        self.get_reward_fn = lambda s: self.rewards[s[0]] if s else 0.0
+        
+    def test_invalid_tree_storage(self):
+        """Test that an unknown tree storage is rejected."""
+        with self.assertRaises(ValueError):
+            MCTS(tree_storage="unknown")
+        
+    def test_search(self):
+        """Test that the array storage finds the best action."""
+        mcts = MCTS(exploration_weight=1.0, tree_storage="array")
+        best_action = mcts.search(
+            (),
+            self.get_legal_actions_fn,
+            self.apply_action_fn,
+            self.is_terminal_fn,
+            self.get_reward_fn,
+            num_simulations=50
+        )
+        
+        self.assertEqual(best_action, "good")
+        self.assertEqual(mcts.decision_stats["best_action"], "good")
+        self.assertEqual(mcts.decision_stats["visits"], 50)
+        self.assertEqual(mcts.decision_stats["children"], 3)
+        self.assertEqual(mcts.decision_stats["tree_storage"], "array")
+        self.assertLessEqual(mcts.decision_stats["nodes"], 51)
+        
+    def test_search_terminal_root(self):
+        """Test that a terminal root yields no action."""
+        mcts = MCTS(tree_storage="array")
+        best_action = mcts.search(
+            ("good", "bad"),
+            self.get_legal_actions_fn,
+            self.apply_action_fn,
+            self.is_terminal_fn,
+            self.get_reward_fn,
+            num_simulations=5
+        )
+        
+        self.assertIsNone(best_action)
+        self.assertEqual(mcts.decision_stats["children"], 0)
+        
+    def test_max_rollout_depth(self):
+        """Test that rollouts stop at the depth limit for non-terminating games."""
+        mcts = MCTS(tree_storage="array", max_rollout_depth=3)
+        best_action = mcts.search(
+            (),
+            self.get_legal_actions_fn,
+            self.apply_action_fn,
+            lambda s: False,
+            self.get_reward_fn,
+            num_simulations=30
+        )
+        
+        self.assertEqual(best_action, "good")
+
+class TestUCB1Scores(unittest.TestCase):
+    def test_scores(self):
+        """Test vectorized UCB1 scores match the scalar formula."""
+        visits = np.array([10, 5, 1, 0])
+        values = np.array([5.0, 4.0, 0.1, 0.0])
+        scores = ucb1_scores(visits, values, 16, exploration_weight=2.0)
+        
+        for i in range(3):
+            expected = values[i] / visits[i] + 2.0 * math.sqrt(math.log(16) / visits[i])
+            self.assertAlmostEqual(scores[i], expected)
+        
+        # Unvisited children are always tried first
+        self.assertEqual(scores[3], float('inf'))
+
+class TestMCTSSelection(unittest.TestCase):
+    def setUp(self):
+        """Set up a small deterministic game for each test method."""
+        random.seed(42)
+        
+        # Two moves deep; the best line is "good" followed by "good"
+        self.get_legal_actions_fn = lambda s: ["good", "bad", "neutral"]
+        self.apply_action_fn = lambda s, a: s + (a,)
+        self.is_terminal_fn = lambda s: len(s) >= 2
+        self.get_reward_fn = lambda s: sum({"good": 5.0, "bad": 0.0, "neutral": 2.0}[a] for a in s)
+        
+    def _search(self, mcts, num_simulations=60):
+        return mcts.search(
+            (),
+            self.get_legal_actions_fn,
+            self.apply_action_fn,
+            self.is_terminal_fn,
+            self.get_reward_fn,
+            num_simulations=num_simulations
+        )
+        
+    def test_node_storage_search(self):
+        """Test that the node storage runs a full selection phase."""
+        mcts = MCTS(exploration_weight=1.0)
+        self.assertEqual(self._search(mcts), "good")
+        self.assertEqual(mcts.decision_stats["visits"], 60)
+        self.assertEqual(mcts.decision_stats["children"], 3)
+        
+    def test_node_storage_terminal_root(self):
+        """Test that a terminal root yields no action with node storage."""
+        mcts = MCTS()
+        best_action = mcts.search(
+            ("good", "good"),
+            self.get_legal_actions_fn,
+            self.apply_action_fn,
+            self.is_terminal_fn,
+            self.get_reward_fn,
+            num_simulations=5
+        )
+        self.assertIsNone(best_action)
+        
+    def test_invalid_widening_constant(self):
+        """Test that a non-positive widening constant is rejected."""
+        with self.assertRaises(ValueError):
+            MCTS(widening_constant=0)
+        
+    def test_progressive_widening(self):
+        """Test that progressive widening limits the number of children."""
+        for tree_storage in MCTS.TREE_STORAGES:
+            # With 4 visits the root may only have ceil(0.5 * 4^0.5) = 1 child
+            mcts = MCTS(tree_storage=tree_storage, widening_constant=0.5)
+            self._search(mcts, num_simulations=4)
+            self.assertEqual(mcts.decision_stats["children"], 1)
+            
+            # Enough visits open up every action
+            mcts = MCTS(tree_storage=tree_storage, widening_constant=0.5)
+            self.assertEqual(self._search(mcts, num_simulations=400), "good")
+            self.assertEqual(mcts.decision_stats["children"], 3)
+        
+    def test_root_exploration_weight(self):
+        """Test that the root exploration constant only applies at the root."""
+        mcts = MCTS(exploration_weight=0.5, root_exploration_weight=3.0)
+        self.assertEqual(mcts._exploration_weight_at(0), 3.0)
+        self.assertEqual(mcts._exploration_weight_at(1), 0.5)
+        
+        mcts = MCTS(exploration_weight=0.5)
+        self.assertEqual(mcts._exploration_weight_at(0), 0.5)
+        
+        for tree_storage in MCTS.TREE_STORAGES:
+            mcts = MCTS(tree_storage=tree_storage, root_exploration_weight=2.0)
+            self.assertEqual(self._search(mcts), "good")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -3,6 +3,7 @@ from unittest.mock import patch
 import copy
 from app.ai.mcts.core import MCTS
 from app.ai.mcts.states.trader_state import TraderState, TraderAction
+from app.ai.mcts.states.player_state import PlayerState, PlayerAction
 
 class TestMCTSIntegration(unittest.TestCase):
     """Integration tests for MCTS with actual state implementations."""
@@ -377,5 +378,60 @@ class TestMCTSIntegration(unittest.TestCase):
         self.assertEqual(mcts_exploit.decision_stats["exploration_weight"], 0.1)
         self.assertEqual(mcts_explore.decision_stats["exploration_weight"], 2.0)
 
+    def test_array_storage_with_trader_state(self):
+        """Test the array tree storage with TraderState."""
+        mcts = MCTS(exploration_weight=1.0, tree_storage="array", max_rollout_depth=10)
+        best_action = mcts.search(
+            self.root_state,
+            lambda s: s.get_legal_actions(),
+            lambda s, a: s.apply_action(a),
+            lambda s: s.is_terminal(),
+            lambda s: s.get_reward(),
+            num_simulations=30
+        )
+        
+        self.assertIsInstance(best_action, TraderAction)
+        self.assertEqual(mcts.decision_stats["visits"], 30)
+        self.assertEqual(mcts.decision_stats["children"], len(self.root_state.get_legal_actions()))
+        
+        # The root state is never modified by the search
+        self.assertEqual(self.root_state.current_settlement_id, "settlement_1")
+        self.assertEqual(self.root_state.gold, 500)
+        
+    def test_array_storage_with_player_state(self):
+        """Test the array tree storage with a state that never terminates."""
+        player_data = {
+            "player_id": "player_123",
+            "current_location_id": "location_1",
+            "resources": {"wood": 10},
+            "skills": {"woodcutting": 3},
+            "health": 80,
+            "inventory": []
+        }
+        world_data = {
+            "locations": {
+                "location_1": {"name": "Valley Town", "biome": "plains", "resources": ["wood"]},
+                "location_2": {"name": "Forest Camp", "biome": "forest", "resources": ["wood"]}
+            },
+            "location_graph": {
+                "location_1": ["location_2"],
+                "location_2": ["location_1"]
+            }
+        }
+        root_state = PlayerState(player_data, world_data)
+        
+        mcts = MCTS(tree_storage="array", max_rollout_depth=5)
+        best_action = mcts.search(
+            root_state,
+            lambda s: s.get_legal_actions(),
+            lambda s, a: s.apply_action(a),
+            lambda s: s.is_terminal(),
+            lambda s: s.get_reward(),
+            num_simulations=20
+        )
+        
+        self.assertIsInstance(best_action, PlayerAction)
+        self.assertEqual(root_state.current_location_id, "location_1")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,161 @@
+import unittest
+import random
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.ai.mcts.core import MCTS, state_apply_action, state_is_terminal, state_legal_actions, state_reward
+from app.ai.mcts.batch import BatchMCTS
+from app.ai.mcts import parallel, settings
+from app.ai.mcts.parallel import merge_root_stats, tree_seeds
+from app.ai.mcts.settings import create_mcts, get_search_settings, CPU_COUNT
+from app.ai.mcts.states import FactionState, SettlementState
+from tests.ai.mcts.test_transition import build_state_fixtures
+
+def search(mcts, state, num_simulations=60):
+    """Run a search with the standard state callbacks."""
+    return mcts.search(
+        state,
+        lambda s: s.get_legal_actions(),
+        lambda s, a: s.apply_action(a),
+        lambda s: s.is_terminal(),
+        lambda s: s.get_reward(),
+        num_simulations=num_simulations
+    )
+
+def tearDownModule():
+    parallel.shutdown_pool()
+
+def merged_visits(mcts):
+    """Get the merged root statistics as comparable (action, visits) pairs."""
+    return [(str(action), visits) for action, visits, _ in mcts.root_stats]
+
+class TestRootParallelHelpers(unittest.TestCase):
+    def test_tree_seeds(self):
+        """Test that trees get consecutive seeds."""
+        self.assertEqual(tree_seeds(10, 3), [10, 11, 12])
+        self.assertEqual(len(tree_seeds(None, 4)), 4)
+    
+    def test_merge_root_stats(self):
+        """Test that equal actions from different trees are merged by value."""
+        merged = merge_root_stats([
+            [("a", 3, 1.5), ("b", 1, 0.5)],
+            [("b", 4, 2.0), ("c", 2, 1.0)]
+        ])
+        self.assertEqual(merged, [("a", 3, 1.5), ("b", 5, 2.5), ("c", 2, 1.0)])
+    
+    def test_invalid_worker_count(self):
+        """Test that at least one tree is required."""
+        with self.assertRaises(ValueError):
+            MCTS(root_parallel_workers=0)
+
+class TestRootParallelSearch(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        self.states = [s for s in build_state_fixtures() if isinstance(s, (FactionState, SettlementState))]
+    
+    def test_reproducible_with_seed(self):
+        """Test that root-parallel searches with the same seed give the same result."""
+        for state in self.states:
+            with self.subTest(state=type(state).__name__):
+                first = MCTS(tree_storage="array", max_rollout_depth=8, root_parallel_workers=3, seed=42)
+                second = MCTS(tree_storage="array", max_rollout_depth=8, root_parallel_workers=3, seed=42)
+                
+                first_action = first.search_state(state, 60)
+                second_action = second.search_state(state, 60)
+                
+                self.assertEqual(str(first_action), str(second_action))
+                self.assertEqual(merged_visits(first), merged_visits(second))
+                self.assertEqual(first.decision_stats["visits"], 3 * 60)
+                self.assertEqual(first.decision_stats["seeds"], [42, 43, 44])
+    
+    def test_sequential_fallback_matches_process_pool(self):
+        """Test that the in-process fallback searches the same trees."""
+        state = self.states[0]
+        pooled = MCTS(tree_storage="array", max_rollout_depth=8, root_parallel_workers=2, seed=7)
+        pooled.search_state(state, 60)
+        
+        with patch.object(parallel, "get_pool", return_value=None):
+            sequential = MCTS(tree_storage="array", max_rollout_depth=8, root_parallel_workers=2, seed=7)
+            sequential.search_state(state, 60)
+        
+        # Lambdas cannot be sent to the pool, so these trees are searched in process too
+        unpicklable = MCTS(tree_storage="array", max_rollout_depth=8, root_parallel_workers=2, seed=7)
+        search(unpicklable, state)
+        
+        self.assertEqual(merged_visits(pooled), merged_visits(sequential))
+        self.assertEqual(merged_visits(pooled), merged_visits(unpicklable))
+    
+    def test_searches_reuse_the_pool(self):
+        """Test that consecutive searches run in the same process pool."""
+        state = self.states[0]
+        pool = parallel.get_pool()
+        for seed in (1, 2):
+            MCTS(tree_storage="array", max_rollout_depth=8, root_parallel_workers=2, seed=seed).search_state(state, 20)
+        self.assertIs(parallel.get_pool(), pool)
+    
+    def test_single_tree_seed(self):
+        """Test that a seeded single-tree search is reproducible too."""
+        state = self.states[0]
+        first = MCTS(max_rollout_depth=8, seed=5)
+        second = MCTS(max_rollout_depth=8, seed=5)
+        search(first, state)
+        search(second, state)
+        self.assertEqual(merged_visits(first), merged_visits(second))
+    
+    def test_seed_leaves_global_random_alone(self):
+        """Test that seeded searches use their own generator instead of reseeding random."""
+        state = self.states[0]
+        random.seed(3)
+        expected = [random.random() for _ in range(3)]
+        random.seed(3)
+        for tree_storage in MCTS.TREE_STORAGES:
+            search(MCTS(tree_storage=tree_storage, max_rollout_depth=8, seed=5), state)
+        batch = BatchMCTS(max_rollout_depth=8, seed=5)
+        batch.search_batch([state], state_legal_actions, state_apply_action, state_is_terminal,
+                           state_reward, num_simulations=20)
+        self.assertEqual([random.random() for _ in range(3)], expected)
+    
+    def test_seeded_batch_is_reproducible(self):
+        """Test that a seeded batch search is reproducible."""
+        results = []
+        for _ in range(2):
+            batch = BatchMCTS(max_rollout_depth=8, seed=5)
+            batch.search_batch(self.states[:2], state_legal_actions, state_apply_action, state_is_terminal,
+                               state_reward, num_simulations=30)
+            results.append([(str(stats["best_action"]), stats["value"]) for stats in batch.agent_stats])
+        self.assertEqual(results[0], results[1])
+
+class TestEntitySearchSettings(unittest.TestCase):
+    def test_expensive_entities_use_all_cores(self):
+        """Test that faction and settlement searches are root-parallel."""
+        self.assertEqual(get_search_settings("faction")["root_parallel_workers"], CPU_COUNT)
+        self.assertEqual(get_search_settings("settlement")["root_parallel_workers"], CPU_COUNT)
+        self.assertEqual(get_search_settings("trader")["root_parallel_workers"], 1)
+    
+    def test_create_mcts_overrides(self):
+        """Test that explicit options override the entity settings."""
+        mcts = create_mcts("faction", root_parallel_workers=2, seed=1)
+        self.assertEqual(mcts.root_parallel_workers, 2)
+        self.assertEqual(mcts.seed, 1)
+        self.assertEqual(mcts.tree_storage, "array")
+        
+        self.assertEqual(create_mcts("unknown").root_parallel_workers, 1)
+    
+    def test_daemon_processes_search_one_tree(self):
+        """Test that processes that may not start a pool search one tree and say so."""
+        with patch.object(settings.multiprocessing, "current_process", return_value=SimpleNamespace(daemon=True)), \
+             patch.object(settings, "_single_tree_warned", set()):
+            with self.assertLogs(settings.logger, level="WARNING") as logs:
+                self.assertEqual(create_mcts("faction", root_parallel_workers=4).root_parallel_workers, 1)
+                self.assertEqual(create_mcts("faction", root_parallel_workers=4).root_parallel_workers, 1)
+                self.assertEqual(create_mcts("settlement", root_parallel_workers=4).root_parallel_workers, 1)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("MCTS queue", logs.output[0])
+    
+    def test_decision_tasks_use_the_mcts_queue(self):
+        """Test that root-parallel decision tasks are routed away from the prefork workers."""
+        from app.workers.celery_app import MCTS_QUEUE, app
+        route = app.conf.task_routes["app.workers.settlement_worker.decide_settlement_action"]
+        self.assertEqual(route, {"queue": MCTS_QUEUE})
+
+if __name__ == "__main__":
+    unittest.main()
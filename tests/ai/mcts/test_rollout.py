@@ -0,0 +1,205 @@
+import unittest
+import random
+import numpy as np
+from app.ai.mcts.core import MCTS
+from app.ai.mcts.batch import BatchMCTS
+from unittest.mock import patch
+from app.ai.mcts import settings
+from app.ai.mcts.rollout import (
+    RandomRolloutPolicy, SoftmaxRolloutPolicy, LinearValueModel, action_scores, collect_value_samples
+)
+from app.ai.mcts.states import TraderState, AnimalGroupState
+from tests.ai.mcts.test_transition import build_state_fixtures
+
+class ScoredAction:
+    def __init__(self, name, score):
+        self.name = name
+        self.score = score
+
+class Line:
+    """Walk along a line; value_features() exposes the position."""
+    
+    def __init__(self, position=0, steps=0):
+        self.position = position
+        self.steps = steps
+    
+    def value_features(self):
+        return [float(self.position), float(self.steps)]
+
+class TestSoftmaxPolicy(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(0)
+        self.actions = [ScoredAction("low", 0.0), ScoredAction("high", 3.0)]
+    
+    def test_prefers_high_scores(self):
+        """Test that higher scored actions are sampled more often."""
+        policy = SoftmaxRolloutPolicy()
+        picks = [policy.choose(None, self.actions).name for _ in range(2000)]
+        share = picks.count("high") / len(picks)
+        # exp(3) / (1 + exp(3)) = 0.95
+        self.assertAlmostEqual(share, 0.95, delta=0.03)
+    
+    def test_temperature(self):
+        """Test that a high temperature approaches uniform sampling."""
+        policy = SoftmaxRolloutPolicy(temperature=100.0)
+        picks = [policy.choose(None, self.actions).name for _ in range(2000)]
+        self.assertAlmostEqual(picks.count("high") / len(picks), 0.5, delta=0.05)
+        with self.assertRaises(ValueError):
+            SoftmaxRolloutPolicy(temperature=0)
+    
+    def test_batch_matches_single_state_distribution(self):
+        """Test the segmented batch softmax against the per-state probabilities."""
+        policy = SoftmaxRolloutPolicy()
+        other = [ScoredAction("a", 1.0), ScoredAction("b", 1.0), ScoredAction("c", 1.0)]
+        counts = {"high": 0, "a": 0, "b": 0, "c": 0, "low": 0}
+        for _ in range(2000):
+            for action in policy.choose_batch([None, None], [self.actions, other]):
+                counts[action.name] += 1
+        
+        self.assertAlmostEqual(counts["high"] / 2000, 0.95, delta=0.03)
+        for name in ("a", "b", "c"):
+            self.assertAlmostEqual(counts[name] / 2000, 1 / 3, delta=0.05)
+        self.assertEqual(policy.choose_batch([], []), [])
+    
+    def test_seeded_sampling_is_reproducible(self):
+        """Test that sampling only depends on the generator it is given."""
+        policy = SoftmaxRolloutPolicy()
+        rng = random.Random(7)
+        first = [policy.choose(None, self.actions, rng).name for _ in range(50)]
+        first_batch = [action.name for action in policy.choose_batch([None] * 20, [self.actions] * 20, rng)]
+        rng = random.Random(7)
+        random.seed(1)
+        self.assertEqual(first, [policy.choose(None, self.actions, rng).name for _ in range(50)])
+        self.assertEqual(first_batch,
+                         [action.name for action in policy.choose_batch([None] * 20, [self.actions] * 20, rng)])
+
+class TestActionScores(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        fixtures = build_state_fixtures()
+        self.trader = next(state for state in fixtures if type(state) is TraderState)
+        self.group = next(state for state in fixtures if type(state) is AnimalGroupState)
+    
+    def test_uses_action_scores(self):
+        """Test that actions with a score attribute are scored by it."""
+        actions = self.group.get_legal_actions()
+        np.testing.assert_array_equal(action_scores(self.group, actions), [a.score for a in actions])
+    
+    def test_uses_trader_probabilities(self):
+        """Test that trader actions are scored by their log preference probability."""
+        actions = self.trader.get_legal_actions()
+        probabilities = self.trader.get_action_probabilities()
+        np.testing.assert_allclose(np.exp(action_scores(self.trader, actions)),
+                                   [probabilities[a] for a in actions])
+
+class TestValueModel(unittest.TestCase):
+    def test_fit_and_predict(self):
+        """Test that the linear model recovers a linear value function."""
+        states = [Line(position, steps) for position in range(-5, 6) for steps in range(4)]
+        rewards = [2.0 * s.position - 0.5 * s.steps + 1.0 for s in states]
+        model = LinearValueModel(alpha=1e-6).fit(states, rewards)
+        
+        np.testing.assert_allclose(model.predict([Line(10, 2)]), [20.0], atol=1e-3)
+        self.assertEqual(len(model.predict([])), 0)
+    
+    def test_unfitted_model(self):
+        """Test that an unfitted model is not used for truncated rollouts."""
+        model = LinearValueModel()
+        with self.assertRaises(ValueError):
+            model.predict([Line()])
+        with self.assertRaises(ValueError):
+            model.fit([], [])
+        self.assertIsNone(RandomRolloutPolicy(value_model=model).evaluate_truncated([Line()]))
+    
+    def test_collect_value_samples(self):
+        """Test that every visited state is labelled with its rollout's final reward."""
+        random.seed(2)
+        states, rewards = collect_value_samples(
+            [Line()], lambda s: [-1, 1], lambda s, a: Line(s.position + a, s.steps + 1),
+            lambda s: s.steps >= 4, lambda s: float(s.position), rollouts_per_state=3
+        )
+        self.assertEqual(len(states), 15)
+        self.assertEqual(len(rewards), 15)
+        for i in range(0, 15, 5):
+            self.assertTrue(all(reward == float(states[i + 4].position) for reward in rewards[i:i + 5]))
+    
+    def test_trader_value_features(self):
+        """Test that trader states expose fixed-size value features."""
+        states, rewards = collect_value_samples(
+            [next(s for s in build_state_fixtures() if type(s) is TraderState)],
+            lambda s: s.get_legal_actions(), lambda s, a: s.apply_action(a),
+            lambda s: s.is_terminal(), lambda s: s.get_reward(), rollouts_per_state=5, max_depth=5
+        )
+        model = LinearValueModel().fit(states, rewards)
+        self.assertEqual(len(model.coef), len(states[0].value_features()))
+
+class TestSearchWithPolicies(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(4)
+        # Three steps along a line: the further right, the better
+        self.search_args = (
+            lambda s: [ScoredAction(-1, 0.0), ScoredAction(1, 2.0)] if s.steps < 3 else [],
+            lambda s, a: Line(s.position + a.name, s.steps + 1),
+            lambda s: s.steps >= 3,
+            lambda s: float(s.position)
+        )
+    
+    def test_policies_find_best_action(self):
+        """Test that searches with each policy find the best action."""
+        for policy in (None, RandomRolloutPolicy(), SoftmaxRolloutPolicy()):
+            for tree_storage in MCTS.TREE_STORAGES:
+                with self.subTest(policy=type(policy).__name__, tree_storage=tree_storage):
+                    mcts = MCTS(tree_storage=tree_storage, rollout_policy=policy)
+                    self.assertEqual(mcts.search(Line(), *self.search_args, 100).name, 1)
+    
+    def test_truncated_rollouts_use_value_model(self):
+        """Test that rollouts cut off at the depth limit are valued by the model."""
+        model = LinearValueModel(alpha=1e-6).fit([Line(p) for p in range(-3, 4)], [100.0 + p for p in range(-3, 4)])
+        mcts = MCTS(tree_storage="array", max_rollout_depth=0,
+                    rollout_policy=RandomRolloutPolicy(value_model=model))
+        mcts.search(Line(), *self.search_args, 2)
+        # Both root children are cut off immediately and valued around 100
+        self.assertGreater(mcts.decision_stats["value"] / mcts.decision_stats["visits"], 90)
+    
+    def test_batch_search_with_policy(self):
+        """Test batched searches with a softmax policy and a value model."""
+        model = LinearValueModel(alpha=1e-6).fit([Line(p) for p in range(-3, 4)], [float(p) for p in range(-3, 4)])
+        mcts = BatchMCTS(max_rollout_depth=1, rollout_policy=SoftmaxRolloutPolicy(value_model=model))
+        best_actions = mcts.search_batch([Line(), Line(5)], *self.search_args[:3],
+                                         get_reward_fn=self.search_args[3], num_simulations=100)
+        self.assertEqual([action.name for action in best_actions], [1, 1])
+
+class TestValueModelSettings(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(6)
+        self.trader = next(s for s in build_state_fixtures() if type(s) is TraderState)
+        patcher = patch.dict(settings._value_models, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_trader_searches_cut_rollouts_off(self):
+        """Test that trader searches use the process-wide value model and a short rollout."""
+        mcts = settings.create_mcts("trader", sample_states=[self.trader])
+        self.assertEqual(mcts.max_rollout_depth, settings.VALUE_MODEL_SETTINGS["trader"]["rollout_depth"])
+        self.assertTrue(mcts.rollout_policy.value_model.is_fitted)
+        
+        again = settings.create_mcts("trader", sample_states=[self.trader], max_rollout_depth=5)
+        self.assertIs(again.rollout_policy.value_model, mcts.rollout_policy.value_model)
+        self.assertEqual(again.max_rollout_depth, 5)
+        self.assertIsNone(settings.create_mcts("trader").max_rollout_depth)
+        self.assertEqual(settings.get_rollout_settings("faction", [self.trader]), {})
+    
+    def test_full_rollouts_without_scikit_learn(self):
+        """Test that searches fall back to full rollouts when the model cannot be fitted."""
+        with patch.object(LinearValueModel, "fit", side_effect=ImportError("no sklearn")) as fit:
+            mcts = settings.create_mcts("trader", sample_states=[self.trader])
+            settings.create_mcts("trader", sample_states=[self.trader])
+        self.assertIsNone(mcts.max_rollout_depth)
+        self.assertIsNone(mcts.rollout_policy.value_model)
+        self.assertEqual(fit.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
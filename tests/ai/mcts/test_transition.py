@@ -0,0 +1,227 @@
+import unittest
+import copy
+import random
+from app.ai.mcts.transition import copy_entity_data, copy_world_path
+from app.ai.mcts.states import (
+    TraderState, AnimalState, AnimalGroupState, ItemState, FactionState,
+    VillagerState, SettlementState, EquipmentState, PlayerState
+)
+from app.ai.mcts.trader_state import TraderState as LegacyTraderState
+
+def build_state_fixtures():
+    """Build one state per state class, all sharing a small world."""
+    location_graph = {
+        "location_1": ["location_2", "location_3"],
+        "location_2": ["location_1", "location_3"],
+        "location_3": ["location_1", "location_2"]
+    }
+    world_data = {
+        "season": "summer",
+        "location_graph": location_graph,
+        "locations": {
+            "location_1": {"name": "Valley Town", "biome": "plains", "resources": ["wood", "stone"], "entities": ["trader_1"]},
+            "location_2": {"name": "Forest Camp", "biome": "forest", "resources": ["wood"], "entities": []},
+            "location_3": {"name": "Mountain Outpost", "biome": "mountains", "resources": ["ore"], "entities": []}
+        },
+        "settlements": {
+            "location_1": {
+                "name": "Valley Town",
+                "biome": "plains",
+                "connections": [
+                    {"destination_id": "location_2", "destination": "Forest Camp", "path": ["area_1"]},
+                    {"destination_id": "location_3", "destination": "Mountain Outpost", "path": []}
+                ]
+            },
+            "location_2": {"name": "Forest Camp", "biome": "forest", "connections": []},
+            "location_3": {"name": "Mountain Outpost", "biome": "mountains", "connections": []}
+        },
+        "markets": {
+            "location_1": {"selling": {"item_3": 50}, "buying": {"item_1": 60}}
+        },
+        "items": {
+            "item_1": {"id": "item_1", "name": "Iron Helmet", "slot_type": "head", "is_equippable": True, "quality": 60, "durability": 60},
+            "item_2": {"id": "item_2", "name": "Steel Helmet", "slot_type": "head", "is_equippable": True, "quality": 90, "durability": 90},
+            "item_3": {"id": "item_3", "name": "Sword", "slot_type": "weapon", "is_equippable": True, "quality": 70, "durability": 50}
+        },
+        "characters": {"player_1": {"inventory_items": ["item_2", "item_3"]}},
+        "entities": {"trader_1": {"id": "trader_1", "name": "Merchant", "type": "trader"}},
+        "factions": {"faction_2": {"id": "faction_2", "current_location_id": "location_2", "strength": 40}},
+        "prey_data": {"location_1": [{"id": "rabbit", "difficulty": 0.2, "energy_value": 20}]},
+        "vegetation_data": {"location_1": {"grass": 50}}
+    }
+    
+    # Villagers read location resources as amounts rather than a list
+    villager_world_data = dict(world_data)
+    villager_world_data["locations"] = {
+        location_id: dict(location, resources={resource: 50 for resource in location["resources"]})
+        for location_id, location in world_data["locations"].items()
+    }
+    
+    return [
+        TraderState({
+            "trader_id": "trader_1", "current_location_id": "location_1", "gold": 600,
+            "inventory": {"item_1": 2}, "visited_settlements": ["location_1"]
+        }, world_data),
+        LegacyTraderState({
+            "trader_id": "trader_1", "current_location_id": "location_1", "gold": 600,
+            "inventory": {"item_1": 2}, "visited_settlements": ["location_1"]
+        }, world_data),
+        PlayerState({
+            "player_id": "player_1", "current_location_id": "location_1", "health": 80,
+            "resources": {"wood": 10}, "skills": {"woodcutting": 3}, "inventory": ["item_1"]
+        }, world_data),
+        EquipmentState({
+            "equipment_id": "equipment_1", "character_id": "player_1",
+            "slots": {"head": "item_1", "weapon": None},
+            "inventory": ["item_2", "item_3"]
+        }, world_data),
+        AnimalState({
+            "animal_id": "animal_1", "area_id": "location_1", "energy": 60, "health": 90,
+            "diet": ["rabbit"], "territory": ["location_1", "location_2"]
+        }, world_data),
+        AnimalGroupState({
+            "group_id": "group_1", "area_id": "location_1", "size": 5, "energy": 60, "health": 90,
+            "diet": ["grass"], "territory": ["location_1"]
+        }, world_data),
+        ItemState({
+            "id": "item_1", "current_owner": "player_1", "durability": 80,
+            "is_equippable": True, "value": 40
+        }, world_data),
+        FactionState({
+            "id": "faction_1", "current_location_id": "location_1", "gold": 800,
+            "resources": {"wood": 50}, "influence": 20, "members": ["member_1", "member_2"],
+            "enemies": ["faction_2"], "available_quests": ["quest_1"]
+        }, world_data),
+        VillagerState({
+            "id": "villager_1", "current_location_id": "location_1", "home_location_id": "location_1",
+            "work_location_id": "location_2", "profession": "farmer", "energy": 80,
+            "happiness": 60, "health": 90, "gold": 20, "needs": {"food": 50},
+            "skills": {"farming": 3}, "inventory": {}
+        }, villager_world_data),
+        SettlementState({
+            "id": "location_1", "settlement_type": "village", "population": 50,
+            "resources": {"wood": 100, "stone": 50, "food": 80}, "gold": 300,
+            "buildings": {"house": 5}, "prosperity": 10, "growth_rate": 1,
+            "happiness": 50, "defense_rating": 5, "connected_settlements": ["location_2"]
+        }, world_data)
+    ]
+
+def random_rollout(state, steps=15):
+    """Apply random legal actions and return every state visited."""
+    states = [state]
+    for _ in range(steps):
+        if state.is_terminal():
+            break
+        actions = state.get_legal_actions()
+        if not actions:
+            break
+        state = state.apply_action(random.choice(actions))
+        states.append(state)
+    return states
+
+class TestCopyEntityData(unittest.TestCase):
+    def test_copy_is_independent(self):
+        """Test that nested containers are copied."""
+        data = {
+            "gold": 100,
+            "inventory": {"item_1": 2},
+            "visited": ["a", "b"],
+            "tags": {"x"},
+            "goals": [{"progress": 10}]
+        }
+        copied = copy_entity_data(data)
+        self.assertEqual(copied, data)
+        
+        copied["inventory"]["item_1"] = 5
+        copied["visited"].append("c")
+        copied["tags"].add("y")
+        copied["goals"][0]["progress"] = 50
+        
+        self.assertEqual(data["inventory"]["item_1"], 2)
+        self.assertEqual(data["visited"], ["a", "b"])
+        self.assertEqual(data["tags"], {"x"})
+        self.assertEqual(data["goals"][0]["progress"], 10)
+    
+    def test_other_objects_are_deep_copied(self):
+        """Test that unknown objects fall back to deepcopy."""
+        class Marker:
+            def __init__(self):
+                self.values = [1]
+        
+        data = {"marker": Marker()}
+        copied = copy_entity_data(data)
+        self.assertIsNot(copied["marker"], data["marker"])
+        self.assertIsNot(copied["marker"].values, data["marker"].values)
+
+class TestCopyWorldPath(unittest.TestCase):
+    def test_only_written_entries_are_copied(self):
+        """Test path copying of world entries."""
+        world = {
+            "items": {"item_1": {"durability": 80}, "item_2": {"durability": 50}},
+            "locations": {"location_1": {}}
+        }
+        new_world = copy_world_path(world, "items", ["item_1"])
+        new_world["items"]["item_1"]["durability"] = 10
+        
+        self.assertEqual(world["items"]["item_1"]["durability"], 80)
+        self.assertIsNot(new_world["items"], world["items"])
+        self.assertIs(new_world["items"]["item_2"], world["items"]["item_2"])
+        self.assertIs(new_world["locations"], world["locations"])
+    
+    def test_missing_collection(self):
+        """Test that a missing collection leaves the world shared."""
+        world = {"locations": {}}
+        new_world = copy_world_path(world, "items", ["item_1"])
+        self.assertEqual(new_world, world)
+        self.assertIs(new_world["locations"], world["locations"])
+
+class TestStateTransitions(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(7)
+        self.states = build_state_fixtures()
+    
+    def test_world_snapshot_is_shared(self):
+        """Test that transitions share the world snapshot instead of copying it."""
+        for state in self.states:
+            with self.subTest(state=type(state).__name__):
+                actions = state.get_legal_actions()
+                self.assertGreater(len(actions), 0)
+                
+                # Pick an action that does not write to the world
+                action = next((a for a in actions if a.action_type == "rest"), actions[0])
+                if isinstance(state, EquipmentState):
+                    continue
+                new_state = state.apply_action(action)
+                self.assertIs(new_state.world_data, state.world_data)
+    
+    def test_world_snapshot_is_never_modified(self):
+        """Test that rollouts never modify the world snapshot or the root state."""
+        for state in self.states:
+            with self.subTest(state=type(state).__name__):
+                world_before = copy.deepcopy(state.world_data)
+                entity_before = copy.deepcopy(vars(state).get(self._entity_key(state)))
+                
+                for _ in range(20):
+                    random_rollout(state)
+                
+                self.assertEqual(state.world_data, world_before)
+                self.assertEqual(vars(state).get(self._entity_key(state)), entity_before)
+    
+    def test_equipment_world_writes_are_copied(self):
+        """Test that EquipmentState copies the items it writes to."""
+        state = next(s for s in self.states if isinstance(s, EquipmentState))
+        equip_action = next(a for a in state.get_legal_actions() if a.action_type in ("equip", "swap"))
+        
+        new_state = state.apply_action(equip_action)
+        
+        self.assertTrue(new_state.world_data["items"][equip_action.item_id]["is_equipped"])
+        self.assertNotIn("is_equipped", state.world_data["items"][equip_action.item_id])
+        self.assertIs(new_state.world_data["locations"], state.world_data["locations"])
+    
+    def _entity_key(self, state):
+        """Get the name of the entity data attribute of a state."""
+        return next(key for key in vars(state) if key.endswith("_data") and key != "world_data")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+import random
+import numpy as np
+from app.ai.mcts.core import MCTS
+from app.ai.mcts.transposition import TranspositionTable, NO_SLOT
+from app.ai.mcts.states import TraderState, AnimalState, FactionState
+from tests.ai.mcts.test_transition import build_state_fixtures
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_entry_reuses_slot_for_same_key(self):
+        """Test that equal keys share a slot."""
+        table = TranspositionTable(4)
+        slot, generation = table.entry(("a", 1))
+        self.assertEqual(table.entry(("a", 1)), (slot, generation))
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.hits, 1)
+        self.assertEqual(table.misses, 1)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used key is evicted when full."""
+        table = TranspositionTable(2)
+        slot_a, generation_a = table.entry("a")
+        table.entry("b")
+        table.entry("a")  # "b" is now least recently used
+        table.entry("c")
+        
+        self.assertIn("a", table)
+        self.assertNotIn("b", table)
+        self.assertIn("c", table)
+        self.assertEqual(table.evictions, 1)
+        self.assertTrue(table.is_valid(slot_a, generation_a))
+    
+    def test_evicted_references_are_invalidated(self):
+        """Test that references to a reused slot are detected as stale."""
+        table = TranspositionTable(1)
+        slot, generation = table.entry("a")
+        table.update([slot], [generation], 1.0)
+        
+        new_slot, new_generation = table.entry("b")
+        self.assertEqual(new_slot, slot)
+        self.assertFalse(table.is_valid(slot, generation))
+        self.assertIsNone(table.mean_value(new_slot))
+        
+        # Stale references are ignored on update
+        table.update([slot], [generation], 5.0)
+        self.assertEqual(table.visits[new_slot], 0)
+    
+    def test_shared_stats(self):
+        """Test that live entries replace node statistics."""
+        table = TranspositionTable(4)
+        slot, generation = table.entry("a")
+        table.update([slot, slot], [generation, generation], 2.0)
+        
+        visits, value_sums = table.shared_stats(
+            np.array([slot, NO_SLOT]), np.array([generation, 0]),
+            np.array([1, 3]), np.array([0.5, 1.5])
+        )
+        self.assertEqual(list(visits), [2, 3])
+        self.assertEqual(list(value_sums), [4.0, 1.5])
+        self.assertEqual(table.mean_value(slot), 2.0)
+    
+    def test_invalid_size(self):
+        """Test that the table size must be positive."""
+        with self.assertRaises(ValueError):
+            TranspositionTable(0)
+        with self.assertRaises(ValueError):
+            MCTS(transposition_table_size=0)
+
+class TestStateKeys(unittest.TestCase):
+    def test_trader_transpositions_share_key(self):
+        """Test that different action orders reaching the same trader state share a key."""
+        state = next(s for s in build_state_fixtures() if isinstance(s, TraderState))
+        actions = state.get_legal_actions()
+        buy = next(a for a in actions if a.action_type == "buy")
+        rest = next(a for a in actions if a.action_type == "rest")
+        
+        buy_then_rest = state.apply_action(buy).apply_action(rest)
+        rest_then_buy = state.apply_action(rest).apply_action(buy)
+        
+        self.assertEqual(buy_then_rest.state_key(), rest_then_buy.state_key())
+        self.assertNotEqual(state.state_key(), buy_then_rest.state_key())
+        hash(state.state_key())
+    
+    def test_animal_and_faction_keys_are_hashable(self):
+        """Test that the state keys of the other opted-in states are hashable."""
+        for state in build_state_fixtures():
+            if isinstance(state, (AnimalState, FactionState)):
+                with self.subTest(state=type(state).__name__):
+                    self.assertEqual(hash(state.state_key()), hash(state.state_key()))
+
+class TestMCTSWithTranspositions(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(3)
+        
+        # Two steps on a line; adding 1 then 2 equals adding 2 then 1
+        self.get_legal_actions = lambda s: [1, 2] if s[1] < 2 else []
+        self.apply_action = lambda s, a: (s[0] + a, s[1] + 1)
+        self.is_terminal = lambda s: s[1] >= 2
+        self.get_reward = lambda s: s[0] / 4.0
+    
+    def test_search_with_table(self):
+        """Test that both storages find the best action and report table stats."""
+        for tree_storage in MCTS.TREE_STORAGES:
+            with self.subTest(tree_storage=tree_storage):
+                mcts = MCTS(tree_storage=tree_storage, transposition_table_size=16)
+                best_action = mcts.search(
+                    (0, 0), self.get_legal_actions, self.apply_action,
+                    self.is_terminal, self.get_reward, num_simulations=100,
+                    state_key_fn=lambda s: s[0]
+                )
+                
+                self.assertEqual(best_action, 2)
+                stats = mcts.decision_stats["transposition"]
+                self.assertGreater(stats["hits"], 0)
+                self.assertLessEqual(stats["entries"], 16)
+    
+    def test_bounded_table(self):
+        """Test that a tiny table evicts entries and the search still completes."""
+        mcts = MCTS(tree_storage="array", transposition_table_size=1)
+        best_action = mcts.search(
+            (0, 0), self.get_legal_actions, self.apply_action,
+            self.is_terminal, self.get_reward, num_simulations=50,
+            state_key_fn=lambda s: s
+        )
+        
+        self.assertIn(best_action, [1, 2])
+        self.assertEqual(mcts.decision_stats["transposition"]["entries"], 1)
+        self.assertGreater(mcts.decision_stats["transposition"]["evictions"], 0)
+    
+    def test_state_key_hook(self):
+        """Test that the state_key() hook of real states is used by default."""
+        state = next(s for s in build_state_fixtures() if isinstance(s, TraderState))
+        mcts = MCTS(tree_storage="array", max_rollout_depth=5, transposition_table_size=256)
+        best_action = mcts.search(
+            state,
+            lambda s: s.get_legal_actions(),
+            lambda s, a: s.apply_action(a),
+            lambda s: s.is_terminal(),
+            lambda s: s.get_reward(),
+            num_simulations=100
+        )
+        
+        self.assertIsNotNone(best_action)
+        self.assertGreater(mcts.decision_stats["transposition"]["entries"], 0)
+    
+    def test_table_disabled_by_default(self):
+        """Test that searches without a table report no table stats."""
+        mcts = MCTS()
+        mcts.search((0, 0), self.get_legal_actions, self.apply_action,
+                    self.is_terminal, self.get_reward, num_simulations=20)
+        self.assertNotIn("transposition", mcts.decision_stats)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+import unittest
+import pickle
+import random
+import numpy as np
+from unittest.mock import patch
+from app.ai.mcts import settings
+from app.ai.mcts.core import MCTS
+from app.ai.mcts.batch import BatchMCTS
+from app.ai.mcts.array_tree import ArrayTree
+from app.ai.mcts.tree_cache import TreeCache, snapshot_version
+from app.ai.mcts.settings import get_tree_cache
+from app.ai.mcts.states.trader_state import TraderAction
+
+class Walk:
+    """Walk along a line for a few steps; the further right, the better."""
+    
+    def __init__(self, position=0, steps=0):
+        self.position = position
+        self.steps = steps
+    
+    def legal_actions(self):
+        return [] if self.steps >= 4 else [-1, 1, 2]
+    
+    def apply(self, action):
+        return Walk(self.position + action, self.steps + 1)
+    
+    def reuse_key(self):
+        return self.position
+    
+    def state_key(self):
+        return (self.position, self.steps)
+
+class FakeRedis:
+    """Dict-backed stand-in for the few Redis calls the cache makes."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def delete(self, key):
+        self.data.pop(key, None)
+
+def search(mcts, state, num_simulations=200, tree_key="walker", world_version="v1"):
+    return mcts.search(state, lambda s: s.legal_actions(), lambda s, a: s.apply(a),
+                       lambda s: not s.legal_actions(), lambda s: s.position / 8.0,
+                       num_simulations, tree_key=tree_key, world_version=world_version)
+
+def grow_tree(mcts, simulations=150):
+    tree = ArrayTree()
+    root = tree.add_root()
+    state = Walk()
+    for _ in range(simulations):
+        path, leaf, _ = mcts._select_and_expand(
+            tree, root, None, state, lambda s: s.legal_actions(), lambda s, a: s.apply(a),
+            lambda s: not s.legal_actions(), lambda s: None
+        )
+        tree.backpropagate(path, leaf.position / 8.0)
+    return tree
+
+class TestSubtree(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(5)
+        self.mcts = MCTS(tree_storage="array")
+    
+    def _grow_tree(self):
+        return grow_tree(self.mcts)
+    
+    def test_subtree_keeps_statistics(self):
+        """Test that the re-rooted tree mirrors the subtree below the node."""
+        tree = self._grow_tree()
+        child = tree.best_child(0)
+        subtree = tree.subtree(child)
+        
+        self.assertEqual(subtree.visits[0], tree.visits[child])
+        self.assertEqual(subtree.value_sums[0], tree.value_sums[child])
+        self.assertEqual([subtree.action(c) for c in subtree.children(0)],
+                         [tree.action(c) for c in tree.children(child)])
+        self.assertEqual([subtree.visits[c] for c in subtree.children(0)],
+                         [tree.visits[c] for c in tree.children(child)])
+        self.assertLess(len(subtree), len(tree))
+        
+        # Every node's visits are the sum over its children plus its own simulation
+        for node in range(len(subtree)):
+            children = subtree.children(node)
+            if children and subtree.visits[node] > 0:
+                self.assertGreaterEqual(subtree.visits[node], subtree.visits[children].sum())
+    
+    def test_subtree_can_be_searched(self):
+        """Test that a search can continue on a re-rooted tree."""
+        tree = self._grow_tree()
+        child = tree.best_child(0)
+        subtree = tree.subtree(child)
+        state = Walk().apply(tree.action(child))
+        
+        before = int(subtree.visits[0])
+        for _ in range(50):
+            path, leaf, _ = self.mcts._select_and_expand(
+                subtree, 0, None, state, lambda s: s.legal_actions(), lambda s, a: s.apply(a),
+                lambda s: not s.legal_actions(), lambda s: None
+            )
+            subtree.backpropagate(path, leaf.position / 8.0)
+        self.assertEqual(subtree.visits[0], before + 50)
+    
+    def test_subtree_pickles(self):
+        """Test that trees survive a round trip through pickle (parallel searches)."""
+        tree = self._grow_tree()
+        subtree = tree.subtree(0)
+        copy = pickle.loads(pickle.dumps(subtree))
+        self.assertEqual(len(copy), len(tree))
+        self.assertEqual(int(copy.visits[:len(copy)].sum()), int(tree.visits[:len(tree)].sum()))
+        np.testing.assert_array_equal(copy.first_child, subtree.first_child)
+        self.assertEqual(copy.actions, subtree.actions)
+    
+    def test_subtree_round_trips_arrays(self):
+        """Test that a tree can be rebuilt from its node arrays and actions."""
+        subtree = self._grow_tree().subtree(0)
+        copy = ArrayTree.from_arrays(subtree.to_arrays(), subtree.actions)
+        self.assertEqual(len(copy), len(subtree))
+        np.testing.assert_array_equal(copy.visits[:len(copy)], subtree.visits[:len(subtree)])
+        np.testing.assert_array_equal(copy.first_child[:len(copy)], subtree.first_child[:len(subtree)])
+        self.assertEqual(copy.best_child(0), subtree.best_child(0))
+        
+        arrays = subtree.to_arrays()
+        arrays["parent"] = arrays["parent"][:-1]
+        with self.assertRaises(ValueError):
+            ArrayTree.from_arrays(arrays, subtree.actions)
+        with self.assertRaises(ValueError):
+            ArrayTree.from_arrays(subtree.to_arrays(), subtree.actions[:1])
+
+class TestTreeCache(unittest.TestCase):
+    def test_take_checks_version_and_reuse_key(self):
+        """Test that a tree is only reused on the same world version and position."""
+        cache = TreeCache()
+        tree = ArrayTree()
+        tree.add_root()
+        
+        cache.put("a", "v1", Walk(2, 1), tree)
+        self.assertIsNone(cache.take("a", "v2", Walk(2)))
+        self.assertEqual(cache.invalidations, 1)
+        
+        cache.put("a", "v1", Walk(2, 1), tree)
+        self.assertIsNone(cache.take("a", "v1", Walk(3)))
+        
+        cache.put("a", "v1", Walk(2, 1), tree)
+        self.assertIs(cache.take("a", "v1", Walk(2)), tree)
+        self.assertNotIn("a", cache)
+        self.assertIsNone(cache.take("a", "v1", Walk(2)))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+    
+    def test_lru_eviction_spills_to_redis(self):
+        """Test that evicted trees are spilled to Redis and read back."""
+        redis_client = FakeRedis()
+        cache = TreeCache(max_entries=1, redis_client=redis_client)
+        tree = ArrayTree()
+        tree.add_root()
+        
+        cache.put("a", "v1", Walk(1), tree)
+        cache.put("b", "v1", Walk(1), tree)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.spills, 1)
+        
+        reused = cache.take("a", "v1", Walk(1))
+        self.assertIsNotNone(reused)
+        self.assertEqual(redis_client.data, {})
+    
+    def test_spill_is_json_and_numpy(self):
+        """Test that spilled trees round-trip without pickle, keys included."""
+        redis_client = FakeRedis()
+        cache = TreeCache(max_entries=1, redis_client=redis_client, reuse_key_fn=lambda s: s)
+        tree = grow_tree(MCTS(tree_storage="array")).subtree(0)
+        key = ("s1", 3, False, frozenset({("i1", 2), ("i2", 1)}))
+        
+        cache.put("a", "v1", key, tree)
+        cache.put("b", "v1", key, tree)
+        payload = redis_client.data["mcts:tree:a"]
+        self.assertTrue(payload.startswith(b"{"))
+        with self.assertRaises(Exception):
+            pickle.loads(payload)
+        
+        reused = cache.take("a", "v1", ("s1", 3, False, frozenset({("i2", 1), ("i1", 2)})))
+        self.assertIsNotNone(reused)
+        self.assertEqual(reused.actions, tree.actions)
+        np.testing.assert_array_equal(reused.value_sums[:len(reused)], tree.value_sums[:len(tree)])
+    
+    def test_spill_ignores_pickled_payload(self):
+        """Test that a pickled entry planted in Redis is never unpickled."""
+        redis_client = FakeRedis()
+        tree = ArrayTree()
+        tree.add_root()
+        redis_client.data["mcts:tree:a"] = pickle.dumps(("v1", 1, tree))
+        cache = TreeCache(redis_client=redis_client)
+        
+        with patch("pickle.loads") as loads:
+            self.assertIsNone(cache.take("a", "v1", Walk(1)))
+        loads.assert_not_called()
+        self.assertEqual(cache.misses, 1)
+    
+    def test_spill_uses_action_type(self):
+        """Test that object actions are spilled with to_dict/from_dict of the action type."""
+        redis_client = FakeRedis()
+        tree = ArrayTree()
+        root = tree.add_root()
+        tree.set_actions(root, [TraderAction("move", destination_id="s2", area_path=["a1"]),
+                                TraderAction("rest")])
+        
+        untyped = TreeCache(max_entries=1, redis_client=redis_client)
+        untyped.put("a", "v1", Walk(1), tree)
+        untyped.put("b", "v1", Walk(1), tree)
+        self.assertEqual(untyped.spills, 0)
+        
+        cache = TreeCache(max_entries=1, redis_client=redis_client, action_type=TraderAction)
+        cache.put("a", "v1", Walk(1), tree)
+        cache.put("b", "v1", Walk(1), tree)
+        reused = cache.take("a", "v1", Walk(1))
+        self.assertEqual([action.to_dict() for action in reused.actions],
+                         [action.to_dict() for action in tree.actions])
+        self.assertIs(get_tree_cache("trader").action_type, TraderAction)
+    
+    def test_snapshot_version(self):
+        """Test that the version follows the planning data, not the game day."""
+        world = {"current_game_day": 1, "settlements": {"s1": {"connections": []}}}
+        later = dict(world, current_game_day=2)
+        changed = dict(world, settlements={"s1": {"connections": [{"destination_id": "s2"}]}})
+        
+        self.assertEqual(snapshot_version(world), snapshot_version(later))
+        self.assertNotEqual(snapshot_version(world), snapshot_version(changed))
+    
+    def test_get_tree_cache_is_shared(self):
+        """Test that each entity type has one cache per process."""
+        self.assertIs(get_tree_cache("trader"), get_tree_cache("trader"))
+        self.assertIsNot(get_tree_cache("trader"), get_tree_cache("animal"))
+    
+    def test_spill_redis_url(self):
+        """Test that trees only spill to Redis when TREE_CACHE_REDIS_URL is set."""
+        with patch.object(settings, "TREE_CACHE_REDIS_URL", None):
+            self.assertIsNone(settings._tree_cache_redis_client())
+        with patch.object(settings, "TREE_CACHE_REDIS_URL", "redis://cache:6380/2"):
+            client = settings._tree_cache_redis_client()
+        kwargs = client.connection_pool.connection_kwargs
+        self.assertEqual((kwargs["host"], kwargs["port"], kwargs["db"]), ("cache", 6380, 2))
+
+class TestSearchReuse(unittest.TestCase):
+    def setUp(self):
+        """Set up test data for each test method."""
+        random.seed(9)
+    
+    def test_search_reuses_subtree(self):
+        """Test that the next decision starts from the chosen subtree."""
+        mcts = MCTS(tree_storage="array", tree_cache=TreeCache())
+        best_action = search(mcts, Walk())
+        self.assertEqual(mcts.decision_stats["reused_visits"], 0)
+        expected_visits = mcts.root_stats[[a for a, _, _ in mcts.root_stats].index(best_action)][1]
+        
+        search(mcts, Walk(best_action))
+        self.assertEqual(mcts.decision_stats["reused_visits"], expected_visits)
+        self.assertEqual(mcts.decision_stats["visits"], expected_visits + 200)
+    
+    def test_world_version_change_invalidates(self):
+        """Test that a new world version starts from an empty tree."""
+        mcts = MCTS(tree_storage="array", tree_cache=TreeCache())
+        best_action = search(mcts, Walk())
+        search(mcts, Walk(best_action), world_version="v2")
+        self.assertEqual(mcts.decision_stats["reused_visits"], 0)
+    
+    def test_reuse_saves_simulations_with_early_stopping(self):
+        """Test that a reused tree reaches a decided search with fewer simulations."""
+        cache = TreeCache()
+        mcts = MCTS(tree_storage="array", tree_cache=cache, early_stopping=True)
+        best_action = search(mcts, Walk(), num_simulations=400)
+        
+        fresh = MCTS(tree_storage="array", early_stopping=True)
+        search(fresh, Walk(best_action), num_simulations=400, tree_key=None)
+        search(mcts, Walk(best_action), num_simulations=400)
+        
+        self.assertGreater(mcts.decision_stats["reused_visits"], 0)
+        self.assertLess(mcts.decision_stats["simulations"], fresh.decision_stats["simulations"])
+    
+    def test_batch_reuses_subtrees(self):
+        """Test that batched searches reuse each agent's subtree."""
+        mcts = BatchMCTS(tree_cache=TreeCache())
+        args = (lambda s: s.legal_actions(), lambda s, a: s.apply(a), lambda s: not s.legal_actions(),
+                lambda s: s.position / 8.0)
+        best_actions = mcts.search_batch([Walk(), Walk(5)], *args, num_simulations=100,
+                                         tree_keys=["a", "b"], world_version="v1")
+        mcts.search_batch([Walk(best_actions[0]), Walk(5 + best_actions[1])], *args, num_simulations=100,
+                          tree_keys=["a", "b"], world_version="v1")
+        self.assertTrue(all(stats["reused_visits"] > 0 for stats in mcts.agent_stats))
+    
+    def test_requires_single_array_tree(self):
+        """Test that the tree cache is rejected where it cannot be used."""
+        with self.assertRaises(ValueError):
+            MCTS(tree_storage="node", tree_cache=TreeCache())
+        with self.assertRaises(ValueError):
+            MCTS(tree_storage="array", root_parallel_workers=2, tree_cache=TreeCache())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+from database.connection import (
+    DEFAULT_POOL_SETTINGS, engine_options, get_pool_metrics, pool_capacity, pool_settings
+)
+from sqlalchemy.pool import NullPool
+import pytest
+
+def test_pool_settings_are_read_from_the_environment():
+    environ = {"DB_POOL_SIZE": "8", "DB_POOL_PRE_PING": "false", "DB_PGBOUNCER": "1", "DB_MAX_OVERFLOW": ""}
+    settings = pool_settings("DB_", DEFAULT_POOL_SETTINGS, environ)
+    assert settings["pool_size"] == 8 and settings["max_overflow"] == DEFAULT_POOL_SETTINGS["max_overflow"]
+    assert settings["pool_pre_ping"] is False and settings["pgbouncer"] is True
+
+    # Prefixed variables override their own engine's defaults only
+    async_settings = pool_settings("DB_ASYNC_", {**settings, "pool_size": 20}, {"DB_POOL_SIZE": "3"})
+    assert async_settings["pool_size"] == 20 and async_settings["pgbouncer"] is True
+
+    with pytest.raises(ValueError, match="DB_POOL_SIZE"):
+        pool_settings("DB_", DEFAULT_POOL_SETTINGS, {"DB_POOL_SIZE": "many"})
+
+def test_engine_options():
+    settings = dict(DEFAULT_POOL_SETTINGS, pool_size=4, max_overflow=6, statement_timeout=5000)
+    options = engine_options(settings)
+    assert options["pool_size"] == 4 and options["max_overflow"] == 6
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert pool_capacity(settings) == 10
+
+    options = engine_options(settings, driver="asyncpg")
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+def test_pgbouncer_options():
+    settings = dict(DEFAULT_POOL_SETTINGS, pool_size=0, statement_timeout=5000, pgbouncer=True)
+    options = engine_options(settings, driver="asyncpg")
+    assert options["poolclass"] is NullPool and "pool_size" not in options
+    assert options["connect_args"]["statement_cache_size"] == 0
+    # The timeout is set per transaction instead of as a startup option
+    assert "server_settings" not in options["connect_args"]
+    assert "connect_args" not in engine_options(settings)
+    assert pool_capacity(settings) is None
+
+def test_pool_metrics_cover_every_engine():
+    metrics = get_pool_metrics()
+    primary = metrics["engines"]["primary"]
+    assert {"checked_out", "checkouts", "connects", "max_checked_out"} <= set(primary)
+    assert "async" in metrics["engines"]
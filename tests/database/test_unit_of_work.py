@@ -0,0 +1,41 @@
+from database import unit_of_work as uow
+from database.unit_of_work import current_session, unit_of_work
+from unittest.mock import MagicMock, patch
+import pytest
+
+@pytest.fixture
+def session_factory():
+    with patch.object(uow, "SessionLocal", side_effect=lambda: MagicMock()) as factory:
+        yield factory
+
+def test_outer_unit_commits_and_closes_its_session(session_factory):
+    with unit_of_work() as session:
+        assert current_session() is session
+        # Nested units join the outer one
+        with unit_of_work() as nested:
+            assert nested is session
+        with unit_of_work(session) as nested:
+            assert nested is session
+        session.commit.assert_not_called()
+
+    assert current_session() is None
+    assert session_factory.call_count == 1
+    session.commit.assert_called_once()
+    session.close.assert_called_once()
+
+def test_failed_unit_rolls_back(session_factory):
+    with pytest.raises(ValueError):
+        with unit_of_work() as session:
+            with unit_of_work():
+                raise ValueError("boom")
+    session.rollback.assert_called_once()
+    session.commit.assert_not_called()
+    session.close.assert_called_once()
+
+def test_unit_on_a_given_session_does_not_close_it(session_factory):
+    db = MagicMock()
+    with unit_of_work(db) as session:
+        assert session is db and current_session() is db
+    db.commit.assert_called_once()
+    db.close.assert_not_called()
+    session_factory.assert_not_called()
@@ -0,0 +1,73 @@
+from app.game_state.services import action_log_sink
+from app.game_state.services.action_log_sink import (
+    COPY_NULL, ActionLogSink, cached_game_day, clear_game_day_cache, to_copy_value
+)
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import uuid
+
+def make_sink(**settings):
+    batches = []
+    sink = ActionLogSink(writer=batches.append, background=False, **settings)
+    return sink, batches
+
+def test_rows_are_buffered_until_the_flush_size():
+    sink, batches = make_sink(flush_size=3)
+    log_ids = [sink.append({"entity_id": "t1", "action_type": "movement"}) for _ in range(2)]
+    assert batches == [] and sink.pending() == 2
+    assert len(set(log_ids)) == 2 and uuid.UUID(log_ids[0])
+
+    sink.append({"entity_id": "t1", "action_type": "trade", "details": None})
+    assert [len(batch) for batch in batches] == [3] and sink.pending() == 0
+    assert batches[0][2]["details"] == {} and isinstance(batches[0][2]["timestamp"], datetime)
+
+def test_flush_writes_the_remaining_rows():
+    sink, batches = make_sink()
+    sink.append({"entity_id": "t1"})
+    assert sink.flush() == 1 and sink.flush() == 0
+    assert len(batches) == 1
+
+def test_failed_batches_are_dropped():
+    sink = ActionLogSink(writer=MagicMock(side_effect=RuntimeError("down")), background=False)
+    sink.append({"entity_id": "t1"})
+    assert sink.flush() == 0
+    assert sink.dropped == 1 and sink.pending() == 0
+
+def test_buffer_is_bounded():
+    sink, batches = make_sink(flush_size=100, max_buffered=2)
+    for index in range(3):
+        sink.append({"entity_id": "t1", "game_day": index})
+    assert sink.dropped == 1
+    sink.flush()
+    assert [row["game_day"] for row in batches[0]] == [1, 2]
+
+def test_large_batches_are_copied():
+    sink = ActionLogSink(background=False, copy_threshold=2)
+    with patch.object(sink, "_copy") as copy, patch.object(sink, "_insert") as insert:
+        sink.write([{}])
+        sink.write([{}, {}])
+    assert insert.call_count == 1 and copy.call_count == 1
+
+    with patch.object(sink, "_copy", side_effect=RuntimeError("no COPY")), patch.object(sink, "_insert") as insert:
+        sink.write([{}, {}])
+    assert insert.call_count == 1
+
+def test_copy_values():
+    assert to_copy_value(None) == COPY_NULL
+    assert to_copy_value({"profit": 5}) == '{"profit": 5}'
+    assert to_copy_value(datetime(2024, 1, 2, 3, 4)) == "2024-01-02T03:04:00"
+    assert to_copy_value("") == ""
+
+def test_game_day_is_cached_per_world():
+    clear_game_day_cache()
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = SimpleNamespace(current_game_day=7)
+    assert cached_game_day(db, "w1") == 7
+    assert cached_game_day(db, "w1") == 7
+    assert db.query.call_count == 1
+
+    with patch.object(action_log_sink, "GAME_DAY_TTL", 0.0):
+        cached_game_day(db, "w1")
+    assert db.query.call_count == 2
+    clear_game_day_cache()
@@ -0,0 +1,91 @@
+from app.game_state.services.area_service import AreaService, get_settlement_area_ids, link_area_to_settlements
+from app.models.core import Areas, AreaSettlements
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from unittest.mock import MagicMock, patch
+import pytest
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Areas.__table__.create(engine)
+    AreaSettlements.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+def test_link_and_lookup(db):
+    link_area_to_settlements(db, "a1", ["s1", "s2", "s1"], "w1")
+    link_area_to_settlements(db, "a2", ["s1"], "w1")
+    db.commit()
+    assert sorted(get_settlement_area_ids(db, "s1")) == ["a1", "a2"]
+    assert get_settlement_area_ids(db, "s2") == ["a1"]
+    assert get_settlement_area_ids(db, "s3") == []
+
+def test_settlement_lookup_uses_index(db):
+    plan = " ".join(str(row) for row in db.execute(
+        text("EXPLAIN QUERY PLAN SELECT area_id FROM area_settlements WHERE settlement_id = 's1'")
+    ))
+    assert "ix_area_settlements_settlement_id" in plan
+
+def test_connect_area_to_settlement_maintains_links(db):
+    area = MagicMock()
+    area.get_property.side_effect = lambda name, default=None: {"world_id": "w1"}.get(name, [] if default == [] else default)
+    service = AreaService(db)
+    service.area_manager = MagicMock()
+    service.area_manager.load_entity.return_value = area
+    service.area_manager.save_entity.return_value = True
+    
+    with patch("app.game_state.services.area_service.record_settlement_connection") as record:
+        assert service.connect_area_to_settlement("a1", "s1")
+        # Connecting twice keeps a single row
+        assert service.connect_area_to_settlement("a1", "s1")
+    
+    assert service.get_settlement_area_ids("s1") == ["a1"]
+    assert db.query(AreaSettlements).one().world_id == "w1"
+    record.assert_called_with("w1", "a1", "s1")
+
+def test_connect_area_to_settlement_is_one_transaction(db):
+    area = MagicMock()
+    area.get_property.side_effect = lambda name, default=None: {"world_id": "w1"}.get(name, [] if default == [] else default)
+    service = AreaService(db)
+    service.area_manager = MagicMock()
+    service.area_manager.load_entity.return_value = area
+    # The area save writes through the same session, like AreaManager does
+    service.area_manager.save_entity.side_effect = lambda entity: db.add(
+        Areas(area_id="a1", area_name="Pass", area_type="mountain_pass", world_id="w1")) or True
+    
+    with patch("app.game_state.services.area_service.record_settlement_connection"), \
+         patch.object(db, "commit", wraps=db.commit) as commit:
+        assert service.connect_area_to_settlement("a1", "s1")
+    commit.assert_called_once()
+    
+    # A failing index write rolls the area save back too
+    db.query(Areas).delete()
+    db.query(AreaSettlements).delete()
+    db.commit()
+    with patch("app.game_state.services.area_service.record_settlement_connection") as record, \
+         patch.object(db, "merge", side_effect=RuntimeError("index write failed")):
+        assert not service.connect_area_to_settlement("a1", "s1")
+    record.assert_not_called()
+    assert db.query(Areas).count() == 0
+
+def test_update_danger_level_updates_cached_routes(db):
+    db.add(Areas(area_id="a1", area_name="Pass", area_type="mountain_pass", world_id="w1", danger_level=2))
+    db.commit()
+    area = MagicMock(area_name="Pass")
+    area.get_property.side_effect = lambda name, default=None: {"world_id": "w1"}.get(name, default)
+    service = AreaService(db)
+    service.area_manager = MagicMock()
+    service.area_manager.load_entity.return_value = area
+    service.area_manager.save_entity.return_value = True
+    
+    with patch("app.game_state.services.area_service.record_area_update") as record:
+        assert service.update_danger_level("a1", 4)["status"] == "success"
+        service.area_manager.save_entity.return_value = False
+        assert service.update_danger_level("a1", 5)["status"] == "error"
+    
+    record.assert_called_once()
+    world_id, area_row = record.call_args.args
+    assert world_id == "w1"
+    assert area_row.area_id == "a1"
@@ -0,0 +1,20 @@
+from app.game_state.services.logging_service import decode_cursor, encode_cursor, next_cursor
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+import uuid
+
+def test_cursor_round_trip():
+    log_id = uuid.uuid4()
+    timestamp = datetime(2026, 10, 16, 12, 30, 15, 250)
+    assert decode_cursor(encode_cursor(timestamp, log_id)) == (timestamp, log_id)
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_next_cursor_only_for_full_pages():
+    logs = [SimpleNamespace(timestamp=datetime(2026, 10, 16), log_id=uuid.uuid4()) for _ in range(2)]
+    assert next_cursor(logs, 3) is None
+    assert next_cursor([], 0) is None
+    assert decode_cursor(next_cursor(logs, 2)) == (logs[1].timestamp, logs[1].log_id)
@@ -0,0 +1,29 @@
+from app.game_state.entities.settlement import Settlement
+from app.game_state.services import settlement_service
+from app.game_state.services.settlement_service import SettlementService
+from unittest.mock import MagicMock, patch
+
+def test_settlement_decision_uses_the_settlement_search_settings():
+    settlement = Settlement("s1", "Oakvale")
+    settlement.set_property("world_id", "w1")
+    settlement.set_property("gold", 500)
+    settlement.set_property("population", 120)
+
+    service = SettlementService(MagicMock())
+    service.settlement_manager = MagicMock()
+    service.settlement_manager.load_settlement.return_value = settlement
+    mcts = MagicMock()
+    mcts.search_state.return_value.to_dict.return_value = {"action_type": "build"}
+    mcts.decision_stats = {"best_action": "build", "simulations": 400}
+
+    with patch("app.game_state.managers.world_manager.WorldManager") as world_manager, \
+            patch.object(settlement_service, "create_mcts", return_value=mcts) as create_mcts:
+        world_manager.return_value.get_world_info.return_value = {"id": "w1"}
+        decision = service.get_settlement_decision("s1")
+
+    create_mcts.assert_called_once_with("settlement")
+    state, simulations = mcts.search_state.call_args.args
+    assert (state.settlement_id, state.gold, state.population) == ("s1", 500, 120)
+    assert simulations == SettlementService.MCTS_SIMULATIONS
+    assert decision == {"status": "success", "settlement_id": "s1",
+                        "action": {"action_type": "build"}, "stats": {"simulations": 400}}
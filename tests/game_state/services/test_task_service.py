@@ -0,0 +1,36 @@
+from app.game_state.managers.task_manager import AsyncTaskManager, TaskManager
+from app.game_state.services.task_service import TaskService
+from sqlalchemy.ext.asyncio import AsyncSession
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+
+def task_record(task_id, status="available"):
+    return SimpleNamespace(task_id=task_id, title="Escort", description="", task_type_id="tt1", world_id="w1",
+                           location_id=None, target_id=None, character_id=None, status=status, progress=0.0,
+                           created_at=None, start_time=None, deadline=None, completion_time=None,
+                           requirements={}, rewards={"xp": 10}, task_data={}, difficulty=1,
+                           duration_minutes=5, repeatable=False, is_active=True)
+
+def test_async_sessions_use_the_async_manager():
+    assert isinstance(TaskService(MagicMock(spec=AsyncSession)).task_manager, AsyncTaskManager)
+    assert isinstance(TaskService(MagicMock()).task_manager, TaskManager)
+
+def test_tasks_are_loaded_with_their_type_codes_in_one_query():
+    db = MagicMock(spec=AsyncSession)
+    db.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[
+        (task_record("t1"), "escort"), (task_record("t2"), None)
+    ])))
+
+    tasks = asyncio.run(TaskService(db).get_available_tasks("w1"))
+
+    assert db.execute.await_count == 1
+    assert [(task["task_id"], task["task_type_code"]) for task in tasks] == [("t1", "escort"), ("t2", None)]
+
+def test_accepting_a_taken_task_fails():
+    db = MagicMock(spec=AsyncSession)
+    db.execute = AsyncMock(side_effect=[MagicMock(first=MagicMock(return_value=("c1",))), MagicMock(rowcount=0)])
+    db.rollback = AsyncMock()
+
+    assert asyncio.run(AsyncTaskManager(db).accept_task("t1", "c1")) is None
+    db.rollback.assert_awaited_once()
@@ -0,0 +1,78 @@
+from app.game_state.services.trader_service import TraderService
+from unittest.mock import MagicMock
+import json
+import pytest
+
+def make_settlement(settlement_id, name, destinations):
+    settlement = MagicMock()
+    settlement.settlement_id = settlement_id
+    settlement.settlement_name = name
+    settlement.biome = "forest"
+    settlement.population = 100
+    settlement.area_type = "village"
+    settlement.connections = json.dumps([
+        {"destination_id": destination, "destination": destination, "path": ["area_1"]}
+        for destination in destinations
+    ])
+    return settlement
+
+def make_trader(trader_id, settlement_id, gold=100):
+    trader = MagicMock()
+    trader.trader_id = trader_id
+    trader.npc_name = f"Trader {trader_id}"
+    trader.current_settlement_id = settlement_id
+    trader.destination_id = None
+    trader.gold = gold
+    trader.inventory = {}
+    trader.preferred_settlements = []
+    trader.preferred_biomes = []
+    trader.visited_settlements = []
+    trader.is_retired = False
+    trader.life_goals = []
+    return trader
+
+@pytest.fixture
+def world_data():
+    service = TraderService(MagicMock())
+    settlements = [
+        make_settlement("s1", "Oakvale", ["s2", "00000000-0000-0000-0000-000000000000"]),
+        make_settlement("s2", "Riverton", ["s1"])
+    ]
+    service.db.query.return_value.filter.return_value.first.return_value = MagicMock(current_game_day=3)
+    service.db.query.return_value.filter.return_value.all.return_value = settlements
+    return service.build_trader_world_data("world1")
+
+def test_build_trader_world_data(world_data):
+    assert set(world_data["settlements"]) == {"s1", "s2"}
+    # Placeholder destinations are dropped
+    assert [c["destination_id"] for c in world_data["settlements"]["s1"]["connections"]] == ["s2"]
+
+def test_make_batch_mcts_decisions(world_data):
+    service = TraderService(MagicMock())
+    traders = [make_trader(f"t{i}", "s1" if i % 2 else "s2") for i in range(6)]
+    
+    decisions = service.make_batch_mcts_decisions(traders, world_data, num_simulations=20)
+    
+    assert set(decisions) == {f"t{i}" for i in range(6)}
+    for trader in traders:
+        decision = decisions[trader.trader_id]
+        assert decision["status"] == "success"
+        if decision["action"] == "move":
+            assert decision["next_settlement_id"] != trader.current_settlement_id
+
+def test_make_batch_mcts_decisions_empty(world_data):
+    assert TraderService(MagicMock()).make_batch_mcts_decisions([], world_data) == {}
+
+def test_make_batch_mcts_decisions_reuses_trees(world_data):
+    service = TraderService(MagicMock())
+    trader = make_trader("reuse-t1", "s1")
+    
+    decision = service.make_batch_mcts_decisions([trader], world_data, num_simulations=20)["reuse-t1"]
+    assert decision["mcts_stats"]["reused_visits"] == 0
+    assert decision["mcts_stats"]["simulations"] == 20
+    
+    # The trader arrived where the search expected, in an unchanged world
+    trader.current_settlement_id = decision["next_settlement_id"]
+    trader.visited_settlements = [decision["next_settlement_id"]]
+    decision = service.make_batch_mcts_decisions([trader], world_data, num_simulations=20)["reuse-t1"]
+    assert decision["mcts_stats"]["reused_visits"] > 0
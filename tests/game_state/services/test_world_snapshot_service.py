@@ -0,0 +1,108 @@
+from app.game_state.services.world_snapshot_service import (
+    WorldSnapshotService, invalidate_world_snapshot, parse_valid_connections
+)
+from app.models.core import Worlds, Settlements, SettlementResources, ResourceTypes
+from app.game_state.reference_data import ReferenceData
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime
+import json
+import pytest
+
+@compiles(JSONB, "sqlite")
+def compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+def make_settlement(settlement_id, name, destinations, world_id="w1"):
+    return Settlements(
+        settlement_id=settlement_id, settlement_name=name, world_id=world_id, area_type="village",
+        biome="forest", last_updated=datetime(2025, 1, 1),
+        connections=json.dumps([{"destination_id": destination} for destination in destinations])
+    )
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (Worlds, Settlements, SettlementResources, ResourceTypes):
+        model.__table__.create(engine)
+    
+    # Count the statements a snapshot takes
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        Worlds(world_id="w1", world_name="One", current_game_day=3, current_season="winter"),
+        Worlds(world_id="w2", world_name="Two", current_game_day=1),
+        make_settlement("s1", "Oakvale", ["s2", "00000000-0000-0000-0000-000000000000", "11111-placeholder"]),
+        make_settlement("s2", "Riverton", ["s1"]),
+        make_settlement("s3", "Elsewhere", [], world_id="w2"),
+        ResourceTypes(resource_type_id="wood", resource_code="wood", resource_name="Wood", base_value=2.0),
+        ResourceTypes(resource_type_id="ore", resource_code="ore", resource_name="Ore", base_value=5.0),
+        SettlementResources(settlement_resource_id="r1", settlement_id="s1", resource_type_id="wood", quantity=10),
+        SettlementResources(settlement_resource_id="r2", settlement_id="s1", resource_type_id="ore", quantity=0),
+        SettlementResources(settlement_resource_id="r3", settlement_id="s3", resource_type_id="ore", quantity=4)
+    ])
+    session.commit()
+    invalidate_world_snapshot()
+    session.statements = statements
+    
+    winter = SimpleNamespace(name="winter", resource_modifiers={"wood": 0.5}, travel_modifier=0.7)
+    reference_data = ReferenceData({"seasons": [winter]})
+    with patch("app.game_state.services.world_snapshot_service.get_reference_data", return_value=reference_data), \
+            patch("app.game_state.services.world_snapshot_service.get_route_table") as get_route_table:
+        session.route_table = get_route_table.return_value
+        yield session
+    session.close()
+    invalidate_world_snapshot()
+
+def test_parse_valid_connections():
+    assert parse_valid_connections(json.dumps([{"destination_id": "s2"}, {"destination_id": None}])) == [{"destination_id": "s2"}]
+    assert parse_valid_connections("not json") == []
+    assert parse_valid_connections(None) == []
+
+def test_snapshot_contents(db):
+    snapshot = WorldSnapshotService(db).get_snapshot("w1")
+    
+    assert set(snapshot["settlements"]) == set(snapshot["locations"]) == {"s1", "s2"}
+    # Placeholder destinations are dropped
+    assert [c["destination_id"] for c in snapshot["settlements"]["s1"]["connections"]] == ["s2"]
+    assert snapshot["markets"]["s1"] == {"selling": {"wood": 2.0}, "buying": {"ore": 5.0}}
+    assert snapshot["markets"]["s2"] == {"buying": {}, "selling": {}}
+    assert snapshot["season"] == {"name": "winter", "travel_modifier": 0.7, "resource_modifiers": {"wood": 0.5}}
+    assert snapshot["current_game_day"] == 3
+    assert snapshot["version"]
+    assert snapshot["route_table"] is db.route_table
+    
+    assert WorldSnapshotService(db).get_snapshot("missing") is None
+
+def test_snapshot_is_memoized_until_the_world_changes(db):
+    service = WorldSnapshotService(db)
+    db.statements.clear()
+    snapshot = service.get_snapshot("w1")
+    # World, version, settlements and markets; the season comes from the reference data
+    assert len(db.statements) == 4
+    
+    # A cached snapshot costs the world lookup and the version query
+    db.statements.clear()
+    assert service.get_snapshot("w1") is snapshot
+    assert len(db.statements) == 2
+    
+    # A new game day or changed settlement data invalidates it
+    db.query(Worlds).filter(Worlds.world_id == "w1").update({"current_game_day": 4})
+    db.commit()
+    next_day = service.get_snapshot("w1")
+    assert next_day is not snapshot and next_day["current_game_day"] == 4
+    
+    db.query(SettlementResources).filter(SettlementResources.settlement_resource_id == "r2").update(
+        {"quantity": 3, "last_updated": datetime(2025, 2, 1)})
+    db.commit()
+    assert service.get_snapshot("w1")["markets"]["s1"]["selling"] == {"wood": 2.0, "ore": 5.0}
+    
+    # Worlds are cached independently
+    assert set(service.get_snapshot("w2")["settlements"]) == {"s3"}
+    assert service.get_snapshot("w1")["current_game_day"] == 4
@@ -0,0 +1,37 @@
+from app.game_state.action_log_partitions import (
+    add_months, expired_partitions, maintain_action_log, months_to_create, partition_month, partition_name
+)
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+from app.game_state import action_log_partitions
+
+def test_months():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == "entity_action_log_y2026m03"
+    assert partition_month("entity_action_log_y2026m03") == date(2026, 3, 1)
+    assert partition_month("entity_action_log_default") is None
+    assert months_to_create(datetime(2026, 12, 15), 1) == [date(2026, 12, 1), date(2027, 1, 1)]
+
+def test_expired_partitions():
+    names = ["entity_action_log_y2026m07", "entity_action_log_default", "entity_action_log_y2026m06",
+             "entity_action_log_y2026m08"]
+    # July ends on August 1st, so it expires once the cutoff reaches that day
+    assert expired_partitions(names, datetime(2026, 7, 31)) == ["entity_action_log_y2026m06"]
+    assert expired_partitions(names, datetime(2026, 8, 1)) == ["entity_action_log_y2026m06",
+                                                               "entity_action_log_y2026m07"]
+
+def test_maintenance_steps_are_committed_separately():
+    db = MagicMock()
+    with patch.object(action_log_partitions, "list_partitions", return_value=["entity_action_log_y2026m06"]), \
+            patch.object(action_log_partitions, "ensure_partition", side_effect=[True, False, RuntimeError("locked")]), \
+            patch.object(action_log_partitions, "drop_expired_partition") as drop, \
+            patch.object(action_log_partitions, "expire_default_rows", return_value=4):
+        result = maintain_action_log(db, now=datetime(2026, 10, 16))
+
+    assert result["created"] == ["entity_action_log_y2026m10"]
+    assert result["dropped"] == ["entity_action_log_y2026m06"]
+    assert drop.call_args[0][2] == datetime(2026, 7, 18)
+    assert result["default_rows_deleted"] == 4
+    assert len(result["errors"]) == 1
+    assert db.commit.call_count == 4 and db.rollback.call_count == 1
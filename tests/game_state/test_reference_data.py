@@ -0,0 +1,119 @@
+from app.game_state import reference_data
+from app.game_state.reference_data import ReferenceData, _ensure_listener, get_reference_data, invalidate_reference_data
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import pytest
+
+def make_reference_data(version=0):
+    return ReferenceData({
+        "seasons": [SimpleNamespace(name="winter", travel_modifier=0.7)],
+        "biomes": [
+            SimpleNamespace(biome_id=1, name="plains", base_movement_modifier=1.0),
+            SimpleNamespace(biome_id=2, name="void", base_movement_modifier=None)
+        ],
+        "resource_types": [SimpleNamespace(resource_type_id="r1", resource_code="wood")],
+        "site_types": [SimpleNamespace(site_type_id="s1")],
+        "site_stages": [SimpleNamespace(site_type_id="s1", stage_code="developed")],
+        "encounter_types": [SimpleNamespace(encounter_type_id="e1")],
+        "encounter_outcomes": [
+            SimpleNamespace(outcome_id="o1", encounter_type_id="e1"),
+            SimpleNamespace(outcome_id="o2", encounter_type_id="e1")
+        ]
+    }, version)
+
+@pytest.fixture(autouse=True)
+def reset_snapshot():
+    invalidate_reference_data()
+    with patch.object(reference_data, "_ensure_listener"):
+        yield
+    invalidate_reference_data()
+
+def test_lookups():
+    data = make_reference_data()
+    assert data.season("winter").travel_modifier == 0.7
+    assert data.season("spring") is None
+    assert data.biome(1).name == "plains"
+    assert data.biome_movement_modifiers() == {"plains": 1.0}
+    assert data.resource_type_by_code("wood") is data.resource_type("r1")
+    assert data.site_stage("s1", "developed") is not None
+    assert data.site_stage("s1", "ruined") is None
+    assert [outcome.outcome_id for outcome in data.outcomes_for("e1")] == ["o1", "o2"]
+    assert data.encounter_outcome("o2").encounter_type_id == "e1"
+    assert data.outcomes_for("e2") == []
+    assert data.building_type("b1") is None
+
+def test_snapshot_is_reused_until_the_version_changes():
+    with patch.object(reference_data, "_read_version", return_value=1), \
+            patch.object(reference_data, "_load", side_effect=make_reference_data) as load:
+        first = get_reference_data()
+        assert get_reference_data() is first
+
+        # A version check after the interval keeps an unchanged snapshot
+        reference_data._checked_at = 0.0
+        assert get_reference_data() is first
+        assert load.call_count == 1
+
+        # A new version is loaded at the next check
+        reference_data._read_version.return_value = 2
+        reference_data._checked_at = 0.0
+        assert get_reference_data().version == 2
+        assert load.call_count == 2
+
+def test_invalidation_reloads_the_snapshot():
+    with patch.object(reference_data, "_read_version", return_value=None), \
+            patch.object(reference_data, "_load", side_effect=make_reference_data) as load:
+        first = get_reference_data()
+        invalidate_reference_data()
+        assert get_reference_data() is not first
+        assert load.call_count == 2
+
+def test_snapshot_is_loaded_with_a_session_of_its_own():
+    session = MagicMock()
+    session.query.side_effect = RuntimeError("relation does not exist")
+    with patch("database.connection.SessionLocal", return_value=session), \
+            patch.object(reference_data, "_read_version", return_value=None):
+        assert get_reference_data().seasons == {}
+    session.rollback.assert_called()
+    session.close.assert_called_once()
+
+def test_redis_url_falls_back_to_the_celery_broker():
+    with patch.object(reference_data, "_redis_client", None), \
+            patch.object(reference_data, "REFERENCE_DATA_REDIS_URL", ""):
+        assert reference_data._get_redis_client() is None
+
+    client = MagicMock()
+    with patch.object(reference_data, "_redis_client", None), \
+            patch.object(reference_data, "_redis_retry_at", 0.0), \
+            patch.object(reference_data, "REFERENCE_DATA_REDIS_URL", None), \
+            patch("redis.Redis.from_url", return_value=client) as from_url:
+        assert reference_data._get_redis_client() is client
+    from app.workers.celery_app import app
+    from_url.assert_called_once_with(app.conf.broker_url)
+
+def test_failed_redis_connection_is_retried_after_the_interval():
+    client = MagicMock()
+    with patch.object(reference_data, "_redis_client", None), \
+            patch.object(reference_data, "_redis_retry_at", 0.0), \
+            patch.object(reference_data, "REFERENCE_DATA_REDIS_URL", "redis://localhost:6379/0"), \
+            patch.object(reference_data.time, "monotonic", return_value=100.0) as monotonic, \
+            patch("redis.Redis.from_url", side_effect=[ConnectionError("refused"), client]) as from_url:
+        assert reference_data._get_redis_client() is None
+        assert reference_data._get_redis_client() is None
+        assert from_url.call_count == 1
+
+        monotonic.return_value = 100.0 + reference_data.REDIS_RETRY_INTERVAL
+        assert reference_data._get_redis_client() is client
+        assert from_url.call_count == 2
+
+def test_listener_starts_once_redis_is_available():
+    client = MagicMock()
+    with patch.object(reference_data, "_listener_pid", None), \
+            patch.object(reference_data, "_get_redis_client", side_effect=[None, client]), \
+            patch.object(reference_data.threading, "Thread") as thread:
+        _ensure_listener()
+        assert reference_data._listener_pid is None
+        _ensure_listener()
+        _ensure_listener()
+    thread.assert_called_once()
+    assert thread.call_args.kwargs["args"] == (client,)
+    thread.return_value.start.assert_called_once()
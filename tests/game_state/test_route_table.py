@@ -0,0 +1,211 @@
+from app.game_state.route_table import (
+    RouteTable, find_settlement_path, get_route_table, invalidate_route_table,
+    record_area_connection, record_area_created, record_settlement_connection
+)
+from app.game_state.travel_graph import TravelGraph
+from app.game_state.services.area_service import AreaService
+from app.ai.mcts.states.player_state import PlayerState
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import json
+import random
+import numpy as np
+import pytest
+
+def make_area(area_id, x, y, areas=(), settlements=(), area_type="plains", danger_level=1):
+    return SimpleNamespace(
+        area_id=area_id, location_x=x, location_y=y, area_type=area_type, danger_level=danger_level,
+        connected_areas=json.dumps(list(areas)), connected_settlements=json.dumps(list(settlements))
+    )
+
+def make_settlement(settlement_id, x, y):
+    return SimpleNamespace(settlement_id=settlement_id, location_x=x, location_y=y)
+
+def build_grid(size=8, seed=5):
+    """A grid of areas with random terrain and a settlement (on plains) on every fourth area."""
+    rng = random.Random(seed)
+    areas, settlements = [], []
+    for i in range(size):
+        for j in range(size):
+            neighbours = [f"{i + di}_{j + dj}" for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                          if 0 <= i + di < size and 0 <= j + dj < size and rng.random() < 0.8]
+            settlement_ids = [f"s_{i}_{j}"] if (i + j) % 4 == 0 else []
+            area_type = rng.choice(["plains", "forest", "swamp"])
+            areas.append(make_area(f"{i}_{j}", i, j, neighbours, settlement_ids,
+                                   area_type="plains" if settlement_ids else area_type,
+                                   danger_level=rng.randint(1, 5)))
+            settlements += [make_settlement(sid, i + 0.3, j + 0.3) for sid in settlement_ids]
+    return areas, settlements
+
+BIOME_MODIFIERS = {"plains": 1.0, "forest": 0.7, "swamp": 0.2}
+
+def assert_same_routes(table, expected):
+    """Compare an incrementally updated table with one solved from scratch."""
+    graph = table.graph
+    assert table.settlement_ids == expected.settlement_ids
+    # Paths may differ between routes of equal travel time
+    np.testing.assert_allclose(table.travel_time, expected.travel_time)
+    for start in table.settlement_ids:
+        for end in table.settlement_ids:
+            route = table.route(start, end)
+            assert (route is None) == (expected.route(start, end) is None)
+            if route is not None and route.path:
+                assert route.danger_level == max(graph.danger[graph.area_index[a]] for a in route.path)
+                assert graph.path_cost(list(route.path)) == pytest.approx(
+                    route.travel_time - graph.entry_cost(start, graph.area_index[route.path[0]]) -
+                    graph.entry_cost(end, graph.area_index[route.path[-1]]))
+
+@pytest.fixture
+def grid():
+    areas, settlements = build_grid()
+    return areas, settlements, RouteTable(TravelGraph(areas, settlements, biome_modifiers=BIOME_MODIFIERS))
+
+def test_routes_match_a_star(grid):
+    _, _, table = grid
+    graph = table.graph
+    for start in table.settlement_ids:
+        for end in table.settlement_ids:
+            route = table.route(start, end)
+            path = graph.find_path(start, end)
+            if start == end:
+                assert route.path == () and route.travel_time == 0
+            elif not path:
+                assert route is None
+            else:
+                expected = (graph.entry_cost(start, graph.area_index[path[0]]) + graph.path_cost(path) +
+                            graph.entry_cost(end, graph.area_index[path[-1]]))
+                assert route.travel_time == pytest.approx(expected)
+                # The route's own path has the route's cost
+                assert graph.path_cost(list(route.path)) == pytest.approx(
+                    route.travel_time - graph.entry_cost(start, graph.area_index[route.path[0]]) -
+                    graph.entry_cost(end, graph.area_index[route.path[-1]]))
+                assert route.danger_level == max(graph.danger[graph.area_index[a]] for a in route.path)
+
+def test_unknown_settlements(grid):
+    _, _, table = grid
+    assert table.route("s_0_0", "unknown") is None
+    assert table.steps("s_0_0", "s_0_0") == 0
+
+def test_connect_areas_is_incremental(grid):
+    _, _, table = grid
+    graph = table.graph
+    missing = [(f"{i}_{j}", f"{i + 1}_{j}") for i in range(7) for j in range(8)
+               if f"{i + 1}_{j}" not in graph.connected_areas(f"{i}_{j}")]
+    table.changed_pairs.clear()
+    
+    with patch.object(table, "_solve_sources", wraps=table._solve_sources) as solve:
+        for area_id, other_area_id in missing:
+            assert table.connect_areas(area_id, other_area_id)
+        # Most new connections only shorten the routes of a few settlements
+        solved = sum(len(call.args[0]) for call in solve.call_args_list)
+        assert solved < len(missing) * len(table) / 2
+    assert not table.connect_areas(*missing[0])
+    
+    assert table.changed_pairs
+    assert_same_routes(table, RouteTable(graph))
+
+def test_long_connection_changes_routes(grid):
+    _, _, table = grid
+    before = table.route("s_0_0", "s_6_6")
+    table.changed_pairs.clear()
+    table.connect_areas("0_0", "6_6")
+    assert table.route("s_0_0", "s_6_6").travel_time < before.travel_time
+    assert ("s_0_0", "s_6_6") in table.changed_pairs
+
+def test_connect_area_to_settlement(grid):
+    areas, settlements, table = grid
+    assert table.connect_area_to_settlement("3_3", "s_new")
+    assert table.connect_area_to_settlement("2_4", "s_0_0")
+    assert_same_routes(table, RouteTable(table.graph))
+    assert table.route("s_new", "s_new").path == ()
+    assert "s_new" in table.settlement_ids
+
+def test_update_area(grid):
+    _, _, table = grid
+    # Make a busy area impassable swamp and another one fast
+    busy = max(range(len(table.graph.area_ids)), key=lambda a: int((table.parents == a).sum()))
+    area_id = table.graph.area_ids[busy]
+    i, j = map(int, area_id.split("_"))
+    table.update_area(make_area(area_id, i, j, area_type="swamp", danger_level=9))
+    table.update_area(make_area("5_2", 5, 2, area_type="plains", danger_level=1))
+    assert_same_routes(table, RouteTable(table.graph))
+
+def test_add_area(grid):
+    _, _, table = grid
+    table.add_area(make_area("bridge", 3, 3, ["0_0", "6_6"], ["s_0_0", "s_bridge"]))
+    assert table.route("s_bridge", "s_0_0").path == ("bridge",)
+    assert_same_routes(table, RouteTable(table.graph))
+
+def test_persist_upserts_rows(grid):
+    _, _, table = grid
+    db = MagicMock()
+    existing = SimpleNamespace(start_settlement_id="s_0_0", end_settlement_id="s_0_4", path=None)
+    db.query.return_value.filter.return_value.all.return_value = [existing]
+    
+    written = table.persist(db, "w1")
+    
+    reachable = sum(1 for s in table.settlement_ids for t in table.settlement_ids
+                    if s != t and table.route(s, t) is not None)
+    assert written == reachable
+    assert json.loads(existing.path) == list(table.route("s_0_0", "s_0_4").path)
+    assert db.add.call_count == reachable - 1
+    
+    # Only changed pairs are written next time
+    table.connect_areas("0_0", "6_6")
+    changed = len(table.changed_pairs)
+    assert 0 < table.persist(db, "w1") <= changed
+    assert not table.changed_pairs
+
+def test_cached_table_is_updated_in_place(grid):
+    areas, settlements, _ = grid
+    invalidate_route_table()
+    graph = TravelGraph(areas, settlements, biome_modifiers=BIOME_MODIFIERS)
+    with patch.object(TravelGraph, "load", return_value=graph) as load:
+        table = get_route_table(MagicMock(), "w1")
+        before = table.route("s_0_0", "s_6_6")
+        
+        record_area_connection("w1", "0_0", "6_6")
+        record_settlement_connection("w1", "4_4", "s_0_0")
+        record_area_created("w1", make_area("new", 9, 9, ["6_6"], ["s_far"]))
+        
+        assert get_route_table(MagicMock(), "w1") is table
+        assert load.call_count == 1
+        assert table.route("s_0_0", "s_6_6").travel_time < before.travel_time
+        assert table.route("s_far", "s_6_6").path == ("new", "6_6")
+        
+        # A connection to an area the graph does not know drops the cache
+        record_area_connection("w1", "0_0", "unknown")
+        get_route_table(MagicMock(), "w1")
+        assert load.call_count == 2
+    invalidate_route_table()
+
+def test_find_settlement_path_fallback():
+    graph = TravelGraph([make_area("a", 1, 0, [], ["s1"]), make_area("b", 5, 0, [], ["s2"]),
+                         make_area("c", 3, 0, ["a"], ["s3"])])
+    invalidate_route_table()
+    with patch.object(TravelGraph, "load", return_value=graph):
+        assert find_settlement_path(MagicMock(), "s3", "s1", "w1") == ["c", "a"]
+        # No connection: first area of each settlement, as before
+        assert find_settlement_path(MagicMock(), "s1", "s2", "w1") == ["a", "b"]
+        assert find_settlement_path(MagicMock(), "s1", "unknown", "w1") == []
+    invalidate_route_table()
+
+def test_area_service_records_connections():
+    service = AreaService(MagicMock())
+    area = MagicMock(area_id="a", area_name="A")
+    area.get_property.side_effect = lambda name, default=None: "w1" if name == "world_id" else []
+    service.area_manager = MagicMock()
+    service.area_manager.load_entity.return_value = area
+    
+    with patch("app.game_state.services.area_service.record_area_connection") as connection, \
+            patch("app.game_state.services.area_service.record_settlement_connection") as settlement_connection:
+        assert service.connect_areas("a", "b")
+        assert service.connect_area_to_settlement("a", "s1")
+    connection.assert_called_once_with("w1", "a", "b")
+    settlement_connection.assert_called_once_with("w1", "a", "s1")
+
+def test_player_state_uses_route_table(grid):
+    _, _, table = grid
+    state = PlayerState({"player_id": "p1", "current_location_id": "s_0_0"}, {"route_table": table})
+    assert state._get_path_distance("s_0_0", "s_0_4") == len(table.route("s_0_0", "s_0_4").path) + 1
+    assert state._get_path_distance("s_0_0", "somewhere") == 999
@@ -0,0 +1,73 @@
+from app.game_state import settlement_production
+from app.game_state.reference_data import ReferenceData
+from app.game_state.settlement_production import (
+    RESOURCE_CODE_IDS, SettlementProduction, advance_construction, grow_population
+)
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+
+FOOD = RESOURCE_CODE_IDS["food"]
+STONE = RESOURCE_CODE_IDS["stone"]
+
+@pytest.fixture(autouse=True)
+def reference_data():
+    data = ReferenceData({
+        "site_types": [
+            SimpleNamespace(site_type_id="quarry", site_category="mining"),
+            SimpleNamespace(site_type_id="field", site_category="farming")
+        ],
+        "building_types": [SimpleNamespace(building_type_id="b-house", building_code="house")]
+    })
+    with patch.object(settlement_production, "get_reference_data", return_value=data):
+        yield data
+
+def site(settlement_id, site_type_id, stage, depletion_level=0.0, development_level=0.0):
+    return SimpleNamespace(site_id=f"{settlement_id}-{stage}", settlement_id=settlement_id, site_type_id=site_type_id,
+                           current_stage=stage, depletion_level=depletion_level,
+                           development_level=development_level, production_multiplier=1.0)
+
+def building(building_id, settlement_id, status, progress=0, operational=False, type_id="b-house"):
+    return SimpleNamespace(settlement_building_id=building_id, settlement_id=settlement_id, building_type_id=type_id,
+                           is_operational=operational, construction_status=status, construction_progress=progress)
+
+def test_grow_population():
+    population = np.array([100, 100, 10, 0])
+    food = np.array([100, 50, 100, 0])
+    housing = np.array([200, 200, 10, 10])
+    assert grow_population(population, food, housing).tolist() == [102, 101, 10, 0]
+    assert grow_population(population, food, housing, 0.5).tolist() == [101, 100, 10, 0]
+
+def test_advance_construction():
+    progress, completed = advance_construction(np.array([0.0, 95.0]))
+    assert progress.tolist() == [10.0, 100.0]
+    assert completed.tolist() == [False, True]
+
+def test_compute():
+    settlements = [
+        SimpleNamespace(settlement_id="s1", settlement_name="Stonehold", population=12),
+        SimpleNamespace(settlement_id="s2", settlement_name="Greenfield", population=5)
+    ]
+    buildings = [building("h1", "s1", "completed", 100, operational=True), building("h2", "s2", "in_progress", 95)]
+    sites = [
+        site("s1", "quarry", "quarry", depletion_level=0.995),
+        site("s2", "field", "established_farm", development_level=1.0)
+    ]
+    stock = [SimpleNamespace(settlement_id="s1", resource_type_id=FOOD, quantity=8)]
+
+    result = SettlementProduction(MagicMock(), "w1").compute(
+        settlements, buildings, sites, stock, {"stone": 2.0}, growth_modifier=1.0
+    )
+
+    # The quarry produces stone at double rate; Stonehold eats its 8 food
+    # Greenfield's farm produces 30 food and its 5 people eat 5
+    assert result["deltas"] == {("s1", STONE): 50, ("s1", FOOD): -8, ("s2", FOOD): 25}
+    # Stonehold lacks food to grow; Greenfield is capped by its housing
+    assert result["populations"] == []
+    population = result["summary"]["results"][0]["growth_result"]["population"]
+    assert population["housing_capacity"] == 15 and population["food_supply"] == 8
+    # The quarry is depleted and the house is finished
+    assert result["sites"] == [{"site_id": "s1-quarry", "depletion_level": 1.0, "current_stage": "depleted"}]
+    assert result["buildings"][0]["construction_status"] == "completed"
+    assert result["summary"]["processed"] == 2
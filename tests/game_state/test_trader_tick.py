@@ -0,0 +1,130 @@
+from app.game_state.trader_tick import TraderTick, advance_journeys, parse_journey_path
+from database.unit_of_work import unit_of_work
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import json
+import numpy as np
+import pytest
+
+def make_trader(trader_id, settlement_id=None, area_id=None, path=None, position=None,
+                destination_id=None, active_task_id=None):
+    return SimpleNamespace(
+        trader_id=trader_id, world_id="w1", npc_name=f"Trader {trader_id}", current_settlement_id=settlement_id,
+        current_area_id=area_id, active_task_id=active_task_id, destination_id=destination_id,
+        journey_path=json.dumps(path) if path is not None else None, path_position=position, journey_started=None
+    )
+
+WORLD_DATA = {
+    "world_id": "w1",
+    "settlements": {
+        "s1": {"id": "s1", "name": "Oakvale", "connections": [{"destination_id": "s2"}]},
+        "s2": {"id": "s2", "name": "Riverton", "connections": [{"destination_id": "s1"}]}
+    }
+}
+
+def test_parse_journey_path():
+    assert parse_journey_path(json.dumps(["a1", "a2"])) == ("a1", "a2")
+    assert parse_journey_path("not json") == ()
+    assert parse_journey_path(json.dumps({"a": 1})) == ()
+
+def test_advance_journeys():
+    paths = [("a1", "a2", "a3"), ("a1", "a2", "a3"), ("a1",), ()]
+    new_positions, arrived, progress = advance_journeys(paths, np.array([0, 2, 0, 0]))
+
+    assert new_positions.tolist() == [1, 3, 1, 1]
+    assert arrived.tolist() == [False, True, True, True]
+    assert progress.tolist() == [50, 100, 100, 100]
+
+def run_tick(traders, active_tasks=None, decisions=None, encounter_chance=0.0):
+    db = MagicMock()
+    db.query.return_value.all.return_value = traders
+
+    with patch("app.game_state.trader_tick.load_active_task_ids", return_value=active_tasks or {}), \
+         patch("app.game_state.trader_tick.LoggingService") as logging_service, \
+         patch("app.game_state.trader_tick.WorldSnapshotService") as snapshots, \
+         patch("app.game_state.trader_tick.find_settlement_path", return_value=["a1", "a2"]), \
+         patch("app.game_state.trader_tick.ENCOUNTER_CHANCE", encounter_chance), \
+         patch.object(TraderTick, "_mcts_decisions", return_value=decisions or {}), \
+         patch.object(TraderTick, "_create_encounter_tasks", return_value=0):
+        tick = TraderTick(db, use_mcts=decisions is not None, rng=np.random.default_rng(0))
+        snapshots.return_value.get_snapshot.return_value = WORLD_DATA
+        result = tick.run()
+
+    # One bulk update and one commit for the whole tick
+    db.bulk_update_mappings.assert_called_once()
+    db.commit.assert_called_once()
+    updates = {update["trader_id"]: update for update in db.bulk_update_mappings.call_args[0][1]}
+    tick.movements = {
+        call.kwargs["trader_id"]: call.kwargs for call in logging_service.return_value.log_trader_movement.call_args_list
+    }
+    return tick, result, updates
+
+def test_tick_advances_travelling_traders():
+    traders = [
+        make_trader("t1", area_id="a1", path=["a1", "a2", "a3"], position=0, destination_id="s2"),
+        make_trader("t2", area_id="a3", path=["a1", "a2", "a3"], position=2, destination_id="s2"),
+        make_trader("t3", area_id="a1", path=["a1", "a2"], position=0, destination_id="s1", active_task_id="task")
+    ]
+    tick, result, updates = run_tick(traders, active_tasks={"t3": "task"}, encounter_chance=1.0)
+
+    assert updates["t1"] == {"trader_id": "t1", "current_area_id": "a2", "path_position": 1, "journey_progress": 50}
+    assert updates["t2"]["current_settlement_id"] == "s2"
+    assert updates["t2"]["current_area_id"] is None and updates["t2"]["journey_progress"] == 100
+    assert updates["t2"]["path_position"] is None and updates["t2"]["journey_path"] is None
+    # Area moves and arrivals are logged
+    assert tick.movements["t1"]["details"]["action"] == "area_moved" and tick.movements["t1"]["to_location_id"] == "a2"
+    assert tick.movements["t2"]["details"]["action"] == "journey_completed"
+    assert tick.movements["t2"]["to_location_id"] == "s2" and "t3" not in tick.movements
+    # Traders waiting for a task stay where they are
+    assert "t3" not in updates
+    # Only traders entering a new area run into encounters
+    assert tick.encounters == [("t1", "a2", "w1")]
+    assert result["processed"] == 2 and result["arrived"] == 1 and result["waiting_for_task"] == 1
+
+def test_tick_syncs_active_task_ids():
+    traders = [
+        make_trader("t1", settlement_id="s1", active_task_id="stale"),
+        make_trader("t2", settlement_id="s1")
+    ]
+    _, _, updates = run_tick(traders, active_tasks={"t2": "task"}, decisions={})
+
+    assert updates["t1"] == {"trader_id": "t1", "active_task_id": None}
+    assert updates["t2"] == {"trader_id": "t2", "active_task_id": "task"}
+
+def test_tick_starts_journeys_from_mcts_decisions():
+    traders = [make_trader("t1", settlement_id="s1"), make_trader("t2", settlement_id="s2")]
+    decisions = {
+        "t1": {"status": "success", "action": "move", "next_settlement_id": "s2"},
+        "t2": {"status": "success", "action": "rest"}
+    }
+    tick, result, updates = run_tick(traders, decisions=decisions)
+
+    assert updates["t1"]["destination_id"] == "s2"
+    assert updates["t1"]["destination_settlement_name"] == "Riverton"
+    assert updates["t1"]["current_settlement_id"] is None
+    assert updates["t1"]["current_area_id"] == "a1" and json.loads(updates["t1"]["journey_path"]) == ["a1", "a2"]
+    assert "t2" not in updates
+    assert result["journeys_started"] == 1
+    assert tick.movements["t1"]["details"]["action"] == "journey_started"
+    assert tick.movements["t1"]["from_location_name"] == "Oakvale" and tick.movements["t1"]["to_location_name"] == "Riverton"
+
+def test_tick_joins_the_batch_unit_of_work():
+    db = MagicMock()
+    db.query.return_value.all.return_value = [make_trader("t1", area_id="a1", path=["a1", "a2"], position=0)]
+    with patch("app.game_state.trader_tick.load_active_task_ids", return_value={}), \
+         patch("app.game_state.trader_tick.LoggingService"), \
+         patch("app.game_state.trader_tick.ENCOUNTER_CHANCE", 1.0), \
+         patch("app.workers.task_worker.add_trader_assistance_task",
+               return_value={"status": "success", "task_id": "task"}) as add_task, \
+         unit_of_work(db):
+        result = TraderTick(db, rng=np.random.default_rng(0)).run()
+        # The updates and the encounter task are flushed, not committed
+        db.flush.assert_called()
+        db.commit.assert_not_called()
+
+    # The batch's unit of work commits once, trader updates and tasks together
+    db.commit.assert_called_once()
+    add_task.assert_called_once()
+    assert add_task.call_args.args[:4] == (db, "t1", "a2", "w1")
+    db.begin_nested.assert_called_once()
+    assert result["new_tasks_created"] == 1
@@ -0,0 +1,144 @@
+from app.game_state.travel_graph import TravelGraph, get_travel_graph, invalidate_travel_graph
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import json
+import heapq
+import random
+import pytest
+
+def make_area(area_id, x, y, areas=(), settlements=(), area_type="plains"):
+    return SimpleNamespace(
+        area_id=area_id, location_x=x, location_y=y, area_type=area_type,
+        connected_areas=json.dumps(list(areas)), connected_settlements=json.dumps(list(settlements))
+    )
+
+def make_settlement(settlement_id, x, y):
+    return SimpleNamespace(settlement_id=settlement_id, location_x=x, location_y=y)
+
+@pytest.fixture
+def graph():
+    # s1 - a - b - c - s2 along y=0, with a detour a - d - c through mountains
+    areas = [
+        make_area("a", 1, 0, ["b", "d"], ["s1"]),
+        make_area("b", 2, 0, ["a", "c"]),
+        make_area("c", 3, 0, ["b", "d"], ["s2"]),
+        make_area("d", 2, 1, ["a", "c"], area_type="mountains"),
+        make_area("e", 10, 10, [], ["s3"])
+    ]
+    settlements = [make_settlement("s1", 0, 0), make_settlement("s2", 4, 0), make_settlement("s3", 11, 10)]
+    return TravelGraph(areas, settlements, biome_modifiers={"plains": 1.0, "mountains": 0.5})
+
+def test_adjacency(graph):
+    assert sorted(graph.connected_areas("a")) == ["b", "d"]
+    assert graph.connected_areas("unknown") == []
+    assert graph.settlement_connected_areas("s1") == ["a"]
+    assert graph.indptr[-1] == len(graph.indices) == 8
+
+def test_find_path(graph):
+    assert graph.find_path("s1", "s2") == ["a", "b", "c"]
+    assert graph.find_path("s2", "s1") == ["c", "b", "a"]
+    # Disconnected and unknown settlements
+    assert graph.find_path("s1", "s3") == []
+    assert graph.find_path("s1", "unknown") == []
+
+def test_edge_costs_use_movement_factors(graph):
+    # Entering mountains at half speed doubles the cost of the hop
+    assert graph.path_cost(["a", "b"]) == pytest.approx(1.0)
+    assert graph.path_cost(["a", "d"]) == pytest.approx(2 ** 0.5 / 0.5)
+
+def test_slow_terrain_is_avoided():
+    areas = [
+        make_area("a", 1, 0, ["swamp", "n1"], ["s1"]),
+        make_area("swamp", 2, 0, ["a", "c"], area_type="swamp"),
+        make_area("n1", 1, 1, ["a", "n2"]),
+        make_area("n2", 3, 1, ["n1", "c"]),
+        make_area("c", 3, 0, ["swamp", "n2"], ["s2"])
+    ]
+    graph = TravelGraph(areas, [make_settlement("s1", 0, 0), make_settlement("s2", 4, 0)],
+                        biome_modifiers={"swamp": 0.1})
+    assert graph.find_path("s1", "s2") == ["a", "n1", "n2", "c"]
+
+def test_shared_area():
+    graph = TravelGraph([make_area("a", 0, 0, [], ["s1", "s2"])])
+    assert graph.find_path("s1", "s2") == ["a"]
+
+def test_add_area_and_connections(graph):
+    assert not graph.add_connection("a", "b")
+    with pytest.raises(KeyError):
+        graph.add_connection("a", "unknown")
+    
+    graph.add_area(make_area("f", 2, -1, ["a", "c"], ["s3"]))
+    assert graph.connected_areas("f") == ["a", "c"]
+    assert graph.add_connection("a", "f")
+    assert graph.add_settlement_connection("f", "s1")
+    assert graph.find_path("s3", "s2") == ["f", "c"]
+    with pytest.raises(ValueError):
+        graph.add_area(make_area("f", 0, 0))
+
+def test_update_area(graph):
+    graph.update_area(make_area("b", 2, 0, area_type="mountains"))
+    assert graph.path_cost(["a", "b"]) == pytest.approx(2.0)
+    
+    graph.update_area(make_area("b", 2, 0, area_type="swamp"))
+    graph.biome_modifiers["swamp"] = 0.1
+    graph.update_area(make_area("b", 2, 0, area_type="swamp"))
+    assert graph.find_path("s1", "s2") == ["a", "d", "c"]
+
+def test_routes_add_connections():
+    areas = [make_area("a", 0, 0), make_area("b", 1, 0), make_area("c", 2, 0)]
+    route = SimpleNamespace(start_settlement_id="s1", end_settlement_id="s2", path=json.dumps(["a", "b", "c"]))
+    graph = TravelGraph(areas, routes=[route])
+    assert graph.find_path("s1", "s2") == ["a", "b", "c"]
+    assert graph.find_path("s2", "s1") == ["c", "b", "a"]
+
+def test_settlement_links_replace_json_column():
+    # The JSON column is ignored once AreaSettlements rows are given
+    areas = [make_area("a", 0, 0, ["b"], ["stale"]), make_area("b", 1, 0, ["a"])]
+    graph = TravelGraph(areas, settlement_links=[("a", "s1"), ("b", "s2"), ("unknown", "s3")])
+    assert graph.settlement_connected_areas("stale") == []
+    assert graph.settlement_connected_areas("s1") == ["a"]
+    assert graph.settlement_connected_areas("s3") == []
+    assert graph.find_path("s1", "s2") == ["a", "b"]
+
+def test_matches_dijkstra_on_random_grid():
+    random.seed(3)
+    areas, size = [], 12
+    for i in range(size):
+        for j in range(size):
+            neighbours = [f"{i + di}_{j + dj}" for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                          if 0 <= i + di < size and 0 <= j + dj < size]
+            settlements = ["start"] if (i, j) == (0, 0) else ["end"] if (i, j) == (size - 1, size - 1) else []
+            areas.append(make_area(f"{i}_{j}", i, j, neighbours, settlements,
+                                   area_type=random.choice(["plains", "forest", "swamp"])))
+    graph = TravelGraph(areas, [make_settlement("start", -1, 0), make_settlement("end", size, size - 1)],
+                        biome_modifiers={"plains": 1.0, "forest": 0.7, "swamp": 0.2})
+    
+    path = graph.find_path("start", "end")
+    assert path[0] == "0_0" and path[-1] == f"{size - 1}_{size - 1}"
+    
+    # Plain Dijkstra over the same costs
+    start, end = graph.area_index["0_0"], graph.area_index[f"{size - 1}_{size - 1}"]
+    distances, heap = {start: 0.0}, [(0.0, start)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if cost > distances[node]:
+            continue
+        for k in range(graph.indptr[node], graph.indptr[node + 1]):
+            neighbour, new_cost = int(graph.indices[k]), cost + graph.costs[k]
+            if new_cost < distances.get(neighbour, float("inf")):
+                distances[neighbour] = new_cost
+                heapq.heappush(heap, (new_cost, neighbour))
+    assert graph.path_cost(path) == pytest.approx(distances[end])
+
+def test_cache_and_invalidation(graph):
+    invalidate_travel_graph()
+    db = MagicMock()
+    with patch.object(TravelGraph, "load", return_value=graph) as load:
+        assert get_travel_graph(db, "w1") is graph
+        assert get_travel_graph(db, "w1") is graph
+        assert load.call_count == 1
+        
+        invalidate_travel_graph("w1")
+        get_travel_graph(db, "w1")
+        assert load.call_count == 2
+    invalidate_travel_graph()
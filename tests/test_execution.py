@@ -0,0 +1,144 @@
+from app.execution import BoundedPool, PoolOverloaded, PoolTimeout, offload, runs_on_event_loop
+from app import execution
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+import asyncio
+import inspect
+import threading
+import pytest
+
+def make_pool(max_workers=1, max_queued=0, timeout=5.0):
+    return BoundedPool("test", lambda workers: ThreadPoolExecutor(max_workers=workers), max_workers, max_queued, timeout)
+
+def test_run_returns_the_result():
+    pool = make_pool()
+    assert asyncio.run(pool.run(lambda a, b=0: a + b, 1, b=2)) == 3
+    assert pool.in_flight == 0
+
+def test_calls_beyond_the_limit_are_refused():
+    pool = make_pool(max_workers=1, max_queued=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolOverloaded):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(scenario())
+    assert pool.in_flight == 0
+
+def test_timed_out_calls_keep_their_slot_until_they_finish():
+    pool = make_pool(timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(PoolTimeout):
+            await pool.run(release.wait)
+        assert pool.in_flight == 1
+        release.set()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert pool.in_flight == 0
+
+def test_offload_keeps_the_signature():
+    def endpoint(trader_id: str, limit: int = 10):
+        return threading.current_thread().name, trader_id, limit
+
+    async def async_endpoint(trader_id: str):
+        return trader_id
+
+    wrapped = offload(endpoint)
+    assert inspect.iscoroutinefunction(wrapped)
+    assert list(inspect.signature(wrapped).parameters) == ["trader_id", "limit"]
+    assert offload(wrapped) is wrapped
+
+    pool = make_pool()
+    with patch.dict(execution.pools, {"blocking": pool}):
+        thread, trader_id, limit = asyncio.run(wrapped(trader_id="t1", limit=5))
+        assert (trader_id, limit) == ("t1", 5) and thread != threading.current_thread().name
+        assert asyncio.run(offload(async_endpoint)(trader_id="t2")) == "t2"
+
+def test_endpoints_on_the_event_loop_are_not_wrapped():
+    @runs_on_event_loop
+    async def endpoint():
+        return None
+
+    assert offload(endpoint) is endpoint
+
+def test_offloaded_endpoints_own_their_sessions():
+    from database.connection import get_db
+    from fastapi import Depends
+    sessions = []
+
+    def open_session():
+        session = MagicMock()
+        sessions.append(session)
+        return session
+
+    def endpoint(trader_id: str, db=Depends(get_db)):
+        db.query(trader_id)
+        return db
+
+    wrapped = offload(endpoint)
+    # FastAPI no longer resolves the session; the pool thread opens it
+    assert list(inspect.signature(wrapped).parameters) == ["trader_id"]
+
+    pool = make_pool()
+    with patch.dict(execution.pools, {"blocking": pool}), \
+            patch.dict(execution.SESSION_DEPENDENCIES, {get_db: open_session}):
+        db = asyncio.run(wrapped(trader_id="t1"))
+    assert sessions == [db]
+    db.query.assert_called_once_with("t1")
+    db.close.assert_called_once()
+
+def test_timed_out_calls_close_their_session_when_they_finish():
+    from database.connection import get_db
+    from fastapi import Depends
+    session = MagicMock()
+    release = threading.Event()
+
+    def endpoint(db=Depends(get_db)):
+        release.wait()
+
+    wrapped = offload(endpoint)
+    pool = make_pool(timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(PoolTimeout):
+            await wrapped()
+        # The request is over, but the call still uses its session
+        session.close.assert_not_called()
+        release.set()
+        await asyncio.sleep(0.05)
+
+    with patch.dict(execution.pools, {"blocking": pool}), \
+            patch.dict(execution.SESSION_DEPENDENCIES, {get_db: lambda: session}):
+        asyncio.run(scenario())
+    session.close.assert_called_once()
+
+def test_endpoints_on_the_event_loop_take_no_session():
+    from app.routers import trader
+
+    endpoint = trader.get_trader_mcts_decision
+    assert getattr(endpoint, "runs_on_event_loop", False)
+    dependencies = [getattr(parameter.default, "dependency", None)
+                    for parameter in inspect.signature(endpoint).parameters.values()]
+    assert not set(dependencies) & set(execution.SESSION_DEPENDENCIES)
+
+def test_mcts_decision_inputs_use_a_session_of_their_own():
+    from app.routers import trader
+
+    session = MagicMock()
+    session.query.return_value.filter.return_value.first.return_value = MagicMock(current_settlement_id="s1")
+    session_factory = MagicMock()
+    session_factory.return_value.__enter__.return_value = session
+    with patch.object(trader, "SessionLocal", session_factory), \
+            patch.object(trader, "GameStateManager") as manager:
+        manager.return_value.prepare_mcts_trader_decision.return_value = {"status": "success"}
+        assert trader.load_mcts_decision_inputs("t1") == {"status": "success"}
+    manager.assert_called_once_with(session)
+    session_factory.return_value.__exit__.assert_called_once()
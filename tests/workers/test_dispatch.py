@@ -0,0 +1,89 @@
+from app.workers import dispatch
+from app.workers.dispatch import (
+    aggregate_failed_batches, batch_result, chunk, get_batch_settings, group_ids_by_world, merge_batch_results,
+    run_batch
+)
+from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import pytest
+
+def test_chunk():
+    assert chunk(["a", "b", "c", "d", "e"], 2) == [["a", "b"], ["c", "d"], ["e"]]
+    assert chunk([], 10) == []
+
+def test_group_ids_by_world():
+    assert group_ids_by_world([("t1", "w1"), ("t2", "w2"), ("t3", "w1")]) == {"w1": ["t1", "t3"], "w2": ["t2"]}
+
+def test_batch_settings_fall_back_to_defaults():
+    assert get_batch_settings("trader")["batch_size"] == 1000
+    assert get_batch_settings("unknown") == {"batch_size": 200, "batch_timeout": 120}
+
+def test_run_batch_reports_errors_and_timeouts():
+    assert run_batch("w1", ["t1", "t2"], lambda: {"status": "success", "processed": 2}) == {
+        "status": "success", "processed": 2, "world_id": "w1", "batch_size": 2
+    }
+
+    def fail():
+        raise ValueError("boom")
+    assert run_batch("w1", ["t1"], fail)["message"] == "boom"
+
+    def time_out():
+        raise SoftTimeLimitExceeded()
+    result = run_batch("w2", ["t1"], time_out)
+    assert result["status"] == "error" and result["timed_out"] and result["world_id"] == "w2"
+
+def test_merge_batch_results():
+    results = [
+        {"status": "success", "total": 3, "processed": 2, "results": [1], "world_id": "w1", "batch_size": 3},
+        {"status": "success", "total": 1, "processed": 1, "results": [2], "world_id": "w2", "batch_size": 1},
+        {"status": "error", "message": "Batch timed out", "timed_out": True, "world_id": "w2", "batch_size": 5}
+    ]
+    summary = merge_batch_results(results)
+
+    assert summary["status"] == "partial"
+    assert summary["total"] == 4 and summary["processed"] == 3
+    assert summary["results"] == [1, 2]
+    assert summary["failed_batches"] == [
+        {"batch": 2, "world_id": "w2", "batch_size": 5, "timed_out": True, "message": "Batch timed out"}
+    ]
+    assert merge_batch_results(results[:2])["status"] == "success"
+    assert merge_batch_results(results[2:])["status"] == "error"
+
+def make_result(result=None, ready=True, successful=True):
+    return SimpleNamespace(result=result, ready=lambda: ready, successful=lambda: ready and successful)
+
+def test_batch_result():
+    assert batch_result(make_result({"status": "success", "total": 2}), "w1", 2) == {"status": "success", "total": 2}
+    killed = batch_result(make_result(TimeLimitExceeded(120), successful=False), "w1", 5)
+    assert killed["timed_out"] and killed["world_id"] == "w1" and killed["batch_size"] == 5
+    assert batch_result(make_result(ready=False), "w2", 1)["message"] == "Batch did not finish"
+
+def test_failed_chord_merges_finished_batches_and_finishes_the_tick():
+    results = {
+        "b1": make_result({"status": "success", "total": 3, "processed": 3}),
+        "b2": make_result(TimeLimitExceeded(120), successful=False)
+    }
+    tick = {"name": "process_all_traders", "key": "process_all_traders", "token": "t", "started_at": 0.0}
+    with patch.object(dispatch.app, "AsyncResult", side_effect=results.get), \
+         patch.object(dispatch, "finish_tick") as finish_tick:
+        summary = aggregate_failed_batches(None, TimeLimitExceeded(120), None,
+                                           batches=[["b1", "w1", 3], ["b2", "w2", 4]], tick=tick)
+
+    assert summary["status"] == "partial" and summary["processed"] == 3
+    assert summary["failed_batches"][0]["world_id"] == "w2" and summary["failed_batches"][0]["timed_out"]
+    finish_tick.assert_called_once_with(tick)
+
+def test_dispatch_attaches_the_errback():
+    batch_task = MagicMock()
+    batch_task.si.return_value.set.return_value.freeze.return_value.id = "b1"
+    with patch.object(dispatch, "chord") as make_chord, patch.object(dispatch, "group"):
+        summary = dispatch.dispatch_batches(batch_task, {"w1": ["t1", "t2"]}, "trader")
+
+    callback = make_chord.return_value.call_args[0][0]
+    errback = callback.options["link_error"][0]
+    assert errback["task"] == aggregate_failed_batches.name
+    assert errback["kwargs"]["batches"] == [["b1", "w1", 2]]
+    assert summary["status"] == "dispatched" and summary["batches"] == 1
+    # The tick lock outlives the hard time limit of the batches by the margin
+    assert summary["lock_timeout"] == 90 + dispatch.HARD_TIME_LIMIT_GRACE + dispatch.CHORD_LOCK_MARGIN
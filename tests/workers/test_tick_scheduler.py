@@ -0,0 +1,166 @@
+from app.workers import tick_scheduler
+from app.workers.tick_scheduler import TickScheduler, adapt_interval, get_tick_settings, guarded_tick, tick_key
+from unittest.mock import patch
+import fnmatch
+import pytest
+
+class FakeRedis:
+    """The subset of the Redis client the scheduler uses."""
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.expiry = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        self.expiry[key] = ex
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, key):
+        return int(self.values.pop(key, None) is not None)
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def eval(self, script, numkeys, key, token, *args):
+        if self.values.get(key) != token:
+            return 0
+        if script == tick_scheduler.RENEW_LOCK_SCRIPT:
+            self.expiry[key] = args[0]
+            return 1
+        return self.delete(key)
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = float(fields.get(field, 0)) + amount
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def scan_iter(self, match):
+        return [key for key in self.hashes if fnmatch.fnmatch(key, match)]
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def scheduler():
+    return TickScheduler(FakeRedis(), clock=Clock())
+
+def test_tick_key():
+    assert tick_key("process_all_traders") == "process_all_traders"
+    assert tick_key("process_all_traders", ("w1",)) == "process_all_traders:w1"
+    assert tick_key("process_all_traders", (), {"world_id": "w2"}) == "process_all_traders:w2"
+
+def test_adapt_interval():
+    settings = get_tick_settings("process_all_traders")
+    assert adapt_interval(settings, 10.0) == 120.0
+    assert adapt_interval(settings, 200.0) == 300.0
+    assert adapt_interval(settings, 1000.0) == 600.0
+
+def test_overlapping_ticks_are_skipped(scheduler):
+    run = scheduler.start("process_all_animals", "process_all_animals")
+    assert run is not None
+    assert scheduler.start("process_all_animals", "process_all_animals") is None
+    assert scheduler.get_metrics("process_all_animals")["skipped"] == 1
+
+    scheduler.clock.now += 700
+    assert scheduler.finish("process_all_animals", run) is None
+    assert scheduler.get_metrics("process_all_animals")["overruns"] == 1
+
+def test_overlapping_ticks_are_coalesced(scheduler):
+    pending = {"task": "app.workers.trader_worker.process_all_traders", "args": [], "kwargs": {}}
+    run = scheduler.start("process_all_traders", "process_all_traders", pending)
+    # Two ticks during the run coalesce into one follow-up run
+    assert scheduler.start("process_all_traders", "process_all_traders", pending) is None
+    assert scheduler.start("process_all_traders", "process_all_traders", pending) is None
+
+    scheduler.clock.now += 30
+    follow_up = scheduler.finish("process_all_traders", run)
+    assert follow_up["task"] == pending["task"]
+    # The follow-up waits until the tick is due again
+    assert follow_up["countdown"] == pytest.approx(90.0)
+    assert scheduler.get_metrics("process_all_traders")["coalesced"] == 2
+    assert scheduler.finish("process_all_traders", run) is None
+
+def test_interval_adapts_to_duration(scheduler):
+    run = scheduler.start("process_all_traders", "process_all_traders")
+    scheduler.clock.now += 400
+    scheduler.finish("process_all_traders", run)
+    metrics = scheduler.get_metrics("process_all_traders")
+    assert metrics["interval"] == 600.0 and metrics["next_due"] == 1600.0
+
+    # Beats before the adapted interval has passed are skipped
+    scheduler.clock.now = 1200.0
+    assert scheduler.start("process_all_traders", "process_all_traders") is None
+    assert scheduler.get_metrics("process_all_traders")["not_due"] == 1
+
+    # A late run records its lag
+    scheduler.clock.now = 1650.0
+    assert scheduler.start("process_all_traders", "process_all_traders") is not None
+    assert scheduler.get_metrics("process_all_traders")["lag"] == 50.0
+    all_metrics = scheduler.get_all_metrics()
+    assert all_metrics["process_all_traders"]["running"] == 1.0
+    assert all_metrics["process_all_traders"]["current_lag"] == 50.0
+
+def test_guarded_tick(scheduler):
+    calls = []
+
+    @guarded_tick("process_all_animals")
+    def tick(world_id=None):
+        calls.append(world_id)
+        return {"status": "success"}
+
+    with patch.object(tick_scheduler, "get_tick_scheduler", return_value=scheduler):
+        assert tick() == {"status": "success"}
+        # The run finished and released its lock; the next beat is not yet due
+        assert tick()["status"] == "skipped"
+        # Single-world runs are guarded separately
+        assert tick("w1") == {"status": "success"}
+    assert calls == [None, "w1"]
+
+def test_guarded_tick_keeps_the_lock_of_dispatched_batches(scheduler):
+    @guarded_tick("process_all_traders")
+    def tick():
+        return {"status": "dispatched", "batches": 2}
+
+    with patch.object(tick_scheduler, "get_tick_scheduler", return_value=scheduler):
+        tick()
+    assert scheduler.redis.exists("tick:process_all_traders:lock")
+    assert scheduler.redis.expiry["tick:process_all_traders:lock"] == get_tick_settings("process_all_traders")["lock_timeout"]
+
+def test_dispatched_ticks_hold_their_lock_for_the_batch_timeout(scheduler):
+    @guarded_tick("process_all_settlements")
+    def tick():
+        return {"status": "dispatched", "batches": 2, "lock_timeout": 150}
+
+    with patch.object(tick_scheduler, "get_tick_scheduler", return_value=scheduler):
+        tick()
+    assert scheduler.redis.expiry["tick:process_all_settlements:lock"] == 150
+
+def test_failed_redis_connection_is_retried_after_the_interval():
+    client = FakeRedis()
+    client.ping = lambda: True
+    with patch.object(tick_scheduler, "_redis_client", None), \
+            patch.object(tick_scheduler, "_redis_retry_at", 0.0), \
+            patch.object(tick_scheduler.time, "monotonic", return_value=100.0) as monotonic, \
+            patch("redis.Redis.from_url", side_effect=[ConnectionError("refused"), client]) as from_url:
+        assert tick_scheduler.get_tick_scheduler() is None
+        assert tick_scheduler.get_tick_scheduler() is None
+        assert from_url.call_count == 1
+
+        monotonic.return_value = 100.0 + tick_scheduler.REDIS_RETRY_INTERVAL
+        assert tick_scheduler.get_tick_scheduler().redis is client
+        assert from_url.call_count == 2
@@ -1,6 +1,8 @@
--- Create a table for logging entity actions including trader movements
+-- Create a table for logging entity actions including trader movements.
+-- The table is partitioned by month; app/game_state/action_log_partitions.py
+-- creates the monthly partitions and drops them after the retention period.
 CREATE TABLE IF NOT EXISTS entity_action_log (
-    log_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    log_id UUID NOT NULL DEFAULT gen_random_uuid(),
     timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
     
     -- Entity information
@@ -34,16 +36,16 @@ CREATE TABLE IF NOT EXISTS entity_action_log (
     game_day INTEGER,
     game_time VARCHAR(50),
     
-    -- Indexing
-    CONSTRAINT entity_action_log_entity_idx UNIQUE (entity_id, timestamp)
-);
+    -- The partition key has to be part of the primary key
+    PRIMARY KEY (log_id, timestamp)
+) PARTITION BY RANGE (timestamp);
 
--- Create indexes for faster querying
-CREATE INDEX IF NOT EXISTS entity_action_log_entity_id_idx ON entity_action_log(entity_id);
-CREATE INDEX IF NOT EXISTS entity_action_log_entity_type_idx ON entity_action_log(entity_type);
-CREATE INDEX IF NOT EXISTS entity_action_log_action_type_idx ON entity_action_log(action_type);
-CREATE INDEX IF NOT EXISTS entity_action_log_timestamp_idx ON entity_action_log(timestamp);
-CREATE INDEX IF NOT EXISTS entity_action_log_world_id_idx ON entity_action_log(world_id);
+-- Rows outside every monthly partition
+CREATE TABLE IF NOT EXISTS entity_action_log_default PARTITION OF entity_action_log DEFAULT;
+
+-- Create indexes for faster querying (history pages seek on the first one)
+CREATE INDEX IF NOT EXISTS ix_entity_action_log_entity_timestamp ON entity_action_log(entity_id, timestamp, log_id);
+CREATE INDEX IF NOT EXISTS ix_entity_action_log_world_game_day ON entity_action_log(world_id, game_day);
 
 -- Comment on table and columns for documentation
 COMMENT ON TABLE entity_action_log IS 'Logs actions taken by entities in the game world, including trader movements';
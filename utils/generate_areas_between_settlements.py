@@ -6,7 +6,7 @@ import math
 from datetime import datetime
 
 from database.connection import SessionLocal
-from models.core import Settlements, Areas, TravelRoutes
+from models.core import Settlements, Areas, AreaSettlements, TravelRoutes
 
 # Default fantasy theme ID
 FANTASY_THEME_ID = "f47ac10b-58cc-4372-a567-0e02b2c3d479"
@@ -145,6 +145,8 @@ def generate_areas_between_settlements():
                 
                 db.add(area)
                 db.flush()  # Ensure the area is in the database before proceeding
+                for settlement_id in dict.fromkeys([str(start.settlement_id), str(end.settlement_id)]):
+                    db.add(AreaSettlements(area_id=area_id, settlement_id=settlement_id, world_id=start.world_id))
                 area_ids.append(area_id)
                 print(f"Created area: {area_name} ({area_type})")
             
@@ -5,6 +5,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 
 from database.connection import SessionLocal
+from app.game_state.reference_data import bump_reference_data_version
 from models.core import ResourceSiteTypes, ResourceTypes, Settlements
 
 # Function to map our resource names to existing resource IDs
@@ -292,6 +293,8 @@ def seed_resource_site_types():
                     print(f"Site type {site_type['site_name']} already exists")
         
         db.commit()
+        # Running processes cache the resource types
+        bump_reference_data_version()
         print("Resource site types seeded successfully")
     except Exception as e:
         db.rollback()